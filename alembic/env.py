@@ -19,7 +19,10 @@ from app.models.aluguel import AluguelMensal
 from app.models.participacao import Participacao
 from app.models.alias import Alias
 from app.models.transferencia import Transferencia
+from app.models.saldo_transferencia import SaldoTransferencia
 from app.models.permissao_financeira import PermissaoFinanceira
+from app.models.rate_limit import RateLimitContador
+from app.models.versao_dados import VersaoDados
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
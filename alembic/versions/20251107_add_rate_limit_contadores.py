@@ -0,0 +1,32 @@
+"""add rate_limit_contadores table
+
+Revision ID: add_rate_limit_contadores
+Revises: remove_unused_fields
+Create Date: 2025-11-07
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_rate_limit_contadores'
+down_revision = 'remove_unused_fields'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('rate_limit_contadores',
+        sa.Column('chave', sa.String(length=255), nullable=False),
+        sa.Column('inicio', sa.Integer(), nullable=False),
+        sa.Column('contagem', sa.Integer(), nullable=False),
+        sa.Column('expira_em', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('chave', 'inicio')
+    )
+    op.create_index(op.f('ix_rate_limit_contadores_expira_em'), 'rate_limit_contadores', ['expira_em'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_rate_limit_contadores_expira_em'), table_name='rate_limit_contadores')
+    op.drop_table('rate_limit_contadores')
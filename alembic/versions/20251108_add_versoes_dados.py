@@ -0,0 +1,29 @@
+"""add versoes_dados table
+
+Revision ID: add_versoes_dados
+Revises: add_rate_limit_contadores
+Create Date: 2025-11-08
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_versoes_dados'
+down_revision = 'add_rate_limit_contadores'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('versoes_dados',
+        sa.Column('escopo', sa.String(length=100), nullable=False),
+        sa.Column('versao', sa.Integer(), nullable=False),
+        sa.Column('atualizado_em', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('escopo')
+    )
+
+
+def downgrade():
+    op.drop_table('versoes_dados')
@@ -0,0 +1,34 @@
+"""add vigente_de/vigente_ate to participacoes
+
+Revision ID: add_vigencia_participacoes
+Revises: add_versoes_dados
+Create Date: 2025-11-09
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_vigencia_participacoes'
+down_revision = 'add_versoes_dados'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Participações existentes valem desde sempre e continuam atuais (NULL/NULL)
+    op.add_column('participacoes', sa.Column('vigente_de', sa.Date(), nullable=True))
+    op.add_column('participacoes', sa.Column('vigente_ate', sa.Date(), nullable=True))
+    op.create_index(
+        'ix_participacoes_vigencia', 'participacoes',
+        ['imovel_id', 'vigente_de', 'vigente_ate'], unique=False
+    )
+
+
+def downgrade():
+    # Mantém apenas as participações atuais
+    op.execute("DELETE FROM participacoes WHERE vigente_ate IS NOT NULL")
+    op.drop_index('ix_participacoes_vigencia', table_name='participacoes')
+    op.drop_column('participacoes', 'vigente_ate')
+    op.drop_column('participacoes', 'vigente_de')
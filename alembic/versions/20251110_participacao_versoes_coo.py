@@ -0,0 +1,122 @@
+"""store participacao_versoes payload as compressed COO
+
+Revision ID: participacao_versoes_coo
+Revises: add_vigencia_participacoes
+Create Date: 2025-11-10
+
+"""
+import json
+import struct
+import zlib
+
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'participacao_versoes_coo'
+down_revision = 'add_vigencia_participacoes'
+branch_labels = None
+depends_on = None
+
+
+# Cópia congelada do codec de app/core/matriz_esparsa.py no formato "COO1":
+# a migração não pode mudar se o módulo da aplicação evoluir
+_MAGICO = b"COO1"
+_CABECALHO = struct.Struct("<4sI")
+
+
+def _codificar(matriz):
+    """{(imovel, proprietario): percentual} -> bytes no formato COO1"""
+    n = len(matriz)
+    if n:
+        celulas = np.array(list(matriz.keys()), dtype=np.int64)
+        valores = np.fromiter(matriz.values(), dtype=np.float64, count=n)
+        ordem = np.lexsort((celulas[:, 1], celulas[:, 0]))
+        imoveis = celulas[ordem, 0].astype(np.int32)
+        proprietarios = celulas[ordem, 1].astype(np.int32)
+        percentuais = valores[ordem]
+    else:
+        imoveis = proprietarios = np.empty(0, np.int32)
+        percentuais = np.empty(0, np.float64)
+
+    delta_imoveis = np.diff(imoveis, prepend=np.int32(0)).astype("<i4")
+    delta_proprietarios = np.diff(proprietarios, prepend=np.int32(0)).astype("<i4")
+    nova_linha = delta_imoveis != 0
+    if n:
+        nova_linha[0] = True
+    delta_proprietarios[nova_linha] = proprietarios[nova_linha]
+
+    corpo = delta_imoveis.tobytes() + delta_proprietarios.tobytes() + percentuais.astype("<f8").tobytes()
+    return _CABECALHO.pack(_MAGICO, n) + zlib.compress(corpo, 9)
+
+
+def _decodificar(dados):
+    """bytes no formato COO1 -> {(imovel, proprietario): percentual}"""
+    magico, n = _CABECALHO.unpack_from(dados)
+    if magico != _MAGICO:
+        raise ValueError("Formato de matriz desconhecido")
+    corpo = zlib.decompress(dados[_CABECALHO.size:])
+
+    delta_imoveis = np.frombuffer(corpo, dtype="<i4", count=n)
+    delta_proprietarios = np.frombuffer(corpo, dtype="<i4", count=n, offset=4 * n)
+    percentuais = np.frombuffer(corpo, dtype="<f8", count=n, offset=8 * n)
+
+    imoveis = np.cumsum(delta_imoveis, dtype=np.int64)
+    nova_linha = delta_imoveis != 0
+    if n:
+        nova_linha[0] = True
+    acumulado = np.cumsum(delta_proprietarios, dtype=np.int64)
+    inicio_da_linha = np.maximum.accumulate(np.where(nova_linha, np.arange(n), 0))
+    proprietarios = acumulado - (acumulado[inicio_da_linha] - delta_proprietarios[inicio_da_linha])
+
+    return dict(zip(zip(imoveis.tolist(), proprietarios.tolist()), percentuais.tolist()))
+
+
+def upgrade():
+    op.add_column('participacao_versoes', sa.Column('dados_coo', sa.LargeBinary(), nullable=True))
+    op.add_column('participacao_versoes', sa.Column('total_celulas', sa.Integer(), nullable=True))
+
+    conn = op.get_bind()
+    tabela = sa.table(
+        'participacao_versoes',
+        sa.column('id', sa.Integer), sa.column('dados_json', sa.Text),
+        sa.column('dados_coo', sa.LargeBinary), sa.column('total_celulas', sa.Integer)
+    )
+    for versao_id, dados_json in conn.execute(sa.select(tabela.c.id, tabela.c.dados_json)).all():
+        matriz = {
+            (int(imovel_id), int(proprietario_id)): float(percentual)
+            for imovel_id, proprietarios in json.loads(dados_json).items()
+            for proprietario_id, percentual in proprietarios.items()
+            if percentual and percentual > 0
+        }
+        conn.execute(
+            tabela.update().where(tabela.c.id == versao_id)
+            .values(dados_coo=_codificar(matriz), total_celulas=len(matriz))
+        )
+
+    # batch_alter_table: o SQLite não altera colunas no lugar (recria a tabela)
+    with op.batch_alter_table('participacao_versoes') as batch:
+        batch.alter_column('dados_coo', existing_type=sa.LargeBinary(), nullable=False)
+        batch.alter_column('total_celulas', existing_type=sa.Integer(), nullable=False)
+        batch.drop_column('dados_json')
+
+
+def downgrade():
+    op.add_column('participacao_versoes', sa.Column('dados_json', sa.Text(), nullable=True))
+
+    conn = op.get_bind()
+    tabela = sa.table(
+        'participacao_versoes',
+        sa.column('id', sa.Integer), sa.column('dados_json', sa.Text), sa.column('dados_coo', sa.LargeBinary)
+    )
+    for versao_id, dados_coo in conn.execute(sa.select(tabela.c.id, tabela.c.dados_coo)).all():
+        dados = {}
+        for (imovel_id, proprietario_id), percentual in _decodificar(dados_coo).items():
+            dados.setdefault(str(imovel_id), {})[str(proprietario_id)] = percentual
+        conn.execute(tabela.update().where(tabela.c.id == versao_id).values(dados_json=json.dumps(dados)))
+
+    with op.batch_alter_table('participacao_versoes') as batch:
+        batch.drop_column('total_celulas')
+        batch.drop_column('dados_coo')
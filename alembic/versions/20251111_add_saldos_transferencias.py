@@ -0,0 +1,56 @@
+"""add saldos_transferencias ledger table
+
+Revision ID: add_saldos_transferencias
+Revises: participacao_versoes_coo
+Create Date: 2025-11-11
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_saldos_transferencias'
+down_revision = 'participacao_versoes_coo'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('saldos_transferencias',
+        sa.Column('usuario_id', sa.Integer(), nullable=False),
+        sa.Column('mes_referencia', sa.String(length=7), nullable=False),
+        sa.Column('saldo_inicial', sa.Float(), nullable=False),
+        sa.Column('entradas', sa.Float(), nullable=False),
+        sa.Column('saidas', sa.Float(), nullable=False),
+        sa.Column('saldo_final', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id']),
+        sa.PrimaryKeyConstraint('usuario_id', 'mes_referencia')
+    )
+
+    # Carga inicial a partir das transferências confirmadas existentes:
+    # entradas/saídas por usuário e mês, e o saldo final como soma acumulada
+    op.execute("""
+        INSERT INTO saldos_transferencias
+            (usuario_id, mes_referencia, saldo_inicial, entradas, saidas, saldo_final)
+        SELECT usuario_id, mes_referencia,
+               SUM(entradas - saidas) OVER meses - (entradas - saidas),
+               entradas, saidas,
+               SUM(entradas - saidas) OVER meses
+        FROM (
+            SELECT usuario_id, mes_referencia, SUM(entradas) AS entradas, SUM(saidas) AS saidas
+            FROM (
+                SELECT destino_id AS usuario_id, mes_referencia, valor AS entradas, 0.0 AS saidas
+                FROM transferencias WHERE confirmada
+                UNION ALL
+                SELECT origem_id, mes_referencia, 0.0, valor
+                FROM transferencias WHERE confirmada
+            ) AS lancamentos
+            GROUP BY usuario_id, mes_referencia
+        ) AS movimentos
+        WINDOW meses AS (PARTITION BY usuario_id ORDER BY mes_referencia)
+    """)
+
+
+def downgrade():
+    op.drop_table('saldos_transferencias')
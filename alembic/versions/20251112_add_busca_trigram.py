@@ -0,0 +1,61 @@
+"""add trigram search indexes (pg_trgm + unaccent)
+
+Revision ID: add_busca_trigram
+Revises: add_saldos_transferencias
+Create Date: 2025-11-12
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_busca_trigram'
+down_revision = 'add_saldos_transferencias'
+branch_labels = None
+depends_on = None
+
+
+# (índice, tabela, coluna): as colunas pesquisadas pelo BuscaService nesta revisão
+INDICES = [
+    ('ix_busca_proprietarios_nome', 'proprietarios', 'nome'),
+    ('ix_busca_proprietarios_razao_social', 'proprietarios', 'razao_social'),
+    ('ix_busca_proprietarios_email', 'proprietarios', 'email'),
+    ('ix_busca_proprietarios_cpf', 'proprietarios', 'cpf'),
+    ('ix_busca_proprietarios_cnpj', 'proprietarios', 'cnpj'),
+    ('ix_busca_imoveis_nome', 'imoveis', 'nome'),
+    ('ix_busca_imoveis_endereco', 'imoveis', 'endereco'),
+    ('ix_busca_imoveis_cidade', 'imoveis', 'cidade'),
+    ('ix_busca_usuarios_nome', 'usuarios', 'nome'),
+    ('ix_busca_usuarios_email', 'usuarios', 'email'),
+    ('ix_busca_usuarios_cpf', 'usuarios', 'cpf'),
+]
+
+
+def upgrade():
+    # Só PostgreSQL; no SQLite a busca usa um índice FTS5 mantido pelo BuscaService
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    # unaccent() não é IMMUTABLE (depende do dicionário configurado) e não
+    # pode ser usada em índices; a função abaixo fixa o dicionário
+    op.execute("""
+        CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text AS $$
+            SELECT public.unaccent('public.unaccent', $1)
+        $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    """)
+    for nome, tabela, coluna in INDICES:
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS {nome} ON {tabela} "
+            f"USING gin (f_unaccent(lower({coluna})) gin_trgm_ops)"
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    for nome, _, _ in INDICES:
+        op.execute(f"DROP INDEX IF EXISTS {nome}")
+    op.execute("DROP FUNCTION IF EXISTS f_unaccent(text)")
@@ -0,0 +1,277 @@
+"""
+Compressão das respostas HTTP (gzip e brotli)
+
+CompressaoMiddleware comprime as respostas da API e das páginas conforme o
+Accept-Encoding do cliente, preferindo brotli quando a biblioteca está
+instalada. Respostas menores que o tamanho mínimo, já comprimidas
+(Content-Encoding definido) ou de tipos que não ganham com compressão (PDF,
+XLSX, imagens) passam inalteradas.
+
+Os arquivos estáticos são comprimidos uma única vez, na inicialização
+(precomprimir_estaticos), em arquivos .gz/.br ao lado do original, que
+EstaticosPrecomprimidos serve diretamente:
+
+    app.mount("/static", EstaticosPrecomprimidos(directory="app/static"), name="static")
+    app.add_middleware(CompressaoMiddleware, tamanho_minimo=1024)
+"""
+import gzip
+import io
+import os
+from mimetypes import guess_type
+from typing import Iterator, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional: sem ele só gzip é usado
+    brotli = None
+
+# Tipos já comprimidos ou binários em que a compressão só gasta CPU
+TIPOS_NAO_COMPRIMIVEIS = (
+    "application/pdf",
+    "application/zip",
+    "application/gzip",
+    "application/vnd.openxmlformats-officedocument",
+    "application/vnd.ms-excel",
+    "application/octet-stream",
+    "image/",
+    "audio/",
+    "video/",
+    "font/woff",
+)
+
+# Extensões dos estáticos pré-comprimidos na inicialização
+EXTENSOES_COMPRIMIVEIS = (".js", ".css", ".html", ".svg", ".json", ".txt", ".map")
+
+# Sufixo do arquivo pré-comprimido de cada codificação
+SUFIXOS = {"br": ".br", "gzip": ".gz"}
+
+
+def codificacoes_aceitas(accept_encoding: str) -> List[str]:
+    """Codificações suportadas aceitas pelo cliente, na ordem de preferência do servidor"""
+    aceitas = set()
+    for item in accept_encoding.lower().split(","):
+        nome, _, parametros = item.strip().partition(";")
+        if parametros.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        aceitas.add(nome.strip())
+    ordem = ["br", "gzip"] if brotli is not None else ["gzip"]
+    return [codificacao for codificacao in ordem if codificacao in aceitas or "*" in aceitas]
+
+
+def comprimivel(content_type: str) -> bool:
+    """Falso para tipos que já são comprimidos (PDF, XLSX, imagens...)"""
+    return not content_type.lower().startswith(TIPOS_NAO_COMPRIMIVEIS)
+
+
+class _Compressor:
+    """Compressão incremental com a mesma interface para gzip e brotli"""
+
+    def __init__(self, codificacao: str, nivel_gzip: int, nivel_brotli: int):
+        if codificacao == "br":
+            self._brotli = brotli.Compressor(quality=nivel_brotli)
+        else:
+            self._brotli = None
+            self._buffer = io.BytesIO()
+            self._gzip = gzip.GzipFile(mode="wb", fileobj=self._buffer, compresslevel=nivel_gzip, mtime=0)
+
+    def comprimir(self, dados: bytes) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.process(dados)
+        self._gzip.write(dados)
+        return self._retirar()
+
+    def finalizar(self) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.finish()
+        self._gzip.close()
+        return self._retirar()
+
+    def _retirar(self) -> bytes:
+        dados = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return dados
+
+
+class CompressaoMiddleware:
+    """Middleware ASGI de compressão gzip/brotli com tamanho mínimo e nível configuráveis"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        tamanho_minimo: int = 1024,
+        nivel_gzip: int = 6,
+        nivel_brotli: int = 5
+    ):
+        self.app = app
+        self.tamanho_minimo = tamanho_minimo
+        self.nivel_gzip = nivel_gzip
+        self.nivel_brotli = nivel_brotli
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        codificacoes = codificacoes_aceitas(Headers(scope=scope).get("accept-encoding", ""))
+        if not codificacoes:
+            await self.app(scope, receive, send)
+            return
+        await _RespostaComprimida(self, codificacoes[0], send).executar(scope, receive)
+
+
+class _RespostaComprimida:
+    """Estado de uma resposta: decide comprimir ao ver os cabeçalhos e o primeiro bloco do corpo"""
+
+    def __init__(self, middleware: CompressaoMiddleware, codificacao: str, send: Send):
+        self.middleware = middleware
+        self.codificacao = codificacao
+        self.send = send
+        self.inicio: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.repassar = False
+
+    async def executar(self, scope: Scope, receive: Receive) -> None:
+        await self.middleware.app(scope, receive, self.enviar)
+
+    async def enviar(self, mensagem: Message) -> None:
+        if mensagem["type"] == "http.response.start":
+            headers = Headers(raw=mensagem["headers"])
+            # Corpo já comprimido (ex.: estáticos .gz/.br) ou tipo binário: repassa
+            self.repassar = (
+                "content-encoding" in headers
+                or not comprimivel(headers.get("content-type", ""))
+            )
+            if self.repassar:
+                await self.send(mensagem)
+            else:
+                self.inicio = mensagem
+            return
+
+        if mensagem["type"] != "http.response.body" or self.repassar:
+            await self.send(mensagem)
+            return
+
+        corpo = mensagem.get("body", b"")
+        continua = mensagem.get("more_body", False)
+
+        if self.inicio is not None:
+            inicio, self.inicio = self.inicio, None
+            headers = MutableHeaders(raw=inicio["headers"])
+            if len(corpo) < self.middleware.tamanho_minimo and not continua:
+                await self.send(inicio)
+                await self.send(mensagem)
+                return
+
+            self.compressor = _Compressor(self.codificacao, self.middleware.nivel_gzip, self.middleware.nivel_brotli)
+            headers["Content-Encoding"] = self.codificacao
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                # A representação comprimida não é idêntica byte a byte à original
+                headers["ETag"] = f"W/{etag}"
+            if continua:
+                del headers["Content-Length"]
+                await self.send(inicio)
+                await self.send({
+                    "type": "http.response.body",
+                    "body": self.compressor.comprimir(corpo),
+                    "more_body": True
+                })
+            else:
+                comprimido = self.compressor.comprimir(corpo) + self.compressor.finalizar()
+                headers["Content-Length"] = str(len(comprimido))
+                await self.send(inicio)
+                await self.send({"type": "http.response.body", "body": comprimido})
+            return
+
+        if self.compressor is None:
+            await self.send(mensagem)
+            return
+        dados = self.compressor.comprimir(corpo)
+        if not continua:
+            dados += self.compressor.finalizar()
+        await self.send({"type": "http.response.body", "body": dados, "more_body": continua})
+
+
+def _arquivos_comprimiveis(diretorio: str) -> Iterator[str]:
+    for raiz, _, arquivos in os.walk(diretorio):
+        for nome in arquivos:
+            if nome.endswith(EXTENSOES_COMPRIMIVEIS):
+                yield os.path.join(raiz, nome)
+
+
+def _sidecar_atualizado(original: str, sidecar: str) -> bool:
+    return os.path.exists(sidecar) and os.path.getmtime(sidecar) >= os.path.getmtime(original)
+
+
+def precomprimir_estaticos(diretorio: str, nivel_gzip: int = 9, nivel_brotli: int = 11) -> int:
+    """
+    Gera os arquivos .gz (e .br, se brotli estiver instalado) dos estáticos
+
+    Só regrava os que estão desatualizados em relação ao original. Retorna a
+    quantidade de arquivos gerados.
+    """
+    gerados = 0
+    for caminho in _arquivos_comprimiveis(diretorio):
+        with open(caminho, "rb") as arquivo:
+            conteudo = None
+            for codificacao, sufixo in SUFIXOS.items():
+                if codificacao == "br" and brotli is None:
+                    continue
+                sidecar = caminho + sufixo
+                if _sidecar_atualizado(caminho, sidecar):
+                    continue
+                if conteudo is None:
+                    conteudo = arquivo.read()
+                if codificacao == "br":
+                    comprimido = brotli.compress(conteudo, quality=nivel_brotli)
+                else:
+                    comprimido = gzip.compress(conteudo, compresslevel=nivel_gzip, mtime=0)
+                temporario = sidecar + ".tmp"
+                with open(temporario, "wb") as saida:
+                    saida.write(comprimido)
+                os.replace(temporario, sidecar)
+                gerados += 1
+    return gerados
+
+
+class EstaticosPrecomprimidos(StaticFiles):
+    """StaticFiles que serve o .br/.gz gerado por precomprimir_estaticos quando o cliente aceita"""
+
+    def file_response(self, full_path, stat_result, scope: Scope, status_code: int = 200) -> Response:
+        if not str(full_path).endswith(EXTENSOES_COMPRIMIVEIS):
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        request_headers = Headers(scope=scope)
+        media_type = guess_type(str(full_path))[0] or "text/plain"
+        sidecar = self._sidecar(str(full_path), request_headers.get("accept-encoding", ""))
+        if sidecar is None:
+            resposta = FileResponse(
+                full_path, status_code=status_code, stat_result=stat_result,
+                method=scope["method"], media_type=media_type
+            )
+        else:
+            caminho, codificacao = sidecar
+            resposta = FileResponse(
+                caminho, status_code=status_code, stat_result=os.stat(caminho),
+                method=scope["method"], media_type=media_type
+            )
+            resposta.headers["Content-Encoding"] = codificacao
+        resposta.headers.add_vary_header("Accept-Encoding")
+
+        if self.is_not_modified(resposta.headers, request_headers):
+            return NotModifiedResponse(resposta.headers)
+        return resposta
+
+    @staticmethod
+    def _sidecar(caminho: str, accept_encoding: str) -> Optional[Tuple[str, str]]:
+        for codificacao in codificacoes_aceitas(accept_encoding):
+            sidecar = caminho + SUFIXOS[codificacao]
+            if _sidecar_atualizado(caminho, sidecar):
+                return sidecar, codificacao
+        return None
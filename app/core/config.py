@@ -27,6 +27,28 @@ class Settings(BaseSettings):
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     
+    # Rate limiting
+    # "memory://" mantém contadores por processo; "database://" usa a tabela
+    # rate_limit_contadores do DATABASE_URL e "database+<url>" usa outro banco,
+    # permitindo que vários workers compartilhem os mesmos limites
+    RATE_LIMIT_STORAGE_URI: str = "memory://"
+    RATE_LIMIT_SWEEP_INTERVAL: int = 60  # Segundos entre limpezas de entradas expiradas
+    RATE_LIMIT_MAX_KEYS: int = 100_000  # Máximo de IPs rastreados em memória (LRU)
+    
+    # Exportação de relatórios
+    PDF_RENDER_WORKERS: int = 2  # Threads dedicadas à renderização de PDFs
+    EXPORT_SPOOL_MAX_SIZE: int = 5 * 1024 * 1024  # Bytes em memória antes de ir para disco
+    REPORT_CACHE_DIR: str = "cache/relatorios"  # Relatórios de meses fechados já gerados
+    
+    # Templates
+    TEMPLATE_CACHE_DIR: str = "cache/templates"  # Bytecode Jinja2 reaproveitado entre reinicializações
+    
+    # Compressão das respostas (gzip; brotli se a biblioteca estiver instalada)
+    COMPRESSAO_TAMANHO_MINIMO: int = 1024  # Bytes; respostas menores vão sem compressão
+    COMPRESSAO_NIVEL_GZIP: int = 6  # 1 (rápido) a 9 (menor)
+    COMPRESSAO_NIVEL_BROTLI: int = 5  # 0 (rápido) a 11 (menor)
+    COMPRESSAO_PRECOMPRIMIR_ESTATICOS: bool = True  # Gera .gz/.br de app/static na inicialização
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
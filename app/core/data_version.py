@@ -0,0 +1,150 @@
+"""
+Versionamento de dados para invalidação de caches
+
+Cada modelo rastreado tem uma versão por tabela (escopo = nome da tabela) e,
+opcionalmente, versões mais finas (ex: "alugueis_mensais:2025-10"). As
+versões ficam na tabela versoes_dados e são incrementadas na mesma transação
+que altera os dados, então qualquer worker enxerga a invalidação assim que
+o commit acontece.
+
+Uso no modelo:
+    rastrear_versao(AluguelMensal, lambda a: [f"alugueis_mensais:{a.mes_referencia}"])
+"""
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Callable, Dict, Iterable, Set
+
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.versao_dados import VersaoDados
+
+_RASTREADOS: Dict[type, Callable[[object], Iterable[str]]] = {}
+
+
+def rastrear_versao(modelo: type, escopos: Callable[[object], Iterable[str]] = None) -> None:
+    """
+    Passa a versionar as alterações de modelo
+
+    escopos recebe a instância alterada e devolve os escopos finos afetados,
+    além do escopo da tabela. Em atualizações ele é chamado com os valores
+    novos e com os anteriores (ex: um aluguel movido de mês invalida os dois).
+
+    O escopo da tabela também invalida as respostas das rotas de leitura que
+    dependem dela (ETag de app/core/http_cache.py) e os caches de relatórios.
+    """
+    _RASTREADOS[modelo] = escopos or (lambda obj: ())
+
+
+def _valores_anteriores(obj) -> SimpleNamespace:
+    estado = inspect(obj)
+    valores = {}
+    for atributo in estado.mapper.column_attrs:
+        historico = estado.attrs[atributo.key].history
+        valores[atributo.key] = historico.deleted[0] if historico.deleted else getattr(obj, atributo.key)
+    return SimpleNamespace(**valores)
+
+
+def _escopos_alterados(session: Session) -> Set[str]:
+    escopos: Set[str] = set()
+
+    for obj in list(session.new) + list(session.deleted):
+        funcao = _RASTREADOS.get(type(obj))
+        if funcao is not None:
+            escopos.add(obj.__tablename__)
+            escopos.update(funcao(obj))
+
+    for obj in session.dirty:
+        funcao = _RASTREADOS.get(type(obj))
+        if funcao is not None and session.is_modified(obj, include_collections=False):
+            escopos.add(obj.__tablename__)
+            escopos.update(funcao(obj))
+            escopos.update(funcao(_valores_anteriores(obj)))
+
+    return escopos
+
+
+def incrementar_versoes(conn, escopos: Iterable[str]) -> None:
+    """
+    Incrementa (ou cria com versão 1) os escopos informados
+
+    Atômico: INSERT ... ON CONFLICT DO UPDATE no PostgreSQL e no SQLite, para
+    que duas transações criando o mesmo escopo não colidam na chave primária.
+    """
+    escopos = sorted(set(escopos))
+    if not escopos:
+        return
+
+    tabela = VersaoDados.__table__
+    agora = datetime.utcnow()
+    dialeto = conn.dialect.name
+
+    if dialeto in ("postgresql", "sqlite"):
+        if dialeto == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        stmt = insert(tabela).values([{"escopo": e, "versao": 1, "atualizado_em": agora} for e in escopos])
+        conn.execute(stmt.on_conflict_do_update(
+            index_elements=[tabela.c.escopo],
+            set_={"versao": tabela.c.versao + 1, "atualizado_em": stmt.excluded.atualizado_em}
+        ))
+        return
+
+    # Outros bancos: update seguido de insert; se outra transação criou o
+    # escopo no meio do caminho, o insert é desfeito (savepoint) e vira update
+    filtro = tabela.c.escopo.in_(escopos)
+    conn.execute(update(tabela).where(filtro).values(versao=tabela.c.versao + 1))
+    existentes = set(conn.execute(select(tabela.c.escopo).where(filtro)).scalars())
+    for escopo in escopos:
+        if escopo in existentes:
+            continue
+        try:
+            with conn.begin_nested():
+                conn.execute(tabela.insert().values(escopo=escopo, versao=1, atualizado_em=agora))
+        except IntegrityError:
+            conn.execute(update(tabela).where(tabela.c.escopo == escopo).values(versao=tabela.c.versao + 1))
+
+
+def obter_versoes(db: Session, escopos: Iterable[str]) -> Dict[str, int]:
+    """Versões atuais dos escopos (0 para escopos nunca alterados)"""
+    escopos = list(escopos)
+    tabela = VersaoDados.__table__
+    versoes = dict(db.execute(
+        select(tabela.c.escopo, tabela.c.versao).where(tabela.c.escopo.in_(escopos))
+    ).all())
+    return {e: versoes.get(e, 0) for e in escopos}
+
+
+@event.listens_for(Session, "after_flush")
+def _versionar_flush(session: Session, flush_context) -> None:
+    escopos = _escopos_alterados(session)
+    if escopos:
+        incrementar_versoes(session.connection(), escopos)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _versionar_em_massa(orm_execute_state) -> None:
+    """
+    UPDATE/DELETE/INSERT em massa (query.update, session.execute(update(...)))
+    não passam pelo flush: invalida todos os escopos da tabela
+    """
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+        return
+
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ not in _RASTREADOS:
+        return
+
+    nome_tabela = mapper.class_.__tablename__
+    tabela = VersaoDados.__table__
+    conn = orm_execute_state.session.connection()
+    # Escopos finos: só os que já existem; o da tabela pode ainda não existir
+    conn.execute(
+        update(tabela)
+        .where(tabela.c.escopo.like(f"{nome_tabela}:%"))
+        .values(versao=tabela.c.versao + 1)
+    )
+    incrementar_versoes(conn, [nome_tabela])
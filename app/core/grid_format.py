@@ -0,0 +1,62 @@
+"""
+Formato compacto das respostas de grids (planilhas)
+
+As grids de participações e de aluguéis são matrizes linha × proprietário
+quase vazias. No formato "colunar" a resposta leva os atributos das linhas
+como listas paralelas, as colunas uma única vez e apenas as células
+preenchidas, em coordenadas:
+
+    {
+        "formato": "colunar",
+        "linhas": {"id": [1, 2], "nome": ["Apto 101", "Casa 2"]},
+        "colunas": [{"id": 7, "nome": "Maria"}, {"id": 9, "nome": "João"}],
+        "valores": {"linha": [0, 0, 1], "coluna": [0, 1, 0], "valor": [50.0, 50.0, 100.0]}
+    }
+
+A resposta é serializada diretamente (RespostaJSON ou msgpack), sem passar pela
+validação do response_model da rota.
+"""
+from typing import Any, Dict, List, Sequence
+
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+from app.core.responses import RespostaJSON
+
+# Valores aceitos no parâmetro formato das rotas de grid
+PADRAO_FORMATO_GRADE = "^(linhas|colunar|msgpack)$"
+
+MEDIA_TYPE_MSGPACK = "application/x-msgpack"
+
+
+def grade_colunar(
+    linhas: Dict[str, List[Any]],
+    colunas: List[Dict[str, Any]],
+    linha: Sequence[int],
+    coluna: Sequence[int],
+    valor: Sequence[float],
+    **extras: Any
+) -> Dict[str, Any]:
+    """Monta o conteúdo de uma grid no formato colunar"""
+    return {
+        **extras,
+        "formato": "colunar",
+        "linhas": linhas,
+        "colunas": colunas,
+        "valores": {"linha": list(linha), "coluna": list(coluna), "valor": list(valor)}
+    }
+
+
+def responder_grade(conteudo: Dict[str, Any], formato: str) -> Response:
+    """Serializa uma grid colunar como JSON (orjson) ou msgpack"""
+    if formato == "msgpack":
+        try:
+            import msgpack
+        except ImportError:
+            raise HTTPException(
+                status_code=500,
+                detail="Biblioteca msgpack não instalada. Execute: pip install msgpack"
+            )
+        return Response(msgpack.packb(conteudo, use_bin_type=True), media_type=MEDIA_TYPE_MSGPACK)
+
+    return RespostaJSON(conteudo)
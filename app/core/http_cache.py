@@ -0,0 +1,133 @@
+"""
+Requisições condicionais (ETag / Last-Modified) para rotas de leitura
+
+As versões vêm de versoes_dados (app/core/data_version.py): cada tabela
+rastreada tem um contador incrementado na mesma transação de qualquer
+alteração, e atualizado_em marca a última. Antes de executar a rota é feita
+uma única consulta às versões das tabelas de que ela depende; se o cliente
+já tem a representação atual (If-None-Match) a resposta é 304 sem executar
+a consulta principal.
+
+If-Modified-Since é ignorado: Last-Modified tem resolução de segundos e
+duas alterações no mesmo segundo levariam a um 304 desatualizado. O
+Last-Modified enviado é apenas informativo; a validação é sempre pelo ETag.
+
+Uso na rota (db é obrigatório; request é injetado se a rota não o declarar):
+
+    @router.get("/")
+    @cache_condicional("imoveis")
+    async def list_imoveis(..., db: Session = Depends(get_db)):
+        ...
+"""
+import functools
+import hashlib
+import inspect
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Dict, Optional, Sequence, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.models.versao_dados import VersaoDados
+
+CACHE_CONTROL_CONDICIONAL = "private, no-cache"
+
+
+def etag_corresponde(request: Request, etag: str) -> bool:
+    """Verdadeiro se If-None-Match contém etag (comparação fraca) ou *"""
+    cabecalho = request.headers.get("if-none-match")
+    if not cabecalho:
+        return False
+    candidatos = [c.strip() for c in cabecalho.split(",")]
+    return "*" in candidatos or any(c.removeprefix("W/") == etag for c in candidatos)
+
+
+def versoes_com_data(db: Session, escopos: Sequence[str]) -> Tuple[Dict[str, int], Optional[datetime]]:
+    """Versões dos escopos (0 se nunca alterados) e o instante da última alteração (UTC)"""
+    tabela = VersaoDados.__table__
+    linhas = db.execute(
+        select(tabela.c.escopo, tabela.c.versao, tabela.c.atualizado_em).where(tabela.c.escopo.in_(escopos))
+    ).all()
+    versoes = {escopo: 0 for escopo in escopos}
+    ultima_alteracao = None
+    for escopo, versao, atualizado_em in linhas:
+        versoes[escopo] = versao
+        if atualizado_em is not None and (ultima_alteracao is None or atualizado_em > ultima_alteracao):
+            ultima_alteracao = atualizado_em
+    if ultima_alteracao is not None:
+        ultima_alteracao = ultima_alteracao.replace(tzinfo=timezone.utc)
+    return versoes, ultima_alteracao
+
+
+def cabecalhos_condicionais(
+    request: Request,
+    versoes: Dict[str, int],
+    ultima_alteracao: Optional[datetime],
+    usuario_id: Optional[int] = None
+) -> Dict[str, str]:
+    """ETag da representação (rota, parâmetros, usuário e versões) e Last-Modified"""
+    partes = [request.url.path, str(sorted(request.query_params.multi_items())), str(usuario_id)]
+    partes.extend(f"{escopo}={versao}" for escopo, versao in sorted(versoes.items()))
+    headers = {
+        "ETag": f'"{hashlib.sha256("|".join(partes).encode()).hexdigest()[:32]}"',
+        "Cache-Control": CACHE_CONTROL_CONDICIONAL,
+    }
+    if ultima_alteracao is not None:
+        headers["Last-Modified"] = format_datetime(ultima_alteracao, usegmt=True)
+    return headers
+
+
+def cache_condicional(*escopos: str):
+    """
+    Decorador de rotas GET: responde 304 quando nenhuma das tabelas em
+    escopos mudou desde a versão que o cliente tem
+
+    O ETag também depende da URL (com parâmetros) e do usuário atual
+    (parâmetro current_user da rota), pois a resposta pode variar com eles.
+    """
+    def decorador(endpoint):
+        assinatura = inspect.signature(endpoint)
+        if "db" not in assinatura.parameters:
+            raise TypeError(f"{endpoint.__name__}: cache_condicional requer o parâmetro db")
+
+        declara_request = "request" in assinatura.parameters
+        parametros = list(assinatura.parameters.values())
+        if not declara_request:
+            parametros.append(inspect.Parameter(
+                "_request_condicional", inspect.Parameter.KEYWORD_ONLY, annotation=Request
+            ))
+        parametros.append(inspect.Parameter(
+            "_response_condicional", inspect.Parameter.KEYWORD_ONLY, annotation=Response
+        ))
+
+        @functools.wraps(endpoint)
+        async def envoltorio(*args, **kwargs):
+            request = kwargs["request"] if declara_request else kwargs.pop("_request_condicional")
+            response = kwargs.pop("_response_condicional")
+            usuario = kwargs.get("current_user")
+
+            versoes, ultima_alteracao = versoes_com_data(kwargs["db"], escopos)
+            headers = cabecalhos_condicionais(request, versoes, ultima_alteracao, getattr(usuario, "id", None))
+
+            if etag_corresponde(request, headers["ETag"]):
+                return Response(status_code=304, headers=headers)
+
+            if inspect.iscoroutinefunction(endpoint):
+                resultado = await endpoint(*args, **kwargs)
+            else:
+                resultado = await run_in_threadpool(endpoint, *args, **kwargs)
+
+            if isinstance(resultado, Response):
+                if resultado.status_code == 200:
+                    resultado.headers.update(headers)
+            else:
+                response.headers.update(headers)
+            return resultado
+
+        envoltorio.__signature__ = assinatura.replace(parameters=parametros)
+        return envoltorio
+
+    return decorador
@@ -0,0 +1,95 @@
+"""
+Codificação binária compacta de matrizes esparsas (imóvel × proprietário)
+
+As versões de participações guardam a matriz no formato COO: três vetores
+paralelos (imovel_id, proprietario_id, percentual) ordenados por imóvel e
+proprietário, comprimidos com zlib. Formato (little-endian):
+
+    b"COO1" | n: uint32 | zlib(imovel_id int32[n] | proprietario_id int32[n] | percentual float64[n])
+
+Os ids são gravados em diferenças sucessivas (imóveis) e por linha
+(proprietários), o que deixa os vetores cheios de valores pequenos e
+repetidos e melhora bastante a compressão.
+"""
+import struct
+import zlib
+from typing import Dict, Mapping, Tuple
+
+import numpy as np
+
+MAGICO = b"COO1"
+_CABECALHO = struct.Struct("<4sI")
+
+Celula = Tuple[int, int]
+VetoresCOO = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def vetores_de_matriz(matriz: Mapping[Celula, float]) -> VetoresCOO:
+    """(imovel_ids, proprietario_ids, percentuais) ordenados a partir de {(imovel, proprietario): percentual}"""
+    if not matriz:
+        return np.empty(0, np.int32), np.empty(0, np.int32), np.empty(0, np.float64)
+    celulas = np.array(list(matriz.keys()), dtype=np.int64)
+    valores = np.fromiter(matriz.values(), dtype=np.float64, count=len(matriz))
+    ordem = np.lexsort((celulas[:, 1], celulas[:, 0]))
+    return celulas[ordem, 0].astype(np.int32), celulas[ordem, 1].astype(np.int32), valores[ordem]
+
+
+def matriz_de_vetores(imoveis: np.ndarray, proprietarios: np.ndarray, percentuais: np.ndarray) -> Dict[Celula, float]:
+    """Inverso de vetores_de_matriz"""
+    return dict(zip(zip(imoveis.tolist(), proprietarios.tolist()), percentuais.tolist()))
+
+
+def codificar(imoveis: np.ndarray, proprietarios: np.ndarray, percentuais: np.ndarray) -> bytes:
+    """Vetores COO (ordenados por imóvel e proprietário) -> bytes comprimidos"""
+    imoveis = np.asarray(imoveis, dtype=np.int32)
+    proprietarios = np.asarray(proprietarios, dtype=np.int32)
+    percentuais = np.asarray(percentuais, dtype=np.float64)
+
+    # Imóveis: diferença para a célula anterior (0 dentro da mesma linha)
+    delta_imoveis = np.diff(imoveis, prepend=np.int32(0)).astype("<i4")
+    # Proprietários: diferença dentro da linha (o primeiro de cada linha vai inteiro)
+    delta_proprietarios = np.diff(proprietarios, prepend=np.int32(0)).astype("<i4")
+    nova_linha = delta_imoveis != 0
+    if len(proprietarios):
+        nova_linha[0] = True
+    delta_proprietarios[nova_linha] = proprietarios[nova_linha]
+
+    corpo = delta_imoveis.tobytes() + delta_proprietarios.tobytes() + percentuais.astype("<f8").tobytes()
+    return _CABECALHO.pack(MAGICO, len(imoveis)) + zlib.compress(corpo, 9)
+
+
+def decodificar(dados: bytes) -> VetoresCOO:
+    """bytes de codificar -> (imovel_ids, proprietario_ids, percentuais)"""
+    magico, n = _CABECALHO.unpack_from(dados)
+    if magico != MAGICO:
+        raise ValueError("Formato de matriz desconhecido")
+    corpo = zlib.decompress(dados[_CABECALHO.size:])
+
+    delta_imoveis = np.frombuffer(corpo, dtype="<i4", count=n)
+    delta_proprietarios = np.frombuffer(corpo, dtype="<i4", count=n, offset=4 * n)
+    percentuais = np.frombuffer(corpo, dtype="<f8", count=n, offset=8 * n)
+
+    imoveis = np.cumsum(delta_imoveis, dtype=np.int64).astype(np.int32)
+    # Soma acumulada dos proprietários reiniciada a cada linha
+    nova_linha = delta_imoveis != 0
+    if n:
+        nova_linha[0] = True
+    acumulado = np.cumsum(delta_proprietarios, dtype=np.int64)
+    inicio_da_linha = np.maximum.accumulate(np.where(nova_linha, np.arange(n), 0))
+    base = acumulado[inicio_da_linha] - delta_proprietarios[inicio_da_linha]
+    proprietarios = (acumulado - base).astype(np.int32)
+
+    return imoveis, proprietarios, percentuais.copy()
+
+
+def matriz_densa(imoveis: np.ndarray, proprietarios: np.ndarray, percentuais: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Matriz densa (linhas = imóveis, colunas = proprietários) dos vetores COO
+
+    Retorna (imovel_ids, proprietario_ids, matriz) com os ids ordenados.
+    """
+    imovel_ids, linhas = np.unique(imoveis, return_inverse=True)
+    proprietario_ids, colunas = np.unique(proprietarios, return_inverse=True)
+    matriz = np.zeros((len(imovel_ids), len(proprietario_ids)), dtype=np.float64)
+    matriz[linhas, colunas] = percentuais
+    return imovel_ids, proprietario_ids, matriz
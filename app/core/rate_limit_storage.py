@@ -0,0 +1,456 @@
+"""
+Armazenamento de estado do Rate Limiting e da Blacklist de IPs
+Define a interface de armazenamento e as implementações em memória e em banco
+"""
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional
+import math
+import threading
+import time
+
+from limits.storage import Storage
+from sqlalchemy import case, create_engine, delete, func, or_, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.models.rate_limit import RateLimitContador
+
+
+# Prefixo das chaves de bloqueio (separa bloqueios dos contadores de falhas)
+PREFIXO_BLOQUEIO = "bloqueio:"
+
+
+class RateLimitStorage(ABC):
+    """Interface de armazenamento de contadores de tentativas e bloqueios"""
+
+    @abstractmethod
+    def hit(self, key: str, window: float, now: Optional[float] = None) -> int:
+        """Registra um evento e retorna o total de eventos da chave na janela"""
+
+    @abstractmethod
+    def count(self, key: str, window: float, now: Optional[float] = None) -> int:
+        """Retorna o total de eventos da chave na janela, sem registrar"""
+
+    @abstractmethod
+    def block(self, key: str, until: float) -> None:
+        """Bloqueia a chave até o timestamp informado"""
+
+    @abstractmethod
+    def blocked_until(self, key: str) -> Optional[float]:
+        """Retorna o timestamp de desbloqueio da chave (ou None se não bloqueada)"""
+
+    @abstractmethod
+    def clear(self, key: str) -> None:
+        """Remove contadores e bloqueio da chave"""
+
+    @abstractmethod
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Remove entradas expiradas e retorna quantas foram removidas"""
+
+
+class _JanelaDeslizante:
+    """Contador de janela deslizante com dois buckets fixos (atual e anterior)"""
+
+    __slots__ = ("bucket", "atual", "anterior", "ultimo_evento")
+
+    def __init__(self, bucket: int, now: float):
+        self.bucket = bucket
+        self.atual = 0
+        self.anterior = 0
+        self.ultimo_evento = now
+
+    def avancar(self, bucket: int) -> None:
+        """Move a janela para o bucket informado, descartando buckets antigos"""
+        if bucket == self.bucket:
+            return
+        self.anterior = self.atual if bucket == self.bucket + 1 else 0
+        self.atual = 0
+        self.bucket = bucket
+
+    def estimar(self, window: float, now: float) -> int:
+        """
+        Estima eventos na janela ponderando o bucket anterior pela sobreposição
+
+        Arredonda para cima: a estimativa nunca fica abaixo do total real
+        quando os eventos do bucket anterior estão no fim dele (rajadas que
+        atravessam a fronteira entre buckets ainda atingem o limite).
+        """
+        decorrido = (now - self.bucket * window) / window
+        # Tolerância para o erro de ponto flutuante não somar um evento inexistente
+        return math.ceil(self.anterior * (1 - decorrido) + self.atual - 1e-9)
+
+
+class MemoryRateLimitStorage(RateLimitStorage):
+    """
+    Armazenamento em memória (por processo)
+
+    Cada chave usa um contador de janela deslizante com dois buckets fixos,
+    então registrar e consultar eventos custa O(1) e ocupa memória constante
+    por chave. O total de chaves é limitado por max_keys (as menos usadas
+    recentemente são descartadas) e uma thread em segundo plano remove
+    chaves ociosas e bloqueios expirados a cada sweep_interval segundos.
+    Bloqueios ativos nunca são descartados pelo limite: só os expirados dão
+    lugar a novos, senão um atacante derrubaria o próprio bloqueio
+    alternando entre mais de max_keys IPs.
+    """
+
+    def __init__(self, max_keys: int = 100_000, sweep_interval: float = 60, background: bool = True):
+        self.max_keys = max_keys
+        self.sweep_interval = sweep_interval
+        self._eventos: "OrderedDict[str, _JanelaDeslizante]" = OrderedDict()
+        self._bloqueios: "OrderedDict[str, float]" = OrderedDict()  # chave -> timestamp de desbloqueio
+        self._janela_maxima = 0.0
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        if background:
+            self.start_sweeper()
+
+    def hit(self, key: str, window: float, now: Optional[float] = None) -> int:
+        now = now if now is not None else time.time()
+        bucket = int(now // window)
+
+        with self._lock:
+            if window > self._janela_maxima:
+                self._janela_maxima = window
+
+            contador = self._eventos.get(key)
+            if contador is None:
+                contador = _JanelaDeslizante(bucket, now)
+                self._eventos[key] = contador
+                if len(self._eventos) > self.max_keys:
+                    self._eventos.popitem(last=False)
+            else:
+                self._eventos.move_to_end(key)
+                contador.avancar(bucket)
+
+            contador.atual += 1
+            contador.ultimo_evento = now
+            return contador.estimar(window, now)
+
+    def count(self, key: str, window: float, now: Optional[float] = None) -> int:
+        now = now if now is not None else time.time()
+        bucket = int(now // window)
+
+        with self._lock:
+            contador = self._eventos.get(key)
+            if contador is None:
+                return 0
+            contador.avancar(bucket)
+            return contador.estimar(window, now)
+
+    def block(self, key: str, until: float) -> None:
+        with self._lock:
+            self._bloqueios[key] = until
+            self._bloqueios.move_to_end(key)
+            if len(self._bloqueios) > self.max_keys:
+                # Todos os bloqueios têm a mesma duração: os expirados estão no início
+                agora = time.time()
+                while len(self._bloqueios) > self.max_keys:
+                    chave, ate = next(iter(self._bloqueios.items()))
+                    if ate > agora:
+                        break
+                    del self._bloqueios[chave]
+
+    def blocked_until(self, key: str) -> Optional[float]:
+        return self._bloqueios.get(key)
+
+    def clear(self, key: str) -> None:
+        with self._lock:
+            self._eventos.pop(key, None)
+            self._bloqueios.pop(key, None)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        now = now if now is not None else time.time()
+
+        with self._lock:
+            # Chaves em ordem de uso: as ociosas estão no início
+            ociosas = 0
+            while self._eventos:
+                chave, contador = next(iter(self._eventos.items()))
+                if now - contador.ultimo_evento < 2 * self._janela_maxima:
+                    break
+                del self._eventos[chave]
+                ociosas += 1
+
+            expirados = [chave for chave, ate in self._bloqueios.items() if ate <= now]
+            for chave in expirados:
+                del self._bloqueios[chave]
+
+        return ociosas + len(expirados)
+
+    def __len__(self) -> int:
+        return len(self._eventos)
+
+    # ---------- Limpeza em segundo plano ----------
+
+    def start_sweeper(self) -> None:
+        """Inicia a thread de limpeza periódica (daemon)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._executar_limpeza, name="rate-limit-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop_sweeper(self) -> None:
+        """Interrompe a thread de limpeza periódica"""
+        self._parar.set()
+        if self._thread:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def _executar_limpeza(self) -> None:
+        while not self._parar.wait(self.sweep_interval):
+            self.sweep()
+
+
+class DatabaseRateLimitStorage(RateLimitStorage):
+    """
+    Armazenamento compartilhado na tabela rate_limit_contadores
+
+    Todos os workers que apontam para o mesmo banco enxergam os mesmos
+    contadores. A janela deslizante é aproximada por BUCKETS_POR_JANELA
+    contadores de tamanho fixo por chave, atualizados com upsert atômico.
+    """
+
+    BUCKETS_POR_JANELA = 10
+
+    def __init__(self, engine: Engine, sweep_interval: float = 60):
+        self.engine = engine
+        self.sweep_interval = sweep_interval
+        self._proxima_limpeza = time.time() + sweep_interval
+        self._tabela = RateLimitContador.__table__
+
+        # Garante a tabela quando o armazenamento usa um banco separado
+        self._tabela.create(bind=engine, checkfirst=True)
+
+    # ---------- Contadores simples (janela fixa) ----------
+
+    def incr(self, key: str, expiry: float, amount: int = 1, now: Optional[float] = None) -> int:
+        """Incrementa contador de janela fixa, reiniciando-o se já expirou"""
+        now = now if now is not None else time.time()
+
+        with self.engine.begin() as conn:
+            self._upsert(conn, key, 0, amount, now + expiry, now=now)
+            return conn.execute(
+                select(self._tabela.c.contagem).where(
+                    self._tabela.c.chave == key,
+                    self._tabela.c.inicio == 0
+                )
+            ).scalar() or 0
+
+    def get(self, key: str, now: Optional[float] = None) -> int:
+        now = now if now is not None else time.time()
+
+        with self.engine.connect() as conn:
+            return conn.execute(
+                select(self._tabela.c.contagem).where(
+                    self._tabela.c.chave == key,
+                    self._tabela.c.inicio == 0,
+                    self._tabela.c.expira_em > now
+                )
+            ).scalar() or 0
+
+    def get_expiry(self, key: str) -> float:
+        with self.engine.connect() as conn:
+            expira_em = conn.execute(
+                select(self._tabela.c.expira_em).where(
+                    self._tabela.c.chave == key,
+                    self._tabela.c.inicio == 0
+                )
+            ).scalar()
+        return expira_em if expira_em is not None else time.time()
+
+    # ---------- Interface RateLimitStorage ----------
+
+    def hit(self, key: str, window: float, now: Optional[float] = None) -> int:
+        now = now if now is not None else time.time()
+        tamanho_bucket = max(window / self.BUCKETS_POR_JANELA, 1)
+        inicio = int(math.floor(now / tamanho_bucket) * tamanho_bucket)
+
+        with self.engine.begin() as conn:
+            self._upsert(conn, key, inicio, 1, inicio + tamanho_bucket + window)
+            total = self._somar(conn, key, window, now)
+
+        if now >= self._proxima_limpeza:
+            self.sweep(now)
+
+        return total
+
+    def count(self, key: str, window: float, now: Optional[float] = None) -> int:
+        now = now if now is not None else time.time()
+
+        with self.engine.connect() as conn:
+            return self._somar(conn, key, window, now)
+
+    def block(self, key: str, until: float) -> None:
+        chave = PREFIXO_BLOQUEIO + key
+
+        with self.engine.begin() as conn:
+            atualizados = conn.execute(
+                update(self._tabela)
+                .where(self._tabela.c.chave == chave, self._tabela.c.inicio == 0)
+                .values(contagem=1, expira_em=until)
+            ).rowcount
+            if not atualizados:
+                self._inserir(conn, chave, 0, 1, until)
+
+    def blocked_until(self, key: str) -> Optional[float]:
+        with self.engine.connect() as conn:
+            return conn.execute(
+                select(self._tabela.c.expira_em).where(
+                    self._tabela.c.chave == PREFIXO_BLOQUEIO + key,
+                    self._tabela.c.inicio == 0
+                )
+            ).scalar()
+
+    def clear(self, key: str) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(
+                delete(self._tabela).where(
+                    or_(
+                        self._tabela.c.chave == key,
+                        self._tabela.c.chave == PREFIXO_BLOQUEIO + key
+                    )
+                )
+            )
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        now = now if now is not None else time.time()
+        self._proxima_limpeza = now + self.sweep_interval
+
+        with self.engine.begin() as conn:
+            return conn.execute(
+                delete(self._tabela).where(self._tabela.c.expira_em <= now)
+            ).rowcount
+
+    def reset(self) -> int:
+        """Remove todos os contadores"""
+        with self.engine.begin() as conn:
+            return conn.execute(delete(self._tabela)).rowcount
+
+    # ---------- Auxiliares ----------
+
+    def _somar(self, conn, key: str, window: float, now: float) -> int:
+        return conn.execute(
+            select(func.coalesce(func.sum(self._tabela.c.contagem), 0)).where(
+                self._tabela.c.chave == key,
+                self._tabela.c.inicio > now - window
+            )
+        ).scalar() or 0
+
+    def _upsert(self, conn, chave: str, inicio: int, amount: int, expira_em: float, now: Optional[float] = None) -> None:
+        """
+        Incrementa (ou cria) a linha (chave, inicio) de forma atômica
+
+        Com `now` informado, uma linha expirada é reiniciada em vez de incrementada.
+        """
+        c = self._tabela.c
+        dialeto = self.engine.dialect.name
+
+        if dialeto in ("postgresql", "sqlite"):
+            if dialeto == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+
+            stmt = insert(self._tabela).values(chave=chave, inicio=inicio, contagem=amount, expira_em=expira_em)
+            if now is not None:
+                expirada = c.expira_em <= now
+                valores = {
+                    "contagem": case((expirada, stmt.excluded.contagem), else_=c.contagem + stmt.excluded.contagem),
+                    "expira_em": case((expirada, stmt.excluded.expira_em), else_=c.expira_em),
+                }
+            else:
+                valores = {"contagem": c.contagem + stmt.excluded.contagem, "expira_em": stmt.excluded.expira_em}
+            conn.execute(stmt.on_conflict_do_update(index_elements=[c.chave, c.inicio], set_=valores))
+            return
+
+        # Outros bancos: update seguido de insert
+        filtro = (c.chave == chave, c.inicio == inicio)
+        if now is not None:
+            conn.execute(delete(self._tabela).where(*filtro, c.expira_em <= now))
+        atualizados = conn.execute(
+            update(self._tabela).where(*filtro).values(contagem=c.contagem + amount)
+        ).rowcount
+        if not atualizados:
+            self._inserir(conn, chave, inicio, amount, expira_em)
+
+    def _inserir(self, conn, chave: str, inicio: int, contagem: int, expira_em: float) -> None:
+        conn.execute(
+            self._tabela.insert().values(chave=chave, inicio=inicio, contagem=contagem, expira_em=expira_em)
+        )
+
+
+class DatabaseLimitsStorage(Storage):
+    """
+    Adaptador da tabela rate_limit_contadores para a biblioteca `limits`
+
+    Registra os esquemas "database://" e "database+<url>" para que o Limiter
+    do slowapi compartilhe os contadores entre workers.
+    """
+
+    STORAGE_SCHEME = ["database", "database+sqlite", "database+postgresql", "database+postgresql+psycopg2"]
+
+    def __init__(self, uri: Optional[str] = None, wrap_exceptions: bool = False, **options):
+        self.backend = DatabaseRateLimitStorage(_engine_for(uri or "database://"))
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+        return SQLAlchemyError
+
+    def incr(self, key: str, expiry: int, elastic_expiry: bool = False, amount: int = 1) -> int:
+        return self.backend.incr(key, expiry, amount=amount)
+
+    def get(self, key: str) -> int:
+        return self.backend.get(key)
+
+    def get_expiry(self, key: str) -> float:
+        return self.backend.get_expiry(key)
+
+    def check(self) -> bool:
+        try:
+            with self.backend.engine.connect() as conn:
+                conn.execute(select(1))
+            return True
+        except SQLAlchemyError:
+            return False
+
+    def reset(self) -> Optional[int]:
+        return self.backend.reset()
+
+    def clear(self, key: str) -> None:
+        self.backend.clear(key)
+
+
+@lru_cache(maxsize=None)
+def _engine_for(uri: str) -> Engine:
+    """Retorna a engine de um URI "database://" (banco da aplicação) ou "database+<url>" """
+    if uri.startswith("database+"):
+        url = uri[len("database+"):]
+        connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+        return create_engine(url, pool_pre_ping=True, connect_args=connect_args)
+
+    from app.core.database import engine
+    return engine
+
+
+def create_storage(uri: str, max_keys: int = 100_000, sweep_interval: float = 60) -> RateLimitStorage:
+    """
+    Cria o armazenamento a partir de um URI
+
+    - memory://            -> MemoryRateLimitStorage (por processo)
+    - database://          -> DatabaseRateLimitStorage no DATABASE_URL
+    - database+<url>       -> DatabaseRateLimitStorage em outro banco
+    """
+    if uri.startswith("memory://"):
+        return MemoryRateLimitStorage(max_keys=max_keys, sweep_interval=sweep_interval)
+
+    if uri.startswith("database"):
+        return DatabaseRateLimitStorage(_engine_for(uri), sweep_interval=sweep_interval)
+
+    raise ValueError(f"Armazenamento de rate limit não suportado: {uri}")
@@ -6,10 +6,13 @@ from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from fastapi import Request, HTTPException
-from typing import Dict, Optional
+from typing import Optional
 import time
 import logging
-from collections import defaultdict
+
+from app.core.config import settings
+# Importar o armazenamento registra o esquema "database://" no `limits`
+from app.core.rate_limit_storage import RateLimitStorage, create_storage
 
 # Logger específico para segurança
 security_logger = logging.getLogger("security")
@@ -27,50 +30,50 @@ security_logger.setLevel(logging.INFO)
 limiter = Limiter(
     key_func=get_remote_address,
     default_limits=["100/minute"],  # Limite padrão global
-    storage_uri="memory://",  # Usar memória (para produção, usar Redis)
+    # memory:// é por processo; com vários workers usar database:// (ver config)
+    storage_uri=settings.RATE_LIMIT_STORAGE_URI,
 )
 
 
 # Sistema de Blacklist Temporária
 class IPBlacklist:
-    """Gerencia blacklist temporária de IPs suspeitos"""
+    """
+    Gerencia blacklist temporária de IPs suspeitos
     
-    def __init__(self):
-        self.failed_attempts: Dict[str, list] = defaultdict(list)
-        self.blacklist: Dict[str, float] = {}  # IP -> timestamp de desbloqueio
-        
+    Tentativas e bloqueios ficam em um RateLimitStorage, que pode ser
+    compartilhado entre workers (ver RATE_LIMIT_STORAGE_URI).
+    """
+    
+    def __init__(self, storage: Optional[RateLimitStorage] = None):
         # Configurações
         self.MAX_ATTEMPTS = 5  # Tentativas antes de bloquear
         self.ATTEMPT_WINDOW = 300  # Janela de tempo (5 minutos)
         self.BLACKLIST_DURATION = 900  # Duração do bloqueio (15 minutos)
+        
+        self.storage = storage or create_storage(
+            settings.RATE_LIMIT_STORAGE_URI,
+            max_keys=settings.RATE_LIMIT_MAX_KEYS,
+            sweep_interval=settings.RATE_LIMIT_SWEEP_INTERVAL
+        )
     
     def record_failed_attempt(self, ip: str, endpoint: str) -> None:
         """Registra tentativa falha de autenticação"""
-        current_time = time.time()
-        
-        # Limpar tentativas antigas (fora da janela)
-        self.failed_attempts[ip] = [
-            t for t in self.failed_attempts[ip]
-            if current_time - t < self.ATTEMPT_WINDOW
-        ]
-        
-        # Adicionar nova tentativa
-        self.failed_attempts[ip].append(current_time)
+        total_attempts = self.storage.hit(ip, self.ATTEMPT_WINDOW)
         
         # Log de segurança
         security_logger.warning(
             f"Failed authentication attempt from {ip} on {endpoint}. "
-            f"Total attempts: {len(self.failed_attempts[ip])}"
+            f"Total attempts: {total_attempts}"
         )
         
         # Verificar se deve bloquear
-        if len(self.failed_attempts[ip]) >= self.MAX_ATTEMPTS:
+        if total_attempts >= self.MAX_ATTEMPTS:
             self.block_ip(ip)
     
     def block_ip(self, ip: str) -> None:
         """Bloqueia IP temporariamente"""
         unblock_time = time.time() + self.BLACKLIST_DURATION
-        self.blacklist[ip] = unblock_time
+        self.storage.block(ip, unblock_time)
         
         security_logger.error(
             f"IP {ip} has been BLOCKED for {self.BLACKLIST_DURATION}s "
@@ -79,26 +82,29 @@ class IPBlacklist:
     
     def is_blocked(self, ip: str) -> bool:
         """Verifica se IP está bloqueado"""
-        if ip not in self.blacklist:
+        unblock_time = self.storage.blocked_until(ip)
+        if unblock_time is None:
             return False
         
         # Verificar se ainda está bloqueado
-        current_time = time.time()
-        if current_time < self.blacklist[ip]:
+        if time.time() < unblock_time:
             return True
         
         # Tempo de bloqueio expirou, remover da blacklist
-        del self.blacklist[ip]
-        self.failed_attempts[ip] = []
+        self.storage.clear(ip)
         security_logger.info(f"IP {ip} has been unblocked")
         return False
     
+    def retry_after(self, ip: str) -> int:
+        """Segundos restantes de bloqueio do IP (0 se não bloqueado)"""
+        unblock_time = self.storage.blocked_until(ip)
+        if unblock_time is None:
+            return 0
+        return max(int(unblock_time - time.time()), 0)
+    
     def clear_attempts(self, ip: str) -> None:
         """Limpa tentativas falhas após sucesso"""
-        if ip in self.failed_attempts:
-            del self.failed_attempts[ip]
-        if ip in self.blacklist:
-            del self.blacklist[ip]
+        self.storage.clear(ip)
 
 
 # Instância global da blacklist
@@ -119,7 +125,7 @@ async def check_ip_blacklist(request: Request) -> None:
             detail={
                 "error": "Too many failed attempts",
                 "message": "Your IP has been temporarily blocked due to excessive failed login attempts. Please try again later.",
-                "retry_after": int(ip_blacklist.blacklist[client_ip] - time.time())
+                "retry_after": ip_blacklist.retry_after(client_ip)
             }
         )
 
@@ -0,0 +1,53 @@
+"""
+Serialização JSON das respostas da API com orjson
+
+RespostaJSON é a classe de resposta padrão da aplicação (app/main.py).
+orjson serializa datetime, date, UUID e arrays NumPy nativamente; Decimal
+vira float e modelos Pydantic são convertidos com model_dump, como faria o
+jsonable_encoder do FastAPI.
+
+Listagens grandes podem devolver RespostaJSON diretamente a partir das
+linhas do banco, sem instanciar modelos ORM nem validar cada item contra o
+response_model (que continua declarado na rota para a documentação):
+
+    colunas = colunas_do_schema(Imovel, ImovelResponse)
+    return resposta_de_linhas(db.execute(select(*colunas)))
+"""
+from decimal import Decimal
+from typing import Any, List, Type
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy.engine import Result
+
+OPCOES_ORJSON = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _serializar(obj: Any) -> Any:
+    """Tipos que o orjson não conhece"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Tipo não serializável em JSON: {type(obj).__name__}")
+
+
+class RespostaJSON(JSONResponse):
+    """JSONResponse serializada com orjson"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_serializar, option=OPCOES_ORJSON)
+
+
+def colunas_do_schema(modelo: type, schema: Type[BaseModel]) -> List[Any]:
+    """Colunas da tabela de modelo que existem em schema, na ordem dos campos do schema"""
+    tabela = modelo.__table__
+    return [tabela.c[nome] for nome in schema.model_fields if nome in tabela.c]
+
+
+def resposta_de_linhas(resultado: Result, status_code: int = 200) -> RespostaJSON:
+    """Lista de objetos JSON (um por linha, chaves = nomes das colunas)"""
+    return RespostaJSON([dict(linha) for linha in resultado.mappings()], status_code=status_code)
@@ -0,0 +1,80 @@
+"""
+Ambiente Jinja2 compartilhado pelas páginas da aplicação
+
+Todas as rotas HTML usam a mesma instância de templates (um único cache de
+templates compilados). O bytecode compilado é gravado em
+settings.TEMPLATE_CACHE_DIR e reaproveitado entre reinicializações; fora do
+modo DEBUG os arquivos não são verificados a cada renderização (auto_reload
+desligado) e todos os templates são compilados na inicialização
+(precompilar_templates).
+
+As páginas são cascas estáticas: o conteúdo é carregado pelo JavaScript via
+API e o template só depende do título. pagina_estatica renderiza cada casca
+uma única vez e serve os bytes prontos nas requisições seguintes:
+
+    @app.get("/login", response_class=HTMLResponse)
+    async def login_page():
+        return pagina_estatica("login.html", title="Login")
+
+Templates que usem request, usuário ou outros dados da requisição devem
+continuar sendo renderizados com templates.TemplateResponse.
+"""
+import logging
+import os
+from typing import Any, Dict, Tuple
+
+from fastapi.responses import HTMLResponse
+from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache, TemplateError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DIRETORIO_TEMPLATES = "app/templates"
+
+
+def _cache_bytecode() -> FileSystemBytecodeCache:
+    os.makedirs(settings.TEMPLATE_CACHE_DIR, exist_ok=True)
+    return FileSystemBytecodeCache(settings.TEMPLATE_CACHE_DIR)
+
+
+templates = Jinja2Templates(
+    directory=DIRETORIO_TEMPLATES,
+    bytecode_cache=_cache_bytecode(),
+    auto_reload=settings.DEBUG,
+    cache_size=-1,  # Mantém todos os templates compilados em memória
+)
+
+# Cascas já renderizadas: (template, contexto) -> HTML
+_paginas: Dict[Tuple[str, Tuple[Tuple[str, Any], ...]], bytes] = {}
+
+
+def precompilar_templates() -> int:
+    """Compila todos os templates (e grava o bytecode) antes da primeira requisição"""
+    compilados = 0
+    for nome in templates.env.list_templates(extensions=["html"]):
+        try:
+            templates.get_template(nome)
+        except TemplateError as e:
+            logger.warning(f"Template {nome} não compilado: {e}")
+        else:
+            compilados += 1
+    return compilados
+
+
+def renderizar_pagina(nome: str, **contexto: Any) -> bytes:
+    """HTML de uma casca estática, renderizado uma vez por combinação de contexto"""
+    chave = (nome, tuple(sorted(contexto.items())))
+    html = _paginas.get(chave)
+    if html is None:
+        html = templates.get_template(nome).render(**contexto).encode("utf-8")
+        # Em DEBUG os templates podem mudar em disco: não guarda o resultado
+        if not settings.DEBUG:
+            _paginas[chave] = html
+    return html
+
+
+def pagina_estatica(nome: str, **contexto: Any) -> HTMLResponse:
+    """Resposta HTML com a casca pré-renderizada"""
+    return HTMLResponse(renderizar_pagina(nome, **contexto))
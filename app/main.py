@@ -2,12 +2,13 @@
 AlugueisV5 - Sistema de Gestão de Aluguéis
 Aplicação FastAPI principal
 """
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request, Depends
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.exceptions import HTTPException
+from starlette.concurrency import run_in_threadpool
 from app.core.auth import get_current_user_from_cookie
 from app.models.usuario import Usuario
 from slowapi.errors import RateLimitExceeded
@@ -15,9 +16,31 @@ from slowapi.errors import RateLimitExceeded
 # Importar configurações
 from app.core.config import settings
 
+# Serialização JSON com orjson
+from app.core.responses import RespostaJSON
+
+# Compressão gzip/brotli das respostas e dos estáticos
+from app.core.compressao import CompressaoMiddleware, EstaticosPrecomprimidos, precomprimir_estaticos
+
+# Ambiente Jinja2 compartilhado e cascas HTML pré-renderizadas
+from app.core.templates import templates, pagina_estatica, precompilar_templates
+
 # Importar rate limiter
 from app.core.rate_limiter import limiter, custom_rate_limit_handler
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Preparação feita uma vez na inicialização"""
+    if not settings.DEBUG:
+        # Compila os templates (e grava o bytecode) antes da primeira página
+        await run_in_threadpool(precompilar_templates)
+    if settings.COMPRESSAO_PRECOMPRIMIR_ESTATICOS:
+        # Gera os .gz/.br dos estáticos alterados desde a última inicialização
+        await run_in_threadpool(precomprimir_estaticos, "app/static")
+    yield
+
+
 # Criar aplicação FastAPI
 app = FastAPI(
     title=settings.APP_NAME,
@@ -25,6 +48,8 @@ app = FastAPI(
     version="5.0.0",
     docs_url="/docs" if settings.DEBUG else None,
     redoc_url="/redoc" if settings.DEBUG else None,
+    default_response_class=RespostaJSON,
+    lifespan=lifespan,
 )
 
 # Adicionar rate limiter à aplicação
@@ -40,6 +65,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Comprimir respostas (JSON das grids e listagens, páginas HTML)
+app.add_middleware(
+    CompressaoMiddleware,
+    tamanho_minimo=settings.COMPRESSAO_TAMANHO_MINIMO,
+    nivel_gzip=settings.COMPRESSAO_NIVEL_GZIP,
+    nivel_brotli=settings.COMPRESSAO_NIVEL_BROTLI,
+)
+
 # Exception handler para redirecionar 401 para login em rotas HTML
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
@@ -50,19 +83,16 @@ async def http_exception_handler(request: Request, exc: HTTPException):
         if "text/html" in accept:
             return RedirectResponse(url="/login", status_code=303)
     # Caso contrário, retorna erro JSON
-    return JSONResponse(
+    return RespostaJSON(
         status_code=exc.status_code,
         content={"detail": exc.detail}
     )
 
-# Montar arquivos estáticos
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
-
-# Configurar templates
-templates = Jinja2Templates(directory="app/templates")
+# Montar arquivos estáticos (servindo os .gz/.br pré-comprimidos quando existirem)
+app.mount("/static", EstaticosPrecomprimidos(directory="app/static"), name="static")
 
 # Importar e incluir rotas
-from app.routes import auth, proprietarios, imoveis, usuarios, alugueis, participacoes, participacoes_versoes, relatorios, transferencias, import_routes, dashboard
+from app.routes import auth, proprietarios, imoveis, usuarios, alugueis, participacoes, participacoes_versoes, relatorios, transferencias, import_routes, dashboard, busca
 app.include_router(auth.router)
 app.include_router(dashboard.router)
 app.include_router(proprietarios.router)
@@ -74,6 +104,7 @@ app.include_router(participacoes_versoes.router)
 app.include_router(relatorios.router)
 app.include_router(transferencias.router)
 app.include_router(import_routes.router)
+app.include_router(busca.router)
 
 @app.get("/", response_class=RedirectResponse)
 async def root():
@@ -86,75 +117,47 @@ async def test_page(request: Request):
     return templates.TemplateResponse("test.html", {"request": request})
 
 @app.get("/login", response_class=HTMLResponse)
-async def login_page(request: Request):
+async def login_page():
     """Página de login"""
-    return templates.TemplateResponse("login.html", {"request": request, "title": "Login"})
+    return pagina_estatica("login.html", title="Login")
 
 @app.get("/dashboard", response_class=HTMLResponse)
-async def dashboard_page(request: Request, current_user: Usuario = Depends(get_current_user_from_cookie)):
+async def dashboard_page(current_user: Usuario = Depends(get_current_user_from_cookie)):
     """Página do dashboard"""
-    return templates.TemplateResponse("dashboard.html", {
-        "request": request, 
-        "title": "Dashboard",
-        "user": current_user
-    })
+    return pagina_estatica("dashboard.html", title="Dashboard")
 
 @app.get("/proprietarios", response_class=HTMLResponse)
-async def proprietarios_page(request: Request, current_user: Usuario = Depends(get_current_user_from_cookie)):
+async def proprietarios_page(current_user: Usuario = Depends(get_current_user_from_cookie)):
     """Página de gestão de proprietários"""
-    return templates.TemplateResponse("proprietarios.html", {
-        "request": request,
-        "title": "Proprietários",
-        "user": current_user
-    })
+    return pagina_estatica("proprietarios.html", title="Proprietários")
 
 @app.get("/imoveis", response_class=HTMLResponse)
-async def imoveis_page(request: Request, current_user: Usuario = Depends(get_current_user_from_cookie)):
+async def imoveis_page(current_user: Usuario = Depends(get_current_user_from_cookie)):
     """Página de gestão de imóveis"""
-    return templates.TemplateResponse("imoveis.html", {
-        "request": request,
-        "title": "Imóveis",
-        "user": current_user
-    })
+    return pagina_estatica("imoveis.html", title="Imóveis")
 
 @app.get("/alugueis", response_class=HTMLResponse)
-async def alugueis_page(request: Request, current_user: Usuario = Depends(get_current_user_from_cookie)):
+async def alugueis_page(current_user: Usuario = Depends(get_current_user_from_cookie)):
     """Página de gestão de aluguéis"""
-    return templates.TemplateResponse("alugueis.html", {
-        "request": request,
-        "title": "Aluguéis",
-        "user": current_user
-    })
+    return pagina_estatica("alugueis.html", title="Aluguéis")
 
 @app.get("/usuarios", response_class=HTMLResponse)
-async def usuarios_page(request: Request, current_user: Usuario = Depends(get_current_user_from_cookie)):
+async def usuarios_page(current_user: Usuario = Depends(get_current_user_from_cookie)):
     """Página de gestão de usuários (apenas admins)"""
     if not current_user.is_admin:
         return RedirectResponse(url="/dashboard", status_code=303)
     
-    return templates.TemplateResponse("usuarios.html", {
-        "request": request,
-        "title": "Usuários",
-        "user": current_user
-    })
+    return pagina_estatica("usuarios.html", title="Usuários")
 
 @app.get("/participacoes", response_class=HTMLResponse)
-async def participacoes_page(request: Request, current_user: Usuario = Depends(get_current_user_from_cookie)):
+async def participacoes_page(current_user: Usuario = Depends(get_current_user_from_cookie)):
     """Página de gestão de participações"""
-    return templates.TemplateResponse("participacoes.html", {
-        "request": request,
-        "title": "Participações",
-        "user": current_user
-    })
+    return pagina_estatica("participacoes.html", title="Participações")
 
 @app.get("/relatorios", response_class=HTMLResponse)
-async def relatorios_page(request: Request, current_user: Usuario = Depends(get_current_user_from_cookie)):
+async def relatorios_page(current_user: Usuario = Depends(get_current_user_from_cookie)):
     """Página de relatórios financeiros"""
-    return templates.TemplateResponse("relatorios.html", {
-        "request": request,
-        "title": "Relatórios",
-        "user": current_user
-    })
+    return pagina_estatica("relatorios.html", title="Relatórios")
 
 @app.get("/health")
 async def health_check():
@@ -10,7 +10,10 @@ from app.models.participacao import Participacao
 from app.models.participacao_versao import ParticipacaoVersao
 from app.models.alias import Alias
 from app.models.transferencia import Transferencia
+from app.models.saldo_transferencia import SaldoTransferencia
 from app.models.permissao_financeira import PermissaoFinanceira
+from app.models.rate_limit import RateLimitContador
+from app.models.versao_dados import VersaoDados
 
 __all__ = [
     "Usuario",
@@ -21,7 +24,10 @@ __all__ = [
     "ParticipacaoVersao",
     "Alias",
     "Transferencia",
-    "PermissaoFinanceira"
+    "SaldoTransferencia",
+    "PermissaoFinanceira",
+    "RateLimitContador",
+    "VersaoDados"
 ]
 # from app.models.imovel import Imovel
 # from app.models.participacao import Participacao
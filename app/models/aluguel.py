@@ -2,6 +2,7 @@ from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, Date
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
+from app.core.data_version import rastrear_versao
 
 
 class AluguelMensal(Base):
@@ -38,3 +39,7 @@ class AluguelMensal(Base):
 
     def __repr__(self):
         return f"<AluguelMensal(id={self.id}, imovel_id={self.imovel_id}, mes='{self.mes_referencia}', total={self.valor_total})>"
+
+
+# Relatórios e caches são invalidados por mês de referência
+rastrear_versao(AluguelMensal, lambda aluguel: [f"alugueis_mensais:{aluguel.mes_referencia}"])
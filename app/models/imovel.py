@@ -2,6 +2,7 @@ from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, Date
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
+from app.core.data_version import rastrear_versao
 
 
 class Imovel(Base):
@@ -41,3 +42,6 @@ class Imovel(Base):
 
     def __repr__(self):
         return f"<Imovel(id={self.id}, nome='{self.nome}')>"
+
+
+rastrear_versao(Imovel)
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Date, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
+from app.core.data_version import rastrear_versao
 
 
 class Participacao(Base):
@@ -17,6 +18,13 @@ class Participacao(Base):
     # Valores
     percentual = Column(Float, nullable=False)  # 0-100
     
+    # Vigência [vigente_de, vigente_ate): NULL em vigente_de = desde sempre,
+    # NULL em vigente_ate = participação atual. Aplicar uma versão encerra as
+    # participações alteradas em vez de sobrescrevê-las, preservando o rateio
+    # dos meses anteriores.
+    vigente_de = Column(Date, nullable=True)
+    vigente_ate = Column(Date, nullable=True)
+    
     # Observações
     observacoes = Column(String(500), nullable=True)
     
@@ -28,5 +36,14 @@ class Participacao(Base):
     imovel = relationship("Imovel", back_populates="participacoes")
     proprietario = relationship("Proprietario", back_populates="participacoes")
 
+    __table_args__ = (
+        # Busca da matriz vigente em uma data (por imóvel e intervalo)
+        Index("ix_participacoes_vigencia", "imovel_id", "vigente_de", "vigente_ate"),
+    )
+
     def __repr__(self):
         return f"<Participacao(id={self.id}, imovel_id={self.imovel_id}, proprietario_id={self.proprietario_id}, percentual={self.percentual}%)>"
+
+
+# Alterar participações muda o rateio de todos os extratos
+rastrear_versao(Participacao)
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, LargeBinary, DateTime, ForeignKey
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 from app.core.database import Base
+from app.core.data_version import rastrear_versao
 
 
 class ParticipacaoVersao(Base):
@@ -13,8 +14,10 @@ class ParticipacaoVersao(Base):
     # Nome/descrição da versão
     nome = Column(String(200), nullable=False)
     
-    # JSON com os dados da tabela: {imovel_id: {proprietario_id: percentual}}
-    dados_json = Column(Text, nullable=False)
+    # Matriz {imovel_id: {proprietario_id: percentual}} em COO comprimido
+    # (app/core/matriz_esparsa.py); só é carregada quando acessada
+    dados_coo = deferred(Column(LargeBinary, nullable=False))
+    total_celulas = Column(Integer, nullable=False, default=0)
     
     # Observações
     observacoes = Column(String(500), nullable=True)
@@ -29,3 +32,6 @@ class ParticipacaoVersao(Base):
 
     def __repr__(self):
         return f"<ParticipacaoVersao(id={self.id}, nome={self.nome})>"
+
+
+rastrear_versao(ParticipacaoVersao)
@@ -2,6 +2,7 @@ from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
+from app.core.data_version import rastrear_versao
 
 
 class PermissaoFinanceira(Base):
@@ -31,3 +32,7 @@ class PermissaoFinanceira(Base):
 
     def __repr__(self):
         return f"<PermissaoFinanceira(id={self.id}, usuario_id={self.usuario_id}, tipo='{self.tipo_permissao}')>"
+
+
+# Conceder ou revogar permissões muda o que cada usuário enxerga
+rastrear_versao(PermissaoFinanceira)
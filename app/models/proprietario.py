@@ -2,6 +2,7 @@ from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
+from app.core.data_version import rastrear_versao
 
 
 class Proprietario(Base):
@@ -60,3 +61,6 @@ class Proprietario(Base):
 
     def __repr__(self):
         return f"<Proprietario(id={self.id}, nome='{self.nome}', tipo='{self.tipo_pessoa}')>"
+
+
+rastrear_versao(Proprietario)
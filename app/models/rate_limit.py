@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Float
+from app.core.database import Base
+
+
+class RateLimitContador(Base):
+    """Contador compartilhado de rate limiting e bloqueio de IPs entre workers"""
+    __tablename__ = "rate_limit_contadores"
+
+    # Chave do contador (ex: "falhas:10.0.0.1", "bloqueio:10.0.0.1" ou chave do slowapi)
+    chave = Column(String(255), primary_key=True)
+    
+    # Início do bucket da janela deslizante (epoch em segundos); 0 para contadores simples
+    inicio = Column(Integer, primary_key=True, default=0)
+    
+    # Quantidade de eventos no bucket
+    contagem = Column(Integer, nullable=False, default=0)
+    
+    # Momento (epoch) em que a entrada deixa de valer e pode ser removida
+    expira_em = Column(Float, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<RateLimitContador(chave='{self.chave}', inicio={self.inicio}, contagem={self.contagem})>"
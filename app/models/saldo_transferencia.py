@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from app.core.database import Base
+
+
+class SaldoTransferencia(Base):
+    """Saldo mensal de transferências confirmadas de um usuário (livro-razão)"""
+    __tablename__ = "saldos_transferencias"
+
+    usuario_id = Column(Integer, ForeignKey("usuarios.id"), primary_key=True)
+    
+    # Período (formato: YYYY-MM)
+    mes_referencia = Column(String(7), primary_key=True)
+    
+    # Saldo final do mês anterior com movimento
+    saldo_inicial = Column(Float, nullable=False, default=0.0)
+    
+    # Transferências confirmadas recebidas e enviadas no mês
+    entradas = Column(Float, nullable=False, default=0.0)
+    saidas = Column(Float, nullable=False, default=0.0)
+    
+    # saldo_inicial + entradas - saidas
+    saldo_final = Column(Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f"<SaldoTransferencia(usuario_id={self.usuario_id}, mes_referencia='{self.mes_referencia}', saldo_final={self.saldo_final})>"
@@ -2,6 +2,7 @@ from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, Date
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
+from app.core.data_version import rastrear_versao
 
 
 class Transferencia(Base):
@@ -37,3 +38,7 @@ class Transferencia(Base):
 
     def __repr__(self):
         return f"<Transferencia(id={self.id}, origem_id={self.origem_id}, destino_id={self.destino_id}, valor={self.valor})>"
+
+
+# Extratos de proprietários são invalidados por mês de referência
+rastrear_versao(Transferencia, lambda transferencia: [f"transferencias:{transferencia.mes_referencia}"])
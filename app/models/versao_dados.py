@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from app.core.database import Base
+
+
+class VersaoDados(Base):
+    """Contador de versão de um conjunto de dados, incrementado a cada alteração"""
+    __tablename__ = "versoes_dados"
+
+    # Escopo versionado (ex: "alugueis_mensais" ou "alugueis_mensais:2025-10")
+    escopo = Column(String(100), primary_key=True)
+    
+    # Incrementado sempre que uma linha do escopo é criada, alterada ou removida
+    versao = Column(Integer, nullable=False, default=0)
+    
+    atualizado_em = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<VersaoDados(escopo='{self.escopo}', versao={self.versao})>"
@@ -1,19 +1,26 @@
 """Rotas para gestão de aluguéis mensais"""
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func, extract
-from typing import Optional, List, Dict
+from sqlalchemy import and_, or_, func, extract, select, update
 from collections import defaultdict
+from typing import Any, Optional, List, Dict, Tuple
 from datetime import datetime, date
 
+import numpy as np
+
 from app.core.database import get_db
+from app.core.http_cache import cache_condicional
 from app.core.auth import get_current_user_from_cookie, require_admin
+from app.core.responses import resposta_de_linhas
+from app.core.grid_format import PADRAO_FORMATO_GRADE, grade_colunar, responder_grade
 from app.models.usuario import Usuario
 from app.models.aluguel import AluguelMensal
 from app.models.imovel import Imovel
 from app.models.participacao import Participacao
 from app.models.proprietario import Proprietario
-from pydantic import BaseModel, Field
+from app.services.participacao_service import condicao_vigencia, data_de_referencia
+from app.services.permissao_service import ESCOPOS_PERMISSAO, PermissaoService
+from pydantic import BaseModel, Field, field_validator
 
 
 router = APIRouter(prefix="/api/alugueis", tags=["alugueis"])
@@ -32,9 +39,34 @@ class AluguelCreate(AluguelBase):
 
 
 class AluguelUpdate(BaseModel):
+    # Campos omitidos não são alterados (exclude_unset); null explícito é inválido
     valor_total: Optional[float] = None
     pago: Optional[bool] = None
 
+    @field_validator("valor_total", "pago")
+    @classmethod
+    def nao_nulo(cls, valor):
+        if valor is None:
+            raise ValueError("não pode ser nulo")
+        return valor
+
+
+class AluguelBulkItem(AluguelUpdate):
+    id: int
+
+
+class AluguelBulkFiltro(BaseModel):
+    mes_referencia: str = Field(..., pattern=r'^\d{4}-\d{2}$')  # YYYY-MM
+    imovel_ids: Optional[List[int]] = None
+
+
+class AluguelBulkRequest(BaseModel):
+    # Alterações por aluguel
+    itens: List[AluguelBulkItem] = []
+    # Ou: as mesmas alterações em todos os aluguéis do filtro
+    filtro: Optional[AluguelBulkFiltro] = None
+    alteracoes: Optional[AluguelUpdate] = None
+
 
 class AluguelResponse(AluguelBase):
     id: int
@@ -84,6 +116,7 @@ def _format_mes_header(mes_referencia: Optional[str]) -> str:
 
 
 @router.get("/", response_model=List[AluguelResponse])
+@cache_condicional("alugueis_mensais", "imoveis", *ESCOPOS_PERMISSAO)
 async def listar_alugueis(
     mes_referencia: Optional[str] = None,
     imovel_id: Optional[int] = None,
@@ -99,152 +132,211 @@ async def listar_alugueis(
     - Admins veem todos
     - Usuários veem apenas seus imóveis
     """
-    # Usar joinedload para prevenir N+1 ao acessar aluguel.imovel.nome e aluguel.imovel.endereco
-    query = db.query(AluguelMensal).join(Imovel).options(joinedload(AluguelMensal.imovel))
+    # Colunas do aluguel e do imóvel em uma única consulta, sem instanciar modelos
+    query = select(
+        AluguelMensal.imovel_id,
+        AluguelMensal.mes_referencia,
+        AluguelMensal.valor_total,
+        AluguelMensal.pago,
+        AluguelMensal.id,
+        AluguelMensal.created_at,
+        Imovel.nome.label("imovel_nome"),
+        Imovel.endereco.label("imovel_endereco")
+    ).join(Imovel, AluguelMensal.imovel_id == Imovel.id)
     
     # Filtro de permissão
-    if not current_user.is_admin:
-        query = query.filter(Imovel.proprietario_id == current_user.id)
+    query = query.where(*PermissaoService.escopo(db, current_user).filtro(AluguelMensal.imovel_id))
     
     # Filtros
     if mes_referencia:
-        query = query.filter(AluguelMensal.mes_referencia == mes_referencia)
+        query = query.where(AluguelMensal.mes_referencia == mes_referencia)
     
     if imovel_id:
-        query = query.filter(AluguelMensal.imovel_id == imovel_id)
+        query = query.where(AluguelMensal.imovel_id == imovel_id)
     
     if ano:
-        query = query.filter(AluguelMensal.mes_referencia.like(f"{ano}%"))
+        query = query.where(AluguelMensal.mes_referencia.like(f"{ano}%"))
     
     if pago is not None:
-        query = query.filter(AluguelMensal.pago == pago)
+        query = query.where(AluguelMensal.pago == pago)
     
     # Ordenar por mês mais recente primeiro
     query = query.order_by(AluguelMensal.mes_referencia.desc())
     
-    alugueis = query.offset(skip).limit(limit).all()
-    
-    # Adicionar informações do imóvel
-    result = []
-    for aluguel in alugueis:
-        aluguel_dict = {
-            "id": aluguel.id,
-            "imovel_id": aluguel.imovel_id,
-            "mes_referencia": aluguel.mes_referencia,
-            "valor_total": aluguel.valor_total,
-            "pago": aluguel.pago,
-            "created_at": aluguel.created_at,
-            "imovel_nome": aluguel.imovel.nome if aluguel.imovel else None,
-            "imovel_endereco": aluguel.imovel.endereco if aluguel.imovel else None
-        }
-        result.append(aluguel_dict)
-    
-    return result
+    return resposta_de_linhas(db.execute(query.offset(skip).limit(limit)))
+
+
+def _matriz_distribuicao(
+    imovel_ids: List[int],
+    valores_totais: List[float],
+    participacoes: List[tuple]
+):
+    """
+    Distribui os valores de cada imóvel entre os proprietários de uma vez
+
+    Monta a matriz imóvel × proprietário dos percentuais e a multiplica pelos
+    valores totais (diag(valores) @ percentuais, feito por broadcasting),
+    arredondando em centavos. Retorna (ids dos proprietários na ordem das
+    colunas, matriz de valores, máscara das participações existentes).
+    """
+    linha_do_imovel = {imovel_id: i for i, imovel_id in enumerate(imovel_ids)}
+    proprietario_ids = sorted({prop_id for _, prop_id, _ in participacoes})
+    coluna_do_proprietario = {prop_id: j for j, prop_id in enumerate(proprietario_ids)}
+
+    percentuais = np.zeros((len(imovel_ids), len(proprietario_ids)))
+    mascara = np.zeros(percentuais.shape, dtype=bool)
+    if participacoes:
+        linhas = np.fromiter((linha_do_imovel[imovel_id] for imovel_id, _, _ in participacoes), dtype=np.intp)
+        colunas = np.fromiter((coluna_do_proprietario[prop_id] for _, prop_id, _ in participacoes), dtype=np.intp)
+        np.add.at(percentuais, (linhas, colunas), [percentual or 0 for _, _, percentual in participacoes])
+        mascara[linhas, colunas] = True
+
+    valores = np.asarray(valores_totais, dtype=float)
+    distribuicao = np.rint(valores[:, None] * percentuais) / 100
+    return proprietario_ids, distribuicao, mascara
 
 
 @router.get("/grid-data", response_model=AluguelGridResponse)
+@cache_condicional("alugueis_mensais", "imoveis", *ESCOPOS_PERMISSAO)
 async def obter_grid_alugueis(
     mes_referencia: Optional[str] = None,
     imovel_id: Optional[int] = None,
     ano: Optional[int] = None,
     mes_like: Optional[str] = None,
     pago: Optional[bool] = None,
+    formato: str = Query("linhas", pattern=PADRAO_FORMATO_GRADE),
     current_user: Usuario = Depends(get_current_user_from_cookie),
     db: Session = Depends(get_db)
 ):
-    """Retorna dados agregados para exibição dos aluguéis em formato de planilha."""
-
-    query = db.query(AluguelMensal).join(Imovel).options(joinedload(AluguelMensal.imovel))
+    """
+    Retorna dados agregados para exibição dos aluguéis em formato de planilha.
 
-    if not current_user.is_admin:
-        query = query.filter(Imovel.proprietario_id == current_user.id)
+    Usa o aluguel mais recente de cada imóvel dentro dos filtros. Com
+    formato=colunar (ou msgpack) a resposta segue app.core.grid_format: uma
+    lista por atributo das linhas e a distribuição em coordenadas.
+    """
+    filtros = PermissaoService.escopo(db, current_user).filtro(AluguelMensal.imovel_id)
 
     if mes_referencia:
-        query = query.filter(AluguelMensal.mes_referencia == mes_referencia)
+        filtros.append(AluguelMensal.mes_referencia == mes_referencia)
 
     if imovel_id:
-        query = query.filter(AluguelMensal.imovel_id == imovel_id)
+        filtros.append(AluguelMensal.imovel_id == imovel_id)
 
     if ano:
-        query = query.filter(AluguelMensal.mes_referencia.like(f"{ano}%"))
+        filtros.append(AluguelMensal.mes_referencia.like(f"{ano}%"))
 
     if mes_like:
-        query = query.filter(AluguelMensal.mes_referencia.like(f"%{mes_like}"))
+        filtros.append(AluguelMensal.mes_referencia.like(f"%{mes_like}"))
 
     if pago is not None:
-        query = query.filter(AluguelMensal.pago == pago)
-
-    alugueis = query.order_by(AluguelMensal.mes_referencia.desc(), Imovel.nome.asc()).all()
-
-    # Agrupar aluguéis por imóvel, pegando o mais recente de cada um
-    alugueis_por_imovel: Dict[int, AluguelMensal] = {}
-    for aluguel in alugueis:
-        if aluguel.imovel_id not in alugueis_por_imovel:
-            alugueis_por_imovel[aluguel.imovel_id] = aluguel
+        filtros.append(AluguelMensal.pago == pago)
 
-    # Usar apenas um aluguel por imóvel (o mais recente filtrado)
-    alugueis_unicos = list(alugueis_por_imovel.values())
-
-    mes_ref_para_header = mes_referencia or (alugueis_unicos[0].mes_referencia if alugueis_unicos else None)
+    # Um aluguel por imóvel (o mais recente filtrado), escolhido no banco
+    ordem = func.row_number().over(
+        partition_by=AluguelMensal.imovel_id,
+        order_by=(AluguelMensal.mes_referencia.desc(), AluguelMensal.id.desc())
+    )
+    recentes = select(
+        AluguelMensal.id,
+        AluguelMensal.imovel_id,
+        Imovel.nome,
+        AluguelMensal.mes_referencia,
+        AluguelMensal.valor_total,
+        ordem.label("ordem")
+    ).join(Imovel, AluguelMensal.imovel_id == Imovel.id).where(*filtros).subquery("recentes")
+
+    alugueis = db.execute(
+        select(
+            recentes.c.id,
+            recentes.c.imovel_id,
+            recentes.c.nome,
+            recentes.c.mes_referencia,
+            recentes.c.valor_total
+        ).where(recentes.c.ordem == 1).order_by(recentes.c.mes_referencia.desc(), recentes.c.nome.asc())
+    ).all()
+
+    mes_ref_para_header = mes_referencia or (alugueis[0].mes_referencia if alugueis else None)
     mes_label = _format_mes_header(mes_ref_para_header)
 
-    if not alugueis_unicos:
-        return AluguelGridResponse(
+    aluguel_ids = [aluguel.id for aluguel in alugueis]
+    imovel_ids = [aluguel.imovel_id for aluguel in alugueis]
+    imovel_nomes = [aluguel.nome for aluguel in alugueis]
+    meses_referencia = [aluguel.mes_referencia for aluguel in alugueis]
+    valores_totais = [float(aluguel.valor_total or 0) for aluguel in alugueis]
+
+    # Participações vigentes na data de referência de cada aluguel (meses
+    # passados usam os percentuais da época)
+    participacoes = []
+    nomes_proprietarios: Dict[int, str] = {}
+    if aluguel_ids:
+        for part_imovel_id, prop_id, nome, percentual in db.execute(
+            select(
+                Participacao.imovel_id,
+                Participacao.proprietario_id,
+                Proprietario.nome,
+                Participacao.percentual
+            ).select_from(AluguelMensal).join(
+                Participacao,
+                and_(
+                    Participacao.imovel_id == AluguelMensal.imovel_id,
+                    condicao_vigencia(data_de_referencia(AluguelMensal))
+                )
+            ).join(
+                Proprietario, Participacao.proprietario_id == Proprietario.id
+            ).where(AluguelMensal.id.in_(aluguel_ids))
+        ):
+            participacoes.append((part_imovel_id, prop_id, percentual))
+            nomes_proprietarios[prop_id] = nome
+
+    proprietario_ids, distribuicao, mascara = _matriz_distribuicao(imovel_ids, valores_totais, participacoes)
+
+    # Colunas em ordem alfabética de proprietário
+    ordem_colunas = sorted(range(len(proprietario_ids)), key=lambda j: nomes_proprietarios[proprietario_ids[j]].lower())
+    proprietarios_ordenados = [
+        {"id": str(proprietario_ids[j]), "nome": nomes_proprietarios[proprietario_ids[j]]}
+        for j in ordem_colunas
+    ]
+    col_headers = [mes_label, "Valor Total"] + [prop["nome"] for prop in proprietarios_ordenados]
+
+    if formato != "linhas":
+        # A distribuição é esparsa (cada imóvel tem poucos proprietários):
+        # só as participações existentes vão na resposta
+        linhas_dist, colunas_dist = np.nonzero(mascara[:, ordem_colunas])
+        return responder_grade(grade_colunar(
+            linhas={
+                "aluguel_id": aluguel_ids,
+                "imovel_id": imovel_ids,
+                "imovel_nome": imovel_nomes,
+                "mes_referencia": meses_referencia,
+                "valor_total": valores_totais
+            },
+            colunas=[{"id": proprietario_ids[j], "nome": nomes_proprietarios[proprietario_ids[j]]} for j in ordem_colunas],
+            linha=linhas_dist.tolist(),
+            coluna=colunas_dist.tolist(),
+            valor=distribuicao[:, ordem_colunas][linhas_dist, colunas_dist].tolist(),
             mes_referencia=mes_referencia,
             mes_label=mes_label,
-            col_headers=[mes_label, "Valor Total"],
-            proprietarios=[],
-            rows=[]
-        )
-
-    imovel_ids = {aluguel.imovel_id for aluguel in alugueis_unicos if aluguel.imovel_id}
-    participacoes_por_imovel = defaultdict(list)
-    proprietarios_dict: Dict[int, str] = {}
-
-    if imovel_ids:
-        participacoes = (
-            db.query(Participacao)
-            .options(joinedload(Participacao.proprietario))
-            .filter(Participacao.imovel_id.in_(imovel_ids))
-            .all()
-        )
-
-        for participacao in participacoes:
-            participacoes_por_imovel[participacao.imovel_id].append(participacao)
-            if participacao.proprietario and participacao.proprietario_id:
-                proprietarios_dict[participacao.proprietario_id] = participacao.proprietario.nome
-
-    proprietarios_ordenados = sorted(
-        (
-            {"id": str(prop_id), "nome": nome}
-            for prop_id, nome in proprietarios_dict.items()
-        ),
-        key=lambda item: item["nome"].lower()
-    )
+            col_headers=col_headers
+        ), formato)
 
+    valores_linhas = distribuicao.tolist()
     linhas: List[AluguelDistribuicaoRow] = []
-
-    for aluguel in alugueis_unicos:
-        valor_total = float(aluguel.valor_total or 0)
-        distribuicao: Dict[int, float] = {}
-
-        for participacao in participacoes_por_imovel.get(aluguel.imovel_id, []):
-            percentual = participacao.percentual or 0
-            distribuicao[participacao.proprietario_id] = round(valor_total * (percentual / 100), 2)
-
+    for i, linha_mascara in enumerate(mascara.tolist()):
         linhas.append(
             AluguelDistribuicaoRow(
-                aluguel_id=aluguel.id,
-                imovel_id=aluguel.imovel_id,
-                imovel_nome=aluguel.imovel.nome if aluguel.imovel else "Imóvel não cadastrado",
-                mes_referencia=aluguel.mes_referencia,
-                valor_total=valor_total,
-                distribuicao=distribuicao
+                aluguel_id=aluguel_ids[i],
+                imovel_id=imovel_ids[i],
+                imovel_nome=imovel_nomes[i],
+                mes_referencia=meses_referencia[i],
+                valor_total=valores_totais[i],
+                distribuicao={
+                    proprietario_ids[j]: valores_linhas[i][j]
+                    for j, existe in enumerate(linha_mascara) if existe
+                }
             )
         )
 
-    col_headers = [mes_label, "Valor Total"] + [prop["nome"] for prop in proprietarios_ordenados]
-
     return AluguelGridResponse(
         mes_referencia=mes_referencia,
         mes_label=mes_label,
@@ -274,7 +366,7 @@ async def criar_aluguel(
         )
     
     # Verificar permissão
-    if not current_user.is_admin and imovel.proprietario_id != current_user.id:
+    if not PermissaoService.escopo(db, current_user).pode_editar(imovel.id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Você não tem permissão para criar aluguel neste imóvel"
@@ -319,6 +411,107 @@ async def criar_aluguel(
     )
 
 
+def _aplicar_alteracoes(db: Session, linhas: List[Dict[str, Any]]) -> None:
+    """
+    Grava alterações de mesmo formato (mesmos campos) com um único UPDATE
+
+    Valores iguais em todas as linhas: UPDATE ... WHERE id IN (...); valores
+    diferentes: UPDATE por chave primária executado em lote (executemany).
+    """
+    valores = {campo: valor for campo, valor in linhas[0].items() if campo != "id"}
+    if all({c: v for c, v in linha.items() if c != "id"} == valores for linha in linhas):
+        db.execute(
+            update(AluguelMensal)
+            .where(AluguelMensal.id.in_([linha["id"] for linha in linhas]))
+            .values(**valores)
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        db.execute(update(AluguelMensal), linhas)
+
+
+@router.post("/bulk")
+async def atualizar_alugueis_em_massa(
+    dados: AluguelBulkRequest,
+    current_user: Usuario = Depends(get_current_user_from_cookie),
+    db: Session = Depends(get_db)
+):
+    """
+    Atualiza vários aluguéis em uma única transação
+
+    - itens: alterações por id (ex: marcar como pago, corrigir valor)
+    - filtro + alteracoes: as mesmas alterações em todos os aluguéis do mês
+      (opcionalmente restritos a alguns imóveis)
+
+    Existência e permissão são verificadas para o conjunto inteiro; cada
+    formato de alteração vira um único UPDATE. O resultado é informado por
+    item; itens inválidos não impedem a gravação dos demais.
+    """
+    alteracoes = dados.alteracoes.model_dump(exclude_unset=True) if dados.alteracoes else {}
+    if not dados.itens and dados.filtro is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Informe os itens ou um filtro"
+        )
+    if dados.filtro is not None and not alteracoes:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Informe as alterações a aplicar nos aluguéis do filtro"
+        )
+
+    escopo = PermissaoService.escopo(db, current_user)
+
+    # Filtro: primeiro, para que as alterações por item prevaleçam
+    ids_filtro: List[int] = []
+    if dados.filtro is not None:
+        consulta = select(AluguelMensal.id).where(AluguelMensal.mes_referencia == dados.filtro.mes_referencia)
+        if dados.filtro.imovel_ids is not None:
+            consulta = consulta.where(AluguelMensal.imovel_id.in_(dados.filtro.imovel_ids))
+        consulta = consulta.where(*escopo.filtro_edicao(AluguelMensal.imovel_id))
+        ids_filtro = list(db.execute(consulta.order_by(AluguelMensal.id)).scalars())
+        if ids_filtro:
+            _aplicar_alteracoes(db, [{"id": aluguel_id, **alteracoes} for aluguel_id in ids_filtro])
+
+    # Itens: existência de todos os ids em uma consulta; permissão pelo escopo
+    ids = {item.id for item in dados.itens}
+    imovel_do_aluguel: Dict[int, int] = {}
+    if ids:
+        imovel_do_aluguel = dict(db.execute(
+            select(AluguelMensal.id, AluguelMensal.imovel_id).where(AluguelMensal.id.in_(ids))
+        ).all())
+
+    resultados = []
+    por_formato: Dict[Tuple[str, ...], List[Dict[str, Any]]] = defaultdict(list)
+    vistos = set()
+    for item in dados.itens:
+        campos = item.model_dump(exclude_unset=True, exclude={"id"})
+        if item.id in vistos:
+            resultados.append({"id": item.id, "status": "erro", "detail": "Aluguel repetido na requisição"})
+        elif item.id not in imovel_do_aluguel:
+            resultados.append({"id": item.id, "status": "erro", "detail": "Aluguel não encontrado"})
+        elif not escopo.pode_editar(imovel_do_aluguel[item.id]):
+            resultados.append({"id": item.id, "status": "erro", "detail": "Você não tem permissão para editar este aluguel"})
+        elif not campos:
+            resultados.append({"id": item.id, "status": "ignorado", "detail": "Nenhuma alteração informada"})
+        else:
+            por_formato[tuple(sorted(campos))].append({"id": item.id, **campos})
+            resultados.append({"id": item.id, "status": "atualizado"})
+        vistos.add(item.id)
+
+    for linhas in por_formato.values():
+        _aplicar_alteracoes(db, linhas)
+
+    db.commit()
+
+    return {
+        "message": "Aluguéis atualizados com sucesso",
+        "atualizados": len(set(ids_filtro) | {r["id"] for r in resultados if r["status"] == "atualizado"}),
+        "erros": sum(1 for r in resultados if r["status"] == "erro"),
+        "itens": resultados,
+        "filtro": {"atualizados": len(ids_filtro), "ids": ids_filtro} if dados.filtro is not None else None
+    }
+
+
 @router.get("/{aluguel_id}", response_model=AluguelResponse)
 async def obter_aluguel(
     aluguel_id: int,
@@ -335,13 +528,11 @@ async def obter_aluguel(
         )
     
     # Verificar permissão
-    if not current_user.is_admin:
-        imovel = db.query(Imovel).filter(Imovel.id == aluguel.imovel_id).first()
-        if imovel.proprietario_id != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Você não tem permissão para acessar este aluguel"
-            )
+    if not PermissaoService.escopo(db, current_user).pode_ver(aluguel.imovel_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Você não tem permissão para acessar este aluguel"
+        )
     
     return AluguelResponse(
         **{
@@ -374,13 +565,11 @@ async def atualizar_aluguel(
         )
     
     # Verificar permissão
-    if not current_user.is_admin:
-        imovel = db.query(Imovel).filter(Imovel.id == aluguel.imovel_id).first()
-        if imovel.proprietario_id != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Você não tem permissão para editar este aluguel"
-            )
+    if not PermissaoService.escopo(db, current_user).pode_editar(aluguel.imovel_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Você não tem permissão para editar este aluguel"
+        )
     
     # Atualizar campos
     update_data = aluguel_data.model_dump(exclude_unset=True)
@@ -437,11 +626,10 @@ async def obter_estatisticas(
     db: Session = Depends(get_db)
 ):
     """Retorna estatísticas de aluguéis"""
-    query = db.query(AluguelMensal).join(Imovel)
+    query = db.query(AluguelMensal)
     
     # Filtro de permissão
-    if not current_user.is_admin:
-        query = query.filter(Imovel.proprietario_id == current_user.id)
+    query = query.filter(*PermissaoService.escopo(db, current_user).filtro(AluguelMensal.imovel_id))
     
     # Filtro de ano
     if ano:
@@ -0,0 +1,45 @@
+"""
+Rota de busca unificada (proprietários, imóveis e usuários)
+"""
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.core.http_cache import cache_condicional
+from app.core.auth import get_current_user_from_cookie
+from app.models.usuario import Usuario
+from app.services.busca_service import CAMPOS_BUSCA, BuscaService
+
+router = APIRouter(prefix="/api/busca", tags=["busca"])
+
+
+@router.get("/")
+@cache_condicional("proprietarios", "imoveis", "usuarios")
+async def buscar(
+    q: str = Query(..., min_length=2, max_length=100, description="Texto a buscar"),
+    tipos: Optional[List[str]] = Query(None, description="proprietarios, imoveis e/ou usuarios (padrão: todos)"),
+    limite: int = Query(10, ge=1, le=50, description="Máximo de resultados por tipo"),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user_from_cookie)
+):
+    """
+    Busca proprietários, imóveis e usuários em uma única chamada
+
+    Ignora maiúsculas e acentos e tolera erros de digitação. Cada tipo traz
+    os resultados mais relevantes primeiro, com a relevância (0 a 1).
+    Usuários só aparecem para administradores.
+
+    - **q**: Texto a buscar (nome, razão social, e-mail, CPF/CNPJ, endereço, cidade)
+    - **tipos**: Opcional - restringe os tipos (ex: ?tipos=imoveis&tipos=proprietarios)
+    - **limite**: Máximo de resultados por tipo
+    """
+    tipos = tipos or list(CAMPOS_BUSCA)
+    invalidos = [tipo for tipo in tipos if tipo not in CAMPOS_BUSCA]
+    if invalidos:
+        raise HTTPException(status_code=400, detail=f"Tipo de busca inválido: {', '.join(invalidos)}")
+    if not current_user.is_admin:
+        tipos = [tipo for tipo in tipos if tipo != "usuarios"]
+
+    return {"termo": q, **BuscaService.buscar(db, q, tipos, limite)}
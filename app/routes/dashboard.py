@@ -14,6 +14,7 @@ from app.models.usuario import Usuario
 from app.models.imovel import Imovel
 from app.models.aluguel import AluguelMensal
 from app.models.proprietario import Proprietario
+from app.services.permissao_service import PermissaoService
 from pydantic import BaseModel
 
 
@@ -65,8 +66,7 @@ def _build_base_query(db: Session, current_user: Usuario, ano_filtro: int, mes_f
     query = db.query(AluguelMensal)
     
     # Filtro de permissões
-    if not current_user.is_admin:
-        query = query.join(Imovel).filter(Imovel.proprietario_id == current_user.id)
+    query = query.filter(*PermissaoService.escopo(db, current_user).filtro(AluguelMensal.imovel_id))
     
     # Filtrar por ano
     query = query.filter(AluguelMensal.mes_referencia.like(f"{ano_filtro}%"))
@@ -123,9 +123,8 @@ async def get_dashboard_stats(
     ).first()
     
     # Estatísticas de imóveis
-    query_imoveis = db.query(Imovel)
-    if not current_user.is_admin:
-        query_imoveis = query_imoveis.filter(Imovel.proprietario_id == current_user.id)
+    escopo = PermissaoService.escopo(db, current_user)
+    query_imoveis = db.query(Imovel).filter(*escopo.filtro(Imovel.id))
     
     total_imoveis = query_imoveis.count()
     imoveis_ativos = query_imoveis.filter(Imovel.is_active == True).count()
@@ -135,7 +134,10 @@ async def get_dashboard_stats(
     ).count()
     
     # Total de proprietários
-    total_proprietarios = db.query(Proprietario).count()
+    query_proprietarios = db.query(Proprietario)
+    if escopo.proprietarios is not None:
+        query_proprietarios = query_proprietarios.filter(Proprietario.id.in_(escopo.proprietarios))
+    total_proprietarios = query_proprietarios.count()
     
     # Calcular valores
     valor_mes = float(stats_mes.valor_mes or 0)
@@ -183,8 +185,7 @@ async def get_evolution_data(
     )
     
     # Filtro de permissões
-    if not current_user.is_admin:
-        query = query.join(Imovel).filter(Imovel.proprietario_id == current_user.id)
+    query = query.filter(*PermissaoService.escopo(db, current_user).filtro(AluguelMensal.imovel_id))
     
     query = query.filter(
         AluguelMensal.mes_referencia.like(f"{ano_filtro}%")
@@ -247,8 +248,7 @@ async def get_distribution_data(
     )
     
     # Filtro de permissões
-    if not current_user.is_admin:
-        query = query.filter(Imovel.proprietario_id == current_user.id)
+    query = query.filter(*PermissaoService.escopo(db, current_user).filtro(Imovel.id))
     
     query = query.filter(
         AluguelMensal.mes_referencia.like(f"{ano_filtro}%")
@@ -2,20 +2,24 @@
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, func
+from sqlalchemy import func, select
 
 from app.core.database import get_db
+from app.core.http_cache import cache_condicional
 from app.core.auth import get_current_user_from_cookie, require_admin
+from app.core.responses import colunas_do_schema, resposta_de_linhas
 from app.models.usuario import Usuario
 from app.models.imovel import Imovel
 from app.models.proprietario import Proprietario
 from app.schemas.schemas import ImovelCreate, ImovelUpdate, ImovelResponse
+from app.services.busca_service import BuscaService
 
 
 router = APIRouter(prefix="/api/imoveis", tags=["imoveis"])
 
 
 @router.get("/", response_model=List[ImovelResponse])
+@cache_condicional("imoveis")
 async def list_imoveis(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
@@ -30,22 +34,15 @@ async def list_imoveis(
     - Admins veem todos os imóveis
     - Usuários normais não têm restrição (todos podem ver todos os imóveis)
     """
-    query = db.query(Imovel)
+    query = select(*colunas_do_schema(Imovel, ImovelResponse))
     
-    # Filtro de busca
+    # Filtro de busca (nome, endereço, cidade) pelo índice trigram
     if search:
-        search_filter = f"%{search}%"
-        query = query.filter(
-            or_(
-                Imovel.nome.ilike(search_filter),
-                Imovel.endereco.ilike(search_filter),
-                Imovel.cidade.ilike(search_filter)
-            )
-        )
+        query = query.where(BuscaService.filtro(db, "imoveis", search))
     
     # Filtro de status (is_active)
     if is_active is not None:
-        query = query.filter(Imovel.is_active == is_active)
+        query = query.where(Imovel.is_active == is_active)
     
     # Filtro de status por situação de aluguel (alugado/disponivel)
     if status:
@@ -54,12 +51,10 @@ async def list_imoveis(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Status deve ser 'alugado' ou 'disponivel'"
             )
-        query = query.filter(Imovel.status == status)
-    
-    # Paginação
-    imoveis = query.offset(skip).limit(limit).all()
+        query = query.where(Imovel.status == status)
     
-    return [ImovelResponse.model_validate(imovel) for imovel in imoveis]
+    # Paginação; linhas serializadas direto, sem passar por ImovelResponse
+    return resposta_de_linhas(db.execute(query.offset(skip).limit(limit)))
 
 
 @router.get("/{imovel_id}", response_model=ImovelResponse)
@@ -183,6 +178,7 @@ async def get_imoveis_stats(
 
 
 @router.get("/proprietarios/list")
+@cache_condicional("proprietarios")
 async def list_proprietarios_for_select(
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user_from_cookie)
@@ -1,35 +1,30 @@
 """
 Rotas para importação de dados via Excel/CSV
 """
-from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
 from fastapi.responses import HTMLResponse, FileResponse, StreamingResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from typing import Optional
 import io
 from pathlib import Path
 
 from app.core.database import get_db
+from app.core.templates import pagina_estatica
 from app.core.auth import get_current_user_from_cookie
 from app.models.usuario import Usuario
 from app.services.import_service import ImportacaoService
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
 
 
 # ==================== PÁGINA WEB ====================
 
 @router.get("/importacao", response_class=HTMLResponse)
 async def importacao_page(
-    request: Request,
     current_user: Usuario = Depends(get_current_user_from_cookie)
 ):
     """Renderiza a página de importação"""
-    return templates.TemplateResponse(
-        "importacao.html",
-        {"request": request, "user": current_user}
-    )
+    return pagina_estatica("importacao.html")
 
 
 # ==================== API - PREVIEW ====================
@@ -198,6 +193,38 @@ async def importar_participacoes(
         raise HTTPException(status_code=500, detail=f"Erro ao importar: {str(e)}")
 
 
+@router.post("/api/importacao/transferencias")
+async def importar_transferencias(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user_from_cookie)
+):
+    """Importa transferências da planilha matricial (uma aba por mês)"""
+    try:
+        if not file.filename.endswith(('.xlsx', '.xls')):
+            raise HTTPException(
+                status_code=400,
+                detail="Formato de arquivo inválido. Use .xlsx ou .xls"
+            )
+
+        content = await file.read()
+        
+        service = ImportacaoService()
+        resultado = service.importar_transferencias(content, db)
+        
+        if not resultado['success']:
+            erros_msg = ' | '.join(resultado.get('erros', ['Erro desconhecido']))
+            raise HTTPException(status_code=400, detail=erros_msg)
+        
+        return resultado
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Erro ao importar: {str(e)}")
+
+
 # ==================== DOWNLOAD DE TEMPLATES ====================
 
 @router.get("/api/importacao/template/{tipo}")
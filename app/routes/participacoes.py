@@ -1,16 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
-from datetime import datetime
+from datetime import date, datetime
 from pydantic import BaseModel, Field, validator
 import re
 
 from app.core.database import get_db
+from app.core.http_cache import cache_condicional
 from app.core.auth import get_current_user_from_cookie
 from app.models.usuario import Usuario
 from app.models.participacao import Participacao
 from app.models.imovel import Imovel
 from app.models.proprietario import Proprietario
+from app.services.participacao_service import condicao_vigencia, participacoes_atuais
 
 router = APIRouter(prefix="/api/participacoes", tags=["participacoes"])
 
@@ -21,6 +23,8 @@ class ParticipacaoBase(BaseModel):
     proprietario_id: int
     percentual: float = Field(..., ge=0, le=100, description="Percentual de participação (0-100)")
     observacoes: Optional[str] = None
+    vigente_de: Optional[date] = None
+    vigente_ate: Optional[date] = None
 
     class Config:
         from_attributes = True
@@ -55,20 +59,23 @@ class ParticipacaoResponse(ParticipacaoBase):
 
 # Endpoints
 @router.get("/", response_model=List[ParticipacaoResponse])
+@cache_condicional("participacoes", "imoveis", "proprietarios")
 async def listar_participacoes(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     search: Optional[str] = Query(None, description="Buscar em observações, nome do imóvel ou proprietário"),
     imovel_id: Optional[int] = Query(None, description="Filtrar por imóvel"),
     proprietario_id: Optional[int] = Query(None, description="Filtrar por proprietário"),
+    vigente_em: Optional[date] = Query(None, description="Participações vigentes nesta data (padrão: as atuais)"),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user_from_cookie)
 ):
     """
-    Lista todas as participações com filtros opcionais
+    Lista as participações atuais (ou as vigentes em uma data) com filtros opcionais
     """
     # Usar joinedload para prevenir N+1 ao acessar p.imovel.nome e p.proprietario.nome
     query = db.query(Participacao).options(joinedload(Participacao.imovel), joinedload(Participacao.proprietario))
+    query = query.filter(condicao_vigencia(vigente_em) if vigente_em else participacoes_atuais())
     
     # Aplicar filtros
     if imovel_id:
@@ -121,7 +128,8 @@ async def criar_participacao(
     # Verificar se já existe participação para este imóvel e proprietário
     existing = db.query(Participacao).filter(
         Participacao.imovel_id == participacao.imovel_id,
-        Participacao.proprietario_id == participacao.proprietario_id
+        Participacao.proprietario_id == participacao.proprietario_id,
+        participacoes_atuais()
     ).first()
     
     if existing:
@@ -201,7 +209,8 @@ async def atualizar_participacao(
         existing = db.query(Participacao).filter(
             Participacao.id != participacao_id,
             Participacao.imovel_id == new_imovel_id,
-            Participacao.proprietario_id == new_proprietario_id
+            Participacao.proprietario_id == new_proprietario_id,
+            participacoes_atuais()
         ).first()
         
         if existing:
@@ -256,15 +265,16 @@ async def obter_estatisticas(
     current_user: Usuario = Depends(get_current_user_from_cookie)
 ):
     """
-    Retorna estatísticas gerais de participações
+    Retorna estatísticas gerais das participações atuais
     """
-    total = db.query(Participacao).count()
+    atuais = db.query(Participacao).filter(participacoes_atuais())
+    total = atuais.count()
     
     # Contar participações únicas por imóvel
-    imoveis_distintos = db.query(Participacao.imovel_id).distinct().count()
+    imoveis_distintos = atuais.with_entities(Participacao.imovel_id).distinct().count()
     
     # Contar participações únicas por proprietário
-    proprietarios_distintos = db.query(Participacao.proprietario_id).distinct().count()
+    proprietarios_distintos = atuais.with_entities(Participacao.proprietario_id).distinct().count()
     
     return {
         "total": total,
@@ -280,14 +290,14 @@ async def listar_participacoes_por_imovel(
     current_user: Usuario = Depends(get_current_user_from_cookie)
 ):
     """
-    Lista todas as participações de um imóvel específico
+    Lista as participações atuais de um imóvel específico
     """
     # Validar se o imóvel existe
     imovel = db.query(Imovel).filter(Imovel.id == imovel_id).first()
     if not imovel:
         raise HTTPException(status_code=404, detail="Imóvel não encontrado")
     
-    query = db.query(Participacao).filter(Participacao.imovel_id == imovel_id)
+    query = db.query(Participacao).filter(Participacao.imovel_id == imovel_id, participacoes_atuais())
     
     participacoes = query.order_by(Participacao.id.desc()).all()
     
@@ -1,17 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
-from datetime import datetime
+from datetime import date, datetime
 from pydantic import BaseModel, Field, validator
-import json
 
 from app.core.database import get_db
+from app.core.http_cache import cache_condicional
 from app.core.auth import get_current_user_from_cookie
+from app.core.grid_format import PADRAO_FORMATO_GRADE, grade_colunar, responder_grade
 from app.models.usuario import Usuario
 from app.models.participacao_versao import ParticipacaoVersao
 from app.models.participacao import Participacao
 from app.models.imovel import Imovel
 from app.models.proprietario import Proprietario
+from app.services.participacao_service import ParticipacaoService, participacoes_atuais
 
 router = APIRouter(prefix="/api/participacoes-versoes", tags=["participacoes-versoes"])
 
@@ -21,20 +24,23 @@ class ParticipacaoVersaoCreate(BaseModel):
     nome: str = Field(..., min_length=1, max_length=200)
     dados_json: Dict[str, Dict[str, float]]  # {imovel_id: {proprietario_id: percentual}}
     observacoes: Optional[str] = None
+    vigente_de: Optional[date] = None  # Início da vigência ao aplicar (padrão: dia 1 do mês corrente)
 
     class Config:
         from_attributes = True
 
 
 class ParticipacaoVersaoResponse(BaseModel):
+    """Metadados da versão; a matriz é obtida em /{versao_id}/dados"""
     id: int
     nome: str
-    dados_json: str
+    total_celulas: int = 0
     observacoes: Optional[str] = None
     created_at: datetime
     updated_at: datetime
     created_by: Optional[int] = None
     created_by_nome: Optional[str] = None
+    alteracoes: Optional[Dict[str, int]] = None  # Participações inseridas/atualizadas/removidas ao aplicar
 
     class Config:
         from_attributes = True
@@ -49,32 +55,57 @@ class ParticipacaoGridData(BaseModel):
 
 # Endpoints
 @router.get("/grid-data", response_model=ParticipacaoGridData)
+@cache_condicional("imoveis", "proprietarios", "participacoes")
 async def obter_dados_grid(
+    formato: str = Query("linhas", pattern=PADRAO_FORMATO_GRADE),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user_from_cookie)
 ):
     """
     Retorna os dados necessários para montar a grid de participações
+    
+    Com formato=colunar (ou msgpack) a resposta segue app.core.grid_format:
+    imóveis como linhas, proprietários como colunas e apenas as participações
+    de imóveis e proprietários ativos.
     """
     # Buscar imóveis ativos
-    imoveis = db.query(Imovel).filter(Imovel.is_active == True).order_by(Imovel.nome).all()
+    imoveis = db.execute(
+        select(Imovel.id, Imovel.nome).where(Imovel.is_active == True).order_by(Imovel.nome)
+    ).all()
     
     # Buscar proprietários ativos
-    proprietarios = db.query(Proprietario).filter(Proprietario.is_active == True).order_by(Proprietario.nome).all()
+    proprietarios = db.execute(
+        select(Proprietario.id, Proprietario.nome).where(Proprietario.is_active == True).order_by(Proprietario.nome)
+    ).all()
     
     # Buscar participações atuais
-    participacoes = db.query(Participacao).all()
+    participacoes = db.execute(
+        select(Participacao.imovel_id, Participacao.proprietario_id, Participacao.percentual)
+        .where(participacoes_atuais())
+    ).all()
+    
+    if formato != "linhas":
+        linha_do_imovel = {imovel_id: i for i, (imovel_id, _) in enumerate(imoveis)}
+        coluna_do_proprietario = {prop_id: j for j, (prop_id, _) in enumerate(proprietarios)}
+        celulas = [
+            (linha_do_imovel[imovel_id], coluna_do_proprietario[prop_id], percentual)
+            for imovel_id, prop_id, percentual in participacoes
+            if imovel_id in linha_do_imovel and prop_id in coluna_do_proprietario
+        ]
+        celulas.sort()
+        linha, coluna, valor = zip(*celulas) if celulas else ((), (), ())
+        return responder_grade(grade_colunar(
+            linhas={"id": [i for i, _ in imoveis], "nome": [nome for _, nome in imoveis]},
+            colunas=[{"id": prop_id, "nome": nome} for prop_id, nome in proprietarios],
+            linha=linha,
+            coluna=coluna,
+            valor=valor
+        ), formato)
     
     # Construir dicionário de dados
     dados = {}
-    for p in participacoes:
-        imovel_id = str(p.imovel_id)
-        proprietario_id = str(p.proprietario_id)
-        
-        if imovel_id not in dados:
-            dados[imovel_id] = {}
-        
-        dados[imovel_id][proprietario_id] = p.percentual
+    for imovel_id, proprietario_id, percentual in participacoes:
+        dados.setdefault(str(imovel_id), {})[str(proprietario_id)] = percentual
     
     return {
         "imoveis": [{"id": i.id, "nome": i.nome} for i in imoveis],
@@ -84,6 +115,7 @@ async def obter_dados_grid(
 
 
 @router.get("/", response_model=List[ParticipacaoVersaoResponse])
+@cache_condicional("participacoes_versoes", "usuarios")
 async def listar_versoes(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
@@ -91,20 +123,25 @@ async def listar_versoes(
     current_user: Usuario = Depends(get_current_user_from_cookie)
 ):
     """
-    Lista todas as versões de participações
+    Lista as versões de participações (somente metadados, sem as matrizes)
     """
-    query = db.query(ParticipacaoVersao).order_by(ParticipacaoVersao.created_at.desc())
-    versoes = query.offset(skip).limit(limit).all()
-    
-    # Enriquecer com dados do usuário
-    result = []
-    for v in versoes:
-        data = ParticipacaoVersaoResponse.model_validate(v)
-        if v.usuario:
-            data.created_by_nome = v.usuario.nome
-        result.append(data)
+    versoes = db.execute(
+        select(
+            ParticipacaoVersao.id,
+            ParticipacaoVersao.nome,
+            ParticipacaoVersao.total_celulas,
+            ParticipacaoVersao.observacoes,
+            ParticipacaoVersao.created_at,
+            ParticipacaoVersao.updated_at,
+            ParticipacaoVersao.created_by,
+            Usuario.nome.label("created_by_nome")
+        )
+        .outerjoin(Usuario, ParticipacaoVersao.created_by == Usuario.id)
+        .order_by(ParticipacaoVersao.created_at.desc())
+        .offset(skip).limit(limit)
+    ).mappings().all()
     
-    return result
+    return [ParticipacaoVersaoResponse.model_validate(dict(v)) for v in versoes]
 
 
 @router.post("/", response_model=ParticipacaoVersaoResponse, status_code=201)
@@ -125,37 +162,27 @@ async def criar_versao(
                 detail=f"Imóvel ID {imovel_id}: soma dos percentuais ({total:.2f}%) deve estar entre 99.95% e 100.05%"
             )
     
-    # Converter dados para JSON string
-    dados_json_str = json.dumps(versao.dados_json)
+    # Matriz em COO comprimido
+    matriz = ParticipacaoService.matriz_de_dados(versao.dados_json)
     
     # Criar versão
     db_versao = ParticipacaoVersao(
         nome=versao.nome,
-        dados_json=dados_json_str,
+        dados_coo=ParticipacaoService.codificar_matriz(matriz),
+        total_celulas=len(matriz),
         observacoes=versao.observacoes,
         created_by=current_user.id
     )
     db.add(db_versao)
     db.flush()
     
-    # Aplicar as participações ao banco
-    # Use a transaction to ensure atomicity
+    # Aplicar as participações ao banco (apenas as células que mudaram)
     try:
-        # Remove existing participacoes
-        db.query(Participacao).delete()
-        
-        # Create new participacoes
-        for imovel_id, proprietarios_dict in versao.dados_json.items():
-            for proprietario_id, percentual in proprietarios_dict.items():
-                if percentual > 0:  # Only create if there's a percentage
-                    participacao = Participacao(
-                        imovel_id=int(imovel_id),
-                        proprietario_id=int(proprietario_id),
-                        percentual=percentual
-                    )
-                    db.add(participacao)
-        
+        alteracoes = ParticipacaoService.aplicar_matriz(db, matriz, versao.vigente_de)
         db.commit()
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Erro ao aplicar participações: {str(e)}")
@@ -165,6 +192,7 @@ async def criar_versao(
     # Retornar resposta
     response = ParticipacaoVersaoResponse.model_validate(db_versao)
     response.created_by_nome = current_user.nome
+    response.alteracoes = alteracoes
     
     return response
 
@@ -176,7 +204,7 @@ async def obter_versao(
     current_user: Usuario = Depends(get_current_user_from_cookie)
 ):
     """
-    Obtém uma versão específica de participações
+    Obtém os metadados de uma versão específica de participações
     """
     versao = db.query(ParticipacaoVersao).filter(ParticipacaoVersao.id == versao_id).first()
     
@@ -190,45 +218,100 @@ async def obter_versao(
     return response
 
 
-@router.post("/{versao_id}/aplicar", response_model=Dict[str, str])
+@router.get("/{versao_id}/dados")
+@cache_condicional("participacoes_versoes")
+async def obter_dados_versao(
+    versao_id: int,
+    formato: str = Query("linhas", pattern=PADRAO_FORMATO_GRADE),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user_from_cookie)
+):
+    """
+    Retorna a matriz de participações de uma versão
+
+    - formato=linhas: {"dados": {imovel_id: {proprietario_id: percentual}}}
+    - formato=colunar (ou msgpack): vetores COO paralelos imovel_id,
+      proprietario_id e percentual, ordenados por imóvel e proprietário
+    """
+    vetores = ParticipacaoService.vetores_da_versao(db, versao_id)
+    
+    if vetores is None:
+        raise HTTPException(status_code=404, detail="Versão não encontrada")
+    
+    imoveis, proprietarios, percentuais = vetores
+    if formato != "linhas":
+        return responder_grade({
+            "versao_id": versao_id,
+            "formato": "coo",
+            "imovel_id": imoveis.tolist(),
+            "proprietario_id": proprietarios.tolist(),
+            "percentual": percentuais.tolist()
+        }, formato)
+    
+    dados: Dict[str, Dict[str, float]] = {}
+    for imovel_id, proprietario_id, percentual in zip(imoveis.tolist(), proprietarios.tolist(), percentuais.tolist()):
+        dados.setdefault(str(imovel_id), {})[str(proprietario_id)] = percentual
+    
+    return {"versao_id": versao_id, "dados": dados}
+
+
+@router.get("/{versao_a}/diff/{versao_b}")
+@cache_condicional("participacoes_versoes", "alugueis_mensais", "proprietarios")
+async def comparar_versoes(
+    versao_a: int,
+    versao_b: int,
+    mes_referencia: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$", description="Mês para calcular o impacto financeiro"),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user_from_cookie)
+):
+    """
+    Compara duas versões de participações (de a para b)
+
+    Retorna as células alteradas (vetores paralelos imovel_id,
+    proprietario_id, de, para), imóveis e proprietários adicionados ou
+    removidos e, por proprietário, a variação total de percentual e - com
+    mes_referencia - o impacto sobre os aluguéis daquele mês.
+    """
+    diff = ParticipacaoService.comparar_versoes(db, versao_a, versao_b, mes_referencia)
+    
+    if diff is None:
+        raise HTTPException(status_code=404, detail="Versão não encontrada")
+    
+    return diff
+
+
+@router.post("/{versao_id}/aplicar", response_model=Dict[str, Any])
 async def aplicar_versao(
     versao_id: int,
+    vigente_de: Optional[date] = Query(None, description="Início da vigência (padrão: dia 1 do mês corrente)"),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user_from_cookie)
 ):
     """
     Aplica uma versão existente ao banco de dados
+
+    As participações alteradas são encerradas em vigente_de; os meses
+    anteriores continuam com os percentuais da época.
     """
-    versao = db.query(ParticipacaoVersao).filter(ParticipacaoVersao.id == versao_id).first()
+    matriz = ParticipacaoService.matriz_da_versao(db, versao_id)
     
-    if not versao:
+    if matriz is None:
         raise HTTPException(status_code=404, detail="Versão não encontrada")
     
-    # Parse JSON
-    dados_json = json.loads(versao.dados_json)
-    
-    # Apply participacoes in a transaction
+    # Aplicar apenas as diferenças em relação às participações atuais
     try:
-        # Remove existing participacoes
-        db.query(Participacao).delete()
-        
-        # Create new participacoes
-        for imovel_id, proprietarios_dict in dados_json.items():
-            for proprietario_id, percentual in proprietarios_dict.items():
-                if percentual > 0:
-                    participacao = Participacao(
-                        imovel_id=int(imovel_id),
-                        proprietario_id=int(proprietario_id),
-                        percentual=percentual
-                    )
-                    db.add(participacao)
-        
+        alteracoes = ParticipacaoService.aplicar_matriz(db, matriz, vigente_de)
         db.commit()
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Erro ao aplicar versão: {str(e)}")
     
-    return {"message": "Versão aplicada com sucesso"}
+    if not any(alteracoes.values()):
+        return {"message": "Participações já correspondem à versão", "alteracoes": alteracoes}
+    return {"message": "Versão aplicada com sucesso", "alteracoes": alteracoes}
 
 
 @router.delete("/{versao_id}", status_code=204)
@@ -3,15 +3,20 @@ Rotas de Proprietários - CRUD completo
 """
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_, func
+from sqlalchemy import and_, func, select
 from typing import List, Optional
 from pydantic import BaseModel, Field, validator
 import re
 
 from app.core.database import get_db
+from app.core.http_cache import cache_condicional
 from app.core.auth import get_current_user_from_cookie
+from app.core.responses import colunas_do_schema, resposta_de_linhas
 from app.models.proprietario import Proprietario
+from app.models.participacao import Participacao
 from app.models.usuario import Usuario
+from app.services.busca_service import BuscaService
+from app.services.participacao_service import participacoes_atuais
 
 router = APIRouter(prefix="/api/proprietarios", tags=["proprietarios"])
 
@@ -91,6 +96,7 @@ class ProprietarioResponse(ProprietarioBase):
 # ============= ROTAS =============
 
 @router.get("/", response_model=List[ProprietarioResponse])
+@cache_condicional("proprietarios", "participacoes")
 async def listar_proprietarios(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
@@ -102,70 +108,35 @@ async def listar_proprietarios(
 ):
     """Lista todos os proprietários com filtros opcionais"""
     
-    query = db.query(Proprietario)
-    
-    # Filtro de busca (nome, CPF, CNPJ, email)
+    # Número de imóveis por proprietário em uma subconsulta (evita N+1)
+    total_imoveis = (
+        select(func.count(func.distinct(Participacao.imovel_id)))
+        .where(Participacao.proprietario_id == Proprietario.id, participacoes_atuais())
+        .correlate(Proprietario)
+        .scalar_subquery()
+    )
+    query = select(
+        *colunas_do_schema(Proprietario, ProprietarioResponse),
+        total_imoveis.label("total_imoveis")
+    )
+    
+    # Filtro de busca (nome, razão social, email, CPF, CNPJ) pelo índice trigram
     if search:
-        search_filter = or_(
-            Proprietario.nome.ilike(f"%{search}%"),
-            Proprietario.cpf.ilike(f"%{search}%"),
-            Proprietario.cnpj.ilike(f"%{search}%"),
-            Proprietario.email.ilike(f"%{search}%"),
-            Proprietario.razao_social.ilike(f"%{search}%")
-        )
-        query = query.filter(search_filter)
+        query = query.where(BuscaService.filtro(db, "proprietarios", search))
     
     # Filtro por tipo de pessoa
     if tipo_pessoa:
-        query = query.filter(Proprietario.tipo_pessoa == tipo_pessoa)
+        query = query.where(Proprietario.tipo_pessoa == tipo_pessoa)
     
     # Filtro por status
     if is_active is not None:
-        query = query.filter(Proprietario.is_active == is_active)
+        query = query.where(Proprietario.is_active == is_active)
     
     # Ordenar por nome
     query = query.order_by(Proprietario.nome)
     
-    # Paginação
-    proprietarios = query.offset(skip).limit(limit).all()
-    
-    # Adicionar contagem de imóveis
-    result = []
-    for prop in proprietarios:
-        prop_dict = {
-            "id": prop.id,
-            "tipo_pessoa": prop.tipo_pessoa,
-            "nome": prop.nome,
-            "cpf": prop.cpf,
-            "rg": prop.rg,
-            "razao_social": prop.razao_social,
-            "nome_fantasia": prop.nome_fantasia,
-            "cnpj": prop.cnpj,
-            "inscricao_estadual": prop.inscricao_estadual,
-            "email": prop.email,
-            "telefone": prop.telefone,
-            "celular": prop.celular,
-            "endereco": prop.endereco,
-            "numero": prop.numero,
-            "complemento": prop.complemento,
-            "bairro": prop.bairro,
-            "cidade": prop.cidade,
-            "estado": prop.estado,
-            "cep": prop.cep,
-            "banco": prop.banco,
-            "agencia": prop.agencia,
-            "conta": prop.conta,
-            "tipo_conta": prop.tipo_conta,
-            "pix": prop.pix,
-            "observacoes": prop.observacoes,
-            "is_active": prop.is_active,
-            "created_at": prop.created_at.isoformat() if prop.created_at else None,
-            "updated_at": prop.updated_at.isoformat() if prop.updated_at else None,
-            "total_imoveis": len(set(p.imovel_id for p in prop.participacoes))
-        }
-        result.append(prop_dict)
-    
-    return result
+    # Paginação; linhas serializadas direto, sem passar por ProprietarioResponse
+    return resposta_de_linhas(db.execute(query.offset(skip).limit(limit)))
 
 
 @router.post("/", response_model=ProprietarioResponse, status_code=201)
@@ -1,20 +1,55 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Response
-from fastapi.responses import StreamingResponse, FileResponse
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Any, Callable, List, Optional
 from datetime import datetime
-import io
-import tempfile
-import os
+from functools import partial
+import logging
 
-from app.core.database import get_db
+from app.core.database import get_db, SessionLocal
 from app.core.auth import get_current_user_from_cookie
 from app.models.usuario import Usuario
+from app.models.proprietario import Proprietario
+from app.services.permissao_service import PermissaoService
 from app.services.relatorio_service import RelatorioService
+from app.services.pdf_renderer import PDFRenderer, renderizar_em_spool
+from app.services.excel_exporter import ExcelExporter, novo_spool
+from app.services.report_cache import relatorio_cache, meses_do_periodo
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/relatorios", tags=["relatorios"])
 
 
+def _imoveis_do_relatorio(db: Session, current_user: Usuario, proprietario_id: Optional[int] = None):
+    """
+    Imóveis a que o relatório fica restrito pelo escopo de permissão (None = todos)
+
+    Com proprietario_id o relatório já é do proprietário: basta que ele esteja
+    no escopo do usuário.
+    """
+    escopo = PermissaoService.escopo(db, current_user)
+    if proprietario_id is not None:
+        if not escopo.pode_ver_proprietario(proprietario_id):
+            raise HTTPException(status_code=403, detail="Você não tem permissão para ver os dados deste proprietário")
+        return None
+    return escopo.imoveis
+
+
+def _verificar_exportacao(db: Session, current_user: Usuario, proprietario_id: Optional[int]) -> None:
+    """
+    Arquivos exportados ficam em cache por proprietário, compartilhado entre
+    usuários: quem tem escopo restrito só exporta os próprios proprietários
+    """
+    escopo = PermissaoService.escopo(db, current_user)
+    if escopo.proprietarios is None:
+        return
+    if proprietario_id is None:
+        raise HTTPException(status_code=403, detail="Informe um dos seus proprietários para exportar o relatório")
+    if proprietario_id not in escopo.proprietarios:
+        raise HTTPException(status_code=403, detail="Você não tem permissão para ver os dados deste proprietário")
+
+
 @router.get("/mensal")
 async def gerar_relatorio_mensal(
     ano: int = Query(..., description="Ano de referência"),
@@ -30,12 +65,14 @@ async def gerar_relatorio_mensal(
     - **mes**: Mês de referência (1-12)
     - **proprietario_id**: Opcional - ID do proprietário para filtrar
     """
+    imovel_ids = _imoveis_do_relatorio(db, current_user, proprietario_id)
     try:
         relatorio = RelatorioService.gerar_relatorio_mensal(
             db=db,
             ano=ano,
             mes=mes,
-            proprietario_id=proprietario_id
+            proprietario_id=proprietario_id,
+            imovel_ids=imovel_ids
         )
         return relatorio
     except Exception as e:
@@ -57,6 +94,7 @@ async def gerar_relatorio_proprietario(
     - **ano**: Ano de referência
     - **mes**: Opcional - Mês específico (se omitido, gera relatório anual)
     """
+    _imoveis_do_relatorio(db, current_user, proprietario_id)
     try:
         relatorio = RelatorioService.gerar_relatorio_proprietario(
             db=db,
@@ -75,6 +113,39 @@ async def gerar_relatorio_proprietario(
         raise HTTPException(status_code=500, detail=f"Erro ao gerar relatório: {str(e)}")
 
 
+@router.get("/extratos")
+async def gerar_extratos(
+    ano: int = Query(..., description="Ano de referência"),
+    mes: Optional[int] = Query(None, ge=1, le=12, description="Mês de referência (opcional)"),
+    proprietario_ids: Optional[List[int]] = Query(None, description="IDs dos proprietários (opcional)"),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user_from_cookie)
+):
+    """
+    Gera os extratos de todos os proprietários de uma só vez
+    
+    - **ano**: Ano de referência
+    - **mes**: Opcional - Mês específico (se omitido, gera extratos anuais)
+    - **proprietario_ids**: Opcional - restringe aos proprietários informados
+    
+    Usuários com escopo restrito recebem apenas os extratos dos seus proprietários.
+    """
+    escopo = PermissaoService.escopo(db, current_user)
+    if escopo.proprietarios is not None:
+        proprietario_ids = sorted(
+            escopo.proprietarios if proprietario_ids is None else escopo.proprietarios.intersection(proprietario_ids)
+        )
+    try:
+        return RelatorioService.gerar_extratos(
+            db=db,
+            ano=ano,
+            mes=mes,
+            proprietario_ids=proprietario_ids
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao gerar extratos: {str(e)}")
+
+
 @router.get("/anual")
 async def gerar_relatorio_anual(
     ano: int = Query(..., description="Ano de referência"),
@@ -86,10 +157,12 @@ async def gerar_relatorio_anual(
     
     - **ano**: Ano de referência
     """
+    imovel_ids = _imoveis_do_relatorio(db, current_user)
     try:
         relatorio = RelatorioService.gerar_relatorio_anual(
             db=db,
-            ano=ano
+            ano=ano,
+            imovel_ids=imovel_ids
         )
         return relatorio
     except Exception as e:
@@ -109,17 +182,60 @@ async def gerar_relatorio_comparativo(
     - **ano1**: Primeiro ano para comparação
     - **ano2**: Segundo ano para comparação
     """
+    imovel_ids = _imoveis_do_relatorio(db, current_user)
     try:
         relatorio = RelatorioService.gerar_relatorio_comparativo(
             db=db,
             ano1=ano1,
-            ano2=ano2
+            ano2=ano2,
+            imovel_ids=imovel_ids
         )
         return relatorio
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao gerar relatório: {str(e)}")
 
 
+@router.get("/analise")
+async def gerar_analise_comparativa(
+    anos: Optional[List[int]] = Query(None, description="Anos a comparar (repetir o parâmetro)"),
+    inicio: Optional[str] = Query(None, pattern=r"^\d{4}-(0[1-9]|1[0-2])$", description="Mês inicial (YYYY-MM)"),
+    fim: Optional[str] = Query(None, pattern=r"^\d{4}-(0[1-9]|1[0-2])$", description="Mês final (YYYY-MM)"),
+    proprietario_id: Optional[int] = Query(None, description="ID do proprietário (opcional)"),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user_from_cookie)
+):
+    """
+    Análise comparativa de vários anos ou de um intervalo de meses
+    
+    Retorna a série mensal com variação sobre o mês anterior e sobre o mesmo
+    mês do ano anterior, acumulado de 12 meses, resumo por ano e crescimento
+    anual por imóvel.
+    
+    - **anos**: Anos a comparar (ex: ?anos=2023&anos=2024)
+    - **inicio** / **fim**: Alternativa a anos - intervalo de meses (YYYY-MM)
+    - **proprietario_id**: Opcional - ID do proprietário para filtrar
+    """
+    if not anos and not (inicio and fim):
+        raise HTTPException(status_code=400, detail="Informe os anos ou o intervalo (inicio e fim)")
+    if not anos and inicio > fim:
+        raise HTTPException(status_code=400, detail="O mês inicial deve ser anterior ao final")
+    
+    imovel_ids = _imoveis_do_relatorio(db, current_user, proprietario_id)
+    try:
+        return RelatorioService.gerar_analise_comparativa(
+            db=db,
+            anos=anos,
+            inicio=inicio,
+            fim=fim,
+            proprietario_id=proprietario_id,
+            imovel_ids=imovel_ids
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao gerar análise: {str(e)}")
+
+
 @router.get("/dashboard")
 async def obter_dados_dashboard(
     db: Session = Depends(get_db),
@@ -134,76 +250,58 @@ async def obter_dados_dashboard(
     - Comparação com mês anterior
     - Top 5 imóveis por receita
     """
+    imovel_ids = _imoveis_do_relatorio(db, current_user)
     try:
         hoje = datetime.now()
-        ano_atual = hoje.year
-        mes_atual = hoje.month
-        
-        # Relatório do mês atual
-        relatorio_mes_atual = RelatorioService.gerar_relatorio_mensal(
-            db=db,
-            ano=ano_atual,
-            mes=mes_atual
-        )
-        
-        # Relatório do mês anterior
-        mes_anterior = mes_atual - 1 if mes_atual > 1 else 12
-        ano_anterior = ano_atual if mes_atual > 1 else ano_atual - 1
-        
-        relatorio_mes_anterior = RelatorioService.gerar_relatorio_mensal(
-            db=db,
-            ano=ano_anterior,
-            mes=mes_anterior
-        )
-        
-        # Relatório anual
-        relatorio_anual = RelatorioService.gerar_relatorio_anual(
-            db=db,
-            ano=ano_atual
-        )
-        
-        # Calcular variação mensal
-        from decimal import Decimal
-        receita_mes_atual = Decimal(str(relatorio_mes_atual["resumo"]["total_recebido"]))
-        receita_mes_anterior = Decimal(str(relatorio_mes_anterior["resumo"]["total_recebido"]))
-        
-        variacao_mensal = receita_mes_atual - receita_mes_anterior
-        variacao_percentual = ((receita_mes_atual / receita_mes_anterior - 1) * 100) if receita_mes_anterior > 0 else Decimal('0')
-        
-        # Top 5 imóveis por receita do mês
-        detalhamento = relatorio_mes_atual["detalhamento"]
-        top_imoveis = sorted(
-            detalhamento,
-            key=lambda x: x["valores"]["total"],
-            reverse=True
-        )[:5]
-        
-        return {
-            "mes_atual": {
-                "periodo": relatorio_mes_atual["periodo"],
-                "resumo": relatorio_mes_atual["resumo"]
-            },
-            "comparacao_mensal": {
-                "variacao_absoluta": float(variacao_mensal),
-                "variacao_percentual": float(variacao_percentual),
-                "mes_anterior": {
-                    "ano": ano_anterior,
-                    "mes": mes_anterior,
-                    "total_recebido": float(receita_mes_anterior)
-                }
-            },
-            "anual": {
-                "ano": ano_atual,
-                "resumo": relatorio_anual["resumo"]
-            },
-            "top_imoveis": top_imoveis
-        }
+        return RelatorioService.gerar_dashboard(db=db, ano=hoje.year, mes=hoje.month, imovel_ids=imovel_ids)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao obter dados do dashboard: {str(e)}")
 
 
+MEDIA_TYPE_PDF = "application/pdf"
+MEDIA_TYPE_EXCEL = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+async def _gerar_pdf_mensal(db: Session, ano: int, mes: int, proprietario_id: Optional[int]):
+    relatorio = RelatorioService.gerar_relatorio_mensal(
+        db=db,
+        ano=ano,
+        mes=mes,
+        proprietario_id=proprietario_id
+    )
+    # Renderiza fora do event loop, em arquivo temporário
+    return await renderizar_em_spool(PDFRenderer.renderizar_relatorio_mensal, relatorio)
+
+
+async def _gerar_pdf_extrato(db: Session, proprietario_id: int, ano: int, mes: Optional[int]):
+    relatorio = RelatorioService.gerar_relatorio_proprietario(
+        db=db,
+        proprietario_id=proprietario_id,
+        ano=ano,
+        mes=mes
+    )
+    return await renderizar_em_spool(PDFRenderer.renderizar_extrato_proprietario, relatorio)
+
+
+async def _gerar_pdf_extratos(db: Session, ano: int, mes: Optional[int]):
+    lote = RelatorioService.gerar_extratos(db=db, ano=ano, mes=mes)
+    return await renderizar_em_spool(PDFRenderer.renderizar_extratos, lote)
+
+
+async def _gerar_excel(exportar: Callable[..., Any]):
+    """Executa exportar(destino=...) em uma thread, gravando em arquivo temporário"""
+    arquivo = novo_spool()
+    try:
+        await run_in_threadpool(exportar, destino=arquivo)
+    except BaseException:
+        arquivo.close()
+        raise
+    return arquivo
+
+
 @router.get("/exportar/pdf/mensal")
 async def exportar_relatorio_mensal_pdf(
+    request: Request,
     ano: int = Query(..., description="Ano de referência"),
     mes: int = Query(..., ge=1, le=12, description="Mês de referência"),
     proprietario_id: Optional[int] = Query(None, description="ID do proprietário"),
@@ -217,112 +315,107 @@ async def exportar_relatorio_mensal_pdf(
     - **mes**: Mês de referência (1-12)
     - **proprietario_id**: Opcional - ID do proprietário para filtrar
     """
+    _verificar_exportacao(db, current_user, proprietario_id)
     try:
         # Importar aqui para evitar erro se reportlab não estiver instalado
-        from reportlab.lib import colors
-        from reportlab.lib.pagesizes import A4
-        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.units import cm
-        from reportlab.lib.enums import TA_CENTER, TA_RIGHT
+        import reportlab  # noqa: F401
         
-        # Gerar relatório
-        relatorio = RelatorioService.gerar_relatorio_mensal(
-            db=db,
-            ano=ano,
-            mes=mes,
-            proprietario_id=proprietario_id
+        return await relatorio_cache.responder(
+            request, db,
+            tipo="pdf_mensal",
+            meses=meses_do_periodo(ano, mes),
+            proprietario_id=proprietario_id,
+            extensao="pdf",
+            media_type=MEDIA_TYPE_PDF,
+            filename=f"relatorio_mensal_{ano}_{mes:02d}.pdf",
+            gerar=lambda: _gerar_pdf_mensal(db, ano, mes, proprietario_id)
         )
         
-        # Criar PDF em memória
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        elements = []
-        styles = getSampleStyleSheet()
-        
-        # Estilo customizado
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            textColor=colors.HexColor('#135bec'),
-            spaceAfter=30,
-            alignment=TA_CENTER
+    except ImportError:
+        raise HTTPException(
+            status_code=500,
+            detail="Biblioteca reportlab não instalada. Execute: pip install reportlab"
         )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao exportar PDF: {str(e)}")
+
+
+@router.get("/exportar/pdf/proprietario/{proprietario_id}")
+async def exportar_extrato_proprietario_pdf(
+    request: Request,
+    proprietario_id: int,
+    ano: int = Query(..., description="Ano de referência"),
+    mes: Optional[int] = Query(None, ge=1, le=12, description="Mês de referência (opcional)"),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user_from_cookie)
+):
+    """
+    Exporta o extrato de um proprietário em formato PDF
+    
+    - **proprietario_id**: ID do proprietário
+    - **ano**: Ano de referência
+    - **mes**: Opcional - Mês específico (se omitido, gera extrato anual)
+    """
+    _verificar_exportacao(db, current_user, proprietario_id)
+    try:
+        import reportlab  # noqa: F401
         
-        # Título
-        periodo = relatorio["periodo"]
-        titulo = f"Relatório Mensal - {periodo['mes_nome']}/{periodo['ano']}"
-        elements.append(Paragraph(titulo, title_style))
-        elements.append(Spacer(1, 0.5*cm))
-        
-        # Resumo
-        resumo = relatorio["resumo"]
-        data_resumo = [
-            ['Métrica', 'Valor'],
-            ['Total de Aluguéis', str(resumo['total_alugueis'])],
-            ['Aluguéis Pagos', str(resumo['alugueis_pagos'])],
-            ['Aluguéis Pendentes', str(resumo['alugueis_pendentes'])],
-            ['Total Esperado', f"R$ {resumo['total_esperado']:,.2f}"],
-            ['Total Recebido', f"R$ {resumo['total_recebido']:,.2f}"],
-            ['Total Pendente', f"R$ {resumo['total_pendente']:,.2f}"],
-            ['Taxa de Recebimento', f"{resumo['taxa_recebimento']:.1f}%"]
-        ]
-        
-        table_resumo = Table(data_resumo, colWidths=[8*cm, 8*cm])
-        table_resumo.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#135bec')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        elements.append(table_resumo)
-        elements.append(Spacer(1, 1*cm))
-        
-        # Detalhamento por imóvel
-        if relatorio["detalhamento"]:
-            elements.append(Paragraph("Detalhamento por Imóvel", styles['Heading2']))
-            elements.append(Spacer(1, 0.5*cm))
-            
-            data_detalhes = [['Imóvel', 'Status', 'Valor Total']]
-            
-            for item in relatorio["detalhamento"]:
-                data_detalhes.append([
-                    item['imovel_endereco'][:40],
-                    item['status_pagamento'].upper(),
-                    f"R$ {item['valores']['total']:,.2f}"
-                ])
-            
-            table_detalhes = Table(data_detalhes, colWidths=[10*cm, 3*cm, 3*cm])
-            table_detalhes.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#135bec')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('ALIGN', (2, 0), (2, -1), 'RIGHT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            
-            elements.append(table_detalhes)
+        if not db.query(Proprietario.id).filter(Proprietario.id == proprietario_id).first():
+            raise HTTPException(status_code=404, detail="Proprietário não encontrado")
         
-        # Gerar PDF
-        doc.build(elements)
-        buffer.seek(0)
+        sufixo = f"{ano}_{mes:02d}" if mes else str(ano)
         
-        filename = f"relatorio_mensal_{ano}_{mes:02d}.pdf"
+        return await relatorio_cache.responder(
+            request, db,
+            tipo="pdf_extrato",
+            meses=meses_do_periodo(ano, mes),
+            proprietario_id=proprietario_id,
+            extensao="pdf",
+            media_type=MEDIA_TYPE_PDF,
+            filename=f"extrato_proprietario_{proprietario_id}_{sufixo}.pdf",
+            gerar=lambda: _gerar_pdf_extrato(db, proprietario_id, ano, mes)
+        )
         
-        return StreamingResponse(
-            buffer,
-            media_type="application/pdf",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
+    except HTTPException:
+        raise
+    except ImportError:
+        raise HTTPException(
+            status_code=500,
+            detail="Biblioteca reportlab não instalada. Execute: pip install reportlab"
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao exportar PDF: {str(e)}")
+
+
+@router.get("/exportar/pdf/extratos")
+async def exportar_extratos_pdf(
+    request: Request,
+    ano: int = Query(..., description="Ano de referência"),
+    mes: Optional[int] = Query(None, ge=1, le=12, description="Mês de referência (opcional)"),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user_from_cookie)
+):
+    """
+    Exporta os extratos de todos os proprietários em um único PDF (um por página)
+    
+    - **ano**: Ano de referência
+    - **mes**: Opcional - Mês específico (se omitido, gera extratos anuais)
+    """
+    _verificar_exportacao(db, current_user, None)
+    try:
+        import reportlab  # noqa: F401
+        
+        sufixo = f"{ano}_{mes:02d}" if mes else str(ano)
+        
+        return await relatorio_cache.responder(
+            request, db,
+            tipo="pdf_extratos",
+            meses=meses_do_periodo(ano, mes),
+            proprietario_id=None,
+            extensao="pdf",
+            media_type=MEDIA_TYPE_PDF,
+            filename=f"extratos_proprietarios_{sufixo}.pdf",
+            gerar=lambda: _gerar_pdf_extratos(db, ano, mes)
         )
         
     except ImportError:
@@ -336,6 +429,7 @@ async def exportar_relatorio_mensal_pdf(
 
 @router.get("/exportar/excel/mensal")
 async def exportar_relatorio_mensal_excel(
+    request: Request,
     ano: int = Query(..., description="Ano de referência"),
     mes: int = Query(..., ge=1, le=12, description="Mês de referência"),
     proprietario_id: Optional[int] = Query(None, description="ID do proprietário"),
@@ -349,121 +443,58 @@ async def exportar_relatorio_mensal_excel(
     - **mes**: Mês de referência (1-12)
     - **proprietario_id**: Opcional - ID do proprietário para filtrar
     """
+    _verificar_exportacao(db, current_user, proprietario_id)
     try:
         # Importar aqui para evitar erro se openpyxl não estiver instalado
-        from openpyxl import Workbook
-        from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+        import openpyxl  # noqa: F401
         
-        # Gerar relatório
-        relatorio = RelatorioService.gerar_relatorio_mensal(
-            db=db,
-            ano=ano,
-            mes=mes,
-            proprietario_id=proprietario_id
+        return await relatorio_cache.responder(
+            request, db,
+            tipo="excel_mensal",
+            meses=meses_do_periodo(ano, mes),
+            proprietario_id=proprietario_id,
+            extensao="xlsx",
+            media_type=MEDIA_TYPE_EXCEL,
+            filename=f"relatorio_mensal_{ano}_{mes:02d}.xlsx",
+            gerar=lambda: _gerar_excel(partial(ExcelExporter.exportar_mensal, db, ano, mes, proprietario_id=proprietario_id))
         )
         
-        # Criar workbook
-        wb = Workbook()
-        ws_resumo = wb.active
-        ws_resumo.title = "Resumo"
-        
-        # Estilos
-        header_fill = PatternFill(start_color="135bec", end_color="135bec", fill_type="solid")
-        header_font = Font(color="FFFFFF", bold=True, size=12)
-        title_font = Font(bold=True, size=14, color="135bec")
-        border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
+    except ImportError:
+        raise HTTPException(
+            status_code=500,
+            detail="Biblioteca openpyxl não instalada. Execute: pip install openpyxl"
         )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao exportar Excel: {str(e)}")
+
+
+@router.get("/exportar/excel/anual")
+async def exportar_relatorio_anual_excel(
+    request: Request,
+    ano: int = Query(..., description="Ano de referência"),
+    proprietario_id: Optional[int] = Query(None, description="ID do proprietário"),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user_from_cookie)
+):
+    """
+    Exporta relatório anual em formato Excel (aba de resumo e uma aba por mês)
+    
+    - **ano**: Ano de referência
+    - **proprietario_id**: Opcional - ID do proprietário para filtrar
+    """
+    _verificar_exportacao(db, current_user, proprietario_id)
+    try:
+        import openpyxl  # noqa: F401
         
-        # Título
-        periodo = relatorio["periodo"]
-        ws_resumo['A1'] = f"Relatório Mensal - {periodo['mes_nome']}/{periodo['ano']}"
-        ws_resumo['A1'].font = title_font
-        ws_resumo.merge_cells('A1:B1')
-        
-        # Resumo
-        ws_resumo['A3'] = "Métrica"
-        ws_resumo['B3'] = "Valor"
-        ws_resumo['A3'].fill = header_fill
-        ws_resumo['B3'].fill = header_fill
-        ws_resumo['A3'].font = header_font
-        ws_resumo['B3'].font = header_font
-        
-        resumo = relatorio["resumo"]
-        row = 4
-        for label, value in [
-            ('Total de Aluguéis', resumo['total_alugueis']),
-            ('Aluguéis Pagos', resumo['alugueis_pagos']),
-            ('Aluguéis Pendentes', resumo['alugueis_pendentes']),
-            ('Total Esperado', f"R$ {resumo['total_esperado']:,.2f}"),
-            ('Total Recebido', f"R$ {resumo['total_recebido']:,.2f}"),
-            ('Total Pendente', f"R$ {resumo['total_pendente']:,.2f}"),
-            ('Taxa de Recebimento', f"{resumo['taxa_recebimento']:.1f}%")
-        ]:
-            ws_resumo[f'A{row}'] = label
-            ws_resumo[f'B{row}'] = value
-            ws_resumo[f'A{row}'].border = border
-            ws_resumo[f'B{row}'].border = border
-            row += 1
-        
-        # Ajustar largura das colunas
-        ws_resumo.column_dimensions['A'].width = 25
-        ws_resumo.column_dimensions['B'].width = 20
-        
-        # Criar aba de detalhamento
-        if relatorio["detalhamento"]:
-            ws_detalhes = wb.create_sheet("Detalhamento")
-            
-            # Cabeçalhos
-            headers = ['Imóvel', 'Status', 'Vencimento', 'Aluguel', 'Condomínio', 
-                      'IPTU', 'Luz', 'Água', 'Gás', 'Internet', 'Outros', 'Total']
-            for col, header in enumerate(headers, 1):
-                cell = ws_detalhes.cell(1, col, header)
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.border = border
-            
-            # Dados
-            for row, item in enumerate(relatorio["detalhamento"], 2):
-                valores = item['valores']
-                ws_detalhes.cell(row, 1, item['imovel_endereco'])
-                ws_detalhes.cell(row, 2, item['status_pagamento'].upper())
-                ws_detalhes.cell(row, 3, item['data_vencimento'])
-                ws_detalhes.cell(row, 4, valores['aluguel'])
-                ws_detalhes.cell(row, 5, valores['condominio'])
-                ws_detalhes.cell(row, 6, valores['iptu'])
-                ws_detalhes.cell(row, 7, valores['luz'])
-                ws_detalhes.cell(row, 8, valores['agua'])
-                ws_detalhes.cell(row, 9, valores['gas'])
-                ws_detalhes.cell(row, 10, valores['internet'])
-                ws_detalhes.cell(row, 11, valores['outros'])
-                ws_detalhes.cell(row, 12, valores['total'])
-                
-                # Aplicar bordas
-                for col in range(1, 13):
-                    ws_detalhes.cell(row, col).border = border
-            
-            # Ajustar larguras
-            ws_detalhes.column_dimensions['A'].width = 40
-            for col in ['B', 'C']:
-                ws_detalhes.column_dimensions[col].width = 15
-            for col in ['D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L']:
-                ws_detalhes.column_dimensions[col].width = 12
-        
-        # Salvar em memória
-        buffer = io.BytesIO()
-        wb.save(buffer)
-        buffer.seek(0)
-        
-        filename = f"relatorio_mensal_{ano}_{mes:02d}.xlsx"
-        
-        return StreamingResponse(
-            buffer,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        return await relatorio_cache.responder(
+            request, db,
+            tipo="excel_anual",
+            meses=meses_do_periodo(ano),
+            proprietario_id=proprietario_id,
+            extensao="xlsx",
+            media_type=MEDIA_TYPE_EXCEL,
+            filename=f"relatorio_anual_{ano}.xlsx",
+            gerar=lambda: _gerar_excel(partial(ExcelExporter.exportar_anual, db, ano, proprietario_id=proprietario_id))
         )
         
     except ImportError:
@@ -473,3 +504,54 @@ async def exportar_relatorio_mensal_excel(
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao exportar Excel: {str(e)}")
+
+
+async def _pre_renderizar_mes(ano: int, mes: int) -> None:
+    """Gera e grava no cache os relatórios consolidados de um mês fechado"""
+    db = SessionLocal()
+    try:
+        meses = meses_do_periodo(ano, mes)
+        for tipo, extensao, gerar in [
+            ("pdf_mensal", "pdf", lambda: _gerar_pdf_mensal(db, ano, mes, None)),
+            ("excel_mensal", "xlsx", lambda: _gerar_excel(partial(ExcelExporter.exportar_mensal, db, ano, mes))),
+        ]:
+            try:
+                destino = await relatorio_cache.gerar_e_armazenar(db, tipo, meses, None, extensao, gerar)
+                if destino:
+                    logger.info(f"Relatório {tipo} de {mes:02d}/{ano} pré-renderizado em {destino.name}")
+                else:
+                    logger.info(f"Relatório {tipo} de {mes:02d}/{ano} não pré-renderizado: mês não fechado")
+            except Exception as e:
+                logger.error(f"Erro ao pré-renderizar {tipo} de {mes:02d}/{ano}: {e}")
+    finally:
+        db.close()
+
+
+@router.post("/cache/pre-renderizar", status_code=202)
+async def pre_renderizar_relatorios(
+    background_tasks: BackgroundTasks,
+    ano: Optional[int] = Query(None, description="Ano de referência (padrão: mês anterior)"),
+    mes: Optional[int] = Query(None, ge=1, le=12, description="Mês de referência (padrão: mês anterior)"),
+    current_user: Usuario = Depends(get_current_user_from_cookie)
+):
+    """
+    Agenda a pré-renderização dos relatórios mensais em segundo plano (apenas admins)
+    
+    Sem parâmetros, usa o mês anterior. Apenas meses fechados (todos os
+    aluguéis pagos) são gravados no cache.
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Apenas administradores podem pré-renderizar relatórios")
+    
+    if ano is None or mes is None:
+        hoje = datetime.now()
+        mes = hoje.month - 1 if hoje.month > 1 else 12
+        ano = hoje.year if hoje.month > 1 else hoje.year - 1
+    
+    background_tasks.add_task(_pre_renderizar_mes, ano, mes)
+    
+    return {
+        "mensagem": "Pré-renderização agendada",
+        "ano": ano,
+        "mes": mes
+    }
@@ -1,35 +1,34 @@
 """
 Rotas para gerenciamento de transferências entre proprietários
 """
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
+from sqlalchemy import case, delete, func, insert, select
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, date
 
 from app.core.database import get_db
-from app.core.auth import get_current_user_from_cookie
+from app.core.templates import pagina_estatica
+from app.core.auth import get_current_user_from_cookie, require_admin
 from app.models.usuario import Usuario
 from app.models.transferencia import Transferencia
 from app.models.aluguel import AluguelMensal
+from app.services.acerto_service import AcertoService
+from app.services.saldo_transferencia_service import SaldoTransferenciaService
+from app.services.transferencia_service import TransferenciaService
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
 
 
 # ==================== PÁGINA WEB ====================
 
 @router.get("/transferencias", response_class=HTMLResponse)
 async def transferencias_page(
-    request: Request,
     current_user: Usuario = Depends(get_current_user_from_cookie)
 ):
     """Renderiza a página de transferências"""
-    return templates.TemplateResponse(
-        "transferencias.html",
-        {"request": request, "user": current_user}
-    )
+    return pagina_estatica("transferencias.html")
 
 
 # ==================== API REST ====================
@@ -152,6 +151,7 @@ async def criar_transferencia(
     )
     
     db.add(transferencia)
+    SaldoTransferenciaService.registrar(db, [transferencia])
     db.commit()
     db.refresh(transferencia)
     
@@ -172,6 +172,30 @@ async def criar_transferencia(
     }
 
 
+@router.post("/api/transferencias/lote")
+async def criar_transferencias_em_lote(
+    data: dict,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user_from_cookie)
+):
+    """
+    Cria várias transferências de uma vez
+
+    Body: {"transferencias": [{origem_id, destino_id, mes_referencia, valor,
+    descricao?, confirmada?}, ...]}. Linhas inválidas são informadas no
+    relatório (linha = posição na lista, a partir de 1) e as demais são
+    gravadas.
+    """
+    itens = data.get("transferencias")
+    if not isinstance(itens, list) or not itens:
+        raise HTTPException(status_code=400, detail="Informe a lista de transferências")
+    
+    relatorio = TransferenciaService.criar_em_lote(db, itens)
+    db.commit()
+    
+    return {"message": f"{relatorio['criadas']} transferência(s) criada(s)", **relatorio}
+
+
 @router.put("/api/transferencias/{transferencia_id}")
 async def atualizar_transferencia(
     transferencia_id: int,
@@ -196,6 +220,9 @@ async def atualizar_transferencia(
     if "valor" in data and data["valor"] <= 0:
         raise HTTPException(status_code=400, detail="Valor deve ser maior que zero")
     
+    # Estorna o estado atual no livro-razão; o novo é lançado após as alterações
+    SaldoTransferenciaService.registrar(db, [transferencia], sinal=-1)
+    
     # Atualizar campos
     if "origem_id" in data:
         origem = db.query(Usuario).filter(Usuario.id == data["origem_id"]).first()
@@ -226,6 +253,7 @@ async def atualizar_transferencia(
             transferencia.data_confirmacao = None
     
     transferencia.updated_at = datetime.utcnow()
+    SaldoTransferenciaService.registrar(db, [transferencia])
     
     db.commit()
     db.refresh(transferencia)
@@ -261,6 +289,7 @@ async def excluir_transferencia(
     if not transferencia:
         raise HTTPException(status_code=404, detail="Transferência não encontrada")
     
+    SaldoTransferenciaService.registrar(db, [transferencia], sinal=-1)
     db.delete(transferencia)
     db.commit()
     
@@ -288,6 +317,7 @@ async def confirmar_transferencia(
     transferencia.confirmada = True
     transferencia.data_confirmacao = date.today()
     transferencia.updated_at = datetime.utcnow()
+    SaldoTransferenciaService.registrar(db, [transferencia])
     
     db.commit()
     db.refresh(transferencia)
@@ -310,25 +340,121 @@ async def obter_estatisticas(
 ):
     """Obtém estatísticas de transferências"""
     
-    query = db.query(Transferencia)
-    
+    confirmada = Transferencia.confirmada == True
+    query = select(
+        func.count(Transferencia.id),
+        func.count(case((confirmada, 1))),
+        func.coalesce(func.sum(Transferencia.valor), 0.0),
+        func.coalesce(func.sum(case((confirmada, Transferencia.valor), else_=0.0)), 0.0)
+    )
     if mes_referencia:
-        query = query.filter(Transferencia.mes_referencia == mes_referencia)
+        query = query.where(Transferencia.mes_referencia == mes_referencia)
     
-    transferencias = query.all()
-    
-    total_transferencias = len(transferencias)
-    total_confirmadas = sum(1 for t in transferencias if t.confirmada)
-    total_pendentes = total_transferencias - total_confirmadas
-    valor_total = sum(t.valor for t in transferencias)
-    valor_confirmado = sum(t.valor for t in transferencias if t.confirmada)
-    valor_pendente = valor_total - valor_confirmado
+    total_transferencias, total_confirmadas, valor_total, valor_confirmado = db.execute(query).one()
     
     return {
         "total_transferencias": total_transferencias,
         "total_confirmadas": total_confirmadas,
-        "total_pendentes": total_pendentes,
+        "total_pendentes": total_transferencias - total_confirmadas,
         "valor_total": valor_total,
         "valor_confirmado": valor_confirmado,
-        "valor_pendente": valor_pendente
+        "valor_pendente": valor_total - valor_confirmado
+    }
+
+
+# ==================== SALDOS ====================
+
+@router.get("/api/transferencias/saldos/{usuario_id}")
+async def obter_saldo(
+    usuario_id: int,
+    mes_referencia: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$"),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user_from_cookie)
+):
+    """
+    Saldo de transferências confirmadas do usuário
+
+    Com mes_referencia, o saldo inicial, entradas, saídas e saldo final do
+    mês; sem ele, o histórico dos meses com movimento. Cada usuário vê só o
+    próprio saldo; administradores veem o de qualquer um.
+    """
+    if not current_user.is_admin and usuario_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Sem permissão para acessar o saldo deste usuário")
+    if mes_referencia:
+        return SaldoTransferenciaService.saldo(db, usuario_id, mes_referencia)
+    historico = SaldoTransferenciaService.historico(db, usuario_id)
+    return {
+        "usuario_id": usuario_id,
+        "meses": historico,
+        "saldo_atual": historico[-1]["saldo_final"] if historico else 0.0
+    }
+
+
+# ==================== ACERTO DE CONTAS ====================
+
+@router.get("/api/transferencias/acerto/previa")
+async def previa_acerto(
+    mes_referencia: str = Query(..., pattern=r"^\d{4}-\d{2}$"),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_admin)
+):
+    """Posições líquidas do mês e o menor conjunto de transferências que as zera (apenas admin)"""
+    return AcertoService.calcular(db, mes_referencia)
+
+
+@router.post("/api/transferencias/acerto")
+async def aplicar_acerto(
+    data: dict,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_admin)
+):
+    """
+    Cria as transferências sugeridas pelo acerto do mês (apenas admin)
+
+    Com substituir_pendentes, as transferências não confirmadas do mês são
+    excluídas antes (o acerto considera apenas as confirmadas).
+    """
+    mes_referencia = data.get("mes_referencia")
+    if not mes_referencia:
+        raise HTTPException(status_code=400, detail="Mês de referência é obrigatório")
+    try:
+        ano, mes = map(int, mes_referencia.split("-"))
+        date(ano, mes, 1)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Mês de referência inválido (use AAAA-MM)")
+
+    acerto = AcertoService.calcular(db, mes_referencia)
+
+    removidas = 0
+    if data.get("substituir_pendentes"):
+        removidas = db.execute(
+            delete(Transferencia).where(
+                Transferencia.mes_referencia == mes_referencia,
+                Transferencia.confirmada == False
+            )
+        ).rowcount
+
+    descricao = data.get("descricao") or f"Acerto de contas {mes_referencia}"
+    agora = datetime.utcnow()
+    if acerto["transferencias"]:
+        db.execute(insert(Transferencia), [
+            {
+                "origem_id": t["origem_id"],
+                "destino_id": t["destino_id"],
+                "mes_referencia": mes_referencia,
+                "valor": t["valor"],
+                "confirmada": False,
+                "descricao": descricao,
+                "created_at": agora,
+                "updated_at": agora
+            }
+            for t in acerto["transferencias"]
+        ])
+    db.commit()
+
+    return {
+        "message": "Acerto de contas gerado com sucesso",
+        "criadas": len(acerto["transferencias"]),
+        "pendentes_removidas": removidas,
+        **acerto
     }
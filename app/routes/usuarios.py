@@ -2,10 +2,12 @@
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import or_, select
 
 from app.core.database import get_db
+from app.core.http_cache import cache_condicional
 from app.core.auth import get_current_user_from_cookie, require_admin, get_password_hash
+from app.core.responses import colunas_do_schema, resposta_de_linhas
 from app.models.usuario import Usuario
 from app.schemas.schemas import UsuarioCreate, UsuarioUpdate, UsuarioResponse
 
@@ -14,6 +16,7 @@ router = APIRouter(prefix="/api/usuarios", tags=["usuarios"])
 
 
 @router.get("/", response_model=List[UsuarioResponse])
+@cache_condicional("usuarios")
 async def list_usuarios(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
@@ -26,12 +29,13 @@ async def list_usuarios(
     """
     Lista usuários (apenas admins)
     """
-    query = db.query(Usuario)
+    # Somente as colunas de UsuarioResponse (nunca a senha)
+    query = select(*colunas_do_schema(Usuario, UsuarioResponse))
     
     # Filtro de busca
     if search:
         search_filter = f"%{search}%"
-        query = query.filter(
+        query = query.where(
             or_(
                 Usuario.nome.ilike(search_filter),
                 Usuario.email.ilike(search_filter),
@@ -41,18 +45,17 @@ async def list_usuarios(
     
     # Filtros
     if is_active is not None:
-        query = query.filter(Usuario.is_active == is_active)
+        query = query.where(Usuario.is_active == is_active)
     
     if is_admin is not None:
-        query = query.filter(Usuario.is_admin == is_admin)
+        query = query.where(Usuario.is_admin == is_admin)
     
     # Paginação
-    usuarios = query.offset(skip).limit(limit).all()
-    
-    return [UsuarioResponse.model_validate(usuario) for usuario in usuarios]
+    return resposta_de_linhas(db.execute(query.offset(skip).limit(limit)))
 
 
 @router.get("/proprietarios", response_model=List[UsuarioResponse])
+@cache_condicional("usuarios")
 async def list_proprietarios(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
@@ -64,12 +67,12 @@ async def list_proprietarios(
     Lista proprietários (usuários ativos)
     Todos os usuários autenticados podem ver a lista de proprietários
     """
-    query = db.query(Usuario).filter(Usuario.is_active == True)
+    query = select(*colunas_do_schema(Usuario, UsuarioResponse)).where(Usuario.is_active == True)
     
     # Filtro de busca
     if search:
         search_filter = f"%{search}%"
-        query = query.filter(
+        query = query.where(
             or_(
                 Usuario.nome.ilike(search_filter),
                 Usuario.email.ilike(search_filter)
@@ -77,9 +80,7 @@ async def list_proprietarios(
         )
     
     # Paginação
-    proprietarios = query.offset(skip).limit(limit).all()
-    
-    return [UsuarioResponse.model_validate(p) for p in proprietarios]
+    return resposta_de_linhas(db.execute(query.offset(skip).limit(limit)))
 
 
 @router.get("/{usuario_id}", response_model=UsuarioResponse)
@@ -0,0 +1,195 @@
+"""
+Acerto de contas mensal entre usuários
+
+Calcula a posição líquida de cada usuário em um mês e sugere o menor
+conjunto de transferências que zera as posições.
+
+Posição (em centavos; positivo = tem a receber, negativo = deve pagar):
+
+    devido - recebido + transferências enviadas - transferências recebidas
+
+- recebido: aluguéis pagos lançados para o proprietário no mês
+  (proprietario_id preenchido; valor_proprietario ou valor_total)
+- devido: a parte do proprietário, pelas participações vigentes no mês, do
+  total recebido por todos os proprietários de cada imóvel
+- transferências: somente as confirmadas do mês (as pendentes são justamente
+  o que o acerto sugere substituir)
+
+Proprietários são ligados a usuários pelo CPF ou e-mail
+(ExtratoService.vinculo_usuario_proprietario); posições de proprietários
+sem usuário são informadas à parte e não entram no acerto.
+
+O acerto usa o algoritmo guloso de fluxo de caixa mínimo: a cada passo o
+maior credor recebe do maior devedor o menor dos dois valores, o que zera
+pelo menos um deles. Com dois heaps isso custa O(n log n) e gera no máximo
+n - 1 transferências.
+"""
+import heapq
+from datetime import date
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.aluguel import AluguelMensal
+from app.models.participacao import Participacao
+from app.models.proprietario import Proprietario
+from app.models.transferencia import Transferencia
+from app.models.usuario import Usuario
+from app.services.extrato_service import ExtratoService
+from app.services.participacao_service import condicao_vigencia, total_por_imovel
+
+
+def _centavos(valor) -> int:
+    return int(round((valor or 0) * 100))
+
+
+class AcertoService:
+    """Motor de acerto de contas entre usuários"""
+
+    @staticmethod
+    def posicoes_proprietarios(db: Session, mes_referencia: str) -> Dict[int, int]:
+        """{proprietario_id: devido - recebido} em centavos, para o mês"""
+        a = AluguelMensal
+        valor = func.coalesce(a.valor_proprietario, a.valor_total)
+        diretos = [a.proprietario_id.isnot(None), a.pago == True]
+
+        recebido = db.execute(
+            select(a.proprietario_id, func.sum(valor))
+            .where(a.mes_referencia == mes_referencia, *diretos)
+            .group_by(a.proprietario_id)
+        ).all()
+
+        # Total recebido por imóvel, redistribuído pelas participações vigentes no mês
+        ano, mes = map(int, mes_referencia.split("-"))
+        por_imovel = total_por_imovel(mes_referencia, *diretos).subquery()
+        devido = db.execute(
+            select(Participacao.proprietario_id, func.sum(por_imovel.c.total * Participacao.percentual / 100.0))
+            .join(por_imovel, por_imovel.c.imovel_id == Participacao.imovel_id)
+            .where(condicao_vigencia(date(ano, mes, 1)))
+            .group_by(Participacao.proprietario_id)
+        ).all()
+
+        posicoes: Dict[int, int] = {}
+        for proprietario_id, total in devido:
+            posicoes[proprietario_id] = posicoes.get(proprietario_id, 0) + _centavos(total)
+        for proprietario_id, total in recebido:
+            posicoes[proprietario_id] = posicoes.get(proprietario_id, 0) - _centavos(total)
+        return posicoes
+
+    @staticmethod
+    def posicoes(db: Session, mes_referencia: str) -> Tuple[Dict[int, int], Dict[int, int]]:
+        """
+        Posições líquidas do mês em centavos
+
+        Retorna ({usuario_id: posição}, {proprietario_id: posição} dos
+        proprietários sem usuário vinculado).
+        """
+        por_proprietario = AcertoService.posicoes_proprietarios(db, mes_referencia)
+
+        vinculo = ExtratoService.vinculo_usuario_proprietario()
+        usuario_do_proprietario: Dict[int, int] = {}
+        if por_proprietario:
+            for usuario_id, proprietario_id in db.execute(
+                select(vinculo.c.usuario_id, vinculo.c.proprietario_id)
+                .where(vinculo.c.proprietario_id.in_(list(por_proprietario)))
+                .order_by(vinculo.c.usuario_id)
+            ):
+                usuario_do_proprietario.setdefault(proprietario_id, usuario_id)
+
+        posicoes: Dict[int, int] = {}
+        sem_usuario: Dict[int, int] = {}
+        for proprietario_id, posicao in por_proprietario.items():
+            usuario_id = usuario_do_proprietario.get(proprietario_id)
+            if usuario_id is None:
+                sem_usuario[proprietario_id] = posicao
+            else:
+                posicoes[usuario_id] = posicoes.get(usuario_id, 0) + posicao
+
+        confirmadas = [Transferencia.mes_referencia == mes_referencia, Transferencia.confirmada == True]
+        for usuario_id, total in db.execute(
+            select(Transferencia.origem_id, func.sum(Transferencia.valor)).where(*confirmadas)
+            .group_by(Transferencia.origem_id)
+        ):
+            posicoes[usuario_id] = posicoes.get(usuario_id, 0) + _centavos(total)
+        for usuario_id, total in db.execute(
+            select(Transferencia.destino_id, func.sum(Transferencia.valor)).where(*confirmadas)
+            .group_by(Transferencia.destino_id)
+        ):
+            posicoes[usuario_id] = posicoes.get(usuario_id, 0) - _centavos(total)
+
+        return posicoes, sem_usuario
+
+    @staticmethod
+    def liquidar(posicoes: Dict[int, int]) -> List[Tuple[int, int, int]]:
+        """
+        Transferências (origem, destino, centavos) que zeram as posições
+
+        Guloso com dois heaps (maiores valores primeiro). Se as posições não
+        somarem zero, o excedente do lado maior fica sem contrapartida.
+        """
+        credores = [(-valor, usuario_id) for usuario_id, valor in posicoes.items() if valor > 0]
+        devedores = [(valor, usuario_id) for usuario_id, valor in posicoes.items() if valor < 0]
+        heapq.heapify(credores)
+        heapq.heapify(devedores)
+
+        transferencias = []
+        while credores and devedores:
+            credito, credor = heapq.heappop(credores)
+            debito, devedor = heapq.heappop(devedores)
+            valor = min(-credito, -debito)
+            transferencias.append((devedor, credor, valor))
+            if -credito > valor:
+                heapq.heappush(credores, (credito + valor, credor))
+            if -debito > valor:
+                heapq.heappush(devedores, (debito + valor, devedor))
+        return transferencias
+
+    @staticmethod
+    def calcular(db: Session, mes_referencia: str) -> Dict[str, Any]:
+        """Posições do mês e transferências sugeridas para o acerto"""
+        posicoes, sem_usuario = AcertoService.posicoes(db, mes_referencia)
+        sugeridas = AcertoService.liquidar(posicoes)
+
+        pendentes = db.execute(
+            select(func.count(Transferencia.id)).where(
+                Transferencia.mes_referencia == mes_referencia, Transferencia.confirmada == False
+            )
+        ).scalar_one()
+
+        ids = set(posicoes)
+        nomes = dict(db.execute(select(Usuario.id, Usuario.nome).where(Usuario.id.in_(ids))).all()) if ids else {}
+        nomes_proprietarios = dict(db.execute(
+            select(Proprietario.id, Proprietario.nome).where(Proprietario.id.in_(list(sem_usuario)))
+        ).all()) if sem_usuario else {}
+
+        return {
+            "mes_referencia": mes_referencia,
+            "posicoes": sorted(
+                (
+                    {"usuario_id": usuario_id, "nome": nomes.get(usuario_id), "posicao": valor / 100}
+                    for usuario_id, valor in posicoes.items() if valor != 0
+                ),
+                key=lambda p: -p["posicao"]
+            ),
+            "proprietarios_sem_usuario": [
+                {"proprietario_id": proprietario_id, "nome": nomes_proprietarios.get(proprietario_id), "posicao": valor / 100}
+                for proprietario_id, valor in sem_usuario.items() if valor != 0
+            ],
+            "transferencias": [
+                {
+                    "origem_id": origem,
+                    "origem_nome": nomes.get(origem),
+                    "destino_id": destino,
+                    "destino_nome": nomes.get(destino),
+                    "valor": valor / 100
+                }
+                for origem, destino, valor in sugeridas
+            ],
+            "resumo": {
+                "transferencias_sugeridas": len(sugeridas),
+                "transferencias_pendentes": pendentes,
+                "valor_total": sum(valor for _, _, valor in sugeridas) / 100,
+                "nao_compensado": sum(posicoes.values()) / 100
+            }
+        }
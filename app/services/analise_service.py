@@ -0,0 +1,235 @@
+"""
+Análise comparativa de receitas em vários anos
+
+A série mensal é calculada em uma única consulta com funções de janela
+(LAG, SUM OVER) sobre um calendário contínuo gerado no banco, então meses
+sem aluguéis entram com zero e as comparações (mês anterior, mesmo mês do
+ano anterior, acumulado de 12 meses) não se deslocam. Comparar 10 anos
+custa o mesmo número de consultas que comparar 2.
+"""
+from decimal import Decimal
+from typing import Any, Collection, Dict, List, Optional, Sequence
+
+from sqlalchemy import Integer, Numeric, case, cast, func, literal, select
+from sqlalchemy.orm import Session
+
+from app.models.aluguel import AluguelMensal
+from app.models.imovel import Imovel
+
+# Limite de meses de uma análise (inclui os 12 meses anteriores usados
+# nas comparações)
+MAX_MESES_ANALISE = 12 * 50
+
+
+def indice_mes(mes_referencia: str) -> int:
+    """'YYYY-MM' -> número de meses desde o ano zero"""
+    ano, mes = mes_referencia.split("-")
+    return int(ano) * 12 + int(mes) - 1
+
+
+def mes_do_indice(indice: int) -> str:
+    return f"{indice // 12}-{indice % 12 + 1:02d}"
+
+
+def _centavos(valor) -> int:
+    return int(round(Decimal(valor or 0) * 100))
+
+
+def _variacao(atual: int, anterior: Optional[int]) -> Dict[str, Optional[float]]:
+    if anterior is None:
+        return {"absoluta": None, "percentual": None}
+    return {
+        "absoluta": (atual - anterior) / 100,
+        "percentual": ((atual / anterior - 1) * 100) if anterior > 0 else None
+    }
+
+
+class AnaliseComparativaService:
+    """Comparações ano a ano e mês a mês calculadas no banco"""
+
+    @staticmethod
+    def _indice_sql(coluna):
+        """Índice do mês calculado no banco a partir de 'YYYY-MM'"""
+        return cast(func.substr(coluna, 1, 4), Integer) * 12 + cast(func.substr(coluna, 6, 2), Integer) - 1
+
+    @staticmethod
+    def _serie_mensal(
+        db: Session,
+        inicio: int,
+        fim: int,
+        proprietario_id: Optional[int],
+        imovel_ids: Optional[Collection[int]] = None
+    ):
+        a = AluguelMensal
+        valor = cast(func.coalesce(a.valor_total, 0), Numeric(14, 2))
+
+        filtros = [a.mes_referencia.between(mes_do_indice(inicio), mes_do_indice(fim))]
+        if proprietario_id is not None:
+            filtros.append(a.proprietario_id == proprietario_id)
+        if imovel_ids is not None:
+            filtros.append(a.imovel_id.in_(imovel_ids))
+
+        mensal = select(
+            AnaliseComparativaService._indice_sql(a.mes_referencia).label("indice"),
+            func.count(a.id).label("alugueis"),
+            func.sum(valor).label("esperado"),
+            func.sum(case((a.pago == True, valor), else_=0)).label("recebido")
+        ).where(*filtros).group_by(a.mes_referencia).subquery("mensal")
+
+        # Calendário contínuo de inicio a fim, para que LAG(12) seja sempre
+        # o mesmo mês do ano anterior mesmo com meses sem aluguéis
+        calendario = select(cast(literal(inicio), Integer).label("indice")).cte("calendario", recursive=True)
+        calendario = calendario.union_all(
+            select(calendario.c.indice + 1).where(calendario.c.indice < fim)
+        )
+
+        recebido = func.coalesce(mensal.c.recebido, 0)
+        ordem = calendario.c.indice
+        query = select(
+            calendario.c.indice,
+            func.coalesce(mensal.c.alugueis, 0),
+            func.coalesce(mensal.c.esperado, 0),
+            recebido,
+            func.lag(recebido, 1).over(order_by=ordem),
+            func.lag(recebido, 12).over(order_by=ordem),
+            func.sum(recebido).over(order_by=ordem, rows=(-11, 0))
+        ).select_from(
+            calendario.outerjoin(mensal, mensal.c.indice == calendario.c.indice)
+        ).order_by(ordem)
+
+        return db.execute(query).all()
+
+    @staticmethod
+    def _crescimento_imoveis(
+        db: Session,
+        indices: Collection[int],
+        proprietario_id: Optional[int],
+        imovel_ids: Optional[Collection[int]] = None
+    ):
+        """Recebido por imóvel em cada um dos meses informados (índices)"""
+        a = AluguelMensal
+        valor = cast(func.coalesce(a.valor_total, 0), Numeric(14, 2))
+
+        filtros = [a.mes_referencia.in_([mes_do_indice(i) for i in sorted(indices)])]
+        if proprietario_id is not None:
+            filtros.append(a.proprietario_id == proprietario_id)
+        if imovel_ids is not None:
+            filtros.append(a.imovel_id.in_(imovel_ids))
+
+        mensal = select(
+            a.imovel_id.label("imovel_id"),
+            AnaliseComparativaService._indice_sql(a.mes_referencia).label("indice"),
+            func.sum(case((a.pago == True, valor), else_=0)).label("recebido")
+        ).where(*filtros).group_by(a.imovel_id, a.mes_referencia).subquery("mensal")
+
+        query = select(
+            mensal.c.imovel_id,
+            Imovel.nome,
+            Imovel.endereco,
+            mensal.c.indice,
+            mensal.c.recebido
+        ).join(Imovel, Imovel.id == mensal.c.imovel_id).order_by(mensal.c.imovel_id, mensal.c.indice)
+
+        return db.execute(query).all()
+
+    @staticmethod
+    def calcular(
+        db: Session,
+        meses: Sequence[str],
+        proprietario_id: Optional[int] = None,
+        imovel_ids: Optional[Collection[int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Série mensal com variações, resumo por ano e crescimento por imóvel
+
+        - **meses**: meses analisados ('YYYY-MM'); as comparações usam também
+          os 12 meses anteriores ao primeiro deles
+        - **proprietario_id**: opcional - restringe aos aluguéis do proprietário
+        - **imovel_ids**: opcional - restringe aos imóveis informados
+        """
+        indices = sorted({indice_mes(m) for m in meses})
+        if not indices:
+            return {"meses": [], "anos": [], "imoveis": []}
+        inicio, fim = indices[0] - 12, indices[-1]
+        if fim - inicio + 1 > MAX_MESES_ANALISE:
+            raise ValueError(f"Período de análise maior que {MAX_MESES_ANALISE // 12} anos")
+
+        pedidos = set(indices)
+        serie = []
+        anos: Dict[int, Dict[str, Any]] = {}
+        for indice, alugueis, esperado, recebido, anterior, ano_anterior, acumulado in \
+                AnaliseComparativaService._serie_mensal(db, inicio, fim, proprietario_id, imovel_ids):
+            if indice not in pedidos:
+                continue
+
+            recebido = _centavos(recebido)
+            anterior = _centavos(anterior) if anterior is not None else None
+            ano_anterior = _centavos(ano_anterior)
+            serie.append({
+                "mes_referencia": mes_do_indice(indice),
+                "total_alugueis": alugueis,
+                "total_esperado": _centavos(esperado) / 100,
+                "total_recebido": recebido / 100,
+                "recebido_mes_anterior": anterior / 100 if anterior is not None else None,
+                "variacao_mensal": _variacao(recebido, anterior),
+                "recebido_ano_anterior": ano_anterior / 100,
+                "variacao_anual": _variacao(recebido, ano_anterior),
+                "acumulado_12_meses": _centavos(acumulado) / 100
+            })
+
+            totais = anos.setdefault(indice // 12, {"meses": 0, "recebido": 0, "ano_anterior": 0})
+            totais["meses"] += 1
+            totais["recebido"] += recebido
+            totais["ano_anterior"] += ano_anterior
+
+        # Cada ano é comparado com os mesmos meses do ano anterior
+        resumo_anos = [
+            {
+                "ano": ano,
+                "meses_analisados": t["meses"],
+                "total_recebido": t["recebido"] / 100,
+                "recebido_ano_anterior": t["ano_anterior"] / 100,
+                "variacao": _variacao(t["recebido"], t["ano_anterior"])
+            }
+            for ano, t in sorted(anos.items())
+        ]
+
+        # Por imóvel, como no resumo por ano: só os meses pedidos, comparados
+        # com os mesmos meses do ano anterior
+        imoveis: Dict[int, Dict[str, Any]] = {}
+        # imovel_id -> {índice do mês: recebido em centavos}
+        recebido_por_mes: Dict[int, Dict[int, int]] = {}
+        for imovel_id, nome, endereco, indice, recebido in AnaliseComparativaService._crescimento_imoveis(
+            db, pedidos | {i - 12 for i in pedidos}, proprietario_id, imovel_ids
+        ):
+            imoveis.setdefault(imovel_id, {
+                "imovel_id": imovel_id,
+                "imovel_nome": nome,
+                "imovel_endereco": endereco,
+                "anos": []
+            })
+            recebido_por_mes.setdefault(imovel_id, {})[indice] = _centavos(recebido)
+
+        for imovel_id, imovel in imoveis.items():
+            meses_do_imovel = recebido_por_mes[imovel_id]
+            # ano -> [recebido, recebido nos mesmos meses do ano anterior (None sem aluguéis)]
+            por_ano: Dict[int, List[Optional[int]]] = {}
+            for indice in indices:
+                atual = meses_do_imovel.get(indice)
+                anterior = meses_do_imovel.get(indice - 12)
+                if atual is None and anterior is None:
+                    continue
+                totais = por_ano.setdefault(indice // 12, [0, None])
+                totais[0] += atual or 0
+                if anterior is not None:
+                    totais[1] = (totais[1] or 0) + anterior
+            imovel["anos"] = [
+                {
+                    "ano": ano,
+                    "total_recebido": recebido / 100,
+                    "variacao": _variacao(recebido, base)
+                }
+                for ano, (recebido, base) in sorted(por_ano.items())
+            ]
+
+        return {"meses": serie, "anos": resumo_anos, "imoveis": [i for i in imoveis.values() if i["anos"]]}
@@ -0,0 +1,198 @@
+"""
+Busca textual em proprietários, imóveis e usuários
+
+O texto buscado e as colunas são comparados em minúsculas e sem acentos, por
+trigramas: um termo casa com um campo quando aparece nele como substring ou
+quando a maior parte dos seus trigramas aparece nele (tolerância a erros de
+digitação, ex: "Sauza" encontra "Souza"). A relevância é a similaridade do
+termo com o campo mais parecido (1 para substring exata).
+
+- PostgreSQL: pg_trgm. As colunas têm índices GIN (gin_trgm_ops) sobre
+  f_unaccent(lower(coluna)) (migração add_busca_trigram) e a consulta usa os
+  operadores <% (word_similarity) e LIKE, ambos atendidos pelo índice.
+- SQLite (testes e desenvolvimento): tabela FTS5 com tokenizador trigram,
+  criada sob demanda. Ela seleciona os candidatos que têm algum trigrama do
+  termo, e a relevância é calculada em Python com os mesmos critérios. O
+  índice é reconstruído por tipo quando a versão da tabela em versoes_dados
+  muda, numa conexão própria (a transação da requisição não é tocada).
+"""
+import re
+import unicodedata
+from typing import Any, Dict, List, Sequence, Set, Tuple
+
+from sqlalchemy import func, literal, or_, select, text
+from sqlalchemy.orm import Session
+
+from app.core.data_version import obter_versoes
+from app.models.imovel import Imovel
+from app.models.proprietario import Proprietario
+from app.models.usuario import Usuario
+
+# Fração mínima dos trigramas do termo presentes no campo
+LIMIAR_SIMILARIDADE = 0.5
+
+# tipo (= escopo em versoes_dados) -> (modelo, colunas pesquisadas)
+CAMPOS_BUSCA = {
+    "proprietarios": (Proprietario, ("nome", "razao_social", "email", "cpf", "cnpj")),
+    "imoveis": (Imovel, ("nome", "endereco", "cidade")),
+    "usuarios": (Usuario, ("nome", "email", "cpf")),
+}
+
+_DDL_INDICE_SQLITE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS busca_indice "
+    "USING fts5(texto, tipo UNINDEXED, ref_id UNINDEXED, tokenize='trigram')"
+)
+_DDL_VERSOES_SQLITE = (
+    "CREATE TABLE IF NOT EXISTS busca_indice_versoes (tipo VARCHAR(50) PRIMARY KEY, versao INTEGER NOT NULL)"
+)
+
+
+def normalizar(texto: Any) -> str:
+    """Minúsculas, sem acentos e com espaços simples"""
+    decomposto = unicodedata.normalize("NFKD", str(texto or "").lower())
+    sem_acentos = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return " ".join(sem_acentos.split())
+
+
+def trigramas(texto: str) -> Set[str]:
+    """Trigramas de cada palavra, no formato do pg_trgm ("  p", " pa", ..., "ra ")"""
+    grupos = set()
+    for palavra in re.findall(r"[0-9a-z]+", texto):
+        palavra = f"  {palavra} "
+        grupos.update(palavra[i:i + 3] for i in range(len(palavra) - 2))
+    return grupos
+
+
+def similaridade(termo: str, texto: str) -> float:
+    """Relevância de um campo para o termo (ambos já normalizados)"""
+    if not termo or not texto:
+        return 0.0
+    if termo in texto:
+        return 1.0
+    do_termo = trigramas(termo)
+    if not do_termo:
+        return 0.0
+    return len(do_termo & trigramas(texto)) / len(do_termo)
+
+
+def _normalizada(coluna):
+    return func.f_unaccent(func.lower(coluna))
+
+
+class BuscaService:
+    """Busca com relevância e tolerância a erros de digitação"""
+
+    @staticmethod
+    def _postgresql(db: Session) -> bool:
+        return db.get_bind().dialect.name == "postgresql"
+
+    @staticmethod
+    def _condicao_postgresql(db: Session, tipo: str, termo: str):
+        """WHERE e relevância (expressões SQL) atendidos pelos índices trigram"""
+        modelo, campos = CAMPOS_BUSCA[tipo]
+        db.execute(select(func.set_config("pg_trgm.word_similarity_threshold", str(LIMIAR_SIMILARIDADE), True)))
+        colunas = [_normalizada(getattr(modelo, campo)) for campo in campos]
+        condicao = or_(*(
+            or_(literal(termo).op("<%")(coluna), coluna.contains(termo, autoescape=True))
+            for coluna in colunas
+        ))
+        relevancia = func.greatest(*(func.word_similarity(termo, coluna) for coluna in colunas))
+        return condicao, relevancia
+
+    @staticmethod
+    def _atualizar_indice_sqlite(db: Session, tipos: Sequence[str]) -> None:
+        """
+        Cria o índice FTS5 se preciso e reconstrói os tipos cuja tabela mudou
+
+        Usa uma conexão separada, com transação e commit próprios: a sessão da
+        requisição não executa DDL nem é confirmada no meio de uma leitura.
+        """
+        with db.get_bind().engine.begin() as conn:
+            conn.execute(text(_DDL_INDICE_SQLITE))
+            conn.execute(text(_DDL_VERSOES_SQLITE))
+            atuais = obter_versoes(conn, tipos)
+            indexadas = dict(conn.execute(text("SELECT tipo, versao FROM busca_indice_versoes")).all())
+
+            for tipo in tipos:
+                if indexadas.get(tipo) == atuais[tipo]:
+                    continue
+                modelo, campos = CAMPOS_BUSCA[tipo]
+                conn.execute(text("DELETE FROM busca_indice WHERE tipo = :tipo"), {"tipo": tipo})
+                linhas = [
+                    {"texto": "\n".join(normalizar(valor) for valor in valores), "tipo": tipo, "ref_id": ref_id}
+                    for ref_id, *valores in conn.execute(select(modelo.id, *(getattr(modelo, c) for c in campos)))
+                ]
+                if linhas:
+                    conn.execute(text("INSERT INTO busca_indice (texto, tipo, ref_id) VALUES (:texto, :tipo, :ref_id)"), linhas)
+                conn.execute(
+                    text("INSERT OR REPLACE INTO busca_indice_versoes (tipo, versao) VALUES (:tipo, :versao)"),
+                    {"tipo": tipo, "versao": atuais[tipo]}
+                )
+
+    @staticmethod
+    def _ranquear_sqlite(db: Session, tipo: str, termo: str) -> List[Tuple[int, float]]:
+        """(id, relevância) dos registros que casam com o termo, do mais relevante ao menos"""
+        BuscaService._atualizar_indice_sqlite(db, [tipo])
+        if len(termo) < 3:
+            # Curto demais para trigramas: substring simples
+            candidatos = db.execute(
+                text("SELECT ref_id, texto FROM busca_indice WHERE tipo = :tipo AND texto LIKE :padrao"),
+                {"tipo": tipo, "padrao": f"%{termo}%"}
+            )
+        else:
+            consulta = " OR ".join(
+                '"{}"'.format(termo[i:i + 3].replace('"', '""')) for i in range(len(termo) - 2)
+            )
+            candidatos = db.execute(
+                text("SELECT ref_id, texto FROM busca_indice WHERE tipo = :tipo AND busca_indice MATCH :consulta"),
+                {"tipo": tipo, "consulta": consulta}
+            )
+
+        resultados = []
+        for ref_id, texto in candidatos:
+            relevancia = max(similaridade(termo, campo) for campo in texto.split("\n"))
+            if relevancia >= LIMIAR_SIMILARIDADE:
+                resultados.append((int(ref_id), relevancia))
+        resultados.sort(key=lambda r: (-r[1], r[0]))
+        return resultados
+
+    @staticmethod
+    def filtro(db: Session, tipo: str, termo: str):
+        """Condição para o WHERE de uma listagem: registros do tipo que casam com o termo"""
+        termo = normalizar(termo)
+        if BuscaService._postgresql(db):
+            condicao, _ = BuscaService._condicao_postgresql(db, tipo, termo)
+            return condicao
+        modelo, _ = CAMPOS_BUSCA[tipo]
+        return modelo.id.in_([ref_id for ref_id, _ in BuscaService._ranquear_sqlite(db, tipo, termo)])
+
+    @staticmethod
+    def buscar(db: Session, termo: str, tipos: Sequence[str], limite: int = 10) -> Dict[str, List[Dict[str, Any]]]:
+        """Os registros mais relevantes de cada tipo, com os campos pesquisados e a relevância"""
+        termo = normalizar(termo)
+        resultado = {}
+        for tipo in tipos:
+            modelo, campos = CAMPOS_BUSCA[tipo]
+            colunas = [modelo.id, *(getattr(modelo, c) for c in campos)]
+
+            if BuscaService._postgresql(db):
+                condicao, relevancia = BuscaService._condicao_postgresql(db, tipo, termo)
+                linhas = db.execute(
+                    select(*colunas, relevancia.label("relevancia"))
+                    .where(condicao)
+                    .order_by(relevancia.desc(), modelo.id)
+                    .limit(limite)
+                ).all()
+            else:
+                ranking = BuscaService._ranquear_sqlite(db, tipo, termo)[:limite]
+                posicao = {ref_id: i for i, (ref_id, _) in enumerate(ranking)}
+                dados = {linha[0]: linha for linha in db.execute(
+                    select(*colunas).where(modelo.id.in_(list(posicao)))
+                )} if ranking else {}
+                linhas = [(*dados[ref_id], relevancia) for ref_id, relevancia in ranking if ref_id in dados]
+
+            resultado[tipo] = [
+                {"id": linha[0], **dict(zip(campos, linha[1:-1])), "relevancia": round(float(linha[-1]), 3)}
+                for linha in linhas
+            ]
+        return resultado
@@ -0,0 +1,292 @@
+"""
+Exportação de relatórios em Excel
+
+Usa o modo write_only do openpyxl: as linhas são gravadas direto no arquivo
+à medida que chegam do banco (cursor no servidor via yield_per), então a
+memória fica limitada mesmo com centenas de milhares de aluguéis. Os estilos
+são registrados uma única vez como estilos nomeados e referenciados por nome
+em cada célula.
+"""
+from tempfile import SpooledTemporaryFile
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.aluguel import AluguelMensal
+from app.models.imovel import Imovel
+from app.models.proprietario import Proprietario
+
+LINHAS_POR_LOTE = 2000
+
+MESES_NOMES = [
+    "Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho",
+    "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"
+]
+
+CABECALHOS_DETALHAMENTO = [
+    'Imóvel', 'Endereço', 'Proprietário', 'Mês', 'Status',
+    'Valor Proprietário', 'Taxa Administração', 'Total'
+]
+LARGURAS_DETALHAMENTO = [30, 40, 30, 10, 12, 18, 18, 15]
+ESTILOS_DETALHAMENTO = ["texto", "texto", "texto", "texto", "texto", "moeda", "moeda", "moeda"]
+
+
+class _Totais:
+    """Acumula os totais de um período enquanto as linhas são gravadas"""
+
+    __slots__ = ("total_alugueis", "alugueis_pagos", "total_esperado", "total_recebido")
+
+    def __init__(self):
+        self.total_alugueis = 0
+        self.alugueis_pagos = 0
+        self.total_esperado = 0.0
+        self.total_recebido = 0.0
+
+    def adicionar(self, valor_total: float, pago: bool) -> None:
+        self.total_alugueis += 1
+        self.total_esperado += valor_total
+        if pago:
+            self.alugueis_pagos += 1
+            self.total_recebido += valor_total
+
+    @property
+    def total_pendente(self) -> float:
+        return self.total_esperado - self.total_recebido
+
+    @property
+    def taxa_recebimento(self) -> float:
+        return (self.total_recebido / self.total_esperado * 100) if self.total_esperado > 0 else 0.0
+
+
+class _LinhaEstilizada:
+    """
+    Células estilizadas reaproveitadas a cada linha de uma aba
+
+    No modo write_only cada append é serializado imediatamente, então as
+    mesmas células (uma por coluna) podem receber os valores da próxima
+    linha. Isso evita criar e estilizar uma célula nova por valor.
+    """
+
+    def __init__(self, ws, estilos: List[str]):
+        self.ws = ws
+        self.celulas = [ExcelExporter._celula(ws, None, estilo) for estilo in estilos]
+
+    def gravar(self, valores: List[Any]) -> None:
+        for celula, valor in zip(self.celulas, valores):
+            celula.value = valor
+        self.ws.append(self.celulas)
+
+
+class ExcelExporter:
+    """Gera planilhas de relatórios em modo streaming"""
+
+    @staticmethod
+    def _criar_workbook():
+        from openpyxl import Workbook
+        from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+
+        wb = Workbook(write_only=True)
+        borda = Border(
+            left=Side(style='thin'),
+            right=Side(style='thin'),
+            top=Side(style='thin'),
+            bottom=Side(style='thin')
+        )
+
+        titulo = NamedStyle(name="titulo")
+        titulo.font = Font(bold=True, size=14, color="135bec")
+
+        cabecalho = NamedStyle(name="cabecalho")
+        cabecalho.font = Font(color="FFFFFF", bold=True, size=12)
+        cabecalho.fill = PatternFill(start_color="135bec", end_color="135bec", fill_type="solid")
+        cabecalho.border = borda
+        cabecalho.alignment = Alignment(horizontal="center")
+
+        texto = NamedStyle(name="texto")
+        texto.border = borda
+
+        moeda = NamedStyle(name="moeda")
+        moeda.border = borda
+        moeda.number_format = '"R$" #,##0.00'
+
+        percentual = NamedStyle(name="percentual")
+        percentual.border = borda
+        percentual.number_format = '0.0"%"'
+
+        for estilo in (titulo, cabecalho, texto, moeda, percentual):
+            wb.add_named_style(estilo)
+
+        return wb
+
+    @staticmethod
+    def _celula(ws, valor: Any, estilo: str):
+        from openpyxl.cell import WriteOnlyCell
+
+        cell = WriteOnlyCell(ws, value=valor)
+        cell.style = estilo
+        return cell
+
+    @staticmethod
+    def _linha(ws, valores: List[Any], estilos: List[str]) -> List[Any]:
+        return [ExcelExporter._celula(ws, v, e) for v, e in zip(valores, estilos)]
+
+    @staticmethod
+    def _definir_larguras(ws, larguras: List[int]) -> None:
+        from openpyxl.utils import get_column_letter
+
+        for indice, largura in enumerate(larguras, 1):
+            ws.column_dimensions[get_column_letter(indice)].width = largura
+
+    @staticmethod
+    def iterar_alugueis(
+        db: Session,
+        prefixo_mes: str,
+        proprietario_id: Optional[int] = None,
+        lote: int = LINHAS_POR_LOTE
+    ) -> Iterator[Any]:
+        """
+        Percorre os aluguéis cujo mes_referencia começa com prefixo_mes
+
+        Seleciona apenas as colunas exportadas e usa yield_per, que ativa
+        stream_results: o driver entrega as linhas em lotes em vez de
+        materializar o resultado inteiro.
+        """
+        query = db.query(
+            Imovel.nome.label("imovel_nome"),
+            Imovel.endereco.label("imovel_endereco"),
+            Proprietario.nome.label("proprietario_nome"),
+            AluguelMensal.mes_referencia,
+            AluguelMensal.pago,
+            AluguelMensal.valor_proprietario,
+            AluguelMensal.taxa_administracao,
+            AluguelMensal.valor_total
+        ).join(
+            Imovel, AluguelMensal.imovel_id == Imovel.id
+        ).outerjoin(
+            Proprietario, AluguelMensal.proprietario_id == Proprietario.id
+        ).filter(
+            AluguelMensal.mes_referencia.like(f"{prefixo_mes}%")
+        )
+
+        if proprietario_id is not None:
+            query = query.filter(AluguelMensal.proprietario_id == proprietario_id)
+
+        return query.order_by(AluguelMensal.mes_referencia, AluguelMensal.id).yield_per(lote)
+
+    @staticmethod
+    def _nova_aba_detalhamento(wb, titulo: str) -> _LinhaEstilizada:
+        ws = wb.create_sheet(titulo)
+        ExcelExporter._definir_larguras(ws, LARGURAS_DETALHAMENTO)
+        ws.freeze_panes = "A2"
+        ws.append(ExcelExporter._linha(ws, CABECALHOS_DETALHAMENTO, ["cabecalho"] * len(CABECALHOS_DETALHAMENTO)))
+        return _LinhaEstilizada(ws, ESTILOS_DETALHAMENTO)
+
+    @staticmethod
+    def _gravar_aluguel(saida: _LinhaEstilizada, linha: Any, totais: _Totais) -> None:
+        valor_total = linha.valor_total or 0.0
+        totais.adicionar(valor_total, bool(linha.pago))
+        saida.gravar([
+            linha.imovel_nome,
+            linha.imovel_endereco,
+            linha.proprietario_nome,
+            linha.mes_referencia,
+            "PAGO" if linha.pago else "PENDENTE",
+            linha.valor_proprietario,
+            linha.taxa_administracao,
+            valor_total
+        ])
+
+    @staticmethod
+    def exportar_mensal(
+        db: Session,
+        ano: int,
+        mes: int,
+        destino: BinaryIO,
+        proprietario_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Grava em destino o relatório mensal (abas Resumo e Detalhamento)"""
+        wb = ExcelExporter._criar_workbook()
+        ws_resumo = wb.create_sheet("Resumo")
+        saida_detalhes = ExcelExporter._nova_aba_detalhamento(wb, "Detalhamento")
+
+        totais = _Totais()
+        for linha in ExcelExporter.iterar_alugueis(db, f"{ano}-{mes:02d}", proprietario_id):
+            ExcelExporter._gravar_aluguel(saida_detalhes, linha, totais)
+
+        # Cada aba write_only grava em seu próprio arquivo temporário, então
+        # o resumo pode ser preenchido depois do detalhamento
+        ExcelExporter._definir_larguras(ws_resumo, [25, 20])
+        ws_resumo.append([ExcelExporter._celula(ws_resumo, f"Relatório Mensal - {MESES_NOMES[mes - 1]}/{ano}", "titulo")])
+        ws_resumo.append([])
+        ws_resumo.append(ExcelExporter._linha(ws_resumo, ["Métrica", "Valor"], ["cabecalho", "cabecalho"]))
+        for label, valor, estilo in [
+            ('Total de Aluguéis', totais.total_alugueis, "texto"),
+            ('Aluguéis Pagos', totais.alugueis_pagos, "texto"),
+            ('Aluguéis Pendentes', totais.total_alugueis - totais.alugueis_pagos, "texto"),
+            ('Total Esperado', totais.total_esperado, "moeda"),
+            ('Total Recebido', totais.total_recebido, "moeda"),
+            ('Total Pendente', totais.total_pendente, "moeda"),
+            ('Taxa de Recebimento', totais.taxa_recebimento, "percentual")
+        ]:
+            ws_resumo.append(ExcelExporter._linha(ws_resumo, [label, valor], ["texto", estilo]))
+
+        wb.save(destino)
+        return {"linhas": totais.total_alugueis}
+
+    @staticmethod
+    def exportar_anual(
+        db: Session,
+        ano: int,
+        destino: BinaryIO,
+        proprietario_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Grava em destino o relatório anual: aba Resumo e uma aba por mês"""
+        wb = ExcelExporter._criar_workbook()
+        ws_resumo = wb.create_sheet("Resumo")
+
+        totais_por_mes: Dict[int, _Totais] = {}
+        saida_mes = None
+        mes_atual = None
+
+        # Um único cursor para o ano inteiro, ordenado por mês: a aba muda
+        # quando o mês da linha muda
+        for linha in ExcelExporter.iterar_alugueis(db, f"{ano}-", proprietario_id):
+            mes = int(linha.mes_referencia[5:7])
+            if mes != mes_atual:
+                mes_atual = mes
+                saida_mes = ExcelExporter._nova_aba_detalhamento(wb, MESES_NOMES[mes - 1])
+                totais_por_mes[mes] = _Totais()
+            ExcelExporter._gravar_aluguel(saida_mes, linha, totais_por_mes[mes])
+
+        ExcelExporter._definir_larguras(ws_resumo, [15, 12, 12, 18, 18, 18])
+        ws_resumo.append([ExcelExporter._celula(ws_resumo, f"Relatório Anual - {ano}", "titulo")])
+        ws_resumo.append([])
+        cabecalhos = ["Mês", "Aluguéis", "Pagos", "Esperado", "Recebido", "Pendente"]
+        ws_resumo.append(ExcelExporter._linha(ws_resumo, cabecalhos, ["cabecalho"] * len(cabecalhos)))
+
+        estilos = ["texto", "texto", "texto", "moeda", "moeda", "moeda"]
+        anual = _Totais()
+        for mes in range(1, 13):
+            totais = totais_por_mes.get(mes, _Totais())
+            anual.total_alugueis += totais.total_alugueis
+            anual.alugueis_pagos += totais.alugueis_pagos
+            anual.total_esperado += totais.total_esperado
+            anual.total_recebido += totais.total_recebido
+            ws_resumo.append(ExcelExporter._linha(ws_resumo, [
+                MESES_NOMES[mes - 1], totais.total_alugueis, totais.alugueis_pagos,
+                totais.total_esperado, totais.total_recebido, totais.total_pendente
+            ], estilos))
+
+        ws_resumo.append(ExcelExporter._linha(ws_resumo, [
+            "Total", anual.total_alugueis, anual.alugueis_pagos,
+            anual.total_esperado, anual.total_recebido, anual.total_pendente
+        ], estilos))
+
+        wb.save(destino)
+        return {"linhas": anual.total_alugueis}
+
+
+def novo_spool() -> BinaryIO:
+    """Arquivo temporário em memória que passa para disco acima do limite configurado"""
+    return SpooledTemporaryFile(max_size=settings.EXPORT_SPOOL_MAX_SIZE)
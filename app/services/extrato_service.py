@@ -0,0 +1,212 @@
+"""
+Extratos de proprietários em lote
+
+Calcula, em uma única consulta agrupada, o extrato de todos os proprietários
+(ou de um subconjunto) em um período: parte bruta dos aluguéis, parte da
+taxa de administração, transferências recebidas/enviadas e valor líquido.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import Integer, Numeric, and_, case, cast, func, literal, null, or_, select, union_all
+from sqlalchemy.orm import Session
+
+from app.models.aluguel import AluguelMensal
+from app.models.participacao import Participacao
+from app.models.proprietario import Proprietario
+from app.models.transferencia import Transferencia
+from app.models.usuario import Usuario
+from app.services.participacao_service import condicao_vigencia, data_de_referencia
+
+
+def _centavos(valor) -> int:
+    return int(round((valor or 0) * 100))
+
+
+class ExtratoService:
+    """Motor de extratos por proprietário"""
+
+    @staticmethod
+    def vinculo_usuario_proprietario():
+        """
+        Subconsulta (usuario_id, proprietario_id) que liga usuários do sistema
+        aos proprietários correspondentes, pelo CPF ou pelo e-mail
+
+        Transferências são registradas entre usuários; este vínculo permite
+        lançá-las no extrato do proprietário.
+        """
+        return select(
+            Usuario.id.label("usuario_id"),
+            Proprietario.id.label("proprietario_id")
+        ).join(
+            Proprietario,
+            or_(
+                and_(Usuario.cpf.isnot(None), Usuario.cpf == Proprietario.cpf),
+                func.lower(Usuario.email) == func.lower(Proprietario.email)
+            )
+        ).subquery("vinculo_usuario_proprietario")
+
+    @staticmethod
+    def _movimentos(meses: Sequence[str], apenas_confirmadas: bool):
+        """
+        UNION ALL de todas as fontes de lançamentos do extrato, uma linha por
+        (proprietário, mês, imóvel) com as colunas bruto, taxa, recebido,
+        entradas e saídas (CTE: é lido duas vezes pela mesma consulta)
+        """
+        a = AluguelMensal
+
+        # Aluguéis já lançados por proprietário (importação): a parte do
+        # proprietário é valor_proprietario e a taxa é rateada na mesma proporção
+        valor_proprietario = func.coalesce(a.valor_proprietario, a.valor_total)
+        proporcao = case((a.valor_total != 0, valor_proprietario / a.valor_total), else_=1.0)
+        diretos = select(
+            a.proprietario_id.label("proprietario_id"),
+            a.mes_referencia.label("mes_referencia"),
+            a.imovel_id.label("imovel_id"),
+            valor_proprietario.label("bruto"),
+            (func.coalesce(a.taxa_administracao, 0) * proporcao).label("taxa"),
+            case((a.pago == True, valor_proprietario), else_=0).label("recebido"),
+            literal(0.0).label("entradas"),
+            literal(0.0).label("saidas")
+        ).where(a.mes_referencia.in_(meses), a.proprietario_id.isnot(None))
+
+        # Aluguéis do imóvel inteiro: rateados pelas participações vigentes
+        # na data de referência de cada aluguel
+        fator = Participacao.percentual / 100.0
+        rateados = select(
+            Participacao.proprietario_id,
+            a.mes_referencia,
+            a.imovel_id,
+            a.valor_total * fator,
+            func.coalesce(a.taxa_administracao, 0) * fator,
+            case((a.pago == True, a.valor_total * fator), else_=0),
+            literal(0.0),
+            literal(0.0)
+        ).join(
+            Participacao,
+            and_(Participacao.imovel_id == a.imovel_id, condicao_vigencia(data_de_referencia(a)))
+        ).where(a.mes_referencia.in_(meses), a.proprietario_id.is_(None))
+
+        vinculo = ExtratoService.vinculo_usuario_proprietario()
+        filtros_transferencia = [Transferencia.mes_referencia.in_(meses)]
+        if apenas_confirmadas:
+            filtros_transferencia.append(Transferencia.confirmada == True)
+
+        recebidas = select(
+            vinculo.c.proprietario_id,
+            Transferencia.mes_referencia,
+            cast(null(), Integer),
+            literal(0.0), literal(0.0), literal(0.0),
+            Transferencia.valor,
+            literal(0.0)
+        ).join(vinculo, vinculo.c.usuario_id == Transferencia.destino_id).where(*filtros_transferencia)
+
+        enviadas = select(
+            vinculo.c.proprietario_id,
+            Transferencia.mes_referencia,
+            cast(null(), Integer),
+            literal(0.0), literal(0.0), literal(0.0),
+            literal(0.0),
+            Transferencia.valor
+        ).join(vinculo, vinculo.c.usuario_id == Transferencia.origem_id).where(*filtros_transferencia)
+
+        return union_all(diretos, rateados, recebidas, enviadas).cte("movimentos")
+
+    @staticmethod
+    def calcular(
+        db: Session,
+        meses: Sequence[str],
+        proprietario_ids: Optional[Sequence[int]] = None,
+        apenas_confirmadas: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Extratos de todos os proprietários com lançamentos nos meses informados
+
+        - **meses**: meses de referência ('YYYY-MM')
+        - **proprietario_ids**: opcional - restringe aos proprietários informados
+          (que aparecem mesmo sem lançamentos)
+        - **apenas_confirmadas**: considera somente transferências confirmadas
+        """
+        m = ExtratoService._movimentos(meses, apenas_confirmadas)
+        dinheiro = lambda coluna: func.sum(cast(coluna, Numeric(14, 2)))
+
+        # Imóveis distintos de cada proprietário no período inteiro (um imóvel
+        # em janeiro e outro em fevereiro contam 2)
+        imoveis_periodo = select(
+            m.c.proprietario_id,
+            func.count(func.distinct(m.c.imovel_id)).label("total")
+        ).group_by(m.c.proprietario_id).subquery("imoveis_periodo")
+
+        query = select(
+            m.c.proprietario_id,
+            m.c.mes_referencia,
+            imoveis_periodo.c.total,
+            dinheiro(m.c.bruto),
+            dinheiro(m.c.taxa),
+            dinheiro(m.c.recebido),
+            dinheiro(m.c.entradas),
+            dinheiro(m.c.saidas)
+        ).join(
+            imoveis_periodo, imoveis_periodo.c.proprietario_id == m.c.proprietario_id
+        ).group_by(
+            m.c.proprietario_id, m.c.mes_referencia, imoveis_periodo.c.total
+        ).order_by(m.c.proprietario_id, m.c.mes_referencia)
+
+        if proprietario_ids is not None:
+            query = query.where(m.c.proprietario_id.in_(proprietario_ids))
+
+        extratos: Dict[int, Dict[str, Any]] = {}
+        for prop_id, mes_ref, imoveis, bruto, taxa, recebido, entradas, saidas in db.execute(query):
+            extrato = extratos.setdefault(prop_id, {"meses": [], "imoveis": 0})
+            extrato["imoveis"] = imoveis
+            extrato["meses"].append((mes_ref, _centavos(bruto), _centavos(taxa), _centavos(recebido),
+                                     _centavos(entradas), _centavos(saidas)))
+
+        ids = set(extratos) | set(proprietario_ids or ())
+        proprietarios = db.query(
+            Proprietario.id, Proprietario.nome, Proprietario.cpf, Proprietario.cnpj, Proprietario.tipo_pessoa
+        ).filter(Proprietario.id.in_(ids)).order_by(Proprietario.nome).all() if ids else []
+
+        return [
+            ExtratoService._montar(p, extratos.get(p.id, {"meses": [], "imoveis": 0}))
+            for p in proprietarios
+        ]
+
+    @staticmethod
+    def _montar(proprietario, dados: Dict[str, Any]) -> Dict[str, Any]:
+        totais = [0, 0, 0, 0, 0]
+        receitas_por_mes = []
+        for mes_ref, bruto, taxa, recebido, entradas, saidas in dados["meses"]:
+            for i, valor in enumerate((bruto, taxa, recebido, entradas, saidas)):
+                totais[i] += valor
+            receitas_por_mes.append({
+                "mes_referencia": mes_ref,
+                "total_esperado": bruto / 100,
+                "total_recebido": recebido / 100,
+                "total_pendente": (bruto - recebido) / 100,
+                "taxa_administracao": taxa / 100,
+                "transferencias_recebidas": entradas / 100,
+                "transferencias_enviadas": saidas / 100,
+                "liquido": (bruto - taxa + entradas - saidas) / 100
+            })
+
+        bruto, taxa, recebido, entradas, saidas = totais
+        return {
+            "proprietario": {
+                "id": proprietario.id,
+                "nome": proprietario.nome,
+                "cpf_cnpj": proprietario.cpf or proprietario.cnpj,
+                "tipo_pessoa": proprietario.tipo_pessoa
+            },
+            "resumo": {
+                "total_imoveis": dados["imoveis"],
+                "total_esperado": bruto / 100,
+                "total_recebido": recebido / 100,
+                "total_pendente": (bruto - recebido) / 100,
+                "taxa_recebimento": (recebido / bruto * 100) if bruto > 0 else 0.0,
+                "taxa_administracao": taxa / 100,
+                "transferencias_recebidas": entradas / 100,
+                "transferencias_enviadas": saidas / 100,
+                "liquido": (bruto - taxa + entradas - saidas) / 100
+            },
+            "receitas_por_mes": receitas_por_mes
+        }
@@ -7,7 +7,9 @@ Estruturas esperadas:
 - Imoveis.xlsx: Nome, Endereço, Tipo, Área Total, Área Construida, Valor Catastral, Valor Mercado, IPTU Anual, Condominio
 - Participacoes.xlsx: Nome, Endereço, VALOR, [nomes dos proprietários com percentuais]
 - Alugueis.xlsx: Múltiplas abas/sheets (uma por mês), cada aba com [data], Valor Total, [nomes dos proprietários com valores], Taxa de Administração
-- Transferencias.xlsx: formato matricial com datas e valores
+- Transferencias.xlsx: formato matricial, uma aba por mês (ex: "Set25"); cada coluna é um
+  lançamento (cabeçalho = descrição, linhas "Inicio"/"Fim" = vigência) e cada linha um usuário,
+  com valores positivos a receber e negativos a pagar
 
 IMPORTANTE: O importador de Alugueis agora processa TODAS as abas do arquivo Excel,
 permitindo importar dados de todos os meses de uma só vez.
@@ -26,7 +28,7 @@ except ImportError:
     PANDAS_AVAILABLE = False
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
+from sqlalchemy import func, or_, select
 
 from app.models.usuario import Usuario
 from app.models.imovel import Imovel
@@ -34,6 +36,14 @@ from app.models.aluguel import AluguelMensal
 from app.models.participacao import Participacao
 from app.models.proprietario import Proprietario
 from app.models.transferencia import Transferencia
+from app.services.acerto_service import AcertoService
+from app.services.transferencia_service import TransferenciaService
+
+# Abreviações dos meses nos nomes das abas (ex: "Set25")
+MESES_ABREVIADOS = {
+    'jan': 1, 'fev': 2, 'mar': 3, 'abr': 4, 'mai': 5, 'jun': 6,
+    'jul': 7, 'ago': 8, 'set': 9, 'out': 10, 'nov': 11, 'dez': 12
+}
 
 
 class ImportacaoService:
@@ -700,6 +710,159 @@ class ImportacaoService:
                 'sheets_processadas': []
             }
 
+    # ==================== IMPORTAÇÃO DE TRANSFERÊNCIAS ====================
+
+    @staticmethod
+    def mes_referencia_da_aba(nome_aba: str) -> Optional[str]:
+        """Converte o nome da aba ("Set25", "set/2025", "2025-09") para YYYY-MM"""
+        nome = str(nome_aba).strip().lower()
+        m = re.match(r'^(\d{4})-(\d{2})$', nome)
+        if m:
+            return nome
+        m = re.match(r'^([a-zç]{3})\w*[\s/-]*(\d{2}|\d{4})$', nome)
+        if not m or m.group(1) not in MESES_ABREVIADOS:
+            return None
+        ano = int(m.group(2))
+        if ano < 100:
+            ano += 2000
+        return f"{ano:04d}-{MESES_ABREVIADOS[m.group(1)]:02d}"
+
+    def importar_transferencias(self, file_content: bytes, db: Session) -> Dict[str, Any]:
+        """
+        Importa transferências da planilha matricial Transferencias.xlsx
+
+        Cada coluna de cada aba é um lançamento que soma zero entre os
+        usuários; ela vira o menor conjunto de transferências dos que pagam
+        para os que recebem (AcertoService.liquidar). Colunas fora da vigência
+        do mês da aba são ignoradas, e transferências já existentes (mesmos
+        usuários, mês e descrição) não são duplicadas. A gravação é feita em
+        lote por TransferenciaService.criar_em_lote.
+
+        Retorna: {success, importados, erros, warnings, sheets_processadas}
+        """
+        try:
+            excel_file = pd.ExcelFile(BytesIO(file_content))
+
+            # Usuários por nome completo e, se não houver ambiguidade, pelo primeiro nome
+            usuarios = db.execute(select(Usuario.id, Usuario.nome)).all()
+            por_nome = {nome.strip().lower(): usuario_id for usuario_id, nome in usuarios}
+            primeiros_nomes: Dict[str, List[int]] = {}
+            for usuario_id, nome in usuarios:
+                primeiros_nomes.setdefault(nome.strip().split()[0].lower(), []).append(usuario_id)
+            for primeiro, ids in primeiros_nomes.items():
+                if len(ids) == 1:
+                    por_nome.setdefault(primeiro, ids[0])
+
+            erros = []
+            warnings = []
+            itens = []
+            linhas = []
+            sheets_processadas = []
+
+            for sheet_name in excel_file.sheet_names:
+                mes_referencia = self.mes_referencia_da_aba(sheet_name)
+                if not mes_referencia:
+                    erros.append(f"Sheet '{sheet_name}': Não foi possível identificar o mês pelo nome da aba")
+                    continue
+                ano, mes = map(int, mes_referencia.split('-'))
+                inicio_mes = datetime(ano, mes, 1)
+
+                df = excel_file.parse(sheet_name, header=None)
+                rotulos = [str(v).strip().lower() for v in df.iloc[:, 0]]
+                linha_inicio = rotulos.index('inicio') if 'inicio' in rotulos else None
+                linha_fim = rotulos.index('fim') if 'fim' in rotulos else None
+
+                linhas_usuarios = []
+                for idx in range(1, len(df)):
+                    if idx in (linha_inicio, linha_fim) or rotulos[idx] in ('', 'nan'):
+                        continue
+                    usuario_id = por_nome.get(rotulos[idx])
+                    if usuario_id is None:
+                        warnings.append(f"Sheet '{sheet_name}': Usuário '{df.iat[idx, 0]}' não encontrado, linha ignorada")
+                        continue
+                    linhas_usuarios.append((idx, usuario_id))
+
+                lancamentos = 0
+                for col in range(1, df.shape[1]):
+                    descricao = str(df.iat[0, col]).strip()
+                    if descricao.lower() in ('', 'nan'):
+                        continue
+                    inicio = self.parse_data(df.iat[linha_inicio, col]) if linha_inicio is not None else None
+                    fim = self.parse_data(df.iat[linha_fim, col]) if linha_fim is not None else None
+                    if (inicio and inicio.replace(day=1) > inicio_mes) or (fim and fim < inicio_mes):
+                        warnings.append(f"Sheet '{sheet_name}': Lançamento '{descricao}' fora da vigência, ignorado")
+                        continue
+
+                    posicoes: Dict[int, int] = {}
+                    for idx, usuario_id in linhas_usuarios:
+                        valor = self.parse_valor(df.iat[idx, col])
+                        if valor:
+                            posicoes[usuario_id] = posicoes.get(usuario_id, 0) + int(round(valor * 100))
+                    if sum(posicoes.values()) != 0:
+                        warnings.append(
+                            f"Sheet '{sheet_name}': Lançamento '{descricao}' não soma zero "
+                            f"(diferença de {sum(posicoes.values()) / 100:.2f}), excedente ignorado"
+                        )
+
+                    for origem_id, destino_id, centavos in AcertoService.liquidar(posicoes):
+                        itens.append({
+                            'origem_id': origem_id,
+                            'destino_id': destino_id,
+                            'mes_referencia': mes_referencia,
+                            'valor': centavos / 100,
+                            'descricao': descricao,
+                            'confirmada': True
+                        })
+                        linhas.append(f"{sheet_name}/{descricao}")
+                    lancamentos += 1
+
+                sheets_processadas.append({
+                    'nome': sheet_name,
+                    'mes_referencia': mes_referencia,
+                    'lancamentos': lancamentos
+                })
+
+            # Não duplica transferências de uma importação anterior
+            meses = {item['mes_referencia'] for item in itens}
+            existentes = set(db.execute(
+                select(
+                    Transferencia.origem_id, Transferencia.destino_id,
+                    Transferencia.mes_referencia, Transferencia.descricao
+                ).where(Transferencia.mes_referencia.in_(meses))
+            ).all()) if meses else set()
+            novos = [
+                (item, linha) for item, linha in zip(itens, linhas)
+                if (item['origem_id'], item['destino_id'], item['mes_referencia'], item['descricao']) not in existentes
+            ]
+            if len(novos) < len(itens):
+                warnings.append(f"{len(itens) - len(novos)} transferência(s) já importada(s), ignorada(s)")
+
+            relatorio = TransferenciaService.criar_em_lote(
+                db, [item for item, _ in novos], [linha for _, linha in novos]
+            )
+            erros.extend(f"{e['linha']}: {e['erro']}" for e in relatorio['erros'])
+            if relatorio['criadas'] > 0:
+                db.commit()
+
+            return {
+                'success': True,
+                'importados': relatorio['criadas'],
+                'valor_total': relatorio['valor_total'],
+                'erros': erros,
+                'warnings': warnings,
+                'sheets_processadas': sheets_processadas
+            }
+
+        except Exception as e:
+            db.rollback()
+            return {
+                'success': False,
+                'importados': 0,
+                'erros': [f"Erro ao processar arquivo: {str(e)}"],
+                'warnings': [],
+                'sheets_processadas': []
+            }
+
     # ==================== PREVIEW ====================
 
     def preview_arquivo(self, file_content: bytes) -> Dict[str, Any]:
@@ -0,0 +1,330 @@
+"""
+Participações com vigência e aplicação de matrizes por diferença
+
+Cada linha de participacoes vale no intervalo [vigente_de, vigente_ate)
+(NULL = sem limite); as linhas com vigente_ate NULL formam a matriz atual.
+
+Uma versão de participações é a matriz completa {imovel_id: {proprietario_id:
+percentual}}. Aplicá-la a partir de uma data compara a matriz alvo com a
+atual e só toca nas células que mudaram: as participações alteradas ou
+removidas são encerradas na data (vigente_ate) e as novas começam nela, em
+lotes (UPDATE executemany e INSERT em massa). Assim os meses anteriores
+continuam rateados com os percentuais da época. Aplicar uma versão igual à
+matriz atual não executa nenhuma escrita (e não invalida os caches).
+
+Consultas de meses passados juntam os aluguéis às participações vigentes na
+data de referência de cada um (condicao_vigencia / data_de_referencia).
+"""
+from datetime import date
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import Date, and_, delete, func, insert, or_, select, update
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.functions import FunctionElement
+
+from app.core.matriz_esparsa import VetoresCOO, codificar, decodificar, matriz_de_vetores, vetores_de_matriz
+from app.models.aluguel import AluguelMensal
+from app.models.participacao import Participacao
+from app.models.participacao_versao import ParticipacaoVersao
+from app.models.proprietario import Proprietario
+
+# Diferenças menores que isto (em pontos percentuais) não são alterações
+TOLERANCIA_PERCENTUAL = 1e-9
+
+Celula = Tuple[int, int]
+
+
+class inicio_do_mes(FunctionElement):
+    """Primeiro dia de um mês 'YYYY-MM' como DATE"""
+    type = Date()
+    inherit_cache = True
+    name = "inicio_do_mes"
+
+
+@compiles(inicio_do_mes)
+def _inicio_do_mes(elemento, compilador, **kw):
+    mes, = elemento.clauses
+    return f"CAST({compilador.process(mes, **kw)} || '-01' AS DATE)"
+
+
+@compiles(inicio_do_mes, "sqlite")
+def _inicio_do_mes_sqlite(elemento, compilador, **kw):
+    # SQLite guarda datas como texto ISO: a comparação textual já é cronológica
+    mes, = elemento.clauses
+    return f"({compilador.process(mes, **kw)} || '-01')"
+
+
+def data_de_referencia(aluguel) -> Any:
+    """Data usada para escolher as participações de um aluguel (data_referencia ou o dia 1 do mês)"""
+    return func.coalesce(aluguel.data_referencia, inicio_do_mes(aluguel.mes_referencia))
+
+
+def condicao_vigencia(data: Any) -> Any:
+    """Condição SQL: a participação está vigente na data (valor ou expressão)"""
+    return and_(
+        or_(Participacao.vigente_de.is_(None), Participacao.vigente_de <= data),
+        or_(Participacao.vigente_ate.is_(None), Participacao.vigente_ate > data)
+    )
+
+
+def participacoes_atuais() -> Any:
+    """Condição SQL: participações da matriz atual"""
+    return Participacao.vigente_ate.is_(None)
+
+
+def total_por_imovel(mes_referencia: str, *condicoes: Any):
+    """
+    SELECT (imovel_id, total) do aluguel de cada imóvel no mês
+
+    Soma todas as linhas do imóvel, com valor_proprietario (ou valor_total,
+    quando não informado): cobre tanto os aluguéis lançados por proprietário
+    quanto os do imóvel inteiro. É a base rateada pelas participações.
+    """
+    a = AluguelMensal
+    return (
+        select(a.imovel_id, func.sum(func.coalesce(a.valor_proprietario, a.valor_total)).label("total"))
+        .where(a.mes_referencia == mes_referencia, *condicoes)
+        .group_by(a.imovel_id)
+    )
+
+
+class ParticipacaoService:
+    """Comparação, aplicação e consulta de matrizes de participações"""
+
+    @staticmethod
+    def matriz_de_dados(dados: Mapping[Any, Mapping[Any, float]]) -> Dict[Celula, float]:
+        """{(imovel_id, proprietario_id): percentual} a partir do formato das versões (chaves texto)"""
+        return {
+            (int(imovel_id), int(proprietario_id)): float(percentual)
+            for imovel_id, proprietarios in dados.items()
+            for proprietario_id, percentual in proprietarios.items()
+            if percentual and percentual > 0
+        }
+
+    @staticmethod
+    def codificar_matriz(matriz: Mapping[Celula, float]) -> bytes:
+        """Conteúdo de ParticipacaoVersao.dados_coo para a matriz"""
+        return codificar(*vetores_de_matriz(matriz))
+
+    @staticmethod
+    def vetores_da_versao(db: Session, versao_id: int) -> Optional[VetoresCOO]:
+        """Vetores COO (imovel_id, proprietario_id, percentual) de uma versão, ou None se não existir"""
+        dados = db.execute(
+            select(ParticipacaoVersao.dados_coo).where(ParticipacaoVersao.id == versao_id)
+        ).scalar_one_or_none()
+        return None if dados is None else decodificar(dados)
+
+    @staticmethod
+    def matriz_da_versao(db: Session, versao_id: int) -> Optional[Dict[Celula, float]]:
+        """Matriz {(imovel_id, proprietario_id): percentual} de uma versão, ou None se não existir"""
+        vetores = ParticipacaoService.vetores_da_versao(db, versao_id)
+        return None if vetores is None else matriz_de_vetores(*vetores)
+
+    @staticmethod
+    def comparar_versoes(
+        db: Session,
+        versao_a: int,
+        versao_b: int,
+        mes_referencia: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Diferenças da versão a para a versão b (None se alguma não existir)
+
+        As duas matrizes são alinhadas na união de imóveis e proprietários e
+        comparadas com operações vetorizadas: células alteradas, imóveis e
+        proprietários que entraram ou saíram e, por proprietário, a soma das
+        variações de percentual. Com mes_referencia, calcula também o impacto
+        de cada proprietário sobre os aluguéis daquele mês (total do imóvel
+        em total_por_imovel × variação / 100).
+        """
+        vetores_a = ParticipacaoService.vetores_da_versao(db, versao_a)
+        vetores_b = ParticipacaoService.vetores_da_versao(db, versao_b)
+        if vetores_a is None or vetores_b is None:
+            return None
+        imoveis_a, proprietarios_a, percentuais_a = vetores_a
+        imoveis_b, proprietarios_b, percentuais_b = vetores_b
+
+        # Matrizes densas alinhadas (linhas = imóveis, colunas = proprietários)
+        imovel_ids = np.union1d(imoveis_a, imoveis_b)
+        proprietario_ids = np.union1d(proprietarios_a, proprietarios_b)
+        forma = (len(imovel_ids), len(proprietario_ids))
+        matriz_a = np.zeros(forma)
+        matriz_b = np.zeros(forma)
+        matriz_a[np.searchsorted(imovel_ids, imoveis_a), np.searchsorted(proprietario_ids, proprietarios_a)] = percentuais_a
+        matriz_b[np.searchsorted(imovel_ids, imoveis_b), np.searchsorted(proprietario_ids, proprietarios_b)] = percentuais_b
+
+        variacao = matriz_b - matriz_a
+        variacao[np.abs(variacao) <= TOLERANCIA_PERCENTUAL] = 0.0
+        linhas, colunas = np.nonzero(variacao)
+
+        em_a, em_b = matriz_a > 0, matriz_b > 0
+        imovel_em_a, imovel_em_b = em_a.any(axis=1), em_b.any(axis=1)
+        proprietario_em_a, proprietario_em_b = em_a.any(axis=0), em_b.any(axis=0)
+
+        variacao_por_proprietario = variacao.sum(axis=0)
+        imoveis_alterados_por_proprietario = np.count_nonzero(variacao, axis=0)
+
+        impacto = None
+        if mes_referencia:
+            valores = np.zeros(len(imovel_ids))
+            for imovel_id, valor in db.execute(
+                total_por_imovel(mes_referencia, AluguelMensal.imovel_id.in_(imovel_ids.tolist()))
+            ):
+                valores[np.searchsorted(imovel_ids, imovel_id)] = valor or 0.0
+            impacto = np.round(valores @ variacao / 100, 2)
+
+        alterados = np.flatnonzero(imoveis_alterados_por_proprietario)
+        nomes = dict(db.execute(
+            select(Proprietario.id, Proprietario.nome)
+            .where(Proprietario.id.in_(proprietario_ids[alterados].tolist()))
+        ).all()) if len(alterados) else {}
+
+        proprietarios = [
+            {
+                "proprietario_id": int(proprietario_ids[j]),
+                "nome": nomes.get(int(proprietario_ids[j])),
+                "imoveis_alterados": int(imoveis_alterados_por_proprietario[j]),
+                "variacao_percentual": round(float(variacao_por_proprietario[j]), 6),
+                **({"impacto_valor": float(impacto[j])} if impacto is not None else {})
+            }
+            for j in alterados
+        ]
+        proprietarios.sort(key=lambda p: -abs(p.get("impacto_valor", p["variacao_percentual"])))
+
+        return {
+            "versao_a": versao_a,
+            "versao_b": versao_b,
+            "mes_referencia": mes_referencia,
+            "celulas": {
+                "imovel_id": imovel_ids[linhas].tolist(),
+                "proprietario_id": proprietario_ids[colunas].tolist(),
+                "de": matriz_a[linhas, colunas].tolist(),
+                "para": matriz_b[linhas, colunas].tolist()
+            },
+            "imoveis_adicionados": imovel_ids[imovel_em_b & ~imovel_em_a].tolist(),
+            "imoveis_removidos": imovel_ids[imovel_em_a & ~imovel_em_b].tolist(),
+            "proprietarios_adicionados": proprietario_ids[proprietario_em_b & ~proprietario_em_a].tolist(),
+            "proprietarios_removidos": proprietario_ids[proprietario_em_a & ~proprietario_em_b].tolist(),
+            "proprietarios": proprietarios,
+            "resumo": {
+                "celulas_alteradas": int(len(linhas)),
+                "imoveis_alterados": int(np.count_nonzero(variacao.any(axis=1))),
+                "proprietarios_afetados": len(proprietarios),
+                # Valor que muda de mãos: o que uns ganham os outros perdem
+                **({"valor_redistribuido": float(np.round(np.abs(impacto).sum() / 2, 2))} if impacto is not None else {})
+            }
+        }
+
+    @staticmethod
+    def calcular_diff(db: Session, alvo: Mapping[Celula, float]) -> Dict[str, List]:
+        """
+        Alterações que levam a matriz atual à matriz alvo
+
+        Retorna {"inserir": [{imovel_id, proprietario_id, percentual}],
+        "atualizar": [{id, percentual, vigente_de}], "remover": [{id,
+        vigente_de}]}. Linhas duplicadas de uma mesma célula são removidas,
+        mantendo a de menor id.
+        """
+        atuais = db.execute(
+            select(
+                Participacao.id, Participacao.imovel_id, Participacao.proprietario_id,
+                Participacao.percentual, Participacao.vigente_de
+            ).where(participacoes_atuais()).order_by(Participacao.id)
+        ).all()
+
+        inserir, atualizar, remover = [], [], []
+        vistas = set()
+        for participacao_id, imovel_id, proprietario_id, percentual, vigente_de in atuais:
+            celula = (imovel_id, proprietario_id)
+            if celula in vistas or celula not in alvo:
+                remover.append({"id": participacao_id, "vigente_de": vigente_de})
+                continue
+            vistas.add(celula)
+            novo = alvo[celula]
+            if percentual is None or abs(novo - percentual) > TOLERANCIA_PERCENTUAL:
+                atualizar.append({
+                    "id": participacao_id,
+                    "imovel_id": imovel_id,
+                    "proprietario_id": proprietario_id,
+                    "percentual": novo,
+                    "vigente_de": vigente_de
+                })
+
+        for (imovel_id, proprietario_id), percentual in alvo.items():
+            if (imovel_id, proprietario_id) not in vistas:
+                inserir.append({"imovel_id": imovel_id, "proprietario_id": proprietario_id, "percentual": percentual})
+
+        return {"inserir": inserir, "atualizar": atualizar, "remover": remover}
+
+    @staticmethod
+    def aplicar_matriz(
+        db: Session,
+        alvo: Mapping[Celula, float],
+        vigente_de: Optional[date] = None
+    ) -> Dict[str, int]:
+        """
+        Torna a matriz alvo vigente a partir de vigente_de, sem commit
+
+        Sem vigente_de, vale desde o dia 1 do mês corrente: os aluguéis do mês
+        são rateados pela matriz vigente no dia 1 (data_de_referencia), e uma
+        vigência no meio do mês só valeria a partir do mês seguinte.
+
+        Participações alteradas ou removidas são encerradas na data e as
+        novas começam nela; as que já começam na própria data são
+        atualizadas/apagadas no lugar. Retorna a quantidade de células
+        inseridas, atualizadas e removidas.
+
+        Levanta ValueError se alguma participação atual começar depois de
+        vigente_de (a vigência não pode retroagir sobre a matriz atual).
+        """
+        vigente_de = vigente_de or date.today().replace(day=1)
+        diff = ParticipacaoService.calcular_diff(db, alvo)
+
+        inicios = [
+            linha["vigente_de"] for linha in diff["atualizar"] + diff["remover"]
+            if linha["vigente_de"] is not None
+        ]
+        if inicios and max(inicios) > vigente_de:
+            raise ValueError(
+                f"Há participações vigentes desde {max(inicios):%d/%m/%Y}; "
+                f"a nova vigência deve começar nessa data ou depois"
+            )
+
+        apagar, encerrar, corrigir, novas = [], [], [], []
+        for linha in diff["remover"]:
+            if linha["vigente_de"] == vigente_de:
+                apagar.append(linha["id"])
+            else:
+                encerrar.append({"id": linha["id"], "vigente_ate": vigente_de})
+        for linha in diff["atualizar"]:
+            if linha["vigente_de"] == vigente_de:
+                corrigir.append({"id": linha["id"], "percentual": linha["percentual"]})
+            else:
+                encerrar.append({"id": linha["id"], "vigente_ate": vigente_de})
+                novas.append({
+                    "imovel_id": linha["imovel_id"],
+                    "proprietario_id": linha["proprietario_id"],
+                    "percentual": linha["percentual"]
+                })
+        novas.extend(diff["inserir"])
+
+        if apagar:
+            db.execute(
+                delete(Participacao).where(Participacao.id.in_(apagar)),
+                execution_options={"synchronize_session": False}
+            )
+        # UPDATEs em lote pela chave primária (executemany)
+        if encerrar:
+            db.execute(update(Participacao), encerrar)
+        if corrigir:
+            db.execute(update(Participacao), corrigir)
+        if novas:
+            db.execute(insert(Participacao), [{**linha, "vigente_de": vigente_de} for linha in novas])
+
+        return {
+            "inseridas": len(diff["inserir"]),
+            "atualizadas": len(diff["atualizar"]),
+            "removidas": len(diff["remover"])
+        }
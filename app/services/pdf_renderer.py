@@ -0,0 +1,275 @@
+"""
+Renderização de relatórios em PDF
+
+Os relatórios são desenhados com reportlab em uma thread dedicada e gravados
+em um arquivo temporário "spooled" (memória até EXPORT_SPOOL_MAX_SIZE, disco
+acima disso). O arquivo é então enviado ao cliente em blocos, sem manter o
+PDF inteiro em memória nem bloquear o event loop.
+
+Tabelas grandes são divididas em blocos de LINHAS_POR_BLOCO linhas: o
+reportlab calcula o layout de cada tabela como um todo, e quebrar uma única
+tabela de milhares de linhas entre páginas fica cada vez mais caro.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Sequence
+
+from app.core.config import settings
+
+LINHAS_POR_BLOCO = 250
+TAMANHO_CHUNK = 64 * 1024
+COR_PRIMARIA = '#135bec'
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.PDF_RENDER_WORKERS,
+    thread_name_prefix="pdf-render"
+)
+
+
+def _moeda(valor: float) -> str:
+    return f"R$ {valor:,.2f}"
+
+
+class PDFRenderer:
+    """Monta os documentos PDF dos relatórios financeiros"""
+
+    @staticmethod
+    def _estilos():
+        from reportlab.lib import colors
+        from reportlab.lib.enums import TA_CENTER
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
+        styles = getSampleStyleSheet()
+        styles.add(ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=18,
+            textColor=colors.HexColor(COR_PRIMARIA),
+            spaceAfter=30,
+            alignment=TA_CENTER
+        ))
+        return styles
+
+    @staticmethod
+    def _estilo_tabela(alinhamentos: Sequence[tuple] = ()):
+        from reportlab.lib import colors
+        from reportlab.platypus import TableStyle
+
+        comandos = [
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor(COR_PRIMARIA)),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]
+        comandos.extend(alinhamentos)
+        return TableStyle(comandos)
+
+    @staticmethod
+    def tabela_em_blocos(
+        cabecalho: List[str],
+        linhas: Sequence[List[Any]],
+        col_widths: List[float],
+        alinhamentos: Sequence[tuple] = (),
+        linhas_por_bloco: int = LINHAS_POR_BLOCO
+    ) -> List[Any]:
+        """
+        Divide uma tabela em várias tabelas menores
+
+        Cada bloco repete o cabeçalho (repeatRows) e pode ser quebrado entre
+        páginas por linha (splitByRow), então o resultado visual é o de uma
+        única tabela contínua.
+        """
+        from reportlab.platypus import Table
+
+        estilo = PDFRenderer._estilo_tabela(alinhamentos)
+        blocos = []
+        for inicio in range(0, max(len(linhas), 1), linhas_por_bloco):
+            dados = [cabecalho] + list(linhas[inicio:inicio + linhas_por_bloco])
+            tabela = Table(dados, colWidths=col_widths, repeatRows=1, splitByRow=1)
+            tabela.setStyle(estilo)
+            blocos.append(tabela)
+        return blocos
+
+    @staticmethod
+    def _tabela_resumo(linhas: List[List[str]]):
+        from reportlab.lib import colors
+        from reportlab.lib.units import cm
+        from reportlab.platypus import Table, TableStyle
+
+        tabela = Table([['Métrica', 'Valor']] + linhas, colWidths=[8*cm, 8*cm])
+        tabela.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor(COR_PRIMARIA)),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]))
+        return tabela
+
+    @staticmethod
+    def renderizar_relatorio_mensal(relatorio: Dict[str, Any], destino: BinaryIO) -> None:
+        """Desenha o relatório mensal consolidado em destino"""
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.units import cm
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+
+        styles = PDFRenderer._estilos()
+        elements = []
+
+        periodo = relatorio["periodo"]
+        titulo = f"Relatório Mensal - {periodo['mes_nome']}/{periodo['ano']}"
+        elements.append(Paragraph(titulo, styles['CustomTitle']))
+        elements.append(Spacer(1, 0.5*cm))
+
+        resumo = relatorio["resumo"]
+        elements.append(PDFRenderer._tabela_resumo([
+            ['Total de Aluguéis', str(resumo['total_alugueis'])],
+            ['Aluguéis Pagos', str(resumo['alugueis_pagos'])],
+            ['Aluguéis Pendentes', str(resumo['alugueis_pendentes'])],
+            ['Total Esperado', _moeda(resumo['total_esperado'])],
+            ['Total Recebido', _moeda(resumo['total_recebido'])],
+            ['Total Pendente', _moeda(resumo['total_pendente'])],
+            ['Taxa de Recebimento', f"{resumo['taxa_recebimento']:.1f}%"]
+        ]))
+        elements.append(Spacer(1, 1*cm))
+
+        if relatorio["detalhamento"]:
+            elements.append(Paragraph("Detalhamento por Imóvel", styles['Heading2']))
+            elements.append(Spacer(1, 0.5*cm))
+
+            linhas = [
+                [
+                    (item['imovel_endereco'] or '')[:40],
+                    item['status_pagamento'].upper(),
+                    _moeda(item['valores']['total'])
+                ]
+                for item in relatorio["detalhamento"]
+            ]
+            elements.extend(PDFRenderer.tabela_em_blocos(
+                ['Imóvel', 'Status', 'Valor Total'],
+                linhas,
+                col_widths=[10*cm, 3*cm, 3*cm],
+                alinhamentos=[('ALIGN', (2, 0), (2, -1), 'RIGHT')]
+            ))
+
+        SimpleDocTemplate(destino, pagesize=A4).build(elements)
+
+    @staticmethod
+    def _elementos_extrato(relatorio: Dict[str, Any], periodo: Dict[str, Any], styles) -> List[Any]:
+        from reportlab.lib.units import cm
+        from reportlab.platypus import Paragraph, Spacer
+
+        elements = []
+        proprietario = relatorio["proprietario"]
+        referencia = f"{periodo['mes']:02d}/{periodo['ano']}" if periodo.get("mes") else str(periodo["ano"])
+        elements.append(Paragraph(f"Extrato do Proprietário - {referencia}", styles['CustomTitle']))
+        elements.append(Paragraph(proprietario["nome"], styles['Heading2']))
+        if proprietario.get("cpf_cnpj"):
+            elements.append(Paragraph(proprietario["cpf_cnpj"], styles['Normal']))
+        elements.append(Spacer(1, 0.5*cm))
+
+        resumo = relatorio["resumo"]
+        elements.append(PDFRenderer._tabela_resumo([
+            ['Total de Imóveis', str(resumo['total_imoveis'])],
+            ['Total Esperado', _moeda(resumo['total_esperado'])],
+            ['Total Recebido', _moeda(resumo['total_recebido'])],
+            ['Total Pendente', _moeda(resumo['total_pendente'])],
+            ['Taxa de Recebimento', f"{resumo['taxa_recebimento']:.1f}%"],
+            ['Taxa de Administração', _moeda(resumo['taxa_administracao'])],
+            ['Transferências Recebidas', _moeda(resumo['transferencias_recebidas'])],
+            ['Transferências Enviadas', _moeda(resumo['transferencias_enviadas'])],
+            ['Líquido a Pagar', _moeda(resumo['liquido'])]
+        ]))
+        elements.append(Spacer(1, 1*cm))
+
+        if relatorio["receitas_por_mes"]:
+            elements.append(Paragraph("Receitas por Mês", styles['Heading2']))
+            elements.append(Spacer(1, 0.5*cm))
+
+            linhas = [
+                [
+                    item['mes_referencia'],
+                    _moeda(item['total_esperado']),
+                    _moeda(item['taxa_administracao']),
+                    _moeda(item['transferencias_recebidas'] - item['transferencias_enviadas']),
+                    _moeda(item['liquido'])
+                ]
+                for item in relatorio["receitas_por_mes"]
+            ]
+            elements.extend(PDFRenderer.tabela_em_blocos(
+                ['Mês', 'Bruto', 'Taxa Adm.', 'Transferências', 'Líquido'],
+                linhas,
+                col_widths=[2.8*cm, 3.3*cm, 3.3*cm, 3.3*cm, 3.3*cm],
+                alinhamentos=[('ALIGN', (1, 0), (-1, -1), 'RIGHT')]
+            ))
+
+        return elements
+
+    @staticmethod
+    def renderizar_extrato_proprietario(relatorio: Dict[str, Any], destino: BinaryIO) -> None:
+        """Desenha o extrato de um proprietário em destino"""
+        from reportlab.lib.pagesizes import A4
+        from reportlab.platypus import SimpleDocTemplate
+
+        elements = PDFRenderer._elementos_extrato(relatorio, relatorio["periodo"], PDFRenderer._estilos())
+        SimpleDocTemplate(destino, pagesize=A4).build(elements)
+
+    @staticmethod
+    def renderizar_extratos(lote: Dict[str, Any], destino: BinaryIO) -> None:
+        """Desenha os extratos de vários proprietários em um único PDF, um por página"""
+        from reportlab.lib.pagesizes import A4
+        from reportlab.platypus import SimpleDocTemplate, PageBreak, Paragraph
+
+        styles = PDFRenderer._estilos()
+        elements = []
+        for indice, extrato in enumerate(lote["extratos"]):
+            if indice:
+                elements.append(PageBreak())
+            elements.extend(PDFRenderer._elementos_extrato(extrato, lote["periodo"], styles))
+
+        if not elements:
+            elements.append(Paragraph("Nenhum extrato no período", styles['CustomTitle']))
+
+        SimpleDocTemplate(destino, pagesize=A4).build(elements)
+
+
+def iterar_arquivo(arquivo: BinaryIO, tamanho_chunk: int = TAMANHO_CHUNK) -> Iterator[bytes]:
+    """Lê o arquivo em blocos e o fecha ao final (ou se o cliente desconectar)"""
+    try:
+        arquivo.seek(0)
+        while True:
+            chunk = arquivo.read(tamanho_chunk)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        arquivo.close()
+
+
+async def renderizar_em_spool(
+    renderizar: Callable[[Dict[str, Any], BinaryIO], None],
+    relatorio: Dict[str, Any]
+) -> BinaryIO:
+    """
+    Executa renderizar no pool de threads de PDF e devolve o arquivo gerado
+
+    O arquivo retornado já está posicionado no início; use iterar_arquivo
+    para enviá-lo em uma StreamingResponse.
+    """
+    spool = SpooledTemporaryFile(max_size=settings.EXPORT_SPOOL_MAX_SIZE)
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(_executor, renderizar, relatorio, spool)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
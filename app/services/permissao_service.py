@@ -0,0 +1,136 @@
+"""
+Escopo de permissão dos usuários sobre os dados financeiros
+
+Usuários comuns veem os aluguéis, relatórios e dashboards dos imóveis em que
+um proprietário vinculado a eles (pelo CPF ou e-mail, ver
+ExtratoService.vinculo_usuario_proprietario) tem participação atual.
+Permissões financeiras ativas ampliam esse escopo:
+
+- visualizar_proprios: o padrão acima
+- visualizar_todos: vê todos os imóveis e proprietários; edita só os próprios
+- editar_todos: vê e edita tudo, como um administrador
+
+O conjunto de imóveis é calculado uma vez por usuário e guardado em memória
+junto com as versões (versoes_dados) das tabelas de que depende. Cada uso
+confere essas versões com uma única consulta: qualquer alteração em
+permissões, participações, usuários ou proprietários, feita por qualquer
+worker, invalida o escopo. As rotas aplicam o conjunto como filtro IN na
+coluna imovel_id das próprias consultas.
+"""
+import threading
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.data_version import obter_versoes
+from app.models.participacao import Participacao
+from app.models.permissao_financeira import PermissaoFinanceira
+from app.services.extrato_service import ExtratoService
+from app.services.participacao_service import participacoes_atuais
+
+# Tabelas que determinam o escopo (o vínculo usa CPF/e-mail de usuários e proprietários)
+ESCOPOS_PERMISSAO = ("permissoes_financeiras", "participacoes", "usuarios", "proprietarios")
+
+
+class EscopoPermissao:
+    """
+    Imóveis e proprietários visíveis (e imóveis editáveis) de um usuário
+
+    None significa sem restrição.
+    """
+
+    def __init__(
+        self,
+        imoveis: Optional[FrozenSet[int]] = None,
+        editaveis: Optional[FrozenSet[int]] = None,
+        proprietarios: Optional[FrozenSet[int]] = None
+    ):
+        self.imoveis = imoveis
+        self.editaveis = editaveis
+        self.proprietarios = proprietarios
+
+    @property
+    def restrito(self) -> bool:
+        return self.imoveis is not None
+
+    def filtro(self, coluna) -> list:
+        """Condições a acrescentar ao WHERE: coluna IN (imóveis visíveis), se houver restrição"""
+        return [] if self.imoveis is None else [coluna.in_(self.imoveis)]
+
+    def filtro_edicao(self, coluna) -> list:
+        """Como filtro, para os imóveis que o usuário pode alterar"""
+        return [] if self.editaveis is None else [coluna.in_(self.editaveis)]
+
+    def pode_ver(self, imovel_id: int) -> bool:
+        return self.imoveis is None or imovel_id in self.imoveis
+
+    def pode_editar(self, imovel_id: int) -> bool:
+        return self.editaveis is None or imovel_id in self.editaveis
+
+    def pode_ver_proprietario(self, proprietario_id: int) -> bool:
+        return self.proprietarios is None or proprietario_id in self.proprietarios
+
+
+SEM_RESTRICAO = EscopoPermissao()
+
+# usuario_id -> (versões de ESCOPOS_PERMISSAO, escopo)
+_cache: Dict[int, Tuple[Tuple[int, ...], EscopoPermissao]] = {}
+_cache_lock = threading.Lock()
+
+
+class PermissaoService:
+    """Cálculo e cache do escopo de permissão de cada usuário"""
+
+    @staticmethod
+    def calcular(db: Session, usuario: Any) -> EscopoPermissao:
+        """Escopo do usuário calculado no banco (sem cache)"""
+        if usuario.is_admin:
+            return SEM_RESTRICAO
+
+        tipos = set(db.execute(
+            select(PermissaoFinanceira.tipo_permissao).where(
+                PermissaoFinanceira.usuario_id == usuario.id,
+                PermissaoFinanceira.ativa == True
+            )
+        ).scalars())
+        if "editar_todos" in tipos:
+            return SEM_RESTRICAO
+
+        vinculo = ExtratoService.vinculo_usuario_proprietario()
+        proprietarios = frozenset(db.execute(
+            select(vinculo.c.proprietario_id).where(vinculo.c.usuario_id == usuario.id)
+        ).scalars())
+        proprios = frozenset(db.execute(
+            select(Participacao.imovel_id).where(
+                Participacao.proprietario_id.in_(proprietarios),
+                participacoes_atuais()
+            )
+        ).scalars()) if proprietarios else frozenset()
+
+        if "visualizar_todos" in tipos:
+            return EscopoPermissao(editaveis=proprios)
+        return EscopoPermissao(imoveis=proprios, editaveis=proprios, proprietarios=proprietarios)
+
+    @staticmethod
+    def escopo(db: Session, usuario: Any) -> EscopoPermissao:
+        """Escopo do usuário, do cache enquanto as tabelas de que depende não mudarem"""
+        if usuario.is_admin:
+            return SEM_RESTRICAO
+
+        versoes = obter_versoes(db, ESCOPOS_PERMISSAO)
+        chave = tuple(versoes[escopo] for escopo in ESCOPOS_PERMISSAO)
+        with _cache_lock:
+            em_cache = _cache.get(usuario.id)
+        if em_cache is not None and em_cache[0] == chave:
+            return em_cache[1]
+
+        escopo = PermissaoService.calcular(db, usuario)
+        with _cache_lock:
+            _cache[usuario.id] = (chave, escopo)
+        return escopo
+
+    @staticmethod
+    def limpar_cache() -> None:
+        with _cache_lock:
+            _cache.clear()
@@ -1,174 +1,265 @@
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session
 from datetime import datetime
 from decimal import Decimal
-from typing import Dict, List, Optional, Any
+from typing import Collection, Dict, List, Optional, Any
 import calendar
-from sqlalchemy import func, case
+from sqlalchemy import func, case, cast, select, null, or_, union_all, Integer, Numeric, String
 
 from app.models.aluguel import AluguelMensal
 from app.models.imovel import Imovel
 from app.models.proprietario import Proprietario
 from app.models.participacao import Participacao
+from app.services.extrato_service import ExtratoService
+from app.services.analise_service import AnaliseComparativaService, indice_mes, mes_do_indice
 
 
 class RelatorioService:
     """Serviço para geração de relatórios financeiros"""
     
     @staticmethod
-    def calcular_totais_aluguel(aluguel: AluguelMensal) -> Dict[str, Decimal]:
-        """Calcula os totais de um aluguel"""
-        valor_aluguel = Decimal(str(aluguel.valor_aluguel or 0))
-        valor_condominio = Decimal(str(aluguel.valor_condominio or 0))
-        valor_iptu = Decimal(str(aluguel.valor_iptu or 0))
-        valor_luz = Decimal(str(aluguel.valor_luz or 0))
-        valor_agua = Decimal(str(aluguel.valor_agua or 0))
-        valor_gas = Decimal(str(aluguel.valor_gas or 0))
-        valor_internet = Decimal(str(aluguel.valor_internet or 0))
-        outros_valores = Decimal(str(aluguel.outros_valores or 0))
+    def gerar_relatorio_mensal(
+        db: Session,
+        ano: int,
+        mes: int,
+        proprietario_id: Optional[int] = None,
+        imovel_ids: Optional[Collection[int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Gera relatório mensal consolidado
         
-        total = valor_aluguel + valor_condominio + valor_iptu + valor_luz + valor_agua + valor_gas + valor_internet + outros_valores
-        
-        return {
-            "valor_aluguel": valor_aluguel,
-            "valor_condominio": valor_condominio,
-            "valor_iptu": valor_iptu,
-            "valor_luz": valor_luz,
-            "valor_agua": valor_agua,
-            "valor_gas": valor_gas,
-            "valor_internet": valor_internet,
-            "outros_valores": outros_valores,
-            "valor_total": total
-        }
-    
-    @staticmethod
-    def gerar_relatorio_mensal(db: Session, ano: int, mes: int, proprietario_id: Optional[int] = None) -> Dict[str, Any]:
-        """Gera relatório mensal consolidado"""
+        Os totais são somados no banco (NUMERIC) e o detalhamento vem de uma
+        projeção apenas com as colunas exibidas, com aritmética em centavos
+        inteiros por linha. imovel_ids restringe aos imóveis informados (escopo
+        de permissão do usuário).
+        """
         mes_ref = f"{ano}-{mes:02d}"
         
-        # Usar joinedload para prevenir N+1 ao acessar aluguel.imovel.endereco
-        query = db.query(AluguelMensal).options(joinedload(AluguelMensal.imovel)).filter(AluguelMensal.mes_referencia == mes_ref)
-        alugueis = query.all()
+        filtros = [AluguelMensal.mes_referencia == mes_ref]
+        if proprietario_id is not None:
+            filtros.append(AluguelMensal.proprietario_id == proprietario_id)
+        if imovel_ids is not None:
+            filtros.append(AluguelMensal.imovel_id.in_(imovel_ids))
+        
+        valor = cast(func.coalesce(AluguelMensal.valor_total, 0), Numeric(14, 2))
+        resumo = db.query(
+            func.count(AluguelMensal.id).label('total_alugueis'),
+            func.sum(case((AluguelMensal.pago == True, 1), else_=0)).label('alugueis_pagos'),
+            func.sum(valor).label('total_esperado'),
+            func.sum(case((AluguelMensal.pago == True, valor), else_=0)).label('total_recebido')
+        ).filter(*filtros).one()
         
-        total_esperado = Decimal('0')
-        total_recebido = Decimal('0')
-        total_pendente = Decimal('0')
-        alugueis_pagos = 0
-        alugueis_pendentes = 0
-        detalhamento_imoveis = []
+        # Valores já convertidos em centavos inteiros pelo banco
+        em_centavos = lambda coluna: cast(func.round(func.coalesce(coluna, 0) * 100), Integer)
+        linhas = db.connection().execute(select(
+            AluguelMensal.id,
+            AluguelMensal.imovel_id,
+            Imovel.endereco,
+            AluguelMensal.proprietario_id,
+            AluguelMensal.data_referencia,
+            AluguelMensal.pago,
+            em_centavos(AluguelMensal.valor_proprietario),
+            em_centavos(AluguelMensal.taxa_administracao),
+            em_centavos(AluguelMensal.valor_total)
+        ).join(
+            Imovel, AluguelMensal.imovel_id == Imovel.id
+        ).where(*filtros).order_by(AluguelMensal.id)).all()
         
-        for aluguel in alugueis:
-            totais = RelatorioService.calcular_totais_aluguel(aluguel)
-            valor_total = totais["valor_total"]
-            
-            total_esperado += valor_total
-            
-            if aluguel.pago:
-                total_recebido += valor_total
-                alugueis_pagos += 1
-            else:
-                total_pendente += valor_total
-                alugueis_pendentes += 1
-            
-            detalhamento_imoveis.append({
-                "aluguel_id": aluguel.id,
-                "imovel_id": aluguel.imovel_id,
-                "imovel_endereco": aluguel.imovel.endereco,
-                "mes_referencia": aluguel.mes_referencia,
-                "status_pagamento": "pago" if aluguel.pago else "pendente",
-                "data_pagamento": aluguel.data_pagamento.isoformat() if aluguel.data_pagamento else None,
+        # select() executado na conexão (sem a camada de carregamento do ORM)
+        # e tuplas desempacotadas em vez de acesso por nome em cada linha
+        detalhamento_imoveis = [
+            {
+                "aluguel_id": aluguel_id,
+                "imovel_id": imovel_id,
+                "imovel_endereco": endereco,
+                "proprietario_id": prop_id,
+                "mes_referencia": mes_ref,
+                "data_referencia": data_referencia.isoformat() if data_referencia else None,
+                "status_pagamento": "pago" if pago else "pendente",
                 "valores": {
-                    "aluguel": float(totais["valor_aluguel"]),
-                    "condominio": float(totais["valor_condominio"]),
-                    "iptu": float(totais["valor_iptu"]),
-                    "luz": float(totais["valor_luz"]),
-                    "agua": float(totais["valor_agua"]),
-                    "gas": float(totais["valor_gas"]),
-                    "internet": float(totais["valor_internet"]),
-                    "outros": float(totais["outros_valores"]),
-                    "total": float(valor_total)
-                },
-                "participacoes": []
-            })
+                    "proprietario": proprietario_centavos / 100,
+                    "taxa_administracao": taxa_centavos / 100,
+                    "total": total_centavos / 100
+                }
+            }
+            for (aluguel_id, imovel_id, endereco, prop_id, data_referencia, pago,
+                 proprietario_centavos, taxa_centavos, total_centavos) in linhas
+        ]
         
-        nome_mes = calendar.month_name[mes]
+        total_alugueis = resumo.total_alugueis or 0
+        alugueis_pagos = int(resumo.alugueis_pagos or 0)
+        esperado_centavos = int(round((resumo.total_esperado or 0) * 100))
+        recebido_centavos = int(round((resumo.total_recebido or 0) * 100))
         
         return {
-            "periodo": {"ano": ano, "mes": mes, "mes_nome": nome_mes, "mes_referencia": mes_ref},
-            "resumo": {
-                "total_alugueis": len(alugueis),
-                "alugueis_pagos": alugueis_pagos,
-                "alugueis_pendentes": alugueis_pendentes,
-                "total_esperado": float(total_esperado),
-                "total_recebido": float(total_recebido),
-                "total_pendente": float(total_pendente),
-                "taxa_recebimento": float((total_recebido / total_esperado * 100) if total_esperado > 0 else 0)
-            },
+            "periodo": {"ano": ano, "mes": mes, "mes_nome": calendar.month_name[mes], "mes_referencia": mes_ref},
+            "resumo": RelatorioService._resumo(total_alugueis, alugueis_pagos, esperado_centavos, recebido_centavos),
             "detalhamento": detalhamento_imoveis
         }
     
     @staticmethod
     def gerar_relatorio_proprietario(db: Session, proprietario_id: int, ano: int, mes: Optional[int] = None) -> Dict[str, Any]:
-        """Gera relatório de proprietário"""
-        proprietario = db.query(Proprietario).filter(Proprietario.id == proprietario_id).first()
+        """Gera o extrato de um proprietário no mês ou, sem mês, no ano"""
+        extratos = RelatorioService.gerar_extratos(db, ano, mes, proprietario_ids=[proprietario_id])
         
-        if not proprietario:
+        if not extratos["extratos"]:
             return {"erro": "Proprietário não encontrado"}
         
+        return {**extratos["extratos"][0], "periodo": extratos["periodo"]}
+    
+    @staticmethod
+    def gerar_extratos(
+        db: Session,
+        ano: int,
+        mes: Optional[int] = None,
+        proprietario_ids: Optional[List[int]] = None
+    ) -> Dict[str, Any]:
+        """Gera os extratos de todos os proprietários (ou dos informados) de uma só vez"""
+        meses = [mes] if mes else range(1, 13)
+        extratos = ExtratoService.calcular(
+            db,
+            [f"{ano}-{m:02d}" for m in meses],
+            proprietario_ids=proprietario_ids
+        )
+        
         return {
-            "proprietario": {
-                "id": proprietario.id,
-                "nome": proprietario.nome,
-                "cpf_cnpj": proprietario.cpf_cnpj,
-                "tipo_pessoa": proprietario.tipo_pessoa
-            },
             "periodo": {"ano": ano, "mes": mes},
-            "resumo": {
-                "total_imoveis": 0,
-                "total_esperado": 0.0,
-                "total_recebido": 0.0,
-                "total_pendente": 0.0,
-                "taxa_recebimento": 0.0
+            "total_proprietarios": len(extratos),
+            "extratos": extratos
+        }
+    
+    @staticmethod
+    def gerar_dashboard(db: Session, ano: int, mes: int, imovel_ids: Optional[Collection[int]] = None) -> Dict[str, Any]:
+        """
+        Dados do dashboard em uma única consulta
+        
+        Os totais por mês (do ano e do mês anterior) e os 5 imóveis de maior
+        receita no mês são a mesma agregação com agrupamentos diferentes,
+        unidas com UNION ALL; o ranking é ordenado e limitado no banco.
+        imovel_ids restringe aos imóveis informados.
+        """
+        mes_ref = f"{ano}-{mes:02d}"
+        ano_anterior, mes_anterior = (ano, mes - 1) if mes > 1 else (ano - 1, 12)
+        mes_anterior_ref = f"{ano_anterior}-{mes_anterior:02d}"
+        
+        a = AluguelMensal
+        escopo = [a.imovel_id.in_(imovel_ids)] if imovel_ids is not None else []
+        valor = cast(func.coalesce(a.valor_total, 0), Numeric(14, 2))
+        agregados = (
+            func.count(a.id).label("total_alugueis"),
+            func.sum(case((a.pago == True, 1), else_=0)).label("alugueis_pagos"),
+            func.sum(valor).label("total_esperado"),
+            func.sum(case((a.pago == True, valor), else_=0)).label("total_recebido")
+        )
+        
+        por_mes = select(
+            a.mes_referencia.label("mes_referencia"),
+            cast(null(), Integer).label("imovel_id"),
+            cast(null(), String).label("imovel_endereco"),
+            *agregados
+        ).where(
+            or_(a.mes_referencia.like(f"{ano}-%"), a.mes_referencia == mes_anterior_ref),
+            *escopo
+        ).group_by(a.mes_referencia)
+        
+        top = select(
+            a.mes_referencia,
+            a.imovel_id,
+            Imovel.endereco,
+            *agregados
+        ).join(
+            Imovel, a.imovel_id == Imovel.id
+        ).where(
+            a.mes_referencia == mes_ref,
+            *escopo
+        ).group_by(
+            a.mes_referencia, a.imovel_id, Imovel.endereco
+        ).order_by(
+            func.sum(valor).desc(), a.imovel_id
+        ).limit(5).subquery("top_imoveis")
+        
+        em_centavos = lambda valor: int(round((valor or 0) * 100))
+        
+        # (total, pagos, esperado, recebido) por mês, valores em centavos
+        meses: Dict[str, tuple] = {}
+        top_imoveis = []
+        for mes_linha, imovel_id, endereco, total, pagos, esperado, recebido in db.execute(
+            union_all(por_mes, select(top))
+        ):
+            totais = (total, int(pagos or 0), em_centavos(esperado), em_centavos(recebido))
+            if imovel_id is None:
+                meses[mes_linha] = totais
+            else:
+                top_imoveis.append({
+                    "imovel_id": imovel_id,
+                    "imovel_endereco": endereco,
+                    "status_pagamento": "pago" if total == totais[1] else "pendente",
+                    "valores": {"total": totais[2] / 100}
+                })
+        # A ordem do LIMIT não sobrevive ao UNION ALL
+        top_imoveis.sort(key=lambda item: item["valores"]["total"], reverse=True)
+        
+        vazio = (0, 0, 0, 0)
+        _, _, _, recebido_atual = meses.get(mes_ref, vazio)
+        _, _, _, recebido_anterior = meses.get(mes_anterior_ref, vazio)
+        do_ano = [totais for ref, totais in meses.items() if ref.startswith(f"{ano}-")]
+        anual = RelatorioService._resumo(*(sum(coluna) for coluna in zip(vazio, *do_ano)))
+        
+        return {
+            "mes_atual": {
+                "periodo": {"ano": ano, "mes": mes, "mes_nome": calendar.month_name[mes], "mes_referencia": mes_ref},
+                "resumo": RelatorioService._resumo(*meses.get(mes_ref, vazio))
             },
-            "receitas_por_mes": []
+            "comparacao_mensal": {
+                "variacao_absoluta": (recebido_atual - recebido_anterior) / 100,
+                "variacao_percentual": ((recebido_atual / recebido_anterior - 1) * 100) if recebido_anterior > 0 else 0.0,
+                "mes_anterior": {
+                    "ano": ano_anterior,
+                    "mes": mes_anterior,
+                    "total_recebido": recebido_anterior / 100
+                }
+            },
+            "anual": {
+                "ano": ano,
+                "resumo": {
+                    "total_esperado": anual["total_esperado"],
+                    "total_recebido": anual["total_recebido"],
+                    "total_pendente": anual["total_pendente"],
+                    "taxa_recebimento": anual["taxa_recebimento"]
+                }
+            },
+            "top_imoveis": top_imoveis
+        }
+    
+    @staticmethod
+    def _resumo(total: int, pagos: int, esperado_centavos: int, recebido_centavos: int) -> Dict[str, Any]:
+        """Resumo no formato de gerar_relatorio_mensal a partir de valores em centavos"""
+        return {
+            "total_alugueis": total,
+            "alugueis_pagos": pagos,
+            "alugueis_pendentes": total - pagos,
+            "total_esperado": esperado_centavos / 100,
+            "total_recebido": recebido_centavos / 100,
+            "total_pendente": (esperado_centavos - recebido_centavos) / 100,
+            "taxa_recebimento": (recebido_centavos / esperado_centavos * 100) if esperado_centavos > 0 else 0.0
         }
     
     @staticmethod
-    def gerar_relatorio_anual(db: Session, ano: int) -> Dict[str, Any]:
+    def gerar_relatorio_anual(db: Session, ano: int, imovel_ids: Optional[Collection[int]] = None) -> Dict[str, Any]:
         """Gera relatório anual consolidado com query agregada (evita N+1)"""
         
         # Query agregada: uma única consulta ao invés de 12 chamadas a gerar_relatorio_mensal
         # Agrupa por mês e calcula totais com SUM e COUNT
+        valor = cast(func.coalesce(AluguelMensal.valor_total, 0), Numeric(14, 2))
         resultados = db.query(
             func.substr(AluguelMensal.mes_referencia, 6, 2).label('mes'),  # Extrai mês da string 'YYYY-MM'
             func.count(AluguelMensal.id).label('total_alugueis'),
             func.sum(case((AluguelMensal.pago == True, 1), else_=0)).label('alugueis_pagos'),
             func.sum(case((AluguelMensal.pago == False, 1), else_=0)).label('alugueis_pendentes'),
-            func.sum(
-                AluguelMensal.valor_aluguel + 
-                func.coalesce(AluguelMensal.valor_condominio, 0) +
-                func.coalesce(AluguelMensal.valor_iptu, 0) +
-                func.coalesce(AluguelMensal.valor_luz, 0) +
-                func.coalesce(AluguelMensal.valor_agua, 0) +
-                func.coalesce(AluguelMensal.valor_gas, 0) +
-                func.coalesce(AluguelMensal.valor_internet, 0) +
-                func.coalesce(AluguelMensal.outros_valores, 0)
-            ).label('total_esperado'),
-            func.sum(
-                case(
-                    (AluguelMensal.pago == True, 
-                     AluguelMensal.valor_aluguel + 
-                     func.coalesce(AluguelMensal.valor_condominio, 0) +
-                     func.coalesce(AluguelMensal.valor_iptu, 0) +
-                     func.coalesce(AluguelMensal.valor_luz, 0) +
-                     func.coalesce(AluguelMensal.valor_agua, 0) +
-                     func.coalesce(AluguelMensal.valor_gas, 0) +
-                     func.coalesce(AluguelMensal.valor_internet, 0) +
-                     func.coalesce(AluguelMensal.outros_valores, 0)),
-                    else_=0
-                )
-            ).label('total_recebido')
+            func.sum(valor).label('total_esperado'),
+            func.sum(case((AluguelMensal.pago == True, valor), else_=0)).label('total_recebido')
         ).filter(
-            AluguelMensal.mes_referencia.like(f"{ano}-%")
+            AluguelMensal.mes_referencia.like(f"{ano}-%"),
+            *([AluguelMensal.imovel_id.in_(imovel_ids)] if imovel_ids is not None else [])
         ).group_by(
             func.substr(AluguelMensal.mes_referencia, 6, 2)
         ).all()
@@ -227,31 +318,63 @@ class RelatorioService:
         }
     
     @staticmethod
-    def gerar_relatorio_comparativo(db: Session, ano1: int, ano2: int) -> Dict[str, Any]:
+    def gerar_analise_comparativa(
+        db: Session,
+        anos: Optional[List[int]] = None,
+        inicio: Optional[str] = None,
+        fim: Optional[str] = None,
+        proprietario_id: Optional[int] = None,
+        imovel_ids: Optional[Collection[int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Análise comparativa de uma lista de anos ou de um intervalo de meses
+        ('YYYY-MM' a 'YYYY-MM'), calculada com funções de janela no banco
+        """
+        if anos:
+            meses = [f"{ano}-{mes:02d}" for ano in sorted(set(anos)) for mes in range(1, 13)]
+            periodo = {"anos": sorted(set(anos))}
+        else:
+            meses = [mes_do_indice(i) for i in range(indice_mes(inicio), indice_mes(fim) + 1)]
+            periodo = {"inicio": inicio, "fim": fim}
+        
+        return {
+            "periodo": periodo,
+            "proprietario_id": proprietario_id,
+            **AnaliseComparativaService.calcular(db, meses, proprietario_id=proprietario_id, imovel_ids=imovel_ids)
+        }
+    
+    @staticmethod
+    def gerar_relatorio_comparativo(
+        db: Session,
+        ano1: int,
+        ano2: int,
+        imovel_ids: Optional[Collection[int]] = None
+    ) -> Dict[str, Any]:
         """Gera relatório comparativo entre dois anos"""
-        relatorio_ano1 = RelatorioService.gerar_relatorio_anual(db, ano1)
-        relatorio_ano2 = RelatorioService.gerar_relatorio_anual(db, ano2)
+        analise = AnaliseComparativaService.calcular(
+            db,
+            [f"{ano}-{mes:02d}" for ano in (ano1, ano2) for mes in range(1, 13)],
+            imovel_ids=imovel_ids
+        )
         
-        total_ano1 = Decimal(str(relatorio_ano1["resumo"]["total_recebido"]))
-        total_ano2 = Decimal(str(relatorio_ano2["resumo"]["total_recebido"]))
+        recebido = {item["mes_referencia"]: Decimal(str(item["total_recebido"])) for item in analise["meses"]}
+        total_ano1 = sum((recebido[f"{ano1}-{mes:02d}"] for mes in range(1, 13)), Decimal('0'))
+        total_ano2 = sum((recebido[f"{ano2}-{mes:02d}"] for mes in range(1, 13)), Decimal('0'))
         
         variacao_absoluta = total_ano2 - total_ano1
         variacao_percentual = ((total_ano2 / total_ano1 - 1) * 100) if total_ano1 > 0 else Decimal('0')
         
         comparacao_mensal = []
         for mes in range(1, 13):
-            dados_ano1 = relatorio_ano1["receitas_mensais"][mes - 1]
-            dados_ano2 = relatorio_ano2["receitas_mensais"][mes - 1]
-            
-            receita_mes1 = Decimal(str(dados_ano1["total_recebido"]))
-            receita_mes2 = Decimal(str(dados_ano2["total_recebido"]))
+            receita_mes1 = recebido[f"{ano1}-{mes:02d}"]
+            receita_mes2 = recebido[f"{ano2}-{mes:02d}"]
             
             var_mensal = receita_mes2 - receita_mes1
             var_perc_mensal = ((receita_mes2 / receita_mes1 - 1) * 100) if receita_mes1 > 0 else Decimal('0')
             
             comparacao_mensal.append({
                 "mes": mes,
-                "mes_nome": dados_ano1["mes_nome"],
+                "mes_nome": calendar.month_name[mes],
                 f"receita_{ano1}": float(receita_mes1),
                 f"receita_{ano2}": float(receita_mes2),
                 "variacao_absoluta": float(var_mensal),
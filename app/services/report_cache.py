@@ -0,0 +1,172 @@
+"""
+Cache de relatórios exportados (PDF/Excel)
+
+Cada arquivo gerado é identificado por (tipo, período, proprietário, hash da
+versão dos dados). O hash vem das versões de "alugueis_mensais:<mês>",
+"transferencias:<mês>", "participacoes", "imoveis" e "proprietarios" (os
+nomes impressos nos relatórios) em versoes_dados, incrementadas
+automaticamente quando qualquer dado usado no relatório muda, então um
+arquivo em cache nunca fica desatualizado: a chave muda.
+
+Somente períodos fechados (todos os aluguéis pagos) são gravados em disco,
+pois são os que deixam de mudar; os demais são gerados a cada download. Em
+ambos os casos a resposta leva um ETag e pedidos com If-None-Match
+correspondente recebem 304 sem gerar nada.
+"""
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Awaitable, BinaryIO, Callable, List, Optional
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.data_version import obter_versoes
+from app.core.http_cache import etag_corresponde
+from app.models.aluguel import AluguelMensal
+from app.services.pdf_renderer import iterar_arquivo
+
+logger = logging.getLogger(__name__)
+
+
+def meses_do_periodo(ano: int, mes: Optional[int] = None) -> List[str]:
+    """Meses de referência ('YYYY-MM') cobertos por um período"""
+    meses = [mes] if mes else range(1, 13)
+    return [f"{ano}-{m:02d}" for m in meses]
+
+
+class RelatorioCache:
+    """Armazena em disco os arquivos de relatórios de períodos fechados"""
+
+    def __init__(self, diretorio: str):
+        self.diretorio = Path(diretorio)
+
+    @staticmethod
+    def hash_versao(db: Session, tipo: str, meses: List[str], proprietario_id: Optional[int] = None) -> str:
+        """Hash que muda sempre que aluguéis ou transferências dos meses, participações, imóveis ou proprietários mudam"""
+        escopos = [f"alugueis_mensais:{m}" for m in meses] + [f"transferencias:{m}" for m in meses]
+        versoes = obter_versoes(db, escopos + ["participacoes", "imoveis", "proprietarios"])
+        partes = [tipo, ",".join(meses), str(proprietario_id or "todos")]
+        partes.extend(f"{escopo}={versao}" for escopo, versao in sorted(versoes.items()))
+        return hashlib.sha256("|".join(partes).encode()).hexdigest()[:32]
+
+    @staticmethod
+    def periodo_fechado(db: Session, meses: List[str], proprietario_id: Optional[int] = None) -> bool:
+        """Verdadeiro se há aluguéis nos meses e todos estão pagos"""
+        query = db.query(
+            func.count(AluguelMensal.id),
+            func.sum(case((AluguelMensal.pago == True, 0), else_=1))
+        ).filter(AluguelMensal.mes_referencia.in_(meses))
+
+        if proprietario_id is not None:
+            query = query.filter(AluguelMensal.proprietario_id == proprietario_id)
+
+        total, pendentes = query.one()
+        return bool(total) and not pendentes
+
+    def _prefixo(self, tipo: str, meses: List[str], proprietario_id: Optional[int]) -> str:
+        periodo = meses[0] if len(meses) == 1 else meses[0][:4]
+        return f"{tipo}_{periodo}_{proprietario_id or 'todos'}_"
+
+    def caminho(self, tipo: str, meses: List[str], proprietario_id: Optional[int], versao: str, extensao: str) -> Path:
+        return self.diretorio / f"{self._prefixo(tipo, meses, proprietario_id)}{versao}.{extensao}"
+
+    def salvar(self, arquivo: BinaryIO, destino: Path) -> None:
+        """Grava o arquivo de forma atômica e remove versões anteriores do mesmo relatório"""
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        prefixo = destino.name[:destino.name.rindex("_") + 1]
+
+        arquivo.seek(0)
+        fd, temporario = tempfile.mkstemp(dir=self.diretorio, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as saida:
+                shutil.copyfileobj(arquivo, saida)
+            os.replace(temporario, destino)
+        except BaseException:
+            if os.path.exists(temporario):
+                os.unlink(temporario)
+            raise
+
+        for antigo in self.diretorio.glob(f"{prefixo}*"):
+            if antigo != destino:
+                antigo.unlink(missing_ok=True)
+
+    async def gerar_e_armazenar(
+        self,
+        db: Session,
+        tipo: str,
+        meses: List[str],
+        proprietario_id: Optional[int],
+        extensao: str,
+        gerar: Callable[[], Awaitable[BinaryIO]]
+    ) -> Optional[Path]:
+        """Gera o relatório e grava em disco se o período estiver fechado"""
+        if not self.periodo_fechado(db, meses, proprietario_id):
+            return None
+
+        versao = self.hash_versao(db, tipo, meses, proprietario_id)
+        destino = self.caminho(tipo, meses, proprietario_id, versao, extensao)
+        if destino.exists():
+            return destino
+
+        arquivo = await gerar()
+        try:
+            self.salvar(arquivo, destino)
+        finally:
+            arquivo.close()
+        return destino
+
+    async def responder(
+        self,
+        request: Request,
+        db: Session,
+        tipo: str,
+        meses: List[str],
+        proprietario_id: Optional[int],
+        extensao: str,
+        media_type: str,
+        filename: str,
+        gerar: Callable[[], Awaitable[BinaryIO]]
+    ) -> Response:
+        """
+        Responde um download de relatório usando o cache
+
+        gerar é chamado apenas se o cliente não tiver a versão atual
+        (If-None-Match) e o arquivo não estiver em disco.
+        """
+        versao = self.hash_versao(db, tipo, meses, proprietario_id)
+        etag = f'"{versao}"'
+        headers = {
+            "ETag": etag,
+            "Cache-Control": "private, no-cache",
+        }
+
+        if etag_corresponde(request, etag):
+            return Response(status_code=304, headers=headers)
+
+        headers["Content-Disposition"] = f"attachment; filename={filename}"
+        destino = self.caminho(tipo, meses, proprietario_id, versao, extensao)
+        if destino.exists():
+            return FileResponse(destino, media_type=media_type, headers=headers)
+
+        arquivo = await gerar()
+
+        if self.periodo_fechado(db, meses, proprietario_id):
+            try:
+                self.salvar(arquivo, destino)
+            except OSError as e:
+                logger.warning(f"Não foi possível gravar {destino.name} no cache: {e}")
+            else:
+                arquivo.close()
+                return FileResponse(destino, media_type=media_type, headers=headers)
+
+        return StreamingResponse(iterar_arquivo(arquivo), media_type=media_type, headers=headers)
+
+
+relatorio_cache = RelatorioCache(settings.REPORT_CACHE_DIR)
@@ -0,0 +1,218 @@
+"""
+Livro-razão mensal das transferências
+
+Cada usuário tem uma linha por mês em que houve movimento, com saldo
+inicial, entradas, saídas e saldo final das transferências confirmadas. As
+linhas são mantidas incrementalmente pelas rotas de transferências: cada
+criação, alteração, confirmação ou exclusão aplica a diferença no mês da
+transferência e desloca o saldo dos meses seguintes do mesmo usuário.
+
+Consultar o saldo de um usuário em um mês é uma busca pela chave primária
+(usuario_id, mes_referencia): a linha do mês, ou a do último mês anterior
+com movimento.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.saldo_transferencia import SaldoTransferencia
+from app.models.transferencia import Transferencia
+
+# (usuario_id, mes_referencia) -> [entradas, saidas]
+Movimentos = Dict[Tuple[int, str], List[float]]
+
+# Acima de tantos meses afetados, as linhas dos usuários envolvidos são
+# recalculadas de uma vez em vez de atualizadas mês a mês
+LIMITE_INCREMENTAL = 20
+
+
+def movimentos_de(transferencias: Iterable, sinal: int = 1) -> Movimentos:
+    """Entradas e saídas por usuário e mês das transferências confirmadas"""
+    movimentos: Movimentos = defaultdict(lambda: [0.0, 0.0])
+    for t in transferencias:
+        if not t.confirmada:
+            continue
+        movimentos[(t.destino_id, t.mes_referencia)][0] += sinal * t.valor
+        movimentos[(t.origem_id, t.mes_referencia)][1] += sinal * t.valor
+    return movimentos
+
+
+def saldos_acumulados(movimentos: Movimentos) -> List[dict]:
+    """Linhas completas do livro-razão a partir dos movimentos de cada mês"""
+    linhas = []
+    saldo_por_usuario: Dict[int, float] = {}
+    for (usuario_id, mes_referencia), (entradas, saidas) in sorted(movimentos.items()):
+        saldo_inicial = saldo_por_usuario.get(usuario_id, 0.0)
+        saldo_final = saldo_inicial + entradas - saidas
+        saldo_por_usuario[usuario_id] = saldo_final
+        linhas.append({
+            "usuario_id": usuario_id,
+            "mes_referencia": mes_referencia,
+            "saldo_inicial": saldo_inicial,
+            "entradas": entradas,
+            "saidas": saidas,
+            "saldo_final": saldo_final
+        })
+    return linhas
+
+
+def _como_dict(linha: SaldoTransferencia) -> dict:
+    return {
+        "usuario_id": linha.usuario_id,
+        "mes_referencia": linha.mes_referencia,
+        "saldo_inicial": linha.saldo_inicial,
+        "entradas": linha.entradas,
+        "saidas": linha.saidas,
+        "saldo_final": linha.saldo_final
+    }
+
+
+class SaldoTransferenciaService:
+    """Manutenção e consulta do livro-razão de transferências"""
+
+    @staticmethod
+    def movimentar(db: Session, usuario_id: int, mes_referencia: str, entradas: float = 0.0, saidas: float = 0.0) -> None:
+        """Soma entradas/saídas (podem ser negativas) ao mês e propaga a diferença aos meses seguintes"""
+        s = SaldoTransferencia
+        tabela = s.__table__
+        do_mes = (s.usuario_id == usuario_id, s.mes_referencia == mes_referencia)
+        diferenca = entradas - saidas
+        anterior = func.coalesce(
+            select(s.saldo_final)
+            .where(s.usuario_id == usuario_id, s.mes_referencia < mes_referencia)
+            .order_by(s.mes_referencia.desc())
+            .limit(1)
+            .scalar_subquery(),
+            0.0
+        )
+        dialeto = db.get_bind().dialect.name
+
+        if dialeto in ("postgresql", "sqlite"):
+            # Um único INSERT ... ON CONFLICT: duas transações abrindo o mesmo
+            # mês não colidem na chave primária
+            if dialeto == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert as upsert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as upsert
+
+            stmt = upsert(tabela).values(
+                usuario_id=usuario_id, mes_referencia=mes_referencia,
+                saldo_inicial=anterior, entradas=entradas, saidas=saidas, saldo_final=anterior + diferenca
+            )
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[tabela.c.usuario_id, tabela.c.mes_referencia],
+                set_={
+                    "entradas": tabela.c.entradas + stmt.excluded.entradas,
+                    "saidas": tabela.c.saidas + stmt.excluded.saidas,
+                    "saldo_final": tabela.c.saldo_final + (stmt.excluded.entradas - stmt.excluded.saidas)
+                }
+            ))
+        else:
+            # Outros bancos: abre o mês zerado (se outra transação já o abriu,
+            # o insert é desfeito no savepoint) e soma os movimentos
+            if db.execute(select(s.usuario_id).where(*do_mes)).first() is None:
+                try:
+                    with db.begin_nested():
+                        db.execute(insert(s).values(
+                            usuario_id=usuario_id, mes_referencia=mes_referencia,
+                            saldo_inicial=anterior, entradas=0.0, saidas=0.0, saldo_final=anterior
+                        ))
+                except IntegrityError:
+                    pass
+            db.execute(
+                update(s).where(*do_mes).values(
+                    entradas=s.entradas + entradas,
+                    saidas=s.saidas + saidas,
+                    saldo_final=s.saldo_final + diferenca
+                )
+            )
+
+        if diferenca:
+            db.execute(
+                update(s)
+                .where(s.usuario_id == usuario_id, s.mes_referencia > mes_referencia)
+                .values(saldo_inicial=s.saldo_inicial + diferenca, saldo_final=s.saldo_final + diferenca)
+            )
+
+    @staticmethod
+    def registrar(db: Session, transferencias: Iterable, sinal: int = 1) -> None:
+        """
+        Lança (sinal=1) ou estorna (sinal=-1) transferências no livro-razão
+
+        Só as confirmadas têm efeito. Numa alteração, estorne o estado antigo
+        antes de mudar os campos e lance o novo depois.
+        """
+        movimentos = movimentos_de(transferencias, sinal)
+        if len(movimentos) > LIMITE_INCREMENTAL:
+            SaldoTransferenciaService._recalcular_usuarios(db, movimentos)
+            return
+        for (usuario_id, mes_referencia), (entradas, saidas) in movimentos.items():
+            SaldoTransferenciaService.movimentar(db, usuario_id, mes_referencia, entradas, saidas)
+
+    @staticmethod
+    def _recalcular_usuarios(db: Session, movimentos: Movimentos) -> None:
+        """Soma os movimentos às linhas existentes e regrava as linhas dos usuários afetados"""
+        s = SaldoTransferencia
+        usuarios = {usuario_id for usuario_id, _ in movimentos}
+        totais: Movimentos = defaultdict(lambda: [0.0, 0.0])
+        for usuario_id, mes_referencia, entradas, saidas in db.execute(
+            select(s.usuario_id, s.mes_referencia, s.entradas, s.saidas).where(s.usuario_id.in_(usuarios))
+        ):
+            totais[(usuario_id, mes_referencia)] = [entradas, saidas]
+        for chave, (entradas, saidas) in movimentos.items():
+            totais[chave][0] += entradas
+            totais[chave][1] += saidas
+
+        db.execute(delete(s).where(s.usuario_id.in_(usuarios)))
+        db.execute(insert(s), saldos_acumulados(totais))
+
+    @staticmethod
+    def saldo(db: Session, usuario_id: int, mes_referencia: str) -> dict:
+        """Saldo do usuário no mês (sem movimento no mês: o saldo do último mês anterior)"""
+        s = SaldoTransferencia
+        linha = db.execute(
+            select(s)
+            .where(s.usuario_id == usuario_id, s.mes_referencia <= mes_referencia)
+            .order_by(s.mes_referencia.desc())
+            .limit(1)
+        ).scalar_one_or_none()
+
+        if linha is not None and linha.mes_referencia == mes_referencia:
+            return _como_dict(linha)
+        saldo = linha.saldo_final if linha is not None else 0.0
+        return {
+            "usuario_id": usuario_id,
+            "mes_referencia": mes_referencia,
+            "saldo_inicial": saldo,
+            "entradas": 0.0,
+            "saidas": 0.0,
+            "saldo_final": saldo
+        }
+
+    @staticmethod
+    def historico(db: Session, usuario_id: int, ate: Optional[str] = None) -> List[dict]:
+        """Meses com movimento do usuário, em ordem cronológica"""
+        s = SaldoTransferencia
+        consulta = select(s).where(s.usuario_id == usuario_id)
+        if ate:
+            consulta = consulta.where(s.mes_referencia <= ate)
+        return [_como_dict(linha) for linha in db.execute(consulta.order_by(s.mes_referencia)).scalars()]
+
+    @staticmethod
+    def reconstruir(db: Session) -> int:
+        """Recalcula todo o livro-razão a partir das transferências confirmadas"""
+        confirmadas = db.execute(
+            select(
+                Transferencia.origem_id, Transferencia.destino_id, Transferencia.mes_referencia,
+                Transferencia.valor, Transferencia.confirmada
+            ).where(Transferencia.confirmada == True)
+        ).all()
+        linhas = saldos_acumulados(movimentos_de(confirmadas))
+
+        db.execute(delete(SaldoTransferencia))
+        if linhas:
+            db.execute(insert(SaldoTransferencia), linhas)
+        return len(linhas)
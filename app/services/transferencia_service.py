@@ -0,0 +1,124 @@
+"""
+Criação de transferências em lote
+
+Valida e grava de uma só vez listas grandes de transferências (API em lote e
+importação da planilha matricial). A existência de todos os usuários de
+origem e destino é verificada com uma única consulta IN, as linhas válidas
+são inseridas em lotes (executemany) e o livro-razão é atualizado uma vez
+por usuário e mês. Linhas inválidas não impedem a gravação das demais e são
+informadas no relatório.
+"""
+import re
+from datetime import date, datetime
+from types import SimpleNamespace
+from typing import Any, Dict, Optional, Sequence
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.models.transferencia import Transferencia
+from app.models.usuario import Usuario
+from app.services.saldo_transferencia_service import SaldoTransferenciaService
+
+PADRAO_MES = re.compile(r"^\d{4}-(0[1-9]|1[0-2])$")
+
+# Linhas por INSERT em lote
+TAMANHO_LOTE = 1000
+
+
+def _inteiro(valor: Any) -> Optional[int]:
+    if isinstance(valor, bool):
+        return None
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _validar(item: Any) -> Any:
+    """Transferência normalizada (dict) ou a mensagem de erro (str)"""
+    if not isinstance(item, dict):
+        return "Formato inválido"
+    origem_id = _inteiro(item.get("origem_id"))
+    destino_id = _inteiro(item.get("destino_id"))
+    if origem_id is None or destino_id is None:
+        return "Origem e destino são obrigatórios"
+    if origem_id == destino_id:
+        return "Origem e destino não podem ser iguais"
+    mes_referencia = item.get("mes_referencia")
+    if not mes_referencia or not PADRAO_MES.match(str(mes_referencia)):
+        return "Mês de referência inválido (use AAAA-MM)"
+    try:
+        valor = float(item.get("valor"))
+    except (TypeError, ValueError):
+        return "Valor deve ser maior que zero"
+    if not valor > 0:
+        return "Valor deve ser maior que zero"
+    return {
+        "origem_id": origem_id,
+        "destino_id": destino_id,
+        "mes_referencia": str(mes_referencia),
+        "valor": valor,
+        "descricao": item.get("descricao") or "",
+        "confirmada": bool(item.get("confirmada", False))
+    }
+
+
+class TransferenciaService:
+    """Operações em lote sobre transferências"""
+
+    @staticmethod
+    def criar_em_lote(
+        db: Session,
+        itens: Sequence[Any],
+        linhas: Optional[Sequence[Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Valida e insere as transferências (sem commit)
+
+        linhas identifica cada item no relatório (padrão: posição 1, 2, ...).
+        Retorna {total, criadas, valor_total, erros: [{linha, erro}]}.
+        """
+        linhas = list(linhas) if linhas is not None else list(range(1, len(itens) + 1))
+        # (posição, mensagem): o relatório sai na ordem de entrada
+        erros = []
+        validas = []
+        for posicao, item in enumerate(itens):
+            resultado = _validar(item)
+            if isinstance(resultado, str):
+                erros.append((posicao, resultado))
+            else:
+                validas.append((posicao, resultado))
+
+        # Existência de todos os usuários em uma única consulta
+        ids = {t["origem_id"] for _, t in validas} | {t["destino_id"] for _, t in validas}
+        existentes = set(db.execute(select(Usuario.id).where(Usuario.id.in_(ids))).scalars()) if ids else set()
+
+        hoje = date.today()
+        agora = datetime.utcnow()
+        novas = []
+        for posicao, t in validas:
+            if t["origem_id"] not in existentes:
+                erros.append((posicao, "Usuário de origem não encontrado"))
+            elif t["destino_id"] not in existentes:
+                erros.append((posicao, "Usuário de destino não encontrado"))
+            else:
+                t["data_confirmacao"] = hoje if t["confirmada"] else None
+                t["created_at"] = agora
+                t["updated_at"] = agora
+                novas.append(t)
+
+        # O INSERT em lote do ORM quebra o executemany quando as linhas alternam
+        # entre valores nulos e preenchidos: pendentes e confirmadas vão separadas
+        for confirmadas in (False, True):
+            grupo = [t for t in novas if t["confirmada"] is confirmadas]
+            for inicio in range(0, len(grupo), TAMANHO_LOTE):
+                db.execute(insert(Transferencia), grupo[inicio:inicio + TAMANHO_LOTE])
+        SaldoTransferenciaService.registrar(db, (SimpleNamespace(**t) for t in novas))
+
+        return {
+            "total": len(itens),
+            "criadas": len(novas),
+            "valor_total": round(sum(t["valor"] for t in novas), 2),
+            "erros": [{"linha": linhas[posicao], "erro": erro} for posicao, erro in sorted(erros)]
+        }
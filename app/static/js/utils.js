@@ -272,6 +272,19 @@ function exportToCSV(data, filename) {
     link.click();
 }
 
+// Matriz densa (linhas x colunas) a partir de uma grid no formato colunar
+// (?formato=colunar); células sem valor ficam com valorPadrao
+function matrizDaGrade(grade, valorPadrao = 0) {
+    const totalLinhas = Object.values(grade.linhas)[0]?.length || 0;
+    const totalColunas = grade.colunas.length;
+    const matriz = Array.from({ length: totalLinhas }, () => new Array(totalColunas).fill(valorPadrao));
+    const { linha, coluna, valor } = grade.valores;
+    for (let i = 0; i < valor.length; i += 1) {
+        matriz[linha[i]][coluna[i]] = valor[i];
+    }
+    return matriz;
+}
+
 // Event listener para logout
 document.addEventListener('DOMContentLoaded', () => {
     const logoutBtn = document.getElementById('logout-btn');
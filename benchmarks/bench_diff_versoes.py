@@ -0,0 +1,102 @@
+"""
+Benchmark da comparação de versões (/api/participacoes-versoes/{a}/diff/{b})
+
+Grava duas versões de participações com N imóveis × P proprietários (a
+segunda com uma fração das células alteradas) e aluguéis de um mês, e mede
+o tempo da comparação com impacto financeiro.
+
+Uso:
+    python -m benchmarks.bench_diff_versoes [--imoveis 1000] [--proprietarios 200] [--repeticoes 7]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.core.auth import get_current_user_from_cookie
+from app.core.database import Base, get_db
+from app.models.aluguel import AluguelMensal
+from app.models.participacao_versao import ParticipacaoVersao
+from app.models.proprietario import Proprietario
+from app.services.participacao_service import ParticipacaoService
+
+
+def matriz_aleatoria(gerador, total_imoveis: int, total_proprietarios: int, por_imovel: int = 4):
+    matriz = {}
+    for imovel_id in range(1, total_imoveis + 1):
+        for proprietario_id in gerador.sample(range(1, total_proprietarios + 1), por_imovel):
+            matriz[(imovel_id, proprietario_id)] = 100.0 / por_imovel
+    return matriz
+
+
+def popular(db, total_imoveis: int, total_proprietarios: int) -> None:
+    gerador = random.Random(42)
+    db.execute(insert(Proprietario), [
+        {"nome": f"Proprietário {p}", "tipo_pessoa": "fisica"}
+        for p in range(1, total_proprietarios + 1)
+    ])
+    db.execute(insert(AluguelMensal), [
+        {"imovel_id": i, "mes_referencia": "2025-10", "valor_total": 1500.0}
+        for i in range(1, total_imoveis + 1)
+    ])
+    a = matriz_aleatoria(gerador, total_imoveis, total_proprietarios)
+    b = dict(a)
+    # Um em cada dez imóveis muda de divisão
+    b.update(matriz_aleatoria(gerador, total_imoveis // 10, total_proprietarios))
+    for nome, matriz in (("A", a), ("B", b)):
+        db.add(ParticipacaoVersao(
+            nome=nome, dados_coo=ParticipacaoService.codificar_matriz(matriz), total_celulas=len(matriz)
+        ))
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--imoveis", type=int, default=1000)
+    parser.add_argument("--proprietarios", type=int, default=200)
+    parser.add_argument("--repeticoes", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        Sessao = sessionmaker(bind=engine)
+        db = Sessao()
+        popular(db, args.imoveis, args.proprietarios)
+        db.close()
+
+        def sessao():
+            db = Sessao()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = sessao
+        app.dependency_overrides[get_current_user_from_cookie] = lambda: SimpleNamespace(id=1, is_admin=True)
+        client = TestClient(app)
+
+        tempos = []
+        for _ in range(args.repeticoes):
+            inicio = time.perf_counter()
+            resposta = client.get("/api/participacoes-versoes/1/diff/2?mes_referencia=2025-10")
+            tempos.append(time.perf_counter() - inicio)
+        assert resposta.status_code == 200, resposta.text
+        resumo = resposta.json()["resumo"]
+        mediana = sorted(tempos)[len(tempos) // 2]
+        print(f"{args.imoveis} imóveis × {args.proprietarios} proprietários: mediana {mediana * 1000:.1f} ms")
+        print(f"  {resumo['celulas_alteradas']} células alteradas, {resumo['proprietarios_afetados']} proprietários afetados")
+
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
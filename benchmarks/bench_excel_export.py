@@ -0,0 +1,88 @@
+"""
+Benchmark da exportação Excel em modo streaming
+
+Popula um banco SQLite temporário com N aluguéis distribuídos pelos 12 meses
+de um ano e mede a exportação anual (aba de resumo + uma aba por mês):
+linhas por segundo, tamanho do arquivo e pico de memória residente.
+
+Uso:
+    python -m benchmarks.bench_excel_export [--linhas 500000]
+"""
+import argparse
+import os
+import resource
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.aluguel import AluguelMensal
+from app.models.imovel import Imovel
+from app.services.excel_exporter import ExcelExporter
+
+ANO = 2025
+
+
+def popular(db, total_linhas: int, total_imoveis: int = 1000) -> None:
+    db.execute(insert(Imovel), [
+        {"nome": f"Imóvel {i}", "endereco": f"Rua {i}, {i}", "status": "alugado"}
+        for i in range(1, total_imoveis + 1)
+    ])
+    lote = []
+    for i in range(total_linhas):
+        mes = i % 12 + 1
+        lote.append({
+            "imovel_id": i % total_imoveis + 1,
+            "mes_referencia": f"{ANO}-{mes:02d}",
+            "valor_proprietario": 900.0,
+            "taxa_administracao": 100.0,
+            "valor_total": 1000.0 + i % 500,
+            "pago": i % 3 != 0
+        })
+        if len(lote) == 50_000:
+            db.execute(insert(AluguelMensal), lote)
+            lote = []
+    if lote:
+        db.execute(insert(AluguelMensal), lote)
+    db.commit()
+
+
+def pico_memoria_mib() -> float:
+    # ru_maxrss é em KiB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--linhas", type=int, default=500_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+
+        inicio = time.perf_counter()
+        popular(db, args.linhas)
+        print(f"{args.linhas:,} aluguéis inseridos em {time.perf_counter() - inicio:.1f}s")
+        memoria_base = pico_memoria_mib()
+
+        destino = os.path.join(tmp, "anual.xlsx")
+        inicio = time.perf_counter()
+        with open(destino, "wb") as arquivo:
+            resultado = ExcelExporter.exportar_anual(db, ANO, arquivo)
+        duracao = time.perf_counter() - inicio
+
+        print(f"Exportação anual: {resultado['linhas']:,} linhas em {duracao:.1f}s "
+              f"({resultado['linhas'] / duracao:,.0f} linhas/s)")
+        print(f"Arquivo: {os.path.getsize(destino) / 1024 / 1024:.1f} MiB")
+        print(f"Pico de memória: {pico_memoria_mib():.0f} MiB (antes da exportação: {memoria_base:.0f} MiB)")
+
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
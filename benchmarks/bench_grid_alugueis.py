@@ -0,0 +1,86 @@
+"""
+Benchmark da grid de aluguéis (/api/alugueis/grid-data)
+
+Popula um banco SQLite temporário com N imóveis, vários meses de aluguéis e
+P proprietários (cada imóvel com alguns deles) e mede o tempo e o tamanho da
+resposta nos formatos "linhas", "colunar" e "msgpack".
+
+Uso:
+    python -m benchmarks.bench_grid_alugueis [--imoveis 2000] [--proprietarios 60] [--meses 12]
+"""
+import argparse
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.core.auth import get_current_user_from_cookie
+from app.core.database import Base, get_db
+from app.models.aluguel import AluguelMensal
+from app.models.imovel import Imovel
+from app.models.participacao import Participacao
+from app.models.proprietario import Proprietario
+
+
+def popular(db, total_imoveis: int, total_proprietarios: int, meses: int) -> None:
+    db.execute(insert(Imovel), [
+        {"nome": f"Imóvel {i}", "endereco": f"Rua {i}, {i}", "status": "alugado"}
+        for i in range(1, total_imoveis + 1)
+    ])
+    db.execute(insert(Proprietario), [
+        {"nome": f"Proprietário {p}", "tipo_pessoa": "fisica"}
+        for p in range(1, total_proprietarios + 1)
+    ])
+    db.execute(insert(Participacao), [
+        {"imovel_id": i, "proprietario_id": (i + k * 7) % total_proprietarios + 1, "percentual": 25.0}
+        for i in range(1, total_imoveis + 1)
+        for k in range(4)
+    ])
+    db.execute(insert(AluguelMensal), [
+        {"imovel_id": i, "mes_referencia": f"2025-{m:02d}", "valor_total": 1000.0 + i % 500 / 100, "pago": True}
+        for i in range(1, total_imoveis + 1)
+        for m in range(1, meses + 1)
+    ])
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--imoveis", type=int, default=2000)
+    parser.add_argument("--proprietarios", type=int, default=60)
+    parser.add_argument("--meses", type=int, default=12)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        popular(db, args.imoveis, args.proprietarios, args.meses)
+
+        app.dependency_overrides[get_db] = lambda: db
+        app.dependency_overrides[get_current_user_from_cookie] = lambda: SimpleNamespace(id=1, is_admin=True)
+        client = TestClient(app)
+
+        for formato in ("linhas", "colunar", "msgpack"):
+            tempos = []
+            for _ in range(args.repeticoes):
+                inicio = time.perf_counter()
+                resposta = client.get(f"/api/alugueis/grid-data?formato={formato}")
+                tempos.append(time.perf_counter() - inicio)
+            assert resposta.status_code == 200
+            mediana = sorted(tempos)[len(tempos) // 2]
+            print(f"{formato:>8}: mediana {mediana * 1000:.0f} ms, {len(resposta.content) / 1024:,.0f} KiB")
+
+        app.dependency_overrides.clear()
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
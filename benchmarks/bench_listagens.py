@@ -0,0 +1,107 @@
+"""
+Benchmark das listagens da API (proprietários, imóveis, usuários e aluguéis)
+
+Popula um banco SQLite temporário com N registros de cada tipo e mede o
+tempo das rotas de listagem com limit=N, do banco até os bytes da resposta.
+
+Uso:
+    python -m benchmarks.bench_listagens [--registros 1000] [--repeticoes 7]
+"""
+import argparse
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.core.auth import get_current_user_from_cookie, require_admin
+from app.core.database import Base, get_db
+from app.models.aluguel import AluguelMensal
+from app.models.imovel import Imovel
+from app.models.participacao import Participacao
+from app.models.proprietario import Proprietario
+from app.models.usuario import Usuario
+
+ROTAS = (
+    "/api/proprietarios/",
+    "/api/imoveis/",
+    "/api/usuarios/",
+    "/api/alugueis/",
+)
+
+
+def popular(db, total: int) -> None:
+    db.execute(insert(Imovel), [
+        {"nome": f"Imóvel {i}", "endereco": f"Rua {i}, {i}", "cidade": "Porto Alegre", "estado": "RS",
+         "valor_aluguel": 1500.0, "status": "alugado"}
+        for i in range(1, total + 1)
+    ])
+    db.execute(insert(Proprietario), [
+        {"nome": f"Proprietário {i}", "tipo_pessoa": "fisica", "cpf": f"{i:011d}", "email": f"p{i}@exemplo.com",
+         "cidade": "Porto Alegre", "estado": "RS", "banco": "001", "agencia": "1234", "conta": f"{i}-0"}
+        for i in range(1, total + 1)
+    ])
+    db.execute(insert(Participacao), [
+        {"imovel_id": i, "proprietario_id": (i + k) % total + 1, "percentual": 50.0}
+        for i in range(1, total + 1)
+        for k in range(2)
+    ])
+    db.execute(insert(Usuario), [
+        {"nome": f"Usuário {i}", "email": f"u{i}@exemplo.com", "hashed_password": "x", "is_active": True}
+        for i in range(1, total + 1)
+    ])
+    db.execute(insert(AluguelMensal), [
+        {"imovel_id": i, "mes_referencia": "2025-10", "valor_total": 1500.0, "pago": i % 2 == 0}
+        for i in range(1, total + 1)
+    ])
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--registros", type=int, default=1000)
+    parser.add_argument("--repeticoes", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        Sessao = sessionmaker(bind=engine)
+        db = Sessao()
+        popular(db, args.registros)
+        db.close()
+
+        def sessao():
+            db = Sessao()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        admin = SimpleNamespace(id=1, nome="Admin", is_admin=True)
+        app.dependency_overrides[get_db] = sessao
+        app.dependency_overrides[get_current_user_from_cookie] = lambda: admin
+        app.dependency_overrides[require_admin] = lambda: admin
+        client = TestClient(app)
+
+        for rota in ROTAS:
+            tempos = []
+            for _ in range(args.repeticoes):
+                inicio = time.perf_counter()
+                resposta = client.get(f"{rota}?limit={args.registros}")
+                tempos.append(time.perf_counter() - inicio)
+            assert resposta.status_code == 200, resposta.text
+            assert len(resposta.json()) == args.registros
+            mediana = sorted(tempos)[len(tempos) // 2]
+            print(f"{rota:<22} mediana {mediana * 1000:6.1f} ms  {len(resposta.content) / 1024:,.0f} KiB")
+
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
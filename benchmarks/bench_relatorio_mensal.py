@@ -0,0 +1,73 @@
+"""
+Benchmark do relatório mensal consolidado
+
+Popula um banco SQLite temporário com N aluguéis em um único mês e mede
+RelatorioService.gerar_relatorio_mensal (resumo somado no banco +
+detalhamento por projeção de colunas). Meta: 100 mil linhas em menos de 1s.
+
+Uso:
+    python -m benchmarks.bench_relatorio_mensal [--linhas 100000] [--repeticoes 5]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.aluguel import AluguelMensal
+from app.models.imovel import Imovel
+from app.services.relatorio_service import RelatorioService
+
+
+def popular(db, total_linhas: int, total_imoveis: int = 1000) -> None:
+    db.execute(insert(Imovel), [
+        {"nome": f"Imóvel {i}", "endereco": f"Rua {i}, {i}", "status": "alugado"}
+        for i in range(1, total_imoveis + 1)
+    ])
+    db.execute(insert(AluguelMensal), [
+        {
+            "imovel_id": i % total_imoveis + 1,
+            "mes_referencia": "2025-10",
+            "valor_proprietario": 900.0,
+            "taxa_administracao": 100.0,
+            "valor_total": 1000.0 + i % 500 / 100,
+            "pago": i % 3 != 0
+        }
+        for i in range(total_linhas)
+    ])
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--linhas", type=int, default=100_000)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        popular(db, args.linhas)
+
+        tempos = []
+        for _ in range(args.repeticoes):
+            db.expire_all()
+            inicio = time.perf_counter()
+            relatorio = RelatorioService.gerar_relatorio_mensal(db, 2025, 10)
+            tempos.append(time.perf_counter() - inicio)
+
+        assert relatorio["resumo"]["total_alugueis"] == args.linhas
+        melhor, mediana = min(tempos), sorted(tempos)[len(tempos) // 2]
+        print(f"{args.linhas:,} aluguéis: melhor {melhor * 1000:.0f} ms, mediana {mediana * 1000:.0f} ms "
+              f"({args.linhas / mediana:,.0f} linhas/s)")
+
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
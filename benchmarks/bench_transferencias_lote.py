@@ -0,0 +1,80 @@
+"""
+Benchmark da criação de transferências em lote (POST /api/transferencias/lote)
+
+Cria U usuários e envia N transferências aleatórias (uma parte confirmada,
+que também atualiza o livro-razão) em uma única requisição.
+
+Uso:
+    python -m benchmarks.bench_transferencias_lote [--transferencias 10000] [--usuarios 200]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.core.auth import get_current_user_from_cookie
+from app.core.database import Base, get_db
+from app.models.usuario import Usuario
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--transferencias", type=int, default=10000)
+    parser.add_argument("--usuarios", type=int, default=200)
+    args = parser.parse_args()
+
+    gerador = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        Sessao = sessionmaker(bind=engine)
+        db = Sessao()
+        db.execute(insert(Usuario), [
+            {"nome": f"Usuário {u}", "email": f"usuario{u}@exemplo.com", "hashed_password": "x"}
+            for u in range(1, args.usuarios + 1)
+        ])
+        db.commit()
+        db.close()
+
+        def sessao():
+            db = Sessao()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = sessao
+        app.dependency_overrides[get_current_user_from_cookie] = lambda: SimpleNamespace(id=1, is_admin=True)
+        client = TestClient(app)
+
+        transferencias = []
+        for _ in range(args.transferencias):
+            origem, destino = gerador.sample(range(1, args.usuarios + 1), 2)
+            transferencias.append({
+                "origem_id": origem,
+                "destino_id": destino,
+                "mes_referencia": f"2025-{gerador.randint(1, 12):02d}",
+                "valor": round(gerador.uniform(10, 5000), 2),
+                "confirmada": gerador.random() < 0.3
+            })
+
+        inicio = time.perf_counter()
+        resposta = client.post("/api/transferencias/lote", json={"transferencias": transferencias})
+        decorrido = time.perf_counter() - inicio
+        assert resposta.status_code == 200, resposta.text
+        dados = resposta.json()
+        print(f"{dados['criadas']} transferências criadas em {decorrido:.2f} s ({len(dados['erros'])} erros)")
+
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
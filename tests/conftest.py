@@ -1,13 +1,17 @@
 """
 Testes unitários - Configuração pytest
 """
+from types import SimpleNamespace
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.main import app
+from app.core.auth import get_current_user_from_cookie
 from app.core.database import Base, get_db
+from app.services.permissao_service import PermissaoService
 
 # Banco de dados de teste em memória
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -17,6 +21,17 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Usuário autenticado padrão das fixtures `autenticar` e `api`
+ADMIN = SimpleNamespace(id=1, nome="Admin", is_admin=True)
+
+
+@pytest.fixture(autouse=True)
+def limpar_escopos_permissao():
+    """Cada teste usa um banco novo: escopos de permissão em cache não valem entre eles"""
+    PermissaoService.limpar_cache()
+    yield
+    PermissaoService.limpar_cache()
+
 
 @pytest.fixture
 def db_session():
@@ -42,3 +57,50 @@ def client(db_session):
     app.dependency_overrides[get_db] = override_get_db
     with TestClient(app) as test_client:
         yield test_client
+
+
+@pytest.fixture
+def banco(tmp_path):
+    """Engine SQLite em arquivo, novo a cada teste, com todas as tabelas"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'teste.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def sessao(banco):
+    """Sessão no banco do teste"""
+    db = sessionmaker(bind=banco)()
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def usuario_atual():
+    """
+    Usuário autenticado nas requisições de `api`
+
+    Administrador por padrão; para outro perfil, parametrize o teste:
+        @pytest.mark.parametrize("usuario_atual", [SimpleNamespace(id=2, is_admin=False)])
+    """
+    return ADMIN
+
+
+@pytest.fixture
+def autenticar(usuario_atual):
+    """Autentica usuario_atual; chamar autenticar(outro) troca o usuário no meio do teste"""
+    def trocar(usuario):
+        app.dependency_overrides[get_current_user_from_cookie] = lambda: usuario
+
+    trocar(usuario_atual)
+    yield trocar
+    app.dependency_overrides.pop(get_current_user_from_cookie, None)
+
+
+@pytest.fixture
+def api(sessao, autenticar):
+    """Cliente da aplicação usando a sessão do teste e o usuário autenticado"""
+    app.dependency_overrides[get_db] = lambda: sessao
+    yield TestClient(app)
+    app.dependency_overrides.clear()
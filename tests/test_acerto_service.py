@@ -0,0 +1,144 @@
+"""
+Testes do acerto de contas mensal entre usuários
+"""
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+
+from app.models.aluguel import AluguelMensal
+from app.models.imovel import Imovel
+from app.models.participacao import Participacao
+from app.models.proprietario import Proprietario
+from app.models.transferencia import Transferencia
+from app.models.usuario import Usuario
+from app.services.acerto_service import AcertoService
+
+
+@pytest.fixture
+def ambiente(api, sessao):
+    sessao.add_all([
+        Imovel(nome="Apto 101", endereco="Rua A, 1"),
+        Imovel(nome="Casa 2", endereco="Rua B, 2"),
+        Proprietario(nome="Maria", tipo_pessoa="fisica", email="maria@exemplo.com"),
+        Proprietario(nome="João", tipo_pessoa="fisica", email="joao@exemplo.com"),
+        Proprietario(nome="Ana", tipo_pessoa="fisica"),
+        Usuario(nome="Maria", email="maria@exemplo.com", hashed_password="x"),
+        Usuario(nome="João", email="joao@exemplo.com", hashed_password="x"),
+    ])
+    sessao.flush()
+    sessao.add_all([
+        Participacao(imovel_id=1, proprietario_id=1, percentual=50.0),
+        Participacao(imovel_id=1, proprietario_id=2, percentual=50.0),
+        Participacao(imovel_id=2, proprietario_id=2, percentual=80.0),
+        Participacao(imovel_id=2, proprietario_id=3, percentual=20.0),
+        # João recebeu sozinho o aluguel do Apto 101
+        AluguelMensal(imovel_id=1, proprietario_id=2, mes_referencia="2025-10", valor_total=1500.0,
+                      valor_proprietario=1500.0, pago=True),
+        # Ana recebeu o da Casa 2, do qual 80% é de João
+        AluguelMensal(imovel_id=2, proprietario_id=3, mes_referencia="2025-10", valor_total=1000.0,
+                      valor_proprietario=1000.0, pago=True),
+        # Não pago: fica fora do acerto
+        AluguelMensal(imovel_id=1, proprietario_id=1, mes_referencia="2025-10", valor_total=900.0, pago=False),
+    ])
+    sessao.commit()
+    return api, sessao
+
+
+def test_liquidar_gera_no_maximo_n_menos_um_pagamentos():
+    posicoes = {1: 5000, 2: 3000, 3: -4000, 4: -2500, 5: -1500}
+    transferencias = AcertoService.liquidar(posicoes)
+
+    assert len(transferencias) <= len(posicoes) - 1
+    saldo = dict(posicoes)
+    for origem, destino, valor in transferencias:
+        assert valor > 0
+        saldo[origem] += valor
+        saldo[destino] -= valor
+    assert all(valor == 0 for valor in saldo.values())
+
+
+def test_liquidar_deixa_excedente_sem_contrapartida():
+    assert AcertoService.liquidar({1: 1000, 2: -400}) == [(2, 1, 400)]
+    assert AcertoService.liquidar({}) == []
+
+
+def test_posicoes_por_usuario(ambiente):
+    _, db = ambiente
+    posicoes, sem_usuario = AcertoService.posicoes(db, "2025-10")
+
+    # Maria: devido 750, recebido 0. João: devido 750 + 800, recebido 1500
+    assert posicoes == {1: 75000, 2: 5000}
+    # Ana: devido 200, recebido 1000 (sem usuário vinculado)
+    assert sem_usuario == {3: -80000}
+
+
+def test_transferencias_confirmadas_entram_na_posicao(ambiente):
+    _, db = ambiente
+    db.add_all([
+        Transferencia(origem_id=2, destino_id=1, mes_referencia="2025-10", valor=300.0, confirmada=True),
+        Transferencia(origem_id=2, destino_id=1, mes_referencia="2025-10", valor=999.0, confirmada=False),
+    ])
+    db.commit()
+
+    posicoes, _ = AcertoService.posicoes(db, "2025-10")
+    assert posicoes == {1: 45000, 2: 35000}
+
+
+def test_previa(ambiente):
+    client, db = ambiente
+    db.add(Transferencia(origem_id=2, destino_id=1, mes_referencia="2025-10", valor=1000.0, confirmada=True))
+    db.commit()
+
+    resposta = client.get("/api/transferencias/acerto/previa", params={"mes_referencia": "2025-10"})
+    assert resposta.status_code == 200
+    dados = resposta.json()
+    # Maria: 750 - 1000 = -250; João: 50 + 1000 = 1050
+    assert dados["transferencias"] == [{
+        "origem_id": 1, "origem_nome": "Maria", "destino_id": 2, "destino_nome": "João", "valor": 250.0
+    }]
+    assert dados["resumo"]["nao_compensado"] == 800.0
+    assert dados["proprietarios_sem_usuario"] == [{"proprietario_id": 3, "nome": "Ana", "posicao": -800.0}]
+
+    assert client.get("/api/transferencias/acerto/previa", params={"mes_referencia": "out/25"}).status_code == 422
+
+
+def test_aplicar_substitui_pendentes(ambiente):
+    client, db = ambiente
+    db.add_all([
+        Transferencia(origem_id=1, destino_id=2, mes_referencia="2025-10", valor=10.0),
+        Transferencia(origem_id=2, destino_id=1, mes_referencia="2025-10", valor=20.0),
+        Transferencia(origem_id=1, destino_id=2, mes_referencia="2025-10", valor=500.0, confirmada=True),
+    ])
+    db.commit()
+
+    resposta = client.post("/api/transferencias/acerto", json={
+        "mes_referencia": "2025-10", "substituir_pendentes": True
+    })
+    assert resposta.status_code == 200
+    dados = resposta.json()
+    assert dados["criadas"] == 1
+    assert dados["pendentes_removidas"] == 2
+
+    pendentes = db.execute(
+        select(Transferencia.origem_id, Transferencia.destino_id, Transferencia.valor)
+        .where(Transferencia.confirmada == False)
+    ).all()
+    # Maria: 750 + 500 = 1250; João: 50 - 500 = -450
+    assert pendentes == [(2, 1, 450.0)]
+
+    assert client.post("/api/transferencias/acerto", json={}).status_code == 400
+
+
+@pytest.mark.parametrize("usuario_atual", [SimpleNamespace(id=2, nome="João", is_admin=False)])
+def test_acerto_apenas_para_administradores(ambiente):
+    client, db = ambiente
+    db.add(Transferencia(origem_id=1, destino_id=2, mes_referencia="2025-10", valor=10.0))
+    db.commit()
+
+    assert client.get("/api/transferencias/acerto/previa", params={"mes_referencia": "2025-10"}).status_code == 403
+    assert client.post("/api/transferencias/acerto", json={
+        "mes_referencia": "2025-10", "substituir_pendentes": True
+    }).status_code == 403
+    # Nada removido nem criado
+    assert db.execute(select(Transferencia.valor)).scalars().all() == [10.0]
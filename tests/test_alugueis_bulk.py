@@ -0,0 +1,146 @@
+"""
+Testes da atualização de aluguéis em massa
+"""
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event, select
+
+from app.models.aluguel import AluguelMensal
+from app.models.imovel import Imovel
+from app.models.participacao import Participacao
+from app.models.proprietario import Proprietario
+from app.models.usuario import Usuario
+
+MARIA = SimpleNamespace(id=2, nome="Maria", is_admin=False)
+
+
+@pytest.fixture
+def ambiente(api, banco, sessao):
+    sessao.add_all([
+        Imovel(nome="Apto 101", endereco="Rua A, 1"),
+        Imovel(nome="Casa 2", endereco="Rua B, 2"),
+        Imovel(nome="Loja 3", endereco="Rua C, 3"),
+        Proprietario(nome="Maria", tipo_pessoa="fisica", email="maria@exemplo.com"),
+        Proprietario(nome="João", tipo_pessoa="fisica"),
+        Usuario(nome="Admin", email="admin@exemplo.com", hashed_password="x", is_admin=True),
+        Usuario(nome="Maria", email="maria@exemplo.com", hashed_password="x"),
+    ])
+    sessao.flush()
+    sessao.add_all([
+        Participacao(imovel_id=1, proprietario_id=1, percentual=100.0),
+        Participacao(imovel_id=2, proprietario_id=1, percentual=50.0),
+        Participacao(imovel_id=2, proprietario_id=2, percentual=50.0),
+        Participacao(imovel_id=3, proprietario_id=2, percentual=100.0),
+    ])
+    for imovel_id in (1, 2, 3):
+        for mes in ("2025-09", "2025-10"):
+            sessao.add(AluguelMensal(imovel_id=imovel_id, mes_referencia=mes, valor_total=1000.0 * imovel_id))
+    sessao.commit()
+
+    updates = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("UPDATE") and "alugueis_mensais " in statement:
+            updates.append(statement)
+
+    event.listen(banco, "before_cursor_execute", registrar)
+    return api, sessao, updates
+
+
+def _alugueis(db):
+    db.expire_all()
+    return {
+        a.id: (a.valor_total, a.pago)
+        for a in db.execute(select(AluguelMensal).order_by(AluguelMensal.id)).scalars()
+    }
+
+
+def test_itens_agrupados_por_formato(ambiente):
+    client, db, updates = ambiente
+    resposta = client.post("/api/alugueis/bulk", json={"itens": [
+        {"id": 1, "pago": True},
+        {"id": 3, "pago": True},
+        {"id": 5, "pago": True},
+        {"id": 2, "valor_total": 1100.0},
+        {"id": 4, "valor_total": 2200.0},
+        {"id": 99, "pago": True},
+        {"id": 1, "pago": False},
+        {"id": 6},
+    ]})
+    assert resposta.status_code == 200
+    dados = resposta.json()
+    assert [item["status"] for item in dados["itens"]] == [
+        "atualizado", "atualizado", "atualizado", "atualizado", "atualizado", "erro", "erro", "ignorado"
+    ]
+    assert dados["itens"][5]["detail"] == "Aluguel não encontrado"
+    assert dados["atualizados"] == 5
+    assert dados["erros"] == 2
+
+    # Um UPDATE para {pago} e um para {valor_total}
+    assert len(updates) == 2
+    assert _alugueis(db) == {
+        1: (1000.0, True), 2: (1100.0, False),
+        3: (2000.0, True), 4: (2200.0, False),
+        5: (3000.0, True), 6: (3000.0, False),
+    }
+
+
+def test_filtro_marca_mes_como_pago(ambiente):
+    client, db, updates = ambiente
+    resposta = client.post("/api/alugueis/bulk", json={
+        "filtro": {"mes_referencia": "2025-10", "imovel_ids": [1, 2]},
+        "alteracoes": {"pago": True},
+        # Alteração por item prevalece sobre o filtro
+        "itens": [{"id": 2, "pago": False, "valor_total": 500.0}]
+    })
+    assert resposta.status_code == 200
+    assert resposta.json()["filtro"] == {"atualizados": 2, "ids": [2, 4]}
+    assert len(updates) == 2
+    assert _alugueis(db) == {
+        1: (1000.0, False), 2: (500.0, False),
+        3: (2000.0, False), 4: (2000.0, True),
+        5: (3000.0, False), 6: (3000.0, False),
+    }
+
+
+@pytest.mark.parametrize("usuario_atual", [MARIA])
+def test_permissoes_verificadas_no_conjunto(ambiente):
+    client, db, _ = ambiente
+
+    resposta = client.post("/api/alugueis/bulk", json={"itens": [
+        {"id": 1, "pago": True}, {"id": 3, "pago": True}, {"id": 5, "pago": True}
+    ]})
+    assert [item["status"] for item in resposta.json()["itens"]] == ["atualizado", "atualizado", "erro"]
+
+    # O filtro alcança apenas os imóveis em que Maria participa
+    resposta = client.post("/api/alugueis/bulk", json={
+        "filtro": {"mes_referencia": "2025-10"}, "alteracoes": {"valor_total": 1.0}
+    })
+    assert resposta.json()["filtro"]["ids"] == [2, 4]
+    assert _alugueis(db)[6] == (3000.0, False)
+
+
+def test_requisicao_invalida(ambiente):
+    client, _, _ = ambiente
+    assert client.post("/api/alugueis/bulk", json={}).status_code == 400
+    assert client.post("/api/alugueis/bulk", json={"filtro": {"mes_referencia": "2025-10"}}).status_code == 400
+    assert client.post("/api/alugueis/bulk", json={
+        "filtro": {"mes_referencia": "10/2025"}, "alteracoes": {"pago": True}
+    }).status_code == 422
+
+
+def test_valor_nulo_e_rejeitado(ambiente):
+    client, db, updates = ambiente
+    antes = _alugueis(db)
+    assert client.post("/api/alugueis/bulk", json={"itens": [{"id": 1, "valor_total": None}]}).status_code == 422
+    assert client.post("/api/alugueis/bulk", json={
+        "filtro": {"mes_referencia": "2025-10"}, "alteracoes": {"pago": None}
+    }).status_code == 422
+    assert client.put("/api/alugueis/1", json={"valor_total": None}).status_code == 422
+    assert updates == []
+    assert _alugueis(db) == antes
+
+    # Campos omitidos continuam opcionais
+    assert client.put("/api/alugueis/1", json={"pago": True}).status_code == 200
+    assert _alugueis(db)[1] == (1000.0, True)
@@ -0,0 +1,83 @@
+"""
+Testes da grid de aluguéis com distribuição por proprietário
+"""
+import pytest
+
+from app.models.aluguel import AluguelMensal
+from app.models.imovel import Imovel
+from app.models.participacao import Participacao
+from app.models.proprietario import Proprietario
+
+
+@pytest.fixture
+def db(sessao):
+    apto = Imovel(nome="Apto 101", endereco="Rua A, 1")
+    casa = Imovel(nome="Casa 2", endereco="Rua B, 2")
+    sala = Imovel(nome="Sala 3", endereco="Rua C, 3")
+    maria = Proprietario(nome="maria", tipo_pessoa="fisica")
+    joao = Proprietario(nome="João", tipo_pessoa="fisica")
+    sessao.add_all([apto, casa, sala, maria, joao])
+    sessao.flush()
+
+    sessao.add_all([
+        Participacao(imovel_id=apto.id, proprietario_id=maria.id, percentual=33.33),
+        Participacao(imovel_id=apto.id, proprietario_id=joao.id, percentual=66.67),
+        Participacao(imovel_id=casa.id, proprietario_id=maria.id, percentual=100.0),
+        AluguelMensal(imovel_id=apto.id, mes_referencia="2025-09", valor_total=900.0, pago=True),
+        AluguelMensal(imovel_id=apto.id, mes_referencia="2025-10", valor_total=1000.0, pago=True),
+        AluguelMensal(imovel_id=casa.id, mes_referencia="2025-10", valor_total=2500.5, pago=False),
+        AluguelMensal(imovel_id=sala.id, mes_referencia="2025-08", valor_total=300.0, pago=True),
+    ])
+    sessao.commit()
+    return sessao
+
+
+@pytest.fixture
+def client(api, db):
+    return api
+
+
+def test_grid_usa_aluguel_mais_recente_e_distribui_por_participacao(client, db):
+    dados = client.get("/api/alugueis/grid-data").json()
+
+    assert [row["imovel_nome"] for row in dados["rows"]] == ["Apto 101", "Casa 2", "Sala 3"]
+    assert [row["mes_referencia"] for row in dados["rows"]] == ["2025-10", "2025-10", "2025-08"]
+    assert [p["nome"] for p in dados["proprietarios"]] == ["João", "maria"]
+    assert dados["col_headers"] == ["01/10/2025", "Valor Total", "João", "maria"]
+
+    ids = {p["nome"]: p["id"] for p in dados["proprietarios"]}
+    apto, casa, sala = dados["rows"]
+    assert apto["distribuicao"] == {ids["maria"]: 333.3, ids["João"]: 666.7}
+    assert casa["distribuicao"] == {ids["maria"]: 2500.5}
+    assert sala["distribuicao"] == {}
+
+
+def test_grid_colunar(client, db):
+    linhas = client.get("/api/alugueis/grid-data?ano=2025").json()
+    colunar = client.get("/api/alugueis/grid-data?ano=2025&formato=colunar").json()
+
+    assert "rows" not in colunar
+    assert colunar["col_headers"] == linhas["col_headers"]
+    assert [{"id": str(c["id"]), "nome": c["nome"]} for c in colunar["colunas"]] == linhas["proprietarios"]
+    assert colunar["linhas"]["imovel_nome"] == ["Apto 101", "Casa 2", "Sala 3"]
+    assert colunar["linhas"]["valor_total"] == [1000.0, 2500.5, 300.0]
+
+    valores = colunar["valores"]
+    reconstruida = [{} for _ in colunar["linhas"]["aluguel_id"]]
+    for linha, coluna, valor in zip(valores["linha"], valores["coluna"], valores["valor"]):
+        reconstruida[linha][str(colunar["colunas"][coluna]["id"])] = valor
+    assert reconstruida == [row["distribuicao"] for row in linhas["rows"]]
+
+
+def test_grid_msgpack(client, db):
+    import msgpack
+
+    resposta = client.get("/api/alugueis/grid-data?formato=msgpack")
+    assert resposta.headers["content-type"] == "application/x-msgpack"
+    assert msgpack.unpackb(resposta.content) == client.get("/api/alugueis/grid-data?formato=colunar").json()
+
+
+def test_grid_filtrado_sem_resultados(client, db):
+    dados = client.get("/api/alugueis/grid-data?mes_referencia=2030-01").json()
+    assert dados["rows"] == []
+    assert dados["col_headers"] == ["01/01/2030", "Valor Total"]
@@ -0,0 +1,114 @@
+"""
+Testes da análise comparativa com funções de janela
+"""
+import pytest
+from sqlalchemy import event
+
+from app.models.aluguel import AluguelMensal
+from app.models.imovel import Imovel
+from app.services.relatorio_service import RelatorioService
+
+
+@pytest.fixture
+def db(sessao):
+    apto = Imovel(nome="Apto 101", endereco="Rua A, 1")
+    casa = Imovel(nome="Casa 2", endereco="Rua B, 2")
+    sessao.add_all([apto, casa])
+    sessao.flush()
+
+    # Apto: 1000/mês em 2023 e 1100/mês em 2024, exceto março/2024 (sem aluguel)
+    for ano, valor in ((2023, 1000.0), (2024, 1100.0)):
+        for mes in range(1, 13):
+            if (ano, mes) != (2024, 3):
+                sessao.add(AluguelMensal(imovel_id=apto.id, mes_referencia=f"{ano}-{mes:02d}",
+                                         valor_total=valor, pago=True))
+    # Casa: só em 2024, com um mês pendente
+    sessao.add_all([
+        AluguelMensal(imovel_id=casa.id, mes_referencia="2024-01", valor_total=500.0, pago=True),
+        AluguelMensal(imovel_id=casa.id, mes_referencia="2024-02", valor_total=500.0, pago=False),
+    ])
+    sessao.commit()
+    return sessao
+
+
+def _por_mes(analise):
+    return {item["mes_referencia"]: item for item in analise["meses"]}
+
+
+def test_variacoes_mensais_e_anuais(db):
+    analise = RelatorioService.gerar_analise_comparativa(db, anos=[2024])
+    meses = _por_mes(analise)
+    assert list(meses) == [f"2024-{m:02d}" for m in range(1, 13)]
+
+    janeiro = meses["2024-01"]
+    assert janeiro["total_recebido"] == 1600.0
+    assert janeiro["recebido_mes_anterior"] == 1000.0
+    assert janeiro["variacao_anual"]["absoluta"] == 600.0
+    assert janeiro["variacao_anual"]["percentual"] == pytest.approx(60.0)
+
+    # Mês sem aluguéis entra com zero e não desloca as comparações
+    assert meses["2024-03"]["total_recebido"] == 0.0
+    assert meses["2024-03"]["recebido_ano_anterior"] == 1000.0
+    assert meses["2024-04"]["recebido_mes_anterior"] == 0.0
+    assert meses["2024-04"]["variacao_anual"]["absoluta"] == 100.0
+
+    assert meses["2024-02"]["total_esperado"] == 1600.0
+    assert meses["2024-02"]["acumulado_12_meses"] == 1000.0 * 10 + 1600.0 + 1100.0
+
+    ano = analise["anos"][0]
+    assert ano["total_recebido"] == 1100.0 * 11 + 500.0
+    assert ano["recebido_ano_anterior"] == 12000.0
+
+
+def test_crescimento_por_imovel(db):
+    analise = RelatorioService.gerar_analise_comparativa(db, anos=[2023, 2024])
+    imoveis = {i["imovel_nome"]: i["anos"] for i in analise["imoveis"]}
+
+    apto = {a["ano"]: a for a in imoveis["Apto 101"]}
+    assert apto[2023]["variacao"]["absoluta"] is None
+    assert apto[2024]["total_recebido"] == 12100.0
+    assert apto[2024]["variacao"]["percentual"] == pytest.approx(100 * (12100 / 12000 - 1))
+
+    assert [a["ano"] for a in imoveis["Casa 2"]] == [2024]
+
+
+def test_crescimento_por_imovel_em_parte_do_ano(db):
+    # Março a agosto de 2024 contra março a agosto de 2023 (março/2024 sem aluguel)
+    analise = RelatorioService.gerar_analise_comparativa(db, inicio="2024-03", fim="2024-08")
+    apto = {i["imovel_nome"]: i["anos"] for i in analise["imoveis"]}["Apto 101"]
+
+    assert apto == [{
+        "ano": 2024,
+        "total_recebido": 1100.0 * 5,
+        "variacao": {"absoluta": -500.0, "percentual": pytest.approx(100 * (5500 / 6000 - 1))}
+    }]
+    assert analise["anos"][0]["total_recebido"] == apto[0]["total_recebido"]
+    assert analise["anos"][0]["variacao"]["absoluta"] == apto[0]["variacao"]["absoluta"]
+    # Casa só tem aluguéis em janeiro e fevereiro: fora do período
+    assert "Casa 2" not in {i["imovel_nome"] for i in analise["imoveis"]}
+
+
+def test_intervalo_de_meses(db):
+    analise = RelatorioService.gerar_analise_comparativa(db, inicio="2023-11", fim="2024-02")
+    assert list(_por_mes(analise)) == ["2023-11", "2023-12", "2024-01", "2024-02"]
+    assert [a["ano"] for a in analise["anos"]] == [2023, 2024]
+    assert analise["anos"][0]["meses_analisados"] == 2
+
+
+def test_numero_de_consultas_nao_depende_dos_anos(db, banco):
+    consultas = []
+    event.listen(banco, "before_cursor_execute", lambda *args: consultas.append(1))
+
+    RelatorioService.gerar_analise_comparativa(db, anos=[2023, 2024])
+    duas = len(consultas)
+    consultas.clear()
+    RelatorioService.gerar_analise_comparativa(db, anos=list(range(2015, 2025)))
+
+    assert len(consultas) == duas == 2
+
+
+def test_relatorio_comparativo_usa_a_analise(db):
+    relatorio = RelatorioService.gerar_relatorio_comparativo(db, 2023, 2024)
+    assert relatorio["resumo"]["total_2023"] == 12000.0
+    assert relatorio["resumo"]["total_2024"] == 1100.0 * 11 + 500.0
+    assert relatorio["comparacao_mensal"][2]["receita_2024"] == 0.0
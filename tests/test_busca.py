@@ -0,0 +1,86 @@
+"""
+Testes da busca (fallback SQLite com FTS5 trigram)
+"""
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+from app.models.imovel import Imovel
+from app.models.proprietario import Proprietario
+from app.models.usuario import Usuario
+from app.services.busca_service import normalizar, similaridade
+
+MARIA = SimpleNamespace(id=2, nome="Maria", is_admin=False)
+
+
+@pytest.fixture
+def ambiente(api, sessao, autenticar):
+    sessao.add_all([
+        Proprietario(nome="João Souza", tipo_pessoa="fisica", email="joao@exemplo.com", cpf="123.456.789-00"),
+        Proprietario(nome="Maria Conceição", tipo_pessoa="fisica", email="maria@exemplo.com"),
+        Proprietario(nome="Imobiliária Central", tipo_pessoa="juridica", razao_social="Central Imóveis Ltda"),
+        Imovel(nome="Apto 101", endereco="Rua São João, 10", cidade="São Paulo"),
+        Imovel(nome="Loja Centro", endereco="Av. Brasil, 200", cidade="Campinas"),
+        Usuario(nome="Admin", email="admin@exemplo.com", hashed_password="x", is_admin=True),
+        Usuario(nome="Maria Conceição", email="maria@exemplo.com", hashed_password="x"),
+    ])
+    sessao.commit()
+    return api, sessao, autenticar
+
+
+def test_similaridade():
+    assert normalizar("  Conceição  DA Silva ") == "conceicao da silva"
+    assert similaridade("souza", "joao souza") == 1.0
+    assert similaridade("sauza", "joao souza") == 0.5
+    assert similaridade("xyz", "joao souza") == 0.0
+
+
+def test_busca_unificada_com_erro_de_digitacao(ambiente):
+    client, _, autenticar = ambiente
+
+    dados = client.get("/api/busca/", params={"q": "Sauza"}).json()
+    assert [p["nome"] for p in dados["proprietarios"]] == ["João Souza"]
+    assert dados["proprietarios"][0]["relevancia"] == 0.5
+
+    # Sem acentos; a correspondência exata vem antes da aproximada
+    dados = client.get("/api/busca/", params={"q": "conceicao"}).json()
+    assert [p["nome"] for p in dados["proprietarios"]] == ["Maria Conceição"]
+    assert [u["email"] for u in dados["usuarios"]] == ["maria@exemplo.com"]
+
+    dados = client.get("/api/busca/", params={"q": "sao paulo", "tipos": "imoveis"}).json()
+    assert list(dados) == ["termo", "imoveis"]
+    assert [i["nome"] for i in dados["imoveis"]] == ["Apto 101"]
+
+    # Usuários só para administradores
+    autenticar(MARIA)
+    assert "usuarios" not in client.get("/api/busca/", params={"q": "maria"}).json()
+
+    assert client.get("/api/busca/", params={"q": "x", "tipos": "carros"}).status_code == 422
+    assert client.get("/api/busca/", params={"q": "xy", "tipos": "carros"}).status_code == 400
+
+
+def test_listagens_usam_indice_atualizado(ambiente):
+    client, db, _ = ambiente
+
+    resposta = client.get("/api/proprietarios/", params={"search": "central"})
+    assert [p["nome"] for p in resposta.json()] == ["Imobiliária Central"]
+    resposta = client.get("/api/imoveis/", params={"search": "campinas"})
+    assert [i["nome"] for i in resposta.json()] == ["Loja Centro"]
+
+    # Registros novos entram no índice (a versão da tabela mudou)
+    db.add(Imovel(nome="Sala Comercial", endereco="Rua Campinas, 5", cidade="Santos"))
+    db.commit()
+    resposta = client.get("/api/imoveis/", params={"search": "campinas"})
+    assert sorted(i["nome"] for i in resposta.json()) == ["Loja Centro", "Sala Comercial"]
+
+    # O índice é atualizado numa conexão própria: a sessão da requisição não é confirmada
+    db.add(Proprietario(nome="Ana Central", tipo_pessoa="fisica"))
+    db.commit()
+    with mock.patch.object(db, "commit", side_effect=AssertionError("commit na sessão da requisição")):
+        resposta = client.get("/api/proprietarios/", params={"search": "central"})
+    assert sorted(p["nome"] for p in resposta.json()) == ["Ana Central", "Imobiliária Central"]
+
+    # CPF e termos curtos (sem trigramas completos)
+    assert [p["nome"] for p in client.get("/api/proprietarios/", params={"search": "456.789"}).json()] == ["João Souza"]
+    assert [i["nome"] for i in client.get("/api/imoveis/", params={"search": "10"}).json()] == ["Apto 101"]
@@ -0,0 +1,109 @@
+"""
+Testes do middleware de compressão e dos estáticos pré-comprimidos
+"""
+import gzip
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.compressao import (
+    CompressaoMiddleware,
+    EstaticosPrecomprimidos,
+    codificacoes_aceitas,
+    precomprimir_estaticos,
+)
+
+CORPO = b'{"valores": [' + b",".join(b"1500.0" for _ in range(2000)) + b"]}"
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(CompressaoMiddleware, tamanho_minimo=500)
+
+    @app.get("/grande")
+    def grande():
+        return Response(CORPO, media_type="application/json", headers={"ETag": '"abc"'})
+
+    @app.get("/pequena")
+    def pequena():
+        return Response(b'{"ok": true}', media_type="application/json")
+
+    @app.get("/pdf")
+    def pdf():
+        return Response(CORPO, media_type="application/pdf")
+
+    @app.get("/fluxo")
+    def fluxo():
+        return StreamingResponse(iter([CORPO[:3000], CORPO[3000:]]), media_type="text/csv")
+
+    return TestClient(app)
+
+
+def _bruto(client, url, accept_encoding="gzip"):
+    # httpx descomprime automaticamente; stream() dá acesso aos bytes enviados
+    with client.stream("GET", url, headers={"Accept-Encoding": accept_encoding}) as resposta:
+        return resposta, b"".join(resposta.iter_raw())
+
+
+def test_comprime_respostas_grandes(client):
+    resposta, corpo = _bruto(client, "/grande")
+    assert resposta.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in resposta.headers["vary"]
+    assert resposta.headers["etag"] == 'W/"abc"'
+    assert int(resposta.headers["content-length"]) == len(corpo) < len(CORPO)
+    assert gzip.decompress(corpo) == CORPO
+
+
+def test_nao_comprime_pequenas_binarias_ou_sem_accept_encoding(client):
+    assert "content-encoding" not in _bruto(client, "/pequena")[0].headers
+    assert "content-encoding" not in _bruto(client, "/pdf")[0].headers
+    assert "content-encoding" not in _bruto(client, "/grande", accept_encoding="identity")[0].headers
+    assert "content-encoding" not in _bruto(client, "/grande", accept_encoding="gzip;q=0")[0].headers
+
+
+def test_comprime_respostas_em_fluxo(client):
+    resposta, corpo = _bruto(client, "/fluxo")
+    assert resposta.headers["content-encoding"] == "gzip"
+    assert "content-length" not in resposta.headers
+    assert gzip.decompress(corpo) == CORPO
+
+
+def test_codificacoes_aceitas():
+    assert "gzip" in codificacoes_aceitas("gzip, deflate")
+    assert codificacoes_aceitas("deflate") == []
+    assert codificacoes_aceitas("gzip;q=0") == []
+
+
+def test_estaticos_precomprimidos(tmp_path):
+    (tmp_path / "js").mkdir()
+    script = tmp_path / "js" / "utils.js"
+    script.write_text("function soma(a, b) { return a + b; }\n" * 200)
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG" + b"\x00" * 2000)
+
+    assert precomprimir_estaticos(str(tmp_path)) >= 1
+    assert os.path.exists(f"{script}.gz")
+    assert not os.path.exists(tmp_path / "logo.png.gz")
+    # Sidecars atualizados não são regravados
+    assert precomprimir_estaticos(str(tmp_path)) == 0
+
+    app = FastAPI()
+    app.mount("/static", EstaticosPrecomprimidos(directory=str(tmp_path)), name="static")
+    client = TestClient(app)
+
+    resposta, corpo = _bruto(client, "/static/js/utils.js", accept_encoding="gzip")
+    assert resposta.headers["content-encoding"] == "gzip"
+    assert resposta.headers["content-type"].startswith(("application/javascript", "text/javascript"))
+    assert gzip.decompress(corpo) == script.read_bytes()
+
+    etag = resposta.headers["etag"]
+    assert client.get(
+        "/static/js/utils.js", headers={"Accept-Encoding": "gzip", "If-None-Match": etag}
+    ).status_code == 304
+
+    resposta, corpo = _bruto(client, "/static/js/utils.js", accept_encoding="identity")
+    assert "content-encoding" not in resposta.headers
+    assert corpo == script.read_bytes()
@@ -0,0 +1,65 @@
+"""
+Testes da exportação de relatórios em Excel
+"""
+import io
+
+import pytest
+from openpyxl import load_workbook
+
+from app.models.aluguel import AluguelMensal
+from app.models.imovel import Imovel
+from app.models.proprietario import Proprietario
+from app.services.excel_exporter import ExcelExporter
+
+
+@pytest.fixture
+def db(sessao):
+    imovel = Imovel(nome="Apto 101", endereco="Rua A, 1")
+    proprietario = Proprietario(nome="Maria", tipo_pessoa="fisica")
+    sessao.add_all([imovel, proprietario])
+    sessao.flush()
+
+    for mes in (1, 2, 2):
+        sessao.add(AluguelMensal(
+            imovel_id=imovel.id,
+            proprietario_id=proprietario.id,
+            mes_referencia=f"2025-{mes:02d}",
+            valor_proprietario=900.0,
+            taxa_administracao=100.0,
+            valor_total=1000.0,
+            pago=mes == 1
+        ))
+    sessao.commit()
+    return sessao
+
+
+def test_exportar_mensal(db):
+    destino = io.BytesIO()
+    resultado = ExcelExporter.exportar_mensal(db, 2025, 2, destino)
+
+    assert resultado == {"linhas": 2}
+    wb = load_workbook(destino)
+    assert wb.sheetnames == ["Resumo", "Detalhamento"]
+
+    detalhes = list(wb["Detalhamento"].iter_rows(values_only=True))
+    assert detalhes[0][0] == "Imóvel"
+    assert detalhes[1] == ("Apto 101", "Rua A, 1", "Maria", "2025-02", "PENDENTE", 900.0, 100.0, 1000.0)
+    assert wb["Detalhamento"]["H2"].number_format == '"R$" #,##0.00'
+
+    resumo = {linha[0]: linha[1] for linha in wb["Resumo"].iter_rows(min_row=4, values_only=True)}
+    assert resumo["Total Esperado"] == 2000.0
+    assert resumo["Total Pendente"] == 2000.0
+
+
+def test_exportar_anual_uma_aba_por_mes(db):
+    destino = io.BytesIO()
+    ExcelExporter.exportar_anual(db, 2025, destino)
+
+    wb = load_workbook(destino)
+    assert wb.sheetnames == ["Resumo", "Janeiro", "Fevereiro"]
+    assert wb["Fevereiro"].max_row == 3
+
+    resumo = list(wb["Resumo"].iter_rows(min_row=4, values_only=True))
+    assert len(resumo) == 13
+    assert resumo[0] == ("Janeiro", 1, 1, 1000.0, 1000.0, 0.0)
+    assert resumo[-1] == ("Total", 3, 1, 3000.0, 1000.0, 2000.0)
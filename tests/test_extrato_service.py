@@ -0,0 +1,126 @@
+"""
+Testes do motor de extratos por proprietário
+"""
+import io
+
+import pytest
+
+from app.models.aluguel import AluguelMensal
+from app.models.imovel import Imovel
+from app.models.participacao import Participacao
+from app.models.proprietario import Proprietario
+from app.models.transferencia import Transferencia
+from app.models.usuario import Usuario
+from app.services.extrato_service import ExtratoService
+from app.services.pdf_renderer import PDFRenderer
+from app.services.relatorio_service import RelatorioService
+
+
+@pytest.fixture
+def db(sessao):
+    apto = Imovel(nome="Apto 101", endereco="Rua A, 1")
+    casa = Imovel(nome="Casa 2", endereco="Rua B, 2")
+    maria = Proprietario(nome="Maria", tipo_pessoa="fisica", cpf="111.111.111-11", email="maria@exemplo.com")
+    joao = Proprietario(nome="João", tipo_pessoa="fisica", email="Joao@Exemplo.com")
+    ana = Proprietario(nome="Ana", tipo_pessoa="fisica")
+    sessao.add_all([apto, casa, maria, joao, ana])
+    sessao.flush()
+
+    # Usuários ligados aos proprietários por CPF (Maria) e por e-mail (João)
+    u_maria = Usuario(nome="Maria", email="maria.login@exemplo.com", cpf="111.111.111-11", hashed_password="x")
+    u_joao = Usuario(nome="João", email="joao@exemplo.com", hashed_password="x")
+    sessao.add_all([u_maria, u_joao])
+    sessao.flush()
+
+    sessao.add_all([
+        # Apto: aluguel já lançado por proprietário
+        AluguelMensal(imovel_id=apto.id, proprietario_id=maria.id, mes_referencia="2025-10",
+                      valor_proprietario=600.0, taxa_administracao=100.0, valor_total=1000.0, pago=True),
+        AluguelMensal(imovel_id=apto.id, proprietario_id=joao.id, mes_referencia="2025-10",
+                      valor_proprietario=400.0, taxa_administracao=100.0, valor_total=1000.0, pago=False),
+        # Casa: aluguel do imóvel inteiro, rateado pelas participações
+        Participacao(imovel_id=casa.id, proprietario_id=maria.id, percentual=25.0),
+        Participacao(imovel_id=casa.id, proprietario_id=ana.id, percentual=75.0),
+        AluguelMensal(imovel_id=casa.id, mes_referencia="2025-10",
+                      taxa_administracao=200.0, valor_total=2000.0, pago=True),
+        # Fora do período
+        AluguelMensal(imovel_id=apto.id, proprietario_id=maria.id, mes_referencia="2025-09",
+                      valor_proprietario=600.0, valor_total=1000.0, pago=True),
+        Transferencia(origem_id=u_maria.id, destino_id=u_joao.id, mes_referencia="2025-10",
+                      valor=50.0, confirmada=True),
+        Transferencia(origem_id=u_joao.id, destino_id=u_maria.id, mes_referencia="2025-10",
+                      valor=10.0, confirmada=False),
+    ])
+    sessao.commit()
+    return sessao
+
+
+def _por_nome(extratos):
+    return {e["proprietario"]["nome"]: e for e in extratos}
+
+
+def test_extratos_somam_aluguel_direto_rateio_e_transferencias(db):
+    extratos = _por_nome(ExtratoService.calcular(db, ["2025-10"]))
+    assert set(extratos) == {"Maria", "João", "Ana"}
+
+    maria = extratos["Maria"]["resumo"]
+    assert maria["total_imoveis"] == 2
+    assert maria["total_esperado"] == pytest.approx(1100.0)  # 600 + 25% de 2000
+    assert maria["total_recebido"] == pytest.approx(1100.0)
+    assert maria["taxa_administracao"] == pytest.approx(110.0)  # 60% de 100 + 25% de 200
+    assert maria["transferencias_enviadas"] == pytest.approx(50.0)
+    assert maria["transferencias_recebidas"] == pytest.approx(10.0)
+    assert maria["liquido"] == pytest.approx(1100.0 - 110.0 - 50.0 + 10.0)
+
+    joao = extratos["João"]["resumo"]
+    assert joao["total_pendente"] == pytest.approx(400.0)
+    assert joao["taxa_recebimento"] == 0.0
+    assert joao["transferencias_recebidas"] == pytest.approx(50.0)
+
+    ana = extratos["Ana"]["resumo"]
+    assert ana["total_esperado"] == pytest.approx(1500.0)
+    assert ana["taxa_administracao"] == pytest.approx(150.0)
+    assert ana["liquido"] == pytest.approx(1350.0)
+
+
+def test_apenas_confirmadas_ignora_transferencias_pendentes(db):
+    extratos = _por_nome(ExtratoService.calcular(db, ["2025-10"], apenas_confirmadas=True))
+    assert extratos["Maria"]["resumo"]["transferencias_recebidas"] == 0.0
+    assert extratos["João"]["resumo"]["transferencias_enviadas"] == 0.0
+
+
+def test_total_de_imoveis_conta_o_periodo_inteiro(db):
+    joao_id = db.query(Proprietario.id).filter(Proprietario.nome == "João").scalar()
+    casa_id = db.query(Imovel.id).filter(Imovel.nome == "Casa 2").scalar()
+    # João: Casa 2 em setembro, Apto 101 em outubro
+    db.add(AluguelMensal(imovel_id=casa_id, proprietario_id=joao_id, mes_referencia="2025-09",
+                         valor_proprietario=300.0, valor_total=2000.0, pago=True))
+    db.commit()
+
+    assert _por_nome(ExtratoService.calcular(db, ["2025-10"]))["João"]["resumo"]["total_imoveis"] == 1
+    joao = _por_nome(ExtratoService.calcular(db, ["2025-09", "2025-10"]))["João"]["resumo"]
+    assert joao["total_imoveis"] == 2
+
+
+def test_filtro_por_proprietario_e_extrato_anual(db):
+    ana_id = db.query(Proprietario.id).filter(Proprietario.nome == "Ana").scalar()
+    maria_id = db.query(Proprietario.id).filter(Proprietario.nome == "Maria").scalar()
+
+    extratos = ExtratoService.calcular(db, ["2025-10"], proprietario_ids=[ana_id])
+    assert [e["proprietario"]["id"] for e in extratos] == [ana_id]
+
+    relatorio = RelatorioService.gerar_relatorio_proprietario(db, maria_id, ano=2025)
+    assert relatorio["periodo"] == {"ano": 2025, "mes": None}
+    assert [m["mes_referencia"] for m in relatorio["receitas_por_mes"]] == ["2025-09", "2025-10"]
+    assert relatorio["resumo"]["total_esperado"] == pytest.approx(1700.0)
+
+    assert "erro" in RelatorioService.gerar_relatorio_proprietario(db, 9999, ano=2025)
+
+
+def test_pdf_com_todos_os_extratos(db):
+    lote = RelatorioService.gerar_extratos(db, ano=2025, mes=10)
+    assert lote["total_proprietarios"] == 3
+
+    destino = io.BytesIO()
+    PDFRenderer.renderizar_extratos(lote, destino)
+    assert destino.getvalue().count(b"/Type /Page\n") == 3
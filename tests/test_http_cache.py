@@ -0,0 +1,77 @@
+"""
+Testes das requisições condicionais (ETag / Last-Modified) nas rotas de leitura
+"""
+import pytest
+from sqlalchemy import event
+
+from app.models.imovel import Imovel
+
+
+@pytest.fixture
+def ambiente(api, banco, sessao):
+    sessao.add_all([Imovel(nome="Apto 101", endereco="Rua A, 1"), Imovel(nome="Casa 2", endereco="Rua B, 2")])
+    sessao.commit()
+
+    consultas = []
+    event.listen(banco, "before_cursor_execute", lambda *args: consultas.append(args[2]))
+    return api, sessao, consultas
+
+
+def test_resposta_leva_etag_e_last_modified(ambiente):
+    client, _, _ = ambiente
+    resposta = client.get("/api/imoveis/")
+    assert resposta.status_code == 200
+    assert len(resposta.json()) == 2
+    assert resposta.headers["etag"].startswith('"')
+    assert resposta.headers["cache-control"] == "private, no-cache"
+    assert "last-modified" in resposta.headers
+
+
+def test_if_none_match_responde_304_sem_a_consulta_principal(ambiente):
+    client, _, consultas = ambiente
+    etag = client.get("/api/imoveis/").headers["etag"]
+
+    consultas.clear()
+    resposta = client.get("/api/imoveis/", headers={"If-None-Match": etag})
+    assert resposta.status_code == 304
+    assert resposta.content == b""
+    assert resposta.headers["etag"] == etag
+    assert len(consultas) == 1
+    assert "versoes_dados" in consultas[0]
+
+
+def test_etag_muda_com_alteracao_e_com_parametros(ambiente):
+    client, db, _ = ambiente
+    etag = client.get("/api/imoveis/").headers["etag"]
+    assert client.get("/api/imoveis/?limit=1").headers["etag"] != etag
+
+    db.add(Imovel(nome="Sala 3", endereco="Rua C, 3"))
+    db.commit()
+
+    resposta = client.get("/api/imoveis/", headers={"If-None-Match": etag})
+    assert resposta.status_code == 200
+    assert resposta.headers["etag"] != etag
+    assert len(resposta.json()) == 3
+
+
+def test_if_modified_since_nao_valida_a_representacao(ambiente):
+    client, db, _ = ambiente
+    ultima_alteracao = client.get("/api/imoveis/").headers["last-modified"]
+    assert client.get("/api/imoveis/", headers={"If-Modified-Since": ultima_alteracao}).status_code == 200
+
+    # Alteração em geral no mesmo segundo do Last-Modified: o ETag a detecta
+    etag = client.get("/api/imoveis/").headers["etag"]
+    db.add(Imovel(nome="Sala 3", endereco="Rua C, 3"))
+    db.commit()
+    resposta = client.get("/api/imoveis/", headers={"If-None-Match": etag, "If-Modified-Since": ultima_alteracao})
+    assert resposta.status_code == 200
+    assert "Sala 3" in resposta.text
+
+
+def test_grade_colunar_tambem_e_condicional(ambiente):
+    client, _, _ = ambiente
+    url = "/api/alugueis/grid-data?formato=colunar"
+    resposta = client.get(url)
+    assert resposta.status_code == 200
+    assert resposta.json()["formato"] == "colunar"
+    assert client.get(url, headers={"If-None-Match": resposta.headers["etag"]}).status_code == 304
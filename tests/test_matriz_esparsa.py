@@ -0,0 +1,57 @@
+"""
+Testes da codificação COO comprimida das matrizes de participações
+"""
+import json
+import random
+
+import numpy as np
+import pytest
+
+from app.core.matriz_esparsa import (
+    codificar,
+    decodificar,
+    matriz_de_vetores,
+    matriz_densa,
+    vetores_de_matriz,
+)
+
+
+def _matriz_aleatoria(imoveis=1000, proprietarios=200, por_imovel=3):
+    gerador = random.Random(7)
+    matriz = {}
+    for imovel_id in range(1, imoveis + 1):
+        for proprietario_id in gerador.sample(range(1, proprietarios + 1), por_imovel):
+            matriz[(imovel_id, proprietario_id)] = round(100 / por_imovel, 4)
+    return matriz
+
+
+def test_ida_e_volta():
+    matriz = _matriz_aleatoria()
+    assert matriz_de_vetores(*decodificar(codificar(*vetores_de_matriz(matriz)))) == matriz
+
+
+def test_matriz_vazia_e_ids_grandes():
+    assert matriz_de_vetores(*decodificar(codificar(*vetores_de_matriz({})))) == {}
+    matriz = {(2_000_000_000, 5): 12.5, (7, 1_999_999_999): 87.5, (7, 3): 0.125}
+    assert matriz_de_vetores(*decodificar(codificar(*vetores_de_matriz(matriz)))) == matriz
+
+
+def test_mais_compacta_que_o_json():
+    matriz = _matriz_aleatoria()
+    dados = {}
+    for (imovel_id, proprietario_id), percentual in matriz.items():
+        dados.setdefault(str(imovel_id), {})[str(proprietario_id)] = percentual
+    assert len(codificar(*vetores_de_matriz(matriz))) * 5 < len(json.dumps(dados))
+
+
+def test_matriz_densa():
+    imoveis, proprietarios, percentuais = vetores_de_matriz({(10, 2): 40.0, (10, 5): 60.0, (3, 5): 100.0})
+    imovel_ids, proprietario_ids, matriz = matriz_densa(imoveis, proprietarios, percentuais)
+    assert imovel_ids.tolist() == [3, 10]
+    assert proprietario_ids.tolist() == [2, 5]
+    np.testing.assert_array_equal(matriz, [[0.0, 100.0], [40.0, 60.0]])
+
+
+def test_formato_desconhecido():
+    with pytest.raises(ValueError):
+        decodificar(b"XXXX\x00\x00\x00\x00")
@@ -0,0 +1,54 @@
+"""
+Testes da grid de participações nos formatos completo e colunar
+"""
+import pytest
+
+from app.models.imovel import Imovel
+from app.models.participacao import Participacao
+from app.models.proprietario import Proprietario
+
+
+@pytest.fixture
+def client(api, sessao):
+    apto = Imovel(nome="Apto 101", endereco="Rua A, 1")
+    casa = Imovel(nome="Casa 2", endereco="Rua B, 2")
+    antigo = Imovel(nome="Antigo", endereco="Rua C, 3", is_active=False)
+    maria = Proprietario(nome="Maria", tipo_pessoa="fisica")
+    joao = Proprietario(nome="João", tipo_pessoa="fisica")
+    sessao.add_all([apto, casa, antigo, maria, joao])
+    sessao.flush()
+    sessao.add_all([
+        Participacao(imovel_id=casa.id, proprietario_id=maria.id, percentual=100.0),
+        Participacao(imovel_id=apto.id, proprietario_id=maria.id, percentual=40.0),
+        Participacao(imovel_id=apto.id, proprietario_id=joao.id, percentual=60.0),
+        Participacao(imovel_id=antigo.id, proprietario_id=joao.id, percentual=100.0),
+    ])
+    sessao.commit()
+    return api
+
+
+def test_grid_colunar_equivale_ao_formato_completo(client):
+    completo = client.get("/api/participacoes-versoes/grid-data").json()
+    colunar = client.get("/api/participacoes-versoes/grid-data?formato=colunar").json()
+
+    assert colunar["linhas"]["nome"] == ["Apto 101", "Casa 2"]
+    assert [c["nome"] for c in colunar["colunas"]] == ["João", "Maria"]
+
+    valores = colunar["valores"]
+    celulas = {
+        (str(colunar["linhas"]["id"][linha]), str(colunar["colunas"][coluna]["id"])): valor
+        for linha, coluna, valor in zip(valores["linha"], valores["coluna"], valores["valor"])
+    }
+    esperado = {
+        (imovel_id, prop_id): valor
+        for imovel_id, props in completo["dados"].items()
+        for prop_id, valor in props.items()
+        if int(imovel_id) in colunar["linhas"]["id"]
+    }
+    assert celulas == esperado
+    # Células em ordem de linha
+    assert valores["linha"] == sorted(valores["linha"])
+
+
+def test_formato_invalido(client):
+    assert client.get("/api/participacoes-versoes/grid-data?formato=xml").status_code == 422
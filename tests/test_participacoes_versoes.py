@@ -0,0 +1,249 @@
+"""
+Testes da aplicação de versões de participações por diferença e da vigência
+"""
+from datetime import date
+import pytest
+from sqlalchemy import event, select
+
+from app.core.data_version import obter_versoes
+from app.models.aluguel import AluguelMensal
+from app.models.imovel import Imovel
+from app.models.participacao import Participacao
+from app.models.proprietario import Proprietario
+from app.models.usuario import Usuario
+from app.services.extrato_service import ExtratoService
+from app.services.participacao_service import (
+    ParticipacaoService, condicao_vigencia, participacoes_atuais
+)
+
+
+@pytest.fixture
+def ambiente(api, banco, sessao):
+    sessao.add_all([
+        Imovel(nome="Apto 101", endereco="Rua A, 1"),
+        Imovel(nome="Casa 2", endereco="Rua B, 2"),
+        Proprietario(nome="Maria", tipo_pessoa="fisica"),
+        Proprietario(nome="João", tipo_pessoa="fisica"),
+        Usuario(nome="Admin", email="admin@exemplo.com", hashed_password="x", is_admin=True),
+    ])
+    sessao.flush()
+    sessao.add_all([
+        Participacao(imovel_id=1, proprietario_id=1, percentual=40.0),
+        Participacao(imovel_id=1, proprietario_id=2, percentual=60.0),
+        Participacao(imovel_id=2, proprietario_id=1, percentual=100.0),
+        # Linha duplicada da mesma célula, deixada por versões antigas
+        Participacao(imovel_id=2, proprietario_id=1, percentual=100.0),
+    ])
+    sessao.commit()
+
+    escritas = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE")) and "participacoes " in statement:
+            escritas.append(statement.split()[0].upper())
+
+    event.listen(banco, "before_cursor_execute", registrar)
+    return api, sessao, escritas
+
+
+def _matriz(db, data=None):
+    """Matriz atual, ou a vigente na data"""
+    return {
+        (imovel_id, proprietario_id): percentual
+        for imovel_id, proprietario_id, percentual in db.execute(
+            select(Participacao.imovel_id, Participacao.proprietario_id, Participacao.percentual)
+            .where(participacoes_atuais() if data is None else condicao_vigencia(data))
+        )
+    }
+
+
+def test_aplica_somente_as_diferencas(ambiente):
+    client, db, escritas = ambiente
+    resposta = client.post("/api/participacoes-versoes/", json={
+        "nome": "Nova divisão",
+        "dados_json": {"1": {"1": 50.0, "2": 50.0}, "2": {"1": 100.0, "2": 0}},
+        "vigente_de": "2025-11-01"
+    })
+    assert resposta.status_code == 201, resposta.text
+    assert resposta.json()["alteracoes"] == {"inseridas": 0, "atualizadas": 2, "removidas": 1}
+    assert _matriz(db) == {(1, 1): 50.0, (1, 2): 50.0, (2, 1): 100.0}
+    # Um UPDATE em lote (encerra as 3 linhas) e um INSERT em lote (2 novas)
+    assert sorted(escritas) == ["INSERT", "UPDATE"]
+
+    # Reaplicar na mesma data corrige as linhas novas no lugar
+    escritas.clear()
+    resposta = client.post("/api/participacoes-versoes/", json={
+        "nome": "Correção",
+        "dados_json": {"1": {"1": 45.0, "2": 55.0}, "2": {"1": 100.0}},
+        "vigente_de": "2025-11-01"
+    })
+    assert resposta.json()["alteracoes"] == {"inseridas": 0, "atualizadas": 2, "removidas": 0}
+    assert escritas == ["UPDATE"]
+    assert len(db.execute(select(Participacao.id)).all()) == 6
+
+
+def test_aplicar_versao_igual_nao_escreve(ambiente):
+    client, db, escritas = ambiente
+    versao = client.post("/api/participacoes-versoes/", json={
+        "nome": "Atual",
+        "dados_json": {"1": {"1": 40.0, "2": 60.0}, "2": {"1": 100.0}}
+    }).json()
+    versoes_antes = obter_versoes(db, ["participacoes"])
+
+    escritas.clear()
+    resposta = client.post(f"/api/participacoes-versoes/{versao['id']}/aplicar")
+    assert resposta.status_code == 200
+    assert resposta.json()["alteracoes"] == {"inseridas": 0, "atualizadas": 0, "removidas": 0}
+    assert escritas == []
+    assert obter_versoes(db, ["participacoes"]) == versoes_antes
+
+
+def test_calcular_diff_insere_celulas_novas(ambiente):
+    _, db, _ = ambiente
+    alvo = ParticipacaoService.matriz_de_dados({"1": {"1": 40.0, "2": 60.0}, "2": {"1": 70.0, "2": 30.0}})
+    diff = ParticipacaoService.calcular_diff(db, alvo)
+    assert diff["inserir"] == [{"imovel_id": 2, "proprietario_id": 2, "percentual": 30.0}]
+    assert [linha["id"] for linha in diff["atualizar"]] == [3]
+    assert diff["atualizar"][0]["percentual"] == 70.0
+    assert [linha["id"] for linha in diff["remover"]] == [4]
+
+    alteracoes = ParticipacaoService.aplicar_matriz(db, alvo, date(2025, 11, 1))
+    assert alteracoes == {"inseridas": 1, "atualizadas": 1, "removidas": 1}
+    db.commit()
+    assert _matriz(db) == alvo
+
+
+def test_vigencia_preserva_o_rateio_de_meses_anteriores(ambiente):
+    client, db, _ = ambiente
+    db.add_all([
+        AluguelMensal(imovel_id=1, mes_referencia="2025-10", valor_total=1000.0),
+        AluguelMensal(imovel_id=1, mes_referencia="2025-11", valor_total=1000.0),
+    ])
+    db.commit()
+    ParticipacaoService.aplicar_matriz(
+        db, ParticipacaoService.matriz_de_dados({"1": {"1": 100.0}, "2": {"1": 100.0}}), date(2025, 11, 1)
+    )
+    db.commit()
+
+    assert _matriz(db, date(2025, 10, 15)) == {(1, 1): 40.0, (1, 2): 60.0, (2, 1): 100.0}
+    assert _matriz(db, date(2025, 11, 1)) == {(1, 1): 100.0, (2, 1): 100.0}
+
+    def esperado_por_proprietario(mes):
+        return {
+            e["proprietario"]["id"]: e["resumo"]["total_esperado"]
+            for e in ExtratoService.calcular(db, [mes])
+        }
+
+    assert esperado_por_proprietario("2025-10") == {1: 400.0, 2: 600.0}
+    assert esperado_por_proprietario("2025-11") == {1: 1000.0}
+
+    grade = client.get("/api/alugueis/grid-data?mes_referencia=2025-10").json()
+    assert grade["rows"][0]["distribuicao"] == {"1": 400.0, "2": 600.0}
+    grade = client.get("/api/alugueis/grid-data?mes_referencia=2025-11").json()
+    assert grade["rows"][0]["distribuicao"] == {"1": 1000.0}
+
+
+def test_vigencia_padrao_comeca_no_primeiro_dia_do_mes(ambiente):
+    _, db, _ = ambiente
+    ParticipacaoService.aplicar_matriz(db, ParticipacaoService.matriz_de_dados({"1": {"1": 100.0}, "2": {"1": 100.0}}))
+    db.commit()
+
+    inicio_do_mes = date.today().replace(day=1)
+    assert set(db.execute(
+        select(Participacao.vigente_de).where(participacoes_atuais(), Participacao.imovel_id == 1)
+    ).scalars()) == {inicio_do_mes}
+    assert _matriz(db, inicio_do_mes) == {(1, 1): 100.0, (2, 1): 100.0}
+
+
+def test_vigencia_nao_retroage_sobre_a_matriz_atual(ambiente):
+    client, db, _ = ambiente
+    versao = client.post("/api/participacoes-versoes/", json={
+        "nome": "Nova",
+        "dados_json": {"1": {"1": 100.0}, "2": {"1": 100.0}},
+        "vigente_de": "2025-11-01"
+    }).json()
+    resposta = client.post(f"/api/participacoes-versoes/{versao['id']}/aplicar?vigente_de=2025-10-01")
+    # Matriz igual: nada a aplicar, mesmo com data anterior
+    assert resposta.status_code == 200
+
+    outra = client.post("/api/participacoes-versoes/", json={
+        "nome": "Outra",
+        "dados_json": {"1": {"2": 100.0}, "2": {"1": 100.0}},
+        "vigente_de": "2025-10-01"
+    })
+    assert outra.status_code == 400
+    assert "01/11/2025" in outra.json()["detail"]
+
+
+def test_listagem_sem_matriz_e_dados_sob_demanda(ambiente):
+    client, db, _ = ambiente
+    dados_json = {"1": {"1": 40.0, "2": 60.0}, "2": {"1": 100.0}}
+    versao = client.post("/api/participacoes-versoes/", json={"nome": "Atual", "dados_json": dados_json}).json()
+    assert versao["total_celulas"] == 3
+    assert "dados_json" not in versao
+
+    consultas = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: consultas.append(args[2]))
+    listagem = client.get("/api/participacoes-versoes/").json()
+    assert [v["nome"] for v in listagem] == ["Atual"]
+    assert listagem[0]["created_by_nome"] == "Admin"
+    assert not any("dados_coo" in sql for sql in consultas)
+
+    assert client.get(f"/api/participacoes-versoes/{versao['id']}/dados").json() == {
+        "versao_id": versao["id"], "dados": dados_json
+    }
+    coo = client.get(f"/api/participacoes-versoes/{versao['id']}/dados?formato=colunar").json()
+    assert coo["imovel_id"] == [1, 1, 2]
+    assert coo["proprietario_id"] == [1, 2, 1]
+    assert coo["percentual"] == [40.0, 60.0, 100.0]
+    assert client.get("/api/participacoes-versoes/999/dados").status_code == 404
+
+
+def test_comparar_versoes(ambiente):
+    client, db, _ = ambiente
+    db.add(Proprietario(nome="Ana", tipo_pessoa="fisica"))
+    db.add(AluguelMensal(imovel_id=1, mes_referencia="2025-10", valor_total=2000.0))
+    db.commit()
+
+    a = client.post("/api/participacoes-versoes/", json={
+        "nome": "A", "dados_json": {"1": {"1": 40.0, "2": 60.0}, "2": {"1": 100.0}}, "vigente_de": "2025-11-01"
+    }).json()["id"]
+    b = client.post("/api/participacoes-versoes/", json={
+        "nome": "B", "dados_json": {"1": {"1": 50.0, "3": 50.0}}, "vigente_de": "2025-11-01"
+    }).json()["id"]
+
+    diff = client.get(f"/api/participacoes-versoes/{a}/diff/{b}?mes_referencia=2025-10").json()
+    celulas = set(zip(*(diff["celulas"][k] for k in ("imovel_id", "proprietario_id", "de", "para"))))
+    assert celulas == {(1, 1, 40.0, 50.0), (1, 2, 60.0, 0.0), (1, 3, 0.0, 50.0), (2, 1, 100.0, 0.0)}
+    assert diff["imoveis_adicionados"] == []
+    assert diff["imoveis_removidos"] == [2]
+    assert diff["proprietarios_adicionados"] == [3]
+    assert diff["proprietarios_removidos"] == [2]
+
+    por_proprietario = {p["proprietario_id"]: p for p in diff["proprietarios"]}
+    assert por_proprietario[1]["variacao_percentual"] == -90.0
+    assert por_proprietario[2]["impacto_valor"] == -1200.0
+    assert por_proprietario[3] == {
+        "proprietario_id": 3, "nome": "Ana", "imoveis_alterados": 1,
+        "variacao_percentual": 50.0, "impacto_valor": 1000.0
+    }
+    assert diff["resumo"]["celulas_alteradas"] == 4
+    assert diff["resumo"]["valor_redistribuido"] == 1200.0
+
+    # Aluguéis lançados por proprietário (como na importação): a base do
+    # imóvel é a soma de valor_proprietario das linhas, como no acerto
+    db.add_all([
+        AluguelMensal(imovel_id=1, proprietario_id=1, mes_referencia="2025-11", valor_total=2000.0,
+                      valor_proprietario=800.0, pago=True),
+        AluguelMensal(imovel_id=1, proprietario_id=2, mes_referencia="2025-11", valor_total=2000.0,
+                      valor_proprietario=1200.0, pago=True),
+    ])
+    db.commit()
+    diff = client.get(f"/api/participacoes-versoes/{a}/diff/{b}?mes_referencia=2025-11").json()
+    impacto = {p["proprietario_id"]: p["impacto_valor"] for p in diff["proprietarios"]}
+    assert impacto == {1: 200.0, 2: -1200.0, 3: 1000.0}
+    assert diff["resumo"]["valor_redistribuido"] == 1200.0
+
+    assert client.get(f"/api/participacoes-versoes/{a}/diff/{a}").json()["resumo"]["celulas_alteradas"] == 0
+    assert client.get(f"/api/participacoes-versoes/{a}/diff/999").status_code == 404
+    assert client.get(f"/api/participacoes-versoes/{a}/diff/{b}?mes_referencia=10-2025").status_code == 422
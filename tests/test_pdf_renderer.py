@@ -0,0 +1,86 @@
+"""
+Testes da renderização de relatórios em PDF
+"""
+import asyncio
+import io
+
+from app.services.pdf_renderer import PDFRenderer, renderizar_em_spool, iterar_arquivo
+
+
+def _relatorio_mensal(total_imoveis: int):
+    return {
+        "periodo": {"ano": 2025, "mes": 10, "mes_nome": "October", "mes_referencia": "2025-10"},
+        "resumo": {
+            "total_alugueis": total_imoveis,
+            "alugueis_pagos": total_imoveis,
+            "alugueis_pendentes": 0,
+            "total_esperado": 1500.0 * total_imoveis,
+            "total_recebido": 1500.0 * total_imoveis,
+            "total_pendente": 0.0,
+            "taxa_recebimento": 100.0
+        },
+        "detalhamento": [
+            {
+                "imovel_endereco": f"Rua Teste, {i}",
+                "status_pagamento": "pago",
+                "valores": {"total": 1500.0}
+            }
+            for i in range(total_imoveis)
+        ]
+    }
+
+
+def test_tabela_em_blocos_repete_cabecalho():
+    linhas = [[str(i), "pago", "R$ 1,00"] for i in range(600)]
+    blocos = PDFRenderer.tabela_em_blocos(["Imóvel", "Status", "Valor"], linhas, [100, 50, 50], linhas_por_bloco=250)
+
+    assert len(blocos) == 3
+    assert all(bloco.repeatRows == 1 for bloco in blocos)
+    assert [len(bloco._cellvalues) for bloco in blocos] == [251, 251, 101]
+
+
+def test_relatorio_mensal_grande_gera_varias_paginas():
+    destino = io.BytesIO()
+    PDFRenderer.renderizar_relatorio_mensal(_relatorio_mensal(2000), destino)
+
+    pdf = destino.getvalue()
+    assert pdf.startswith(b"%PDF")
+    assert pdf.count(b"/Type /Page\n") > 10
+
+
+def test_extrato_proprietario_e_enviado_em_blocos():
+    relatorio = {
+        "proprietario": {"id": 1, "nome": "Maria", "cpf_cnpj": "123.456.789-00", "tipo_pessoa": "fisica"},
+        "periodo": {"ano": 2025, "mes": None},
+        "resumo": {
+            "total_imoveis": 2,
+            "total_esperado": 3000.0,
+            "total_recebido": 1500.0,
+            "total_pendente": 1500.0,
+            "taxa_recebimento": 50.0,
+            "taxa_administracao": 300.0,
+            "transferencias_recebidas": 0.0,
+            "transferencias_enviadas": 100.0,
+            "liquido": 2600.0
+        },
+        "receitas_por_mes": [
+            {
+                "mes_referencia": f"2025-{m:02d}",
+                "total_esperado": 3000.0,
+                "total_recebido": 1500.0,
+                "total_pendente": 1500.0,
+                "taxa_administracao": 300.0,
+                "transferencias_recebidas": 0.0,
+                "transferencias_enviadas": 100.0,
+                "liquido": 2600.0
+            }
+            for m in range(1, 13)
+        ]
+    }
+
+    arquivo = asyncio.run(renderizar_em_spool(PDFRenderer.renderizar_extrato_proprietario, relatorio))
+    chunks = list(iterar_arquivo(arquivo, tamanho_chunk=1024))
+
+    assert len(chunks) > 1
+    assert b"".join(chunks).startswith(b"%PDF")
+    assert arquivo.closed
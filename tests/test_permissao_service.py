@@ -0,0 +1,119 @@
+"""
+Testes do escopo de permissão sobre os dados financeiros
+"""
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+
+from app.models.aluguel import AluguelMensal
+from app.models.imovel import Imovel
+from app.models.participacao import Participacao
+from app.models.permissao_financeira import PermissaoFinanceira
+from app.models.proprietario import Proprietario
+from app.models.usuario import Usuario
+from app.services.permissao_service import PermissaoService
+
+ADMIN = SimpleNamespace(id=1, nome="Admin", is_admin=True)
+MARIA = SimpleNamespace(id=2, nome="Maria", is_admin=False)
+
+
+@pytest.fixture
+def usuario_atual():
+    return MARIA
+
+
+@pytest.fixture
+def ambiente(api, banco, sessao, autenticar):
+    sessao.add_all([
+        Imovel(nome="Apto 101", endereco="Rua A, 1"),
+        Imovel(nome="Casa 2", endereco="Rua B, 2"),
+        Imovel(nome="Loja 3", endereco="Rua C, 3"),
+        Proprietario(nome="Maria", tipo_pessoa="fisica", email="Maria@Exemplo.com"),
+        Proprietario(nome="João", tipo_pessoa="fisica"),
+        Usuario(nome="Admin", email="admin@exemplo.com", hashed_password="x", is_admin=True),
+        Usuario(nome="Maria", email="maria@exemplo.com", hashed_password="x"),
+    ])
+    sessao.flush()
+    sessao.add_all([
+        Participacao(imovel_id=1, proprietario_id=1, percentual=100.0),
+        Participacao(imovel_id=2, proprietario_id=1, percentual=50.0),
+        Participacao(imovel_id=2, proprietario_id=2, percentual=50.0),
+        Participacao(imovel_id=3, proprietario_id=2, percentual=100.0),
+    ])
+    for imovel_id in (1, 2, 3):
+        sessao.add(AluguelMensal(imovel_id=imovel_id, mes_referencia="2025-10", valor_total=1000.0 * imovel_id, pago=True))
+    sessao.commit()
+
+    consultas = []
+    event.listen(
+        banco, "before_cursor_execute",
+        lambda conn, cursor, statement, *args: consultas.append(statement)
+    )
+    return api, sessao, consultas, autenticar
+
+
+def _conceder(db, tipo, ativa=True):
+    db.add(PermissaoFinanceira(usuario_id=MARIA.id, tipo_permissao=tipo, ativa=ativa))
+    db.commit()
+
+
+def test_escopo_por_vinculo_e_permissoes(ambiente):
+    _, db, _, _ = ambiente
+
+    escopo = PermissaoService.calcular(db, MARIA)
+    assert escopo.imoveis == {1, 2}
+    assert escopo.editaveis == {1, 2}
+    assert escopo.proprietarios == {1}
+    assert not PermissaoService.calcular(db, ADMIN).restrito
+
+    # Permissão inativa não tem efeito
+    _conceder(db, "visualizar_todos", ativa=False)
+    assert PermissaoService.calcular(db, MARIA).imoveis == {1, 2}
+
+    _conceder(db, "visualizar_todos")
+    escopo = PermissaoService.calcular(db, MARIA)
+    assert escopo.imoveis is None and escopo.proprietarios is None
+    assert escopo.pode_ver(3) and not escopo.pode_editar(3)
+
+    _conceder(db, "editar_todos")
+    assert PermissaoService.calcular(db, MARIA).pode_editar(3)
+
+
+def test_cache_invalidado_por_permissoes_e_participacoes(ambiente):
+    _, db, consultas, _ = ambiente
+    assert PermissaoService.escopo(db, MARIA).imoveis == {1, 2}
+
+    # Em cache: apenas a consulta das versões
+    consultas.clear()
+    assert PermissaoService.escopo(db, MARIA).imoveis == {1, 2}
+    assert len(consultas) == 1 and "versoes_dados" in consultas[0]
+
+    db.add(Participacao(imovel_id=3, proprietario_id=1, percentual=10.0))
+    db.commit()
+    assert PermissaoService.escopo(db, MARIA).imoveis == {1, 2, 3}
+
+    _conceder(db, "visualizar_todos")
+    assert PermissaoService.escopo(db, MARIA).imoveis is None
+
+
+def test_alugueis_e_relatorios_filtrados(ambiente):
+    client, db, _, autenticar = ambiente
+
+    assert sorted(a["imovel_id"] for a in client.get("/api/alugueis/").json()) == [1, 2]
+    assert client.get("/api/alugueis/3").status_code == 403
+    assert client.get("/api/alugueis/1").status_code == 200
+    assert client.get("/api/alugueis/stats/summary").json()["valor_total"] == 3000.0
+
+    anual = client.get("/api/relatorios/anual", params={"ano": 2025}).json()
+    assert anual["resumo"]["total_recebido"] == 3000.0
+    assert client.get("/api/relatorios/proprietario/2", params={"ano": 2025}).status_code == 403
+    assert client.get("/api/relatorios/exportar/excel/anual", params={"ano": 2025}).status_code == 403
+
+    # A permissão concedida vale na requisição seguinte (a listagem tem ETag por versão)
+    _conceder(db, "visualizar_todos")
+    assert sorted(a["imovel_id"] for a in client.get("/api/alugueis/").json()) == [1, 2, 3]
+    assert client.put("/api/alugueis/3", json={"pago": False}).status_code == 403
+
+    autenticar(ADMIN)
+    assert client.get("/api/relatorios/anual", params={"ano": 2025}).json()["resumo"]["total_recebido"] == 6000.0
@@ -0,0 +1,133 @@
+"""
+Testes do armazenamento de rate limiting e da blacklist de IPs
+"""
+import time
+
+import pytest
+from limits.storage import storage_from_string
+from sqlalchemy import create_engine
+
+from app.core.rate_limit_storage import (
+    MemoryRateLimitStorage,
+    DatabaseRateLimitStorage,
+    DatabaseLimitsStorage,
+    create_storage,
+)
+from app.core.rate_limiter import IPBlacklist
+
+
+@pytest.fixture
+def shared_engine(tmp_path):
+    """Engine SQLite em arquivo, compartilhável entre 'workers'"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'rate_limit.db'}",
+        connect_args={"check_same_thread": False}
+    )
+    yield engine
+    engine.dispose()
+
+
+def test_memory_storage_sliding_window():
+    storage = MemoryRateLimitStorage(background=False)
+
+    assert storage.hit("1.1.1.1", window=300, now=1000) == 1
+    assert storage.hit("1.1.1.1", window=300, now=1100) == 2
+    # Bucket anterior passa a pesar metade: 2 * 0.5 + 1
+    assert storage.hit("1.1.1.1", window=300, now=1350) == 2
+    assert storage.count("1.1.1.1", window=300, now=1350) == 2
+    assert storage.count("2.2.2.2", window=300, now=1350) == 0
+
+
+def test_memory_storage_sweep_removes_idle_keys():
+    storage = MemoryRateLimitStorage(background=False)
+    storage.hit("1.1.1.1", window=300, now=1000)
+    storage.block("1.1.1.1", until=1500)
+
+    assert storage.sweep(now=1200) == 0
+    assert storage.sweep(now=1600) == 2
+    assert storage.blocked_until("1.1.1.1") is None
+
+
+def test_memory_storage_evicts_least_recently_used_keys():
+    storage = MemoryRateLimitStorage(max_keys=2, background=False)
+    storage.hit("1.1.1.1", window=300, now=1000)
+    storage.hit("2.2.2.2", window=300, now=1001)
+    storage.hit("1.1.1.1", window=300, now=1002)
+    storage.hit("3.3.3.3", window=300, now=1003)
+
+    assert len(storage) == 2
+    assert storage.count("2.2.2.2", window=300, now=1004) == 0
+    assert storage.count("1.1.1.1", window=300, now=1004) == 2
+
+
+def test_memory_storage_burst_across_bucket_boundary():
+    storage = MemoryRateLimitStorage(background=False)
+
+    # Quatro falhas no fim de um bucket e uma logo após a fronteira
+    estimativas = [storage.hit("1.1.1.1", window=300, now=t) for t in (299.0, 299.1, 299.2, 299.3, 301)]
+    assert estimativas == [1, 2, 3, 4, 5]
+
+
+def test_memory_storage_never_evicts_active_blocks():
+    storage = MemoryRateLimitStorage(max_keys=2, background=False)
+    agora = time.time()
+    storage.block("1.1.1.1", until=agora - 1)
+    storage.block("2.2.2.2", until=agora + 900)
+    storage.block("3.3.3.3", until=agora + 900)
+    storage.block("4.4.4.4", until=agora + 900)
+
+    # O expirado abre espaço; os ativos permanecem mesmo acima do limite
+    assert storage.blocked_until("1.1.1.1") is None
+    assert all(storage.blocked_until(ip) is not None for ip in ("2.2.2.2", "3.3.3.3", "4.4.4.4"))
+
+
+def test_database_storage_is_shared_between_instances(shared_engine):
+    worker_a = DatabaseRateLimitStorage(shared_engine)
+    worker_b = DatabaseRateLimitStorage(shared_engine)
+
+    worker_a.hit("1.1.1.1", window=300, now=1000)
+    worker_b.hit("1.1.1.1", window=300, now=1001)
+    assert worker_a.count("1.1.1.1", window=300, now=1002) == 2
+
+    worker_a.block("1.1.1.1", until=2000)
+    assert worker_b.blocked_until("1.1.1.1") == 2000
+
+    worker_b.clear("1.1.1.1")
+    assert worker_a.count("1.1.1.1", window=300, now=1002) == 0
+    assert worker_a.blocked_until("1.1.1.1") is None
+
+
+def test_database_storage_fixed_window_counter(shared_engine):
+    storage = DatabaseRateLimitStorage(shared_engine)
+
+    assert storage.incr("login", expiry=60, now=1000) == 1
+    assert storage.incr("login", expiry=60, now=1010) == 2
+    # Janela expirada reinicia o contador
+    assert storage.incr("login", expiry=60, now=1070) == 1
+    assert storage.sweep(now=2000) == 1
+
+
+@pytest.mark.parametrize("uri", ["memory://", "database+sqlite://"])
+def test_ip_blacklist_blocks_after_max_attempts(uri):
+    blacklist = IPBlacklist(storage=create_storage(uri))
+
+    for _ in range(blacklist.MAX_ATTEMPTS - 1):
+        blacklist.record_failed_attempt("9.9.9.9", "/api/auth/login")
+    assert not blacklist.is_blocked("9.9.9.9")
+
+    blacklist.record_failed_attempt("9.9.9.9", "/api/auth/login")
+    assert blacklist.is_blocked("9.9.9.9")
+    assert blacklist.retry_after("9.9.9.9") > 0
+
+    blacklist.clear_attempts("9.9.9.9")
+    assert not blacklist.is_blocked("9.9.9.9")
+
+
+def test_limits_adapter_registered_for_database_scheme(tmp_path):
+    storage = storage_from_string(f"database+sqlite:///{tmp_path / 'limits.db'}")
+
+    assert isinstance(storage, DatabaseLimitsStorage)
+    assert storage.incr("chave", 60) == 1
+    assert storage.incr("chave", 60) == 2
+    assert storage.get("chave") == 2
+    assert storage.check()
@@ -0,0 +1,95 @@
+"""
+Testes do serviço de relatórios
+"""
+import pytest
+from sqlalchemy import event
+
+from app.models.aluguel import AluguelMensal
+from app.models.imovel import Imovel
+from app.models.proprietario import Proprietario
+from app.services.relatorio_service import RelatorioService
+
+
+@pytest.fixture
+def db(sessao):
+    imovel = Imovel(nome="Apto 101", endereco="Rua A, 1")
+    maria = Proprietario(nome="Maria", tipo_pessoa="fisica")
+    joao = Proprietario(nome="João", tipo_pessoa="fisica")
+    sessao.add_all([imovel, maria, joao])
+    sessao.flush()
+
+    sessao.add_all([
+        AluguelMensal(imovel_id=imovel.id, proprietario_id=maria.id, mes_referencia="2025-10",
+                      valor_proprietario=900.10, taxa_administracao=100.2, valor_total=1000.30, pago=True),
+        AluguelMensal(imovel_id=imovel.id, proprietario_id=joao.id, mes_referencia="2025-10",
+                      valor_total=0.1, pago=False),
+        AluguelMensal(imovel_id=imovel.id, proprietario_id=joao.id, mes_referencia="2025-10",
+                      valor_total=0.2, pago=False),
+        AluguelMensal(imovel_id=imovel.id, proprietario_id=maria.id, mes_referencia="2025-11",
+                      valor_total=5000.0, pago=False),
+    ])
+    sessao.commit()
+    return sessao
+
+
+def test_relatorio_mensal_soma_em_centavos(db):
+    relatorio = RelatorioService.gerar_relatorio_mensal(db, 2025, 10)
+
+    assert relatorio["resumo"] == {
+        "total_alugueis": 3,
+        "alugueis_pagos": 1,
+        "alugueis_pendentes": 2,
+        "total_esperado": 1000.6,
+        "total_recebido": 1000.3,
+        "total_pendente": 0.3,
+        "taxa_recebimento": pytest.approx(99.97, abs=0.01)
+    }
+    assert relatorio["detalhamento"][0]["valores"] == {
+        "proprietario": 900.1,
+        "taxa_administracao": 100.2,
+        "total": 1000.3
+    }
+
+
+def test_relatorio_mensal_filtra_proprietario(db):
+    joao = db.query(Proprietario).filter(Proprietario.nome == "João").one()
+    relatorio = RelatorioService.gerar_relatorio_mensal(db, 2025, 10, proprietario_id=joao.id)
+
+    assert relatorio["resumo"]["total_alugueis"] == 2
+    assert relatorio["resumo"]["total_esperado"] == 0.3
+    assert {item["proprietario_id"] for item in relatorio["detalhamento"]} == {joao.id}
+
+
+def test_dashboard_em_uma_consulta(db):
+    imoveis = [Imovel(nome=f"Casa {i}", endereco=f"Rua C, {i}") for i in range(7)]
+    db.add_all(imoveis)
+    db.flush()
+    db.add_all([
+        AluguelMensal(imovel_id=imovel.id, mes_referencia="2025-11", valor_total=100.0 * (i + 1), pago=i % 2 == 0)
+        for i, imovel in enumerate(imoveis)
+    ])
+    db.add(AluguelMensal(imovel_id=imoveis[0].id, mes_referencia="2024-12", valor_total=999.0, pago=True))
+    db.commit()
+
+    consultas = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: consultas.append(args[2]))
+    dashboard = RelatorioService.gerar_dashboard(db, 2025, 11)
+    assert len(consultas) == 1
+
+    assert dashboard["mes_atual"]["resumo"]["total_alugueis"] == 8
+    assert dashboard["mes_atual"]["resumo"]["total_esperado"] == 5000.0 + 2800.0
+    assert dashboard["comparacao_mensal"]["mes_anterior"]["total_recebido"] == 1000.3
+    assert dashboard["anual"]["resumo"]["total_esperado"] == 1000.6 + 7800.0
+
+    top = dashboard["top_imoveis"]
+    assert [item["valores"]["total"] for item in top] == [5000.0, 700.0, 600.0, 500.0, 400.0]
+    assert top[1]["status_pagamento"] == "pago"
+    assert top[2]["status_pagamento"] == "pendente"
+
+
+def test_relatorio_anual_soma_valor_total(db):
+    relatorio = RelatorioService.gerar_relatorio_anual(db, 2025)
+
+    assert relatorio["resumo"]["total_esperado"] == 6000.6
+    assert relatorio["resumo"]["total_recebido"] == 1000.3
+    assert relatorio["receitas_mensais"][9]["total_alugueis"] == 3
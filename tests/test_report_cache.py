@@ -0,0 +1,114 @@
+"""
+Testes do versionamento de dados e do cache de relatórios exportados
+"""
+import io
+
+import pytest
+from openpyxl import load_workbook
+from sqlalchemy import event
+
+from app.core.data_version import incrementar_versoes, obter_versoes
+from app.models.aluguel import AluguelMensal
+from app.models.imovel import Imovel
+from app.services.report_cache import relatorio_cache
+
+ESCOPO_OUTUBRO = "alugueis_mensais:2025-10"
+ESCOPO_NOVEMBRO = "alugueis_mensais:2025-11"
+
+
+@pytest.fixture
+def db(sessao):
+    imovel = Imovel(nome="Apto 101", endereco="Rua A, 1")
+    sessao.add(imovel)
+    sessao.flush()
+    sessao.add(AluguelMensal(imovel_id=imovel.id, mes_referencia="2025-10", valor_total=1000.0, pago=True))
+    sessao.commit()
+    return sessao
+
+
+@pytest.fixture
+def client(api, db, tmp_path, monkeypatch):
+    monkeypatch.setattr(relatorio_cache, "diretorio", tmp_path / "relatorios")
+    return api
+
+
+def test_alteracoes_incrementam_versao_do_mes(db):
+    inicial = obter_versoes(db, [ESCOPO_OUTUBRO, ESCOPO_NOVEMBRO])
+    assert inicial[ESCOPO_OUTUBRO] == 1
+    assert inicial[ESCOPO_NOVEMBRO] == 0
+
+    aluguel = db.query(AluguelMensal).first()
+    aluguel.mes_referencia = "2025-11"
+    db.commit()
+
+    # Mover de mês invalida o mês antigo e o novo
+    versoes = obter_versoes(db, [ESCOPO_OUTUBRO, ESCOPO_NOVEMBRO, "alugueis_mensais"])
+    assert versoes == {ESCOPO_OUTUBRO: 2, ESCOPO_NOVEMBRO: 1, "alugueis_mensais": 2}
+
+    db.query(AluguelMensal).update({AluguelMensal.pago: False})
+    db.commit()
+    assert obter_versoes(db, [ESCOPO_NOVEMBRO])[ESCOPO_NOVEMBRO] == 2
+
+
+def test_incremento_cria_e_atualiza_em_um_unico_upsert(db):
+    consultas = []
+    event.listen(
+        db.get_bind(), "before_cursor_execute",
+        lambda conn, cursor, statement, *args: consultas.append(statement)
+    )
+
+    # Escopo existente e escopo novo no mesmo comando, sem SELECT prévio
+    # (dois workers criando o mesmo escopo não colidem na chave primária)
+    incrementar_versoes(db.connection(), [ESCOPO_OUTUBRO, ESCOPO_NOVEMBRO, ESCOPO_NOVEMBRO])
+    assert len(consultas) == 1 and "ON CONFLICT" in consultas[0]
+    db.commit()
+    assert obter_versoes(db, [ESCOPO_OUTUBRO, ESCOPO_NOVEMBRO]) == {ESCOPO_OUTUBRO: 2, ESCOPO_NOVEMBRO: 1}
+
+
+def test_exportacao_de_mes_fechado_usa_cache_e_etag(client, db):
+    url = "/api/relatorios/exportar/excel/mensal?ano=2025&mes=10"
+
+    resposta = client.get(url)
+    assert resposta.status_code == 200
+    etag = resposta.headers["etag"]
+    arquivos = list(relatorio_cache.diretorio.glob("excel_mensal_2025-10_todos_*.xlsx"))
+    assert len(arquivos) == 1
+
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    aluguel = db.query(AluguelMensal).first()
+    aluguel.valor_total = 1200.0
+    db.commit()
+
+    resposta = client.get(url, headers={"If-None-Match": etag})
+    assert resposta.status_code == 200
+    assert resposta.headers["etag"] != etag
+    # A versão anterior do arquivo é removida
+    assert list(relatorio_cache.diretorio.glob("excel_mensal_2025-10_todos_*.xlsx")) != arquivos
+    assert len(list(relatorio_cache.diretorio.glob("excel_mensal_2025-10_todos_*.xlsx"))) == 1
+
+
+def test_renomear_imovel_invalida_o_arquivo_em_cache(client, db):
+    url = "/api/relatorios/exportar/excel/mensal?ano=2025&mes=10"
+    etag = client.get(url).headers["etag"]
+
+    db.query(Imovel).first().nome = "Apto 101 - Bloco B"
+    db.commit()
+
+    resposta = client.get(url, headers={"If-None-Match": etag})
+    assert resposta.status_code == 200
+    assert resposta.headers["etag"] != etag
+    planilha = load_workbook(io.BytesIO(resposta.content))
+    valores = [c.value for aba in planilha.worksheets for linha in aba.iter_rows() for c in linha]
+    assert "Apto 101 - Bloco B" in valores
+
+
+def test_mes_aberto_nao_e_gravado_em_disco(client, db):
+    aluguel = db.query(AluguelMensal).first()
+    aluguel.pago = False
+    db.commit()
+
+    resposta = client.get("/api/relatorios/exportar/excel/mensal?ano=2025&mes=10")
+    assert resposta.status_code == 200
+    assert "etag" in resposta.headers
+    assert not relatorio_cache.diretorio.exists()
@@ -0,0 +1,73 @@
+"""
+Testes da serialização JSON com orjson e das listagens sem model_validate
+"""
+from datetime import date, datetime
+from decimal import Decimal
+import numpy as np
+import orjson
+import pytest
+
+from app.core.responses import RespostaJSON
+from app.models.imovel import Imovel
+from app.models.participacao import Participacao
+from app.models.proprietario import Proprietario
+from app.models.usuario import Usuario
+from app.routes.proprietarios import ProprietarioResponse
+from app.schemas.schemas import ImovelResponse, UsuarioResponse
+
+
+@pytest.fixture
+def client(api, sessao):
+    apto = Imovel(nome="Apto 101", endereco="Rua A, 1", valor_aluguel=1500.0)
+    casa = Imovel(nome="Casa 2", endereco="Rua B, 2")
+    maria = Proprietario(nome="Maria", tipo_pessoa="fisica", cpf="111.111.111-11")
+    joao = Proprietario(nome="João", tipo_pessoa="fisica")
+    sessao.add_all([apto, casa, maria, joao])
+    sessao.flush()
+    sessao.add_all([
+        Participacao(imovel_id=apto.id, proprietario_id=maria.id, percentual=50.0),
+        Participacao(imovel_id=casa.id, proprietario_id=maria.id, percentual=100.0),
+        Participacao(imovel_id=apto.id, proprietario_id=joao.id, percentual=50.0),
+        Usuario(nome="Admin", email="admin@exemplo.com", hashed_password="segredo", is_admin=True),
+    ])
+    sessao.commit()
+    return api
+
+
+def test_resposta_json_serializa_tipos_comuns():
+    conteudo = {
+        "valor": Decimal("10.50"),
+        "data": date(2025, 10, 1),
+        "momento": datetime(2025, 10, 1, 12, 30),
+        "matriz": np.array([[1.5, 2.0]]),
+        1: "chave inteira"
+    }
+    assert orjson.loads(RespostaJSON(conteudo).body) == {
+        "valor": 10.5,
+        "data": "2025-10-01",
+        "momento": "2025-10-01T12:30:00",
+        "matriz": [[1.5, 2.0]],
+        "1": "chave inteira"
+    }
+
+
+def test_listagens_seguem_o_schema(client):
+    proprietarios = client.get("/api/proprietarios/").json()
+    assert [p["nome"] for p in proprietarios] == ["João", "Maria"]
+    assert [p["total_imoveis"] for p in proprietarios] == [1, 2]
+    assert set(proprietarios[0]) == set(ProprietarioResponse.model_fields)
+    ProprietarioResponse.model_validate(proprietarios[1])
+
+    imoveis = client.get("/api/imoveis/").json()
+    assert set(imoveis[0]) == set(ImovelResponse.model_fields)
+    ImovelResponse.model_validate(imoveis[0])
+
+    usuarios = client.get("/api/usuarios/").json()
+    assert set(usuarios[0]) == set(UsuarioResponse.model_fields)
+    assert "hashed_password" not in usuarios[0]
+
+
+def test_erros_http_usam_a_resposta_padrao(client):
+    resposta = client.get("/api/proprietarios/9999")
+    assert resposta.status_code == 404
+    assert resposta.json() == {"detail": "Proprietário não encontrado"}
@@ -0,0 +1,121 @@
+"""
+Testes do livro-razão mensal de transferências
+"""
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+
+from app.models.saldo_transferencia import SaldoTransferencia
+from app.models.usuario import Usuario
+from app.services.saldo_transferencia_service import SaldoTransferenciaService
+
+
+@pytest.fixture
+def ambiente(api, sessao):
+    sessao.add_all([
+        Usuario(nome="Maria", email="maria@exemplo.com", hashed_password="x"),
+        Usuario(nome="João", email="joao@exemplo.com", hashed_password="x"),
+    ])
+    sessao.commit()
+    return api, sessao
+
+
+def _livro(db):
+    return [
+        (s.usuario_id, s.mes_referencia, s.saldo_inicial, s.entradas, s.saidas, s.saldo_final)
+        for s in db.execute(
+            select(SaldoTransferencia).order_by(SaldoTransferencia.usuario_id, SaldoTransferencia.mes_referencia)
+        ).scalars()
+    ]
+
+
+def _criar(client, **dados):
+    resposta = client.post("/api/transferencias", json={"origem_id": 1, "destino_id": 2, **dados})
+    assert resposta.status_code == 200
+    return resposta.json()["id"]
+
+
+def test_livro_acompanha_criacao_alteracao_confirmacao_e_exclusao(ambiente):
+    client, db = ambiente
+    _criar(client, mes_referencia="2025-09", valor=100.0, confirmada=True)
+    _criar(client, mes_referencia="2025-11", valor=50.0, confirmada=True)
+    # Mês intermediário: desloca o saldo de novembro
+    intermediaria = _criar(client, mes_referencia="2025-10", valor=30.0, confirmada=True)
+    pendente = _criar(client, mes_referencia="2025-10", valor=999.0)
+
+    assert _livro(db) == [
+        (1, "2025-09", 0.0, 0.0, 100.0, -100.0),
+        (1, "2025-10", -100.0, 0.0, 30.0, -130.0),
+        (1, "2025-11", -130.0, 0.0, 50.0, -180.0),
+        (2, "2025-09", 0.0, 100.0, 0.0, 100.0),
+        (2, "2025-10", 100.0, 30.0, 0.0, 130.0),
+        (2, "2025-11", 130.0, 50.0, 0.0, 180.0),
+    ]
+
+    # Inverte a direção e muda o valor
+    assert client.put(f"/api/transferencias/{intermediaria}", json={
+        "origem_id": 2, "destino_id": 1, "valor": 10.0
+    }).status_code == 200
+    assert client.post(f"/api/transferencias/{pendente}/confirmar").status_code == 200
+    assert client.delete("/api/transferencias/1").status_code == 200
+
+    assert _livro(db) == [
+        (1, "2025-09", 0.0, 0.0, 0.0, 0.0),
+        (1, "2025-10", 0.0, 10.0, 999.0, -989.0),
+        (1, "2025-11", -989.0, 0.0, 50.0, -1039.0),
+        (2, "2025-09", 0.0, 0.0, 0.0, 0.0),
+        (2, "2025-10", 0.0, 999.0, 10.0, 989.0),
+        (2, "2025-11", 989.0, 50.0, 0.0, 1039.0),
+    ]
+
+    incremental = _livro(db)
+    SaldoTransferenciaService.reconstruir(db)
+    db.commit()
+    assert [linha for linha in _livro(db) if linha[1] != "2025-09"] == incremental[1:3] + incremental[4:]
+
+
+def test_consulta_de_saldo(ambiente):
+    client, _ = ambiente
+    _criar(client, mes_referencia="2025-09", valor=100.0, confirmada=True)
+    _criar(client, mes_referencia="2025-11", valor=50.0, confirmada=True)
+
+    assert client.get("/api/transferencias/saldos/2", params={"mes_referencia": "2025-11"}).json() == {
+        "usuario_id": 2, "mes_referencia": "2025-11",
+        "saldo_inicial": 100.0, "entradas": 50.0, "saidas": 0.0, "saldo_final": 150.0
+    }
+    # Mês sem movimento: saldo do último mês anterior
+    assert client.get("/api/transferencias/saldos/2", params={"mes_referencia": "2025-10"}).json()["saldo_final"] == 100.0
+    assert client.get("/api/transferencias/saldos/2", params={"mes_referencia": "2025-01"}).json()["saldo_final"] == 0.0
+
+    historico = client.get("/api/transferencias/saldos/1").json()
+    assert [m["mes_referencia"] for m in historico["meses"]] == ["2025-09", "2025-11"]
+    assert historico["saldo_atual"] == -150.0
+
+
+def test_saldo_apenas_do_proprio_usuario(ambiente, autenticar):
+    client, _ = ambiente
+    _criar(client, mes_referencia="2025-09", valor=100.0, confirmada=True)
+
+    autenticar(SimpleNamespace(id=1, nome="Maria", is_admin=False))
+    assert client.get("/api/transferencias/saldos/1").json()["saldo_atual"] == -100.0
+    assert client.get("/api/transferencias/saldos/2").status_code == 403
+    assert client.get("/api/transferencias/saldos/2", params={"mes_referencia": "2025-09"}).status_code == 403
+
+
+def test_estatisticas_agregadas_no_banco(ambiente):
+    client, _ = ambiente
+    _criar(client, mes_referencia="2025-10", valor=100.0, confirmada=True)
+    _criar(client, mes_referencia="2025-10", valor=40.0)
+    _criar(client, mes_referencia="2025-11", valor=7.0)
+
+    assert client.get("/api/transferencias/estatisticas/resumo", params={"mes_referencia": "2025-10"}).json() == {
+        "total_transferencias": 2,
+        "total_confirmadas": 1,
+        "total_pendentes": 1,
+        "valor_total": 140.0,
+        "valor_confirmado": 100.0,
+        "valor_pendente": 40.0
+    }
+    vazio = client.get("/api/transferencias/estatisticas/resumo", params={"mes_referencia": "2024-01"}).json()
+    assert vazio["total_transferencias"] == 0 and vazio["valor_total"] == 0.0
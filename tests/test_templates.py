@@ -0,0 +1,60 @@
+"""
+Testes do ambiente Jinja2 compartilhado e das cascas HTML pré-renderizadas
+"""
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.core.auth import get_current_user_from_cookie
+from app.core import templates as modulo_templates
+from app.routes import import_routes, transferencias
+
+
+def test_rotas_usam_o_ambiente_compartilhado():
+    assert not hasattr(transferencias, "templates")
+    assert not hasattr(import_routes, "templates")
+    ambiente = modulo_templates.templates.env
+    assert ambiente.bytecode_cache is not None
+    assert ambiente.auto_reload is False
+
+
+def test_precompilar_templates():
+    assert modulo_templates.precompilar_templates() >= len(["login.html", "base.html", "navbar.html"])
+    assert modulo_templates.templates.env.cache is not None
+    assert len(modulo_templates.templates.env.cache) >= 3
+
+
+def test_casca_renderizada_uma_vez(monkeypatch):
+    renderizacoes = []
+    original = modulo_templates.templates.get_template
+
+    def contar(nome):
+        renderizacoes.append(nome)
+        return original(nome)
+
+    monkeypatch.setattr(modulo_templates, "_paginas", {})
+    monkeypatch.setattr(modulo_templates.templates, "get_template", contar)
+
+    client = TestClient(app)
+    primeira = client.get("/login")
+    segunda = client.get("/login")
+    assert primeira.status_code == segunda.status_code == 200
+    assert primeira.headers["content-type"].startswith("text/html")
+    assert "<title>Login - AlugueisV5</title>" in primeira.text
+    assert primeira.content == segunda.content
+    assert renderizacoes == ["login.html"]
+
+
+def test_paginas_autenticadas_continuam_exigindo_usuario():
+    client = TestClient(app)
+    assert client.get("/dashboard", headers={"Accept": "text/html"}, follow_redirects=False).status_code == 303
+
+    app.dependency_overrides[get_current_user_from_cookie] = lambda: SimpleNamespace(id=2, is_admin=False)
+    try:
+        resposta = client.get("/transferencias")
+        assert resposta.status_code == 200
+        assert "<html" in resposta.text.lower()
+        assert client.get("/usuarios", follow_redirects=False).status_code == 303
+    finally:
+        app.dependency_overrides.clear()
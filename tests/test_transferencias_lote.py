@@ -0,0 +1,122 @@
+"""
+Testes da criação de transferências em lote e da importação matricial
+"""
+from pathlib import Path
+import pytest
+from sqlalchemy import event, func, select
+
+from app.models.transferencia import Transferencia
+from app.models.usuario import Usuario
+from app.services.import_service import ImportacaoService
+from app.services.saldo_transferencia_service import SaldoTransferenciaService
+
+PLANILHA = Path(__file__).resolve().parent.parent / "excel" / "Transferencias.xlsx"
+
+
+@pytest.fixture
+def ambiente(api, banco, sessao):
+    sessao.add_all([
+        Usuario(nome=nome, email=f"{nome.lower()}@exemplo.com", hashed_password="x")
+        for nome in ("Jandira", "Manoel", "Fabio", "Carla")
+    ])
+    sessao.commit()
+
+    consultas = []
+    event.listen(
+        banco, "before_cursor_execute",
+        lambda conn, cursor, statement, *args: consultas.append(statement)
+    )
+    return api, sessao, consultas
+
+
+def test_lote_json_com_relatorio_por_linha(ambiente):
+    client, db, consultas = ambiente
+    transferencias = [
+        {"origem_id": 1 + i % 4, "destino_id": 1 + (i + 1) % 4, "mes_referencia": "2025-10", "valor": 10.0 + i}
+        for i in range(2500)
+    ]
+    transferencias[3] = {"origem_id": 1, "destino_id": 1, "mes_referencia": "2025-10", "valor": 5.0}
+    transferencias[7]["destino_id"] = 99
+    transferencias[9]["mes_referencia"] = "2025-13"
+    transferencias[11]["valor"] = -1
+    transferencias.append({"origem_id": 1, "destino_id": 2, "mes_referencia": "2025-10", "valor": 100.0, "confirmada": True})
+
+    consultas.clear()
+    resposta = client.post("/api/transferencias/lote", json={"transferencias": transferencias})
+    assert resposta.status_code == 200
+    dados = resposta.json()
+    assert dados["total"] == 2501
+    assert dados["criadas"] == 2497
+    assert dados["erros"] == [
+        {"linha": 4, "erro": "Origem e destino não podem ser iguais"},
+        {"linha": 8, "erro": "Usuário de destino não encontrado"},
+        {"linha": 10, "erro": "Mês de referência inválido (use AAAA-MM)"},
+        {"linha": 12, "erro": "Valor deve ser maior que zero"},
+    ]
+
+    # Uma consulta de usuários e um INSERT por lote de 1000 (pendentes e confirmadas à parte)
+    assert sum(1 for c in consultas if "FROM usuarios" in c) == 1
+    assert sum(1 for c in consultas if c.startswith("INSERT INTO transferencias")) == 4
+    assert db.execute(select(func.count(Transferencia.id))).scalar_one() == 2497
+
+    # Só a confirmada entra no livro-razão
+    assert SaldoTransferenciaService.saldo(db, 2, "2025-10")["saldo_final"] == 100.0
+
+    assert client.post("/api/transferencias/lote", json={"transferencias": []}).status_code == 400
+
+
+def test_mes_referencia_da_aba():
+    assert ImportacaoService.mes_referencia_da_aba("Set25") == "2025-09"
+    assert ImportacaoService.mes_referencia_da_aba("dez/2024") == "2024-12"
+    assert ImportacaoService.mes_referencia_da_aba("2025-01") == "2025-01"
+    assert ImportacaoService.mes_referencia_da_aba("Resumo") is None
+
+
+def test_importacao_matricial(ambiente):
+    client, db, _ = ambiente
+    with open(PLANILHA, "rb") as arquivo:
+        resposta = client.post("/api/importacao/transferencias", files={"file": ("Transferencias.xlsx", arquivo.read())})
+    assert resposta.status_code == 200
+    dados = resposta.json()
+    assert dados["importados"] > 0
+    assert dados["erros"] == []
+    assert {aba["nome"]: aba["mes_referencia"] for aba in dados["sheets_processadas"]} == {
+        "Set25": "2025-09", "Out25": "2025-10", "Ago25": "2025-08"
+    }
+
+    # Lançamento "Guga" de setembro: Fabio paga 1000 a Jandira
+    guga = db.execute(
+        select(Transferencia.origem_id, Transferencia.destino_id, Transferencia.valor, Transferencia.confirmada)
+        .where(Transferencia.mes_referencia == "2025-09", Transferencia.descricao == "Guga")
+    ).all()
+    assert guga == [(3, 1, 1000.0, True)]
+
+    # Lançamentos com vigência só em setembro não entram em outubro
+    assert db.execute(
+        select(func.count(Transferencia.id))
+        .where(Transferencia.mes_referencia == "2025-10", Transferencia.descricao == "Santos")
+    ).scalar_one() == 0
+
+    # Reimportar não duplica
+    total = db.execute(select(func.count(Transferencia.id))).scalar_one()
+    with open(PLANILHA, "rb") as arquivo:
+        resposta = client.post("/api/importacao/transferencias", files={"file": ("Transferencias.xlsx", arquivo.read())})
+    assert resposta.json()["importados"] == 0
+    assert db.execute(select(func.count(Transferencia.id))).scalar_one() == total
+
+
+def test_lote_grande_recalcula_livro_dos_usuarios_afetados(ambiente):
+    client, db, _ = ambiente
+    client.post("/api/transferencias", json={
+        "origem_id": 1, "destino_id": 2, "mes_referencia": "2025-06", "valor": 40.0, "confirmada": True
+    })
+    transferencias = [
+        {"origem_id": 1 + i % 4, "destino_id": 1 + (i + 2) % 4, "mes_referencia": f"2025-{1 + i % 12:02d}",
+         "valor": 1.0 + i, "confirmada": True}
+        for i in range(60)
+    ]
+    assert client.post("/api/transferencias/lote", json={"transferencias": transferencias}).json()["criadas"] == 60
+
+    incremental = [SaldoTransferenciaService.historico(db, u) for u in range(1, 5)]
+    SaldoTransferenciaService.reconstruir(db)
+    assert [SaldoTransferenciaService.historico(db, u) for u in range(1, 5)] == incremental